@@ -0,0 +1,7 @@
+"""
+Benchmarks for ebook-mcp
+
+Generates a synthetic EPUB/PDF corpus (corpus.py) and times the public
+functions of epub_helper and pdf_helper and every MCP tool end to end
+(runner.py). Run with `python -m ebook_mcp.benchmarks --help`.
+"""
@@ -0,0 +1,4 @@
+import sys
+from .runner import main
+
+sys.exit(main())
@@ -0,0 +1,362 @@
+import os
+import random
+import struct
+import uuid
+import zipfile
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ..tools.lazy_import import LazyModule
+
+fitz = LazyModule('pymupdf')
+
+# Fixed zip timestamp, so the same spec always gives the same bytes
+ZIP_DATE_TIME = (2020, 1, 1, 0, 0, 0)
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which but "
+    "have an they you were her she there been one all we their has would when if so no will more "
+    "storage index page chapter reader library system record log query buffer stream section "
+    "mountain river letter garden morning evening window harbor journey promise silence history "
+    "careful quiet ancient modern simple heavy bright narrow distant gentle sudden ordinary"
+).split()
+
+# Common Hanzi, enough for realistic CJK tokenization and UTF-8 sizes
+CJK_CHARS = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面"
+    "而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把"
+    "性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质"
+    "情绪勒索书页章节读者图馆记录查询缓冲"
+)
+CJK_PUNCTUATION = "，，，、。"
+
+# PyMuPDF base-14 fonts used for the PDF font mix; "china-s" is added for CJK
+PDF_FONTS = ("helv", "tiro", "cour")
+PDF_CJK_FONT = "china-s"
+
+_EPUB_CONTAINER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+    '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+    '</rootfiles></container>'
+)
+
+# Named corpora: book name -> generator keyword arguments
+CORPORA: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "small": {
+        "novel": {"format": "epub", "chapters": 6, "depth": 2, "anchors": 3, "images": 1},
+        "cjk": {"format": "epub", "chapters": 4, "depth": 2, "anchors": 2, "cjk": 1.0},
+        "report": {"format": "pdf", "pages": 12, "outline_depth": 2},
+        "cjk-report": {"format": "pdf", "pages": 6, "outline_depth": 1, "cjk": 1.0},
+    },
+    "default": {
+        "novel": {"format": "epub", "chapters": 40, "depth": 2, "anchors": 4, "images": 4},
+        "reference": {"format": "epub", "chapters": 20, "depth": 4, "anchors": 24, "images": 8},
+        "cjk": {"format": "epub", "chapters": 30, "depth": 3, "anchors": 6, "images": 2, "cjk": 0.9},
+        "report": {"format": "pdf", "pages": 200, "outline_depth": 3},
+        "cjk-report": {"format": "pdf", "pages": 80, "outline_depth": 2, "cjk": 0.8},
+    },
+    "large": {
+        "novel": {"format": "epub", "chapters": 120, "depth": 2, "anchors": 6, "images": 16, "paragraphs": 8},
+        "reference": {"format": "epub", "chapters": 60, "depth": 5, "anchors": 60, "images": 32},
+        "cjk": {"format": "epub", "chapters": 100, "depth": 3, "anchors": 8, "images": 8, "cjk": 0.9},
+        "report": {"format": "pdf", "pages": 1000, "outline_depth": 4},
+        "cjk-report": {"format": "pdf", "pages": 400, "outline_depth": 3, "cjk": 0.8},
+    },
+}
+
+
+class TextGenerator:
+    """Deterministic filler text in English and CJK"""
+
+    def __init__(self, seed: int, cjk: float = 0.0):
+        self.random = random.Random(seed)
+        self.cjk = cjk
+
+    def is_cjk(self) -> bool:
+        return self.cjk > 0 and self.random.random() < self.cjk
+
+    def words(self, count: int, cjk: Optional[bool] = None) -> str:
+        if cjk if cjk is not None else self.is_cjk():
+            chars = []
+            for n in range(count * 2):
+                chars.append(self.random.choice(CJK_CHARS))
+                if n % 12 == 11:
+                    chars.append(self.random.choice(CJK_PUNCTUATION))
+            return "".join(chars)
+        return " ".join(self.random.choice(WORDS) for _ in range(count))
+
+    def title(self) -> str:
+        return self.words(self.random.randint(2, 5)).capitalize()
+
+    def sentence(self) -> str:
+        text = self.words(self.random.randint(8, 20))
+        return text if not text.isascii() else text.capitalize() + "."
+
+
+def png_image(width: int, height: int, seed: int) -> bytes:
+    """Make a deterministic grayscale PNG of width x height pixels"""
+    rng = random.Random(seed)
+    rows = b"".join(
+        b"\x00" + bytes((x * 255 // max(1, width - 1) + rng.randrange(32)) & 0xFF for x in range(width))
+        for _ in range(height)
+    )
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 6)) + chunk(b"IEND", b"")
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _nested_toc(entries: List[Tuple[int, str, str]]) -> List[Tuple[str, str, list]]:
+    """Turn (level, title, href) entries into a (title, href, children) tree"""
+    root: List[Tuple[str, str, list]] = []
+    stack = [(0, root)]
+    for level, title, href in entries:
+        while stack[-1][0] >= level:
+            stack.pop()
+        node = (title, href, [])
+        stack[-1][1].append(node)
+        stack.append((level, node[2]))
+    return root
+
+
+def _nav_list(nodes: List[Tuple[str, str, list]]) -> str:
+    items = "".join(
+        f'<li><a href="{_escape(href)}">{_escape(title)}</a>{_nav_list(children) if children else ""}</li>'
+        for title, href, children in nodes
+    )
+    return f"<ol>{items}</ol>"
+
+
+def _ncx_points(nodes: List[Tuple[str, str, list]], counter: List[int]) -> str:
+    points = []
+    for title, href, children in nodes:
+        counter[0] += 1
+        points.append(
+            f'<navPoint id="np{counter[0]}" playOrder="{counter[0]}">'
+            f'<navLabel><text>{_escape(title)}</text></navLabel><content src="{_escape(href)}"/>'
+            f'{_ncx_points(children, counter)}</navPoint>'
+        )
+    return "".join(points)
+
+
+def write_epub(path: str, chapters: int = 20, depth: int = 2, anchors: int = 4, images: int = 0,
+               cjk: float = 0.0, paragraphs: int = 4, image_size: int = 128, seed: int = 0,
+               title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a synthetic EPUB 3 book with a nav document and an NCX
+
+    Args:
+        path: Output file
+        chapters: Number of chapter files
+        depth: TOC nesting depth; sections nest down to heading level depth
+        anchors: Sections per chapter, each a TOC entry pointing at a heading id
+        images: PNG images, spread over the chapters
+        cjk: Fraction of titles and paragraphs written in Chinese (0.0-1.0)
+        paragraphs: Paragraphs per section
+        image_size: Width and height of each image in pixels
+        seed: Seed of the text and image generator
+
+    Returns:
+        Dict[str, Any]: path, size and the TOC hrefs of the book
+    """
+    text = TextGenerator(seed, cjk)
+    book_title = title or text.title()
+    language = "zh" if cjk >= 0.5 else "en"
+    book_id = uuid.uuid5(uuid.NAMESPACE_URL, f"ebook-mcp-benchmark:{book_title}:{seed}")
+    toc_entries: List[Tuple[int, str, str]] = []
+    files: List[Tuple[str, bytes]] = []
+    image_names = [f"images/figure{n:03d}.png" for n in range(images)]
+
+    for n in range(1, chapters + 1):
+        name = f"text/chapter{n:03d}.xhtml"
+        chapter_title = text.title()
+        toc_entries.append((1, chapter_title, name))
+        body = [f'<section><h1 id="c{n}">{_escape(chapter_title)}</h1>']
+        for p in range(paragraphs):
+            body.append(_paragraph(text, p))
+        for image in image_names[n - 1::chapters]:
+            body.append(f'<figure><img src="../{image}" alt="{_escape(text.title())}"/>'
+                        f'<figcaption>{_escape(text.sentence())}</figcaption></figure>')
+        for s in range(1, anchors + 1):
+            level = 2 + (s - 1) % max(1, depth - 1) if depth > 1 else 2
+            anchor = f"c{n}s{s}"
+            section_title = text.title()
+            if depth > 1:
+                toc_entries.append((level, section_title, f"{name}#{anchor}"))
+            body.append(f'<h{min(level, 6)} id="{anchor}">{_escape(section_title)}</h{min(level, 6)}>')
+            for p in range(paragraphs):
+                body.append(_paragraph(text, p))
+        body.append("</section>")
+        files.append((f"OEBPS/{name}", _xhtml(chapter_title, language, "".join(body)).encode("utf-8")))
+
+    toc = _nested_toc(toc_entries)
+    files.append(("OEBPS/nav.xhtml", _xhtml("Contents", language, (
+        f'<nav epub:type="toc" id="toc"><h1>Contents</h1>{_nav_list(toc)}</nav>'
+    )).encode("utf-8")))
+    files.append(("OEBPS/toc.ncx", (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">'
+        f'<head><meta name="dtb:uid" content="urn:uuid:{book_id}"/></head>'
+        f'<docTitle><text>{_escape(book_title)}</text></docTitle>'
+        f'<navMap>{_ncx_points(toc, [0])}</navMap></ncx>'
+    ).encode("utf-8")))
+    for n, image in enumerate(image_names):
+        files.append((f"OEBPS/{image}", png_image(image_size, image_size, seed * 1000 + n)))
+
+    manifest = ['<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
+                '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>']
+    spine = []
+    for n in range(1, chapters + 1):
+        manifest.append(f'<item id="chapter{n}" href="text/chapter{n:03d}.xhtml" media-type="application/xhtml+xml"/>')
+        spine.append(f'<itemref idref="chapter{n}"/>')
+    for n, image in enumerate(image_names):
+        properties = ' properties="cover-image"' if n == 0 else ''
+        manifest.append(f'<item id="figure{n}" href="{image}" media-type="image/png"{properties}/>')
+    subjects = "".join(f"<dc:subject>{_escape(text.title())}</dc:subject>" for _ in range(2))
+    files.append(("OEBPS/content.opf", (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="uid">'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f'<dc:identifier id="uid">urn:uuid:{book_id}</dc:identifier>'
+        f'<dc:title>{_escape(book_title)}</dc:title>'
+        f'<dc:creator>{_escape(text.title())}</dc:creator>'
+        f'<dc:language>{language}</dc:language>'
+        f'<dc:publisher>{_escape(text.title())}</dc:publisher>'
+        f'<dc:date>2020-01-01</dc:date>{subjects}'
+        f'<dc:description>{_escape(text.sentence())}</dc:description>'
+        '<meta property="dcterms:modified">2020-01-01T00:00:00Z</meta>'
+        f'</metadata><manifest>{"".join(manifest)}</manifest>'
+        f'<spine toc="ncx">{"".join(spine)}</spine></package>'
+    ).encode("utf-8")))
+
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(zipfile.ZipInfo("mimetype", ZIP_DATE_TIME), "application/epub+zip",
+                    compress_type=zipfile.ZIP_STORED)
+        zf.writestr(zipfile.ZipInfo("META-INF/container.xml", ZIP_DATE_TIME), _EPUB_CONTAINER,
+                    compress_type=zipfile.ZIP_DEFLATED)
+        for name, data in files:
+            compress = zipfile.ZIP_STORED if name.endswith(".png") else zipfile.ZIP_DEFLATED
+            zf.writestr(zipfile.ZipInfo(name, ZIP_DATE_TIME), data, compress_type=compress)
+    return {"path": path, "size": os.path.getsize(path), "toc": [href for _, _, href in toc_entries]}
+
+
+def _paragraph(text: TextGenerator, index: int) -> str:
+    sentences = [_escape(text.sentence()) for _ in range(text.random.randint(3, 6))]
+    if index % 5 == 4:
+        return "<ul>" + "".join(f"<li>{sentence}</li>" for sentence in sentences) + "</ul>"
+    if index % 7 == 6:
+        return f"<blockquote><p>{' '.join(sentences)}</p></blockquote>"
+    sentences[0] = f"<em>{sentences[0]}</em>"
+    if len(sentences) > 3:
+        sentences[2] = f"<strong>{sentences[2]}</strong>"
+    return f"<p>{' '.join(sentences)}</p>"
+
+
+def _xhtml(title: str, language: str, body: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+        f'lang="{language}" xml:lang="{language}"><head><title>{_escape(title)}</title></head>'
+        f'<body>{body}</body></html>'
+    )
+
+
+def write_pdf(path: str, pages: int = 50, outline_depth: int = 2, fonts: Sequence[str] = PDF_FONTS,
+              cjk: float = 0.0, lines_per_page: int = 40, pages_per_chapter: int = 10,
+              seed: int = 0, title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a synthetic PDF with an outline, headings and a mix of fonts
+
+    Args:
+        path: Output file
+        pages: Number of pages
+        outline_depth: Levels of the outline (TOC); 1 lists chapters only
+        fonts: PyMuPDF base-14 font names, rotated per paragraph
+        cjk: Fraction of paragraphs written in Chinese, set in the "china-s" font
+        lines_per_page: Text lines per page
+        pages_per_chapter: Pages between level-1 outline entries
+        seed: Seed of the text generator
+
+    Returns:
+        Dict[str, Any]: path, size and the outline titles of the PDF
+
+    Raises:
+        ImportError: If PyMuPDF is not installed
+    """
+    text = TextGenerator(seed, cjk)
+    doc = fitz.open()
+    toc: List[List[Any]] = []
+    for number in range(1, pages + 1):
+        page = doc.new_page()
+        y = 72
+        if (number - 1) % pages_per_chapter == 0:
+            heading = text.title()
+            toc.append([1, heading, number])
+            page.insert_text((72, y), heading, fontsize=20,
+                             fontname=PDF_CJK_FONT if not heading.isascii() else "hebo")
+            y += 36
+        elif outline_depth > 1 and (number - 1) % pages_per_chapter % 2 == 0:
+            # Sections every other page, nesting 2, 3, ... outline_depth, 2, ...
+            level = 2 + ((number - 1) % pages_per_chapter // 2 - 1) % (outline_depth - 1)
+            heading = text.title()
+            toc.append([level, heading, number])
+            page.insert_text((72, y), heading, fontsize=16 - level,
+                             fontname=PDF_CJK_FONT if not heading.isascii() else "hebo")
+            y += 28
+        font_index = number
+        bottom = 72 + lines_per_page * 17
+        while y < bottom:
+            # One insert_text per paragraph: each call costs about a millisecond
+            cjk_paragraph = text.is_cjk()
+            count = min(text.random.randint(3, 8), (bottom - y) // 17 + 1)
+            lines = [text.words(14 if cjk_paragraph else 10, cjk=cjk_paragraph) for _ in range(count)]
+            fontname = PDF_CJK_FONT if cjk_paragraph else fonts[font_index % len(fonts)]
+            page.insert_text((72, y), "\n".join(lines), fontsize=10, fontname=fontname, lineheight=1.7)
+            y += count * 17 + 6
+            font_index += 1
+    doc.set_toc(toc)
+    doc.set_metadata({
+        "title": title or text.title(),
+        "author": text.title(),
+        "subject": text.sentence(),
+        "keywords": ", ".join(text.words(1) for _ in range(3)),
+        "creationDate": "D:20200101000000Z",
+        "modDate": "D:20200101000000Z",
+    })
+    doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    return {"path": path, "size": os.path.getsize(path), "toc": [entry[1] for entry in toc]}
+
+
+def build_corpus(directory: str, corpus: str = "default") -> Dict[str, Dict[str, Any]]:
+    """
+    Generate a named corpus into directory
+
+    Every book has its own seed, so a corpus is the same on every run.
+
+    Args:
+        directory: Output folder, created if missing
+        corpus: "small", "default" or "large"
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Book name -> format, path, size, toc and spec
+
+    Raises:
+        KeyError: If the corpus is unknown
+    """
+    os.makedirs(directory, exist_ok=True)
+    books = {}
+    for seed, (name, spec) in enumerate(sorted(CORPORA[corpus].items())):
+        kwargs = dict(spec)
+        book_format = kwargs.pop("format")
+        path = os.path.join(directory, f"{name}.{book_format}")
+        writer = write_epub if book_format == "epub" else write_pdf
+        info = writer(path, seed=seed, title=f"Benchmark {name}", **kwargs)
+        books[name] = dict(info, format=book_format, spec=spec)
+    return books
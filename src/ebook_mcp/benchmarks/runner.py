@@ -0,0 +1,504 @@
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .corpus import CORPORA, build_corpus
+
+# Bump when the layout of the results file changes
+RESULTS_SCHEMA = 1
+
+DEFAULT_REPEAT = 5
+# Stop repeating a case once it has run this long (after at least MIN_RUNS)
+DEFAULT_MAX_SECONDS = 2.0
+MIN_RUNS = 3
+
+# A case regresses when its median is this much slower than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and at least this many milliseconds slower, so sub-millisecond noise is ignored
+DEFAULT_MIN_DELTA_MS = 1.0
+
+# Folder holding the ebook_mcp package, put on PYTHONPATH of child interpreters
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class BenchmarkCase:
+    """
+    One timed call: a public helper function or an MCP tool on one book
+
+    func is called with the arguments returned by setup, which runs before
+    every repetition and is not timed; it provides fresh trees to functions
+    that modify their input. A measured case is not timed either: func
+    returns the milliseconds to record, e.g. an import time reported by a
+    child interpreter.
+    """
+    __slots__ = ("group", "target", "book", "func", "setup", "measured")
+
+    def __init__(self, group: str, target: str, book: str, func: Callable[..., Any],
+                 setup: Optional[Callable[[], Tuple[Any, ...]]] = None, measured: bool = False):
+        self.group = group
+        self.target = target
+        self.book = book
+        self.func = func
+        self.setup = setup or tuple
+        self.measured = measured
+
+    @property
+    def name(self) -> str:
+        return f"{self.group}.{self.target}[{self.book}]"
+
+
+def public_functions(module: Any) -> List[str]:
+    """Get the names of the public functions defined in a module"""
+    return sorted(
+        name for name, value in vars(module).items()
+        if not name.startswith("_") and inspect.isfunction(value)
+        and getattr(value, "__module__", None) == module.__name__
+    )
+
+
+def _consume(iterator: Iterable[Any]) -> int:
+    return sum(1 for _ in iterator)
+
+
+def import_times(code: str) -> Dict[str, int]:
+    """
+    Run code in a fresh interpreter under -X importtime
+
+    Returns:
+        Dict[str, int]: Cumulative import time in microseconds of every module it imported
+
+    Raises:
+        RuntimeError: If the code failed
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env=env, cwd=SRC_DIR, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"exit status {result.returncode}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def _startup_cases() -> List[BenchmarkCase]:
+    def import_ms(module: str) -> Callable[[], float]:
+        # Cumulative import time of the module in a cold interpreter, without interpreter startup
+        return lambda: import_times(f"import {module}")[module] / 1000
+
+    return [BenchmarkCase("startup", "import", "ebook_mcp.main", import_ms("ebook_mcp.main"), measured=True)]
+
+
+def _epub_cases(name: str, book: Dict[str, Any], library: str) -> List[BenchmarkCase]:
+    from ..tools import epub_helper as eh
+
+    path = book["path"]
+    toc = eh.get_toc(path)
+    href = toc[len(toc) // 2][1]
+    hrefs = [entry[1] for entry in toc[:5]]
+    loaded = eh.read_epub(path)
+    html = eh.get_chapter_html(path, href)
+    raw_html = loaded.get_item_with_href(href.partition("#")[0]).get_content().decode("utf-8")
+    anchor = href.partition("#")[2] or eh.parse_html(raw_html).find(id=True)["id"]
+
+    def anchor_elem() -> Tuple[Any]:
+        return (eh.find_anchor(eh.parse_html(raw_html), anchor),)
+
+    calls: Dict[str, Tuple[Callable[..., Any], Optional[Callable[[], Tuple[Any, ...]]]]] = {
+        "get_html_parser": (eh.get_html_parser, None),
+        "parse_html": (lambda: eh.parse_html(raw_html), None),
+        "make_fragment": (lambda soup: eh.make_fragment(list(soup.body.children), copy_nodes=True),
+                          lambda: (eh.parse_html(raw_html),)),
+        "get_all_epub_files": (lambda: eh.get_all_epub_files(library), None),
+        "get_toc": (lambda: eh.get_toc(path), None),
+        "get_meta": (lambda: eh.get_meta(path), None),
+        "read_opf_metadata": (lambda: eh.read_opf_metadata(path), None),
+        "extract_chapter_from_epub": (lambda: eh.extract_chapter_from_epub(path, href), None),
+        "read_epub": (lambda: eh.read_epub(path), None),
+        "flatten_toc": (lambda: eh.flatten_toc(loaded), None),
+        "flatten_toc_entries": (lambda: eh.flatten_toc_entries(loaded), None),
+        "extract_chapter_plain_text": (lambda: eh.extract_chapter_plain_text(loaded, href), None),
+        "convert_html_to_markdown": (lambda: eh.convert_html_to_markdown(html), None),
+        "clean_tree": (eh.clean_tree, lambda: (eh.parse_html(raw_html),)),
+        "clean_html": (lambda: eh.clean_html(raw_html), None),
+        "heading_level": (lambda: eh.heading_level("h3"), None),
+        "find_anchor": (lambda soup: eh.find_anchor(soup, anchor), lambda: (eh.parse_html(raw_html),)),
+        "find_chapter_end": (eh.find_chapter_end, anchor_elem),
+        "slice_chapter": (lambda start: eh.slice_chapter(start, eh.find_chapter_end(start)), anchor_elem),
+        "get_toc_index": (lambda: eh.get_toc_index(loaded), None),
+        "extract_chapter_tree": (lambda: eh.extract_chapter_tree(loaded, href), None),
+        "extract_chapter_html": (lambda: eh.extract_chapter_html(loaded, href), None),
+        "extract_chapter_markdown": (lambda: eh.extract_chapter_markdown(loaded, href), None),
+        "get_chapter_html": (lambda: eh.get_chapter_html(path, href), None),
+        "get_chapter_markdown": (lambda: eh.get_chapter_markdown(path, href), None),
+        "get_chapter_text": (lambda: eh.get_chapter_text(path, href), None),
+        "iter_chapter_markdown": (lambda: _consume(eh.iter_chapter_markdown(path, href)), None),
+        "get_chapter_markdown_page": (lambda: eh.get_chapter_markdown_page(path, href, max_chars=4000), None),
+        "render_chapter": (lambda tree: eh.render_chapter(tree, "markdown"),
+                           lambda: (eh.extract_chapter_tree(loaded, href),)),
+        "extract_multiple_chapters": (lambda: eh.extract_multiple_chapters(loaded, hrefs, "markdown"), None),
+        "get_toc_range": (lambda: eh.get_toc_range(loaded, hrefs[0], hrefs[-1]), None),
+        "get_multiple_chapters": (lambda: eh.get_multiple_chapters(path, hrefs), None),
+    }
+    return [BenchmarkCase("epub_helper", target, name, func, setup) for target, (func, setup) in calls.items()]
+
+
+def _pdf_cases(name: str, book: Dict[str, Any], library: str) -> List[BenchmarkCase]:
+    from ..tools import pdf_helper as ph
+
+    path = book["path"]
+    chapter = book["toc"][len(book["toc"]) // 2]
+    pages = ph.get_meta(path)["pages"]
+    middle = max(1, pages // 2)
+    last = min(pages, middle + 9)
+
+    def open_only() -> None:
+        with ph.open_pdf(path):
+            pass
+
+    def with_document(func: Callable[[Any], Any]) -> Callable[[], Any]:
+        def call() -> Any:
+            with ph.open_pdf(path) as doc:
+                return func(doc)
+        return call
+
+    calls: Dict[str, Callable[[], Any]] = {
+        "open_pdf": open_only,
+        "get_all_pdf_files": lambda: ph.get_all_pdf_files(library),
+        "get_meta": lambda: ph.get_meta(path),
+        "get_toc": lambda: ph.get_toc(path),
+        "get_catalog_fields": lambda: ph.get_catalog_fields(path),
+        "extract_page_text": lambda: ph.extract_page_text(path, middle),
+        "extract_pages_text": lambda: ph.extract_pages_text(path, list(range(middle, last + 1))),
+        "page_to_markdown": with_document(lambda doc: ph.page_to_markdown(doc[middle - 1])),
+        "extract_page_markdown": lambda: ph.extract_page_markdown(path, middle),
+        "extract_page_range": lambda: ph.extract_page_range(path, middle, last, "markdown"),
+        "find_chapter_page_range": with_document(lambda doc: ph.find_chapter_page_range(doc, chapter)),
+        "iter_chapter_pages": lambda: _consume(ph.iter_chapter_pages(path, chapter)),
+        "extract_chapter_by_title": lambda: ph.extract_chapter_by_title(path, chapter),
+    }
+    return [BenchmarkCase("pdf_helper", target, name, func) for target, func in calls.items()]
+
+
+def _tool_arguments(books: Dict[str, Dict[str, Any]], library: str) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+    """Arguments of every MCP tool, once per book of the right format"""
+    from ..tools import epub_helper
+
+    epubs = [(name, book) for name, book in sorted(books.items()) if book["format"] == "epub"]
+    pdfs = [(name, book) for name, book in sorted(books.items()) if book["format"] == "pdf"]
+    tools: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    for name, book in epubs:
+        path = book["path"]
+        hrefs = [entry[1] for entry in epub_helper.get_toc(path)]
+        href = hrefs[len(hrefs) // 2]
+        query = "图书馆" if book["spec"].get("cjk", 0) >= 0.5 else "library journey"
+        for tool, args in (
+            ("get_epub_metadata", {"epub_path": path}),
+            ("get_epub_toc", {"epub_path": path}),
+            ("get_epub_chapter_markdown", {"epub_path": path, "chapter_id": href}),
+            ("get_epub_chapter_markdown_page", {"epub_path": path, "chapter_id": href, "max_chars": 4000}),
+            ("get_epub_chapters_markdown", {"epub_path": path, "chapter_ids": hrefs[:5]}),
+            ("search_book", {"book_path": path, "query": query}),
+        ):
+            tools.setdefault(tool, []).append((name, args))
+    for name, book in pdfs:
+        path = book["path"]
+        chapter = book["toc"][len(book["toc"]) // 2]
+        for tool, args in (
+            ("get_pdf_metadata", {}),
+            ("get_pdf_toc", {}),
+            ("get_pdf_page_text", {"page_number": 2}),
+            ("get_pdf_page_markdown", {"page_number": 2}),
+            ("get_pdf_pages_text", {"start_page": 1, "end_page": 10}),
+            ("get_pdf_pages_markdown", {"start_page": 1, "end_page": 10}),
+            ("get_pdf_chapter_content", {"chapter_title": chapter}),
+        ):
+            tools.setdefault(tool, []).append((name, dict({"pdf_path": path}, **args)))
+    for tool, args in (
+        ("get_all_epub_files", {"path": library}),
+        ("get_all_pdf_files", {"path": library}),
+        ("scan_library", {"path": library}),
+        ("get_library_catalog", {"path": library, "query": "benchmark"}),
+        ("search_library", {"path": library, "query": "harbor silence"}),
+        ("get_server_stats", {}),
+        # calls=0: times the tool without turning profiling on
+        ("profile_tool_calls", {"calls": 0}),
+    ):
+        tools.setdefault(tool, []).append(("library", args))
+    return tools
+
+
+def _mcp_cases(books: Dict[str, Dict[str, Any]], library: str) -> List[BenchmarkCase]:
+    from ..main import get_server
+    mcp = get_server()
+
+    def call(tool: str, arguments: Dict[str, Any]) -> Callable[[], Any]:
+        # Through FastMCP: argument validation, the tool executor and result serialization
+        return lambda: asyncio.run(mcp.call_tool(tool, arguments))
+
+    return [
+        BenchmarkCase("mcp", tool, name, call(tool, arguments))
+        for tool, calls in _tool_arguments(books, library).items()
+        for name, arguments in calls
+    ]
+
+
+def build_cases(books: Dict[str, Dict[str, Any]], library: str) -> List[BenchmarkCase]:
+    """
+    Get the benchmark cases for a generated corpus
+
+    Args:
+        books: Result of corpus.build_corpus()
+        library: Folder holding the books
+
+    Returns:
+        List[BenchmarkCase]: The server's cold import, every public
+        epub_helper function on every EPUB, every public pdf_helper function
+        on every PDF, and every MCP tool
+    """
+    cases = _startup_cases()
+    for name, book in sorted(books.items()):
+        if book["format"] == "epub":
+            cases += _epub_cases(name, book, library)
+        else:
+            cases += _pdf_cases(name, book, library)
+    return cases + _mcp_cases(books, library)
+
+
+def missing_cases(cases: Sequence[BenchmarkCase]) -> List[str]:
+    """Get the public helper functions and MCP tools that no case times"""
+    from ..main import get_server
+    from ..tools import epub_helper, pdf_helper
+    mcp = get_server()
+
+    covered = {(case.group, case.target) for case in cases}
+    expected = [(module.__name__.rpartition(".")[2], name)
+                for module in (epub_helper, pdf_helper) for name in public_functions(module)]
+    expected += [("mcp", tool.name) for tool in asyncio.run(mcp.list_tools())]
+    return [f"{group}.{target}" for group, target in expected if (group, target) not in covered]
+
+
+def reset_caches(books: Dict[str, Dict[str, Any]]) -> None:
+    """Drop what earlier cases left in the in-memory caches, so each case starts cold"""
+    from ..tools.document_pool import get_document_pool
+    from ..tools.library_scanner import get_library_scanner
+    from ..tools.pagination import get_pagination_cache
+    from ..tools.search_index import get_search_index
+
+    get_document_pool().clear()
+    get_pagination_cache().clear()
+    get_library_scanner().clear()
+    for book in books.values():
+        get_search_index().remove_book(book["path"])
+
+
+def run_case(case: BenchmarkCase, repeat: int = DEFAULT_REPEAT,
+             max_seconds: float = DEFAULT_MAX_SECONDS) -> Dict[str, Any]:
+    """
+    Time a case
+
+    The first run is reported on its own as first_ms: caches are empty
+    then, so it shows the cold cost. The statistics cover all runs.
+
+    Returns:
+        Dict[str, Any]: group, target, book, runs, first_ms, min_ms, median_ms,
+        mean_ms and max_ms, or group, target, book and error if it raised
+    """
+    result: Dict[str, Any] = {"group": case.group, "target": case.target, "book": case.book}
+    timings = []
+    started = time.perf_counter()
+    try:
+        while len(timings) < repeat:
+            args = case.setup()
+            start = time.perf_counter()
+            value = case.func(*args)
+            timings.append(value if case.measured else (time.perf_counter() - start) * 1000)
+            if len(timings) >= MIN_RUNS and time.perf_counter() - started > max_seconds:
+                break
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    result.update(
+        runs=len(timings),
+        first_ms=round(timings[0], 3),
+        min_ms=round(min(timings), 3),
+        median_ms=round(statistics.median(timings), 3),
+        mean_ms=round(statistics.fmean(timings), 3),
+        max_ms=round(max(timings), 3),
+    )
+    return result
+
+
+def _environment() -> Dict[str, Any]:
+    from importlib import metadata
+
+    versions = {}
+    for package in ("ebook-mcp", "PyMuPDF", "ebooklib", "beautifulsoup4", "lxml", "html2text", "mcp"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def run_benchmarks(corpus: str = "default", directory: Optional[str] = None, repeat: int = DEFAULT_REPEAT,
+                   max_seconds: float = DEFAULT_MAX_SECONDS, select: Optional[str] = None,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Generate a corpus and time every case on it
+
+    Args:
+        corpus: Corpus name from corpus.CORPORA
+        directory: Folder for the corpus, a temporary one by default
+        repeat: Runs per case
+        max_seconds: Time after which a case stops repeating (after MIN_RUNS)
+        select: Only run cases whose name contains this text
+        progress: Called with each case result as it finishes
+
+    Returns:
+        Dict[str, Any]: schema, created, environment, corpus (name and books)
+        and results by case name
+    """
+    with tempfile.TemporaryDirectory(prefix="ebook-mcp-bench-") as temp_dir:
+        library = directory or temp_dir
+        books = build_corpus(library, corpus)
+        cases = build_cases(books, library)
+        results = {}
+        for case in cases:
+            if select and select not in case.name:
+                continue
+            reset_caches(books)
+            results[case.name] = run_case(case, repeat, max_seconds)
+            if progress is not None:
+                progress(results[case.name])
+    return {
+        "schema": RESULTS_SCHEMA,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "corpus": {
+            "name": corpus,
+            "books": {name: {"format": book["format"], "size": book["size"], "spec": book["spec"]}
+                      for name, book in sorted(books.items())},
+        },
+        "results": results,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+                    min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Compare the median times of two results files
+
+    Args:
+        current: Results of this run
+        baseline: Stored results to compare against
+        threshold: Relative slowdown that counts as a regression, e.g. 0.25 for 25%
+        min_delta_ms: Smallest absolute slowdown that counts
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: regressions and improvements (case,
+        baseline_ms, current_ms, change), errors (cases that failed now but
+        not in the baseline) and missing (baseline cases not run now)
+    """
+    report: Dict[str, List[Dict[str, Any]]] = {"regressions": [], "improvements": [], "errors": [], "missing": []}
+    old_results = baseline.get("results", {})
+    new_results = current.get("results", {})
+    for name, new in sorted(new_results.items()):
+        old = old_results.get(name)
+        if old is None:
+            continue
+        if "error" in new:
+            if "error" not in old:
+                report["errors"].append({"case": name, "error": new["error"]})
+            continue
+        if "error" in old:
+            continue
+        old_ms, new_ms = old["median_ms"], new["median_ms"]
+        change = (new_ms - old_ms) / old_ms if old_ms else 0.0
+        entry = {"case": name, "baseline_ms": old_ms, "current_ms": new_ms, "change": round(change, 3)}
+        if change > threshold and new_ms - old_ms >= min_delta_ms:
+            report["regressions"].append(entry)
+        elif change < -threshold and old_ms - new_ms >= min_delta_ms:
+            report["improvements"].append(entry)
+    report["missing"] = [{"case": name} for name in sorted(set(old_results) - set(new_results))]
+    return report
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    name = f"{result['group']}.{result['target']}[{result['book']}]"
+    if "error" in result:
+        print(f"{name:<70} ERROR {result['error']}", flush=True)
+    else:
+        print(f"{name:<70} {result['median_ms']:>10.3f} ms  (first {result['first_ms']:.3f}, "
+              f"{result['runs']} runs)", flush=True)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point; returns 1 on regressions or failed cases"""
+    parser = argparse.ArgumentParser(
+        prog="python -m ebook_mcp.benchmarks",
+        description="Time the ebook-mcp helpers and MCP tools on a synthetic corpus",
+    )
+    parser.add_argument("--corpus", choices=sorted(CORPORA), default="default", help="corpus size (default: default)")
+    parser.add_argument("--corpus-dir", help="write the corpus here instead of a temporary folder")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per case")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="stop repeating a case after this long")
+    parser.add_argument("-k", "--select", help="only run cases whose name contains this text")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore slowdowns smaller than this (default: 1.0)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print each case")
+    args = parser.parse_args(argv)
+
+    # Measure extraction rather than the persistent cache, and keep logging out of the timings
+    os.environ.setdefault("EBOOK_MCP_CACHE", "0")
+    os.environ.setdefault("EBOOK_MCP_LOG_LEVEL", "WARNING")
+    from ..tools.logger_config import setup_logger
+    # Next to the results, never in the package folder
+    log_dir = os.path.dirname(os.path.abspath(args.output)) if args.output else tempfile.gettempdir()
+    setup_logger(os.environ["EBOOK_MCP_LOG_LEVEL"], os.path.join(log_dir, "ebook_mcp_benchmark.log"))
+
+    results = run_benchmarks(args.corpus, args.corpus_dir, args.repeat, args.max_seconds, args.select,
+                             progress=None if args.quiet else _print_result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    failed = [name for name, result in results["results"].items() if "error" in result]
+    status = 1 if failed else 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report = compare_results(results, json.load(f), args.threshold, args.min_delta_ms)
+        for kind in ("regressions", "improvements"):
+            for entry in report[kind]:
+                print(f"{kind[:-1]:<12} {entry['case']:<70} {entry['baseline_ms']:>10.3f} -> "
+                      f"{entry['current_ms']:.3f} ms ({entry['change']:+.0%})")
+        for entry in report["errors"]:
+            print(f"{'error':<12} {entry['case']:<70} {entry['error']}")
+        if report["regressions"] or report["errors"]:
+            status = 1
+    if failed:
+        print(f"{len(failed)} case(s) failed: {', '.join(failed)}", file=sys.stderr)
+    return status
@@ -1,14 +1,17 @@
 import os
-from typing import Any,List,Dict,Union,Tuple, Callable, TypeVar
+import inspect
+from typing import Any,List,Dict,Union,Tuple, Callable, TypeVar, Optional, TYPE_CHECKING
 from functools import wraps
-from mcp.server.fastmcp import FastMCP
-from ebooklib import epub
-from pydantic import BaseModel
-from bs4 import BeautifulSoup
-from ebook_mcp.tools import epub_helper, pdf_helper
+from ebook_mcp.tools import (document_pool, epub_helper, extraction_cache, library_catalog, library_scanner,
+                             library_watcher, metrics, pagination, pdf_helper, pdf_workers, profiling,
+                             search_index)
 import logging
 from datetime import datetime
 from ebook_mcp.tools.logger_config import setup_logger  # Import logger config
+from ebook_mcp.tools.tool_executor import get_tool_executor, offload, LIGHT, HEAVY
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
 
 # Type variable for generic function return type
 T = TypeVar('T')
@@ -18,19 +21,32 @@ def handle_mcp_errors(func: Callable[..., T]) -> Callable[..., T]:
     Decorator to handle common MCP tool errors uniformly.
     
     This decorator catches FileNotFoundError and other exceptions,
-    re-raises them with consistent error messages.
+    re-raises them with consistent error messages. It works for both
+    synchronous and async tools.
     """
+    def reraise(e: Exception):
+        if isinstance(e, FileNotFoundError):
+            raise FileNotFoundError(str(e))
+        if isinstance(e, (epub_helper.EpubProcessingError, pdf_helper.PdfProcessingError)):
+            # Re-raise custom exceptions as-is to preserve detailed error information
+            raise e
+        raise Exception(str(e))
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs) -> T:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                reraise(e)
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs) -> T:
         try:
             return func(*args, **kwargs)
-        except FileNotFoundError as e:
-            raise FileNotFoundError(str(e))
-        except (epub_helper.EpubProcessingError, pdf_helper.PdfProcessingError) as e:
-            # Re-raise custom exceptions as-is to preserve detailed error information
-            raise e
         except Exception as e:
-            raise Exception(str(e))
+            reraise(e)
     return wrapper
 
 def handle_pdf_errors(func: Callable[..., T]) -> Callable[..., T]:
@@ -40,6 +56,15 @@ def handle_pdf_errors(func: Callable[..., T]) -> Callable[..., T]:
     Some PDF functions don't need FileNotFoundError handling
     as they handle it internally.
     """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs) -> T:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                raise Exception(str(e))
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs) -> T:
         try:
@@ -49,56 +74,74 @@ def handle_pdf_errors(func: Callable[..., T]) -> Callable[..., T]:
     return wrapper
 
 
-log_dir = os.path.expanduser("~/Library/Logs/ebook-mcp")
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir, exist_ok=True)
-
-log_file = os.path.join(log_dir, f"ebook-mcp_server_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-
-
-
-# Initialize FastMCP server
-mcp = FastMCP("ebook-MCP")
+# Importing this module only defines the tools: logging, the FastMCP server
+# and the tool registration happen in create_server() and serve(). Spawned
+# PDF worker processes re-import the entry script, so its module body must
+# stay free of side effects.
+server_tools: List[Callable[..., Any]] = []
+
+def server_tool(func: Callable[..., T]) -> Callable[..., T]:
+    """Mark a function as a tool, registered with the server by create_server()"""
+    server_tools.append(func)
+    return func
+
+# Components reported by get_server_stats and the metrics endpoint
+def _stats_or_none(component: Any) -> Optional[Dict[str, Any]]:
+    # The extraction cache and PDF worker pool are None when disabled
+    return component.stats() if component is not None else None
+
+server_metrics = metrics.get_metrics_registry()
+server_metrics.add_source("tool_executor", lambda: get_tool_executor().stats())
+server_metrics.add_source("document_pool", lambda: document_pool.get_document_pool().stats())
+server_metrics.add_source("extraction_cache", lambda: _stats_or_none(extraction_cache.get_extraction_cache()))
+server_metrics.add_source("pagination_cache", lambda: pagination.get_pagination_cache().stats())
+server_metrics.add_source("pdf_workers", lambda: _stats_or_none(pdf_workers.get_pdf_worker_pool()))
+server_metrics.add_source("search_index", lambda: search_index.get_search_index().stats())
+server_metrics.add_source("library_scanner", lambda: library_scanner.get_library_scanner().stats())
+server_metrics.add_source("library_catalog", lambda: library_catalog.get_library_catalog().stats())
+server_metrics.add_source("profiler", lambda: profiling.get_tool_profiler().status())
+
+# Tool bodies are synchronous; @offload runs them in the tool executor so
+# heavy extraction never blocks the event loop. Metadata, TOC and listing
+# tools use the light lane, parsing and search the heavy lane.
 
 # EPUB related tools
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
+@offload(LIGHT)
 def get_all_epub_files(path: str) -> List[str]:
     """Get all epub files in a given path.
     """
     return epub_helper.get_all_epub_files(path)
 
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
-def get_epub_metadata(epub_path:str) -> Dict[str, Union[str, List[str]]]:
+@offload(LIGHT)
+def get_epub_metadata(epub_path:str) -> Dict[str, Union[str, float, List[str], List[Dict[str, str]]]]:
     """Get metadata of a given ebook.
 
     Args:
         epub_path: Full path to the ebook file.eg. "/Users/macbook/Downloads/test.epub"
     
     Returns:
-        List[Tuple[str, str]]: Return a list，Each element is a Tuple，contains key and value of metadata
+        Dict: title, language, identifier, date, publisher, description, rights;
+        creator/contributor/subject lists; and, when the book declares them, subtitle,
+        series, series_index, cover, modified, epub_version and creator_details/
+        contributor_details (name, role, file_as)
 
     Raises:
         FileNotFoundError: Raises when the epub file not found
         Exception: Raisers when running into parsing error of epub file
     """
-    logger.debug(f"Getting ebook metadata: {epub_path}")
+    logger.debug("Getting ebook metadata: %s", epub_path)
     return epub_helper.get_meta(epub_path)
 
 
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
+@offload(LIGHT)
 def get_epub_toc(epub_path: str) -> List[Tuple[str, str]]:
     """Get table of contents of a given EPUB file.
 
@@ -112,11 +155,12 @@ def get_epub_toc(epub_path: str) -> List[Tuple[str, str]]:
         FileNotFoundError: Raises when the EPUB file not found
         Exception: Raisers when running into parsing error of EPUB file
     """
-    logger.debug(f"calling get_epub_toc: {epub_path}")
+    logger.debug("calling get_epub_toc: %s", epub_path)
     return epub_helper.get_toc(epub_path)
 
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
+@offload(HEAVY, max_concurrency=2)
 def get_epub_chapter_markdown(epub_path:str, chapter_id: str) -> str:
     """Get content of a given chapter using the improved extraction method.
     
@@ -134,22 +178,72 @@ def get_epub_chapter_markdown(epub_path:str, chapter_id: str) -> str:
     Returns:
         str: Chapter content in markdown format
     """
-    logger.debug(f"calling get_epub_chapter_markdown: {epub_path}, chapter ID: {chapter_id}")
-    book = epub_helper.read_epub(epub_path)
-    
-    # Use the improved version
-    return epub_helper.extract_chapter_markdown(book, chapter_id)
+    logger.debug("calling get_epub_chapter_markdown: %s, chapter ID: %s", epub_path, chapter_id)
+    return epub_helper.get_chapter_markdown(epub_path, chapter_id)
+
+@server_tool
+@handle_mcp_errors
+@offload(HEAVY, max_concurrency=2)
+def get_epub_chapter_markdown_page(epub_path: str, chapter_id: str, cursor: Optional[str] = None,
+                                   max_chars: int = epub_helper.DEFAULT_PAGE_CHARS,
+                                   max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """Get a chapter in markdown format one page at a time, for chapters too large for one response.
+
+    Pages end at paragraph or heading boundaries. Pass the returned
+    next_cursor to get the following page; it is None on the last page.
+    The chapter is extracted only once for all its pages.
+
+    Args:
+        epub_path: Full path to the ebook file. eg. "/Users/macbook/Downloads/test.epub"
+        chapter_id: Chapter id of the chapter to get content (e.g., "chapter1.xhtml#section1_3")
+        cursor: next_cursor from the previous page; omit for the first page
+        max_chars: Maximum characters per page
+        max_tokens: Maximum estimated tokens per page (optional)
+
+    Returns:
+        Dict[str, Any]: content, offset (of the page in the chapter), total_chars and next_cursor
+    """
+    logger.debug("calling get_epub_chapter_markdown_page: %s, chapter ID: %s, cursor: %s",
+                 epub_path, chapter_id, cursor)
+    return epub_helper.get_chapter_markdown_page(epub_path, chapter_id, cursor, max_chars, max_tokens)
+
+@server_tool
+@handle_mcp_errors
+@offload(HEAVY, max_concurrency=2)
+def get_epub_chapters_markdown(epub_path: str, chapter_ids: Optional[List[str]] = None,
+                               start_chapter_id: Optional[str] = None,
+                               end_chapter_id: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Get content of several chapters in one call.
+
+    Pass either chapter_ids, or start_chapter_id and end_chapter_id to get a
+    range of TOC entries (inclusive). Each content file is parsed only once,
+    however many of the requested chapters it holds.
+
+    Args:
+        epub_path: Full path to the ebook file. eg. "/Users/macbook/Downloads/test.epub"
+        chapter_ids: Chapter ids to get content of (e.g., ["chapter1.xhtml#section1_1", "chapter1.xhtml#section1_2"])
+        start_chapter_id: First chapter of a TOC range
+        end_chapter_id: Last chapter of a TOC range
+
+    Returns:
+        List[Tuple[str, str]]: (chapter_id, content in markdown format) for each chapter, in order
+    """
+    logger.debug("calling get_epub_chapters_markdown: %s, chapter IDs: %s, range: %s-%s",
+                 epub_path, chapter_ids, start_chapter_id, end_chapter_id)
+    return epub_helper.get_multiple_chapters(epub_path, chapter_ids, start_chapter_id, end_chapter_id, 'markdown')
 
 # PDF related tools
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
+@offload(LIGHT)
 def get_all_pdf_files(path: str) -> List[str]:
     """Get all PDF files in a given path.
     """
     return pdf_helper.get_all_pdf_files(path)
 
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
+@offload(LIGHT)
 def get_pdf_metadata(pdf_path: str) -> Dict[str, Union[str, List[str], int, float, bool]]:
     """Get metadata of a given PDF file.
 
@@ -163,11 +257,12 @@ def get_pdf_metadata(pdf_path: str) -> Dict[str, Union[str, List[str], int, floa
         FileNotFoundError: Raises when the PDF file not found
         Exception: Raisers when running into parsing error of PDF file
     """
-    logger.debug(f"calling get_pdf_metadata: {pdf_path}")
+    logger.debug("calling get_pdf_metadata: %s", pdf_path)
     return pdf_helper.get_meta(pdf_path)
 
-@mcp.tool()
+@server_tool
 @handle_mcp_errors
+@offload(LIGHT)
 def get_pdf_toc(pdf_path: str) -> List[Tuple[str, int]]:
     """Get table of contents of a given PDF file.
 
@@ -181,11 +276,12 @@ def get_pdf_toc(pdf_path: str) -> List[Tuple[str, int]]:
         FileNotFoundError: Raises when the PDF file not found
         Exception: Raisers when running into parsing error of PDF file
     """
-    logger.debug(f"calling get_pdf_toc: {pdf_path}")
+    logger.debug("calling get_pdf_toc: %s", pdf_path)
     return pdf_helper.get_toc(pdf_path)
 
-@mcp.tool()
+@server_tool
 @handle_pdf_errors
+@offload(HEAVY, max_concurrency=4)
 def get_pdf_page_text(pdf_path: str, page_number: int) -> str:
     """Get text content of a specific page in PDF file.
 
@@ -196,11 +292,12 @@ def get_pdf_page_text(pdf_path: str, page_number: int) -> str:
     Returns:
         str: Extracted text content
     """
-    logger.debug(f"calling get_pdf_page_text: {pdf_path}, page: {page_number}")
+    logger.debug("calling get_pdf_page_text: %s, page: %s", pdf_path, page_number)
     return pdf_helper.extract_page_text(pdf_path, page_number)
 
-@mcp.tool()
+@server_tool
 @handle_pdf_errors
+@offload(HEAVY, max_concurrency=4)
 def get_pdf_page_markdown(pdf_path: str, page_number: int) -> str:
     """Get markdown formatted content of a specific page in PDF file.
 
@@ -211,11 +308,56 @@ def get_pdf_page_markdown(pdf_path: str, page_number: int) -> str:
     Returns:
         str: Markdown formatted text
     """
-    logger.debug(f"calling get_pdf_page_markdown: {pdf_path}, page: {page_number}")
+    logger.debug("calling get_pdf_page_markdown: %s, page: %s", pdf_path, page_number)
     return pdf_helper.extract_page_markdown(pdf_path, page_number)
 
-@mcp.tool()
+@server_tool
+@handle_pdf_errors
+@offload(HEAVY, max_concurrency=4)
+def get_pdf_pages_text(pdf_path: str, start_page: int, end_page: int,
+                       max_chars: int = pdf_helper.DEFAULT_MAX_CHARS) -> Dict[str, Any]:
+    """Get text content of a range of pages in PDF file in one call.
+
+    Pages are returned until max_chars would be exceeded; call again with
+    start_page set to next_page to continue.
+
+    Args:
+        pdf_path: Full path to the PDF file.eg. "/Users/macbook/Downloads/test.pdf"
+        start_page: First page to extract (1-based index)
+        end_page: Last page to extract (inclusive)
+        max_chars: Maximum characters of content to return (at least one page is always returned)
+
+    Returns:
+        Dict[str, Any]: content, pages (page numbers included), next_page (None when done) and total_pages
+    """
+    logger.debug("calling get_pdf_pages_text: %s, pages: %s-%s", pdf_path, start_page, end_page)
+    return pdf_helper.extract_page_range(pdf_path, start_page, end_page, "text", max_chars)
+
+@server_tool
+@handle_pdf_errors
+@offload(HEAVY, max_concurrency=4)
+def get_pdf_pages_markdown(pdf_path: str, start_page: int, end_page: int,
+                           max_chars: int = pdf_helper.DEFAULT_MAX_CHARS) -> Dict[str, Any]:
+    """Get markdown formatted content of a range of pages in PDF file in one call.
+
+    Pages are returned until max_chars would be exceeded; call again with
+    start_page set to next_page to continue.
+
+    Args:
+        pdf_path: Full path to the PDF file.eg. "/Users/macbook/Downloads/test.pdf"
+        start_page: First page to extract (1-based index)
+        end_page: Last page to extract (inclusive)
+        max_chars: Maximum characters of content to return (at least one page is always returned)
+
+    Returns:
+        Dict[str, Any]: content, pages (page numbers included), next_page (None when done) and total_pages
+    """
+    logger.debug("calling get_pdf_pages_markdown: %s, pages: %s-%s", pdf_path, start_page, end_page)
+    return pdf_helper.extract_page_range(pdf_path, start_page, end_page, "markdown", max_chars)
+
+@server_tool
 @handle_pdf_errors
+@offload(HEAVY, max_concurrency=2)
 def get_pdf_chapter_content(pdf_path: str, chapter_title: str) -> Tuple[str, List[int]]:
     """Get content of a specific chapter in PDF file by its title.
 
@@ -226,18 +368,204 @@ def get_pdf_chapter_content(pdf_path: str, chapter_title: str) -> Tuple[str, Lis
     Returns:
         Tuple[str, List[int]]: Tuple containing (chapter_content, page_numbers)
     """
-    logger.debug(f"calling get_pdf_chapter_content: {pdf_path}, chapter: {chapter_title}")
+    logger.debug("calling get_pdf_chapter_content: %s, chapter: %s", pdf_path, chapter_title)
     return pdf_helper.extract_chapter_by_title(pdf_path, chapter_title)
 
-if __name__ == "__main__":
-    # Initialize and run the server
+# Library related tools
+@server_tool
+@handle_mcp_errors
+@offload(LIGHT)
+def scan_library(path: str, force: bool = False) -> List[Dict[str, Any]]:
+    """Find all EPUB and PDF books in a folder and its subfolders.
+
+    Repeated scans of the same folder only list the subfolders that changed.
+
+    Args:
+        path: Library folder. eg. "/Users/macbook/Books"
+        force: Rescan every subfolder, e.g. after books were replaced in place
+
+    Returns:
+        List[Dict[str, Any]]: One entry per book with path, relative_path, format
+        ("epub" or "pdf"), size in bytes and mtime in seconds since the epoch
+    """
+    logger.debug("calling scan_library: %s", path)
+    return library_scanner.scan_library(path, force=force)
+
+@server_tool
+@handle_mcp_errors
+@offload(LIGHT)
+def get_library_catalog(path: str, query: Optional[str] = None, format: Optional[str] = None,
+                        language: Optional[str] = None, author: Optional[str] = None,
+                        subject: Optional[str] = None, sort_by: str = "title", descending: bool = False,
+                        offset: int = 0, limit: int = library_catalog.DEFAULT_LIMIT,
+                        refresh: bool = False) -> Dict[str, Any]:
+    """Search the metadata of all books in a folder and its subfolders without opening each book.
+
+    Metadata is indexed in the background and kept in a persistent catalog. Books not
+    indexed yet are listed under their file name; indexing.complete tells whether the
+    catalog is complete.
+
+    Args:
+        path: Library folder. eg. "/Users/macbook/Books"
+        query: Words that must all appear in the title, creators or subjects
+        format: Only "epub" or only "pdf" books
+        language: Language code, eg. "en" (also matches "en-US")
+        author: Part of an author's name
+        subject: Part of a subject
+        sort_by: "title", "author", "path", "size", "mtime", "pages" or "chapters"
+        descending: Reverse the sort order
+        offset: Number of matching books to skip, eg. the next_offset of the previous call
+        limit: Maximum books to return (at most 500)
+        refresh: Rescan the folder for new and changed books now
+
+    Returns:
+        Dict[str, Any]: books (path, relative_path, format, title, creators, language,
+        subjects, publisher, date, pages, chapters, size, mtime, indexed), total,
+        offset, next_offset and indexing
+    """
+    logger.debug("calling get_library_catalog: %s, query: %s", path, query)
+    return library_catalog.get_library_catalog().query(
+        path, query, format, language, author, subject, sort_by, descending, offset, limit, refresh
+    )
+
+# Search related tools
+@server_tool
+@handle_mcp_errors
+@offload(HEAVY, max_concurrency=2)
+def search_book(book_path: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Full-text search inside one EPUB or PDF book.
+
+    The book is indexed on first use and re-indexed only when it changes.
+
+    Args:
+        book_path: Full path to the EPUB or PDF file. eg. "/Users/macbook/Downloads/test.epub"
+        query: Words to search for
+        limit: Maximum number of hits to return
+
+    Returns:
+        List[Dict[str, Any]]: Ranked hits, each with file_path, location (chapter id for EPUB,
+        page number for PDF), title, score and snippet
+    """
+    logger.debug("calling search_book: %s, query: %s", book_path, query)
+    return search_index.search_book(book_path, query, limit)
+
+@server_tool
+@handle_mcp_errors
+@offload(HEAVY, max_concurrency=1)
+def search_library(path: str, query: str, limit: int = 10) -> Dict[str, Any]:
+    """Full-text search across the EPUB and PDF books in a folder.
+
+    Books are indexed in the background and the index is kept between runs; new or
+    changed books become searchable once indexed, so check indexing.complete and
+    search again if it is false.
+
+    Args:
+        path: Folder containing the books. eg. "/Users/macbook/Books"
+        query: Words to search for
+        limit: Maximum number of hits to return
+
+    Returns:
+        Dict[str, Any]: hits (ranked, each with file_path, location (chapter id for EPUB,
+        page number for PDF), title, score and snippet) and indexing (pending books,
+        indexed books, complete flag)
+    """
+    logger.debug("calling search_library: %s, query: %s", path, query)
+    return search_index.search_library(path, query, limit)
+
+# Server related tools
+@server_tool
+@handle_mcp_errors
+@offload(LIGHT)
+def get_server_stats() -> Dict[str, Any]:
+    """Get performance statistics of this server: which tools and books are slow.
+
+    Returns:
+        Dict[str, Any]: uptime_s; tools with calls, errors, avg/p50/p95/p99/max run time
+        in ms and bytes_returned per tool; slowest_books by total run time; and the
+        counters of the tool executor, document pool, caches (with hit_ratio), PDF
+        workers, search index and library scanner, catalog and watcher
+    """
+    return server_metrics.snapshot()
+
+@server_tool
+@handle_mcp_errors
+@offload(LIGHT)
+def profile_tool_calls(calls: int = 1, slow_ms: Optional[float] = None, tools: Optional[List[str]] = None,
+                       format: Optional[str] = None) -> Dict[str, Any]:
+    """Profile upcoming tool calls to see where their time goes. calls=0 without slow_ms stops profiling.
+
+    Each profile is written to the profiles folder of the log directory, named after the
+    tool and book, with a .json summary listing this server's slowest functions.
+
+    Args:
+        calls: Number of calls to profile; with slow_ms, the number of slow calls to keep (0 for no limit)
+        slow_ms: Only keep profiles of calls that take at least this many milliseconds
+        tools: Only profile these tools, eg. ["get_epub_chapter_markdown"]; all tools if omitted
+        format: "speedscope" (samples the tool's thread, open in speedscope.app) or "pstats"
+            (cProfile, open with pstats or snakeviz; on Python 3.12+ it may include other
+            threads' work). Defaults to speedscope on Python 3.12+, pstats before
+
+    Returns:
+        Dict[str, Any]: Profiler status: active, remaining, slow_ms, tools, format, directory,
+        written, discarded and the most recent profile files
+    """
+    return profiling.get_tool_profiler().configure(calls, slow_ms, tools, format)
+
+def create_server() -> "FastMCP":
+    """
+    Create the FastMCP server with every tool registered
+
+    Returns:
+        FastMCP: A new server; get_server() returns the shared one
+    """
+    from mcp.server.fastmcp import FastMCP
+    server = FastMCP("ebook-MCP")
+    for func in server_tools:
+        server.tool()(func)
+    return server
+
+_server: Optional["FastMCP"] = None
+
+def get_server() -> "FastMCP":
+    """Get the process-wide server, created on first use"""
+    global _server
+    if _server is None:
+        _server = create_server()
+    return _server
+
+def __getattr__(name: str) -> Any:
+    # "mcp" is the attribute MCP tooling (mcp dev / mcp run) looks up
+    if name == "mcp":
+        return get_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def serve() -> None:
+    """Set up logging and the background services, then run the server over stdio"""
+    log_dir = os.path.expanduser("~/Library/Logs/ebook-mcp")
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, f"ebook-mcp_server_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+    # Records are queued and written by a background thread; set EBOOK_MCP_LOG_LEVEL=DEBUG to log every tool call
+    setup_logger(os.environ.get("EBOOK_MCP_LOG_LEVEL", "INFO"), log_file)
+    server = get_server()
     logger.info("Server is starting.....")
-    mcp.run(transport='stdio')
+    # Keep the folders in EBOOK_MCP_WATCH_PATHS scanned and their caches current
+    watcher = library_watcher.watch_libraries()
+    if watcher is not None:
+        watcher.add_listener(library_catalog.get_library_catalog().on_library_change)
+        # Index the watched books for search in the background, and keep them indexed
+        index = search_index.get_search_index()
+        watcher.add_listener(index.on_library_change)
+        for library in watcher.libraries():
+            index.update(library)
+        server_metrics.add_source("library_watcher", watcher.stats)
+    # Prometheus text metrics on localhost (EBOOK_MCP_METRICS_PORT=9464 to enable)
+    metrics.serve_metrics_from_env()
+    # PyMuPDF extraction runs in worker processes when EBOOK_MCP_PDF_WORKERS is set
+    server.run(transport='stdio')
+
+if __name__ == "__main__":
+    serve()
 
 # as the cli entry after the "pip install ebook-mcp"
 def cli_entry():
-    import logging
-    logging.info("Starting ebook-mcp server")
-    from mcp.server.fastmcp import FastMCP
-    mcp = FastMCP("ebook-mcp")
-    mcp.run(transport='stdio')
+    serve()
@@ -3,6 +3,9 @@ import tempfile
 import os
 from unittest.mock import Mock
 
+# Keep the persistent extraction cache out of the test run; cache tests use their own databases
+os.environ["EBOOK_MCP_CACHE"] = "0"
+
 
 @pytest.fixture
 def temp_dir():
@@ -93,4 +96,13 @@ def temp_pdf_file():
     
     # Cleanup
     if os.path.exists(pdf_path):
-        os.unlink(pdf_path) 
\ No newline at end of file
+        os.unlink(pdf_path)
+
+
+@pytest.fixture(autouse=True)
+def reset_document_pool():
+    """Start every test with an empty shared document pool"""
+    from ebook_mcp.tools.document_pool import get_document_pool
+    get_document_pool().clear()
+    yield
+    get_document_pool().clear()
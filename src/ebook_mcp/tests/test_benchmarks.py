@@ -0,0 +1,132 @@
+import pytest
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+fitz = pytest.importorskip("fitz")
+
+from ebook_mcp.benchmarks import runner
+from ebook_mcp.benchmarks.corpus import build_corpus, write_epub, write_pdf
+from ebook_mcp.tools import epub_helper
+
+
+def _toc_depth(entries):
+    return max((1 + _toc_depth(entry[1]) if isinstance(entry, tuple) else 1 for entry in entries), default=0)
+
+
+class TestCorpus:
+    """Test the synthetic EPUB and PDF generators"""
+
+    def test_epub_deterministic(self, temp_dir):
+        """Test that the same spec always writes the same bytes"""
+        paths = [os.path.join(temp_dir, f"{n}.epub") for n in range(2)]
+        for path in paths:
+            write_epub(path, chapters=3, depth=3, anchors=4, images=2, cjk=0.5, seed=7)
+        with open(paths[0], 'rb') as a, open(paths[1], 'rb') as b:
+            assert a.read() == b.read()
+
+    def test_epub_shape(self, temp_dir):
+        """Test chapter count, TOC nesting, anchors, images and CJK text"""
+        path = os.path.join(temp_dir, "book.epub")
+        info = write_epub(path, chapters=5, depth=3, anchors=4, images=3, cjk=1.0)
+        book = epub_helper.read_epub(path)
+        assert len(book.toc) == 5
+        assert _toc_depth(book.toc) == 3
+        assert len(info["toc"]) == 5 * (1 + 4)
+        assert sum(1 for item in book.get_items() if item.get_name().endswith(".png")) == 3
+        assert epub_helper.get_meta(path)["language"] == "zh"
+        text = epub_helper.get_chapter_text(path, info["toc"][1])
+        assert any("一" <= char <= "鿿" for char in text)
+
+    def test_pdf_shape(self, temp_dir):
+        """Test page count, outline depth, font mix and determinism"""
+        paths = [os.path.join(temp_dir, f"{n}.pdf") for n in range(2)]
+        for path in paths:
+            info = write_pdf(path, pages=12, outline_depth=3, cjk=0.3, seed=3)
+        with open(paths[0], 'rb') as a, open(paths[1], 'rb') as b:
+            assert a.read() == b.read()
+        doc = fitz.open(paths[0])
+        try:
+            assert doc.page_count == 12
+            assert {level for level, _, _ in doc.get_toc()} == {1, 2, 3}
+            assert [title for _, title, _ in doc.get_toc()] == info["toc"]
+            fonts = {font[3] for number in range(doc.page_count) for font in doc[number].get_fonts()}
+            assert {"Helvetica", "Times-Roman", "Courier"} <= fonts
+            assert len(fonts) >= 5
+        finally:
+            doc.close()
+
+
+class TestRunner:
+    """Test the benchmark runner and baseline comparison"""
+
+    def test_every_function_and_tool_covered(self, temp_dir):
+        """Test that every public helper function and MCP tool has a case"""
+        books = build_corpus(temp_dir, "small")
+        assert runner.missing_cases(runner.build_cases(books, temp_dir)) == []
+
+    def test_run_small_corpus(self):
+        """Test that every case runs without errors and reports its timings"""
+        results = runner.run_benchmarks("small", repeat=1)
+        assert results["schema"] == runner.RESULTS_SCHEMA
+        assert set(results["corpus"]["books"]) == {"novel", "cjk", "report", "cjk-report"}
+        errors = {name: result["error"] for name, result in results["results"].items() if "error" in result}
+        assert errors == {}
+        result = results["results"]["mcp.get_epub_toc[novel]"]
+        assert result["runs"] == 1
+        assert result["first_ms"] == result["median_ms"] > 0
+
+    def test_server_import_time_recorded(self):
+        """Test that the cold import of the server is a case, timed by the child interpreter"""
+        case, = [case for case in runner.build_cases({}, "") if case.group == "startup"]
+        assert case.name == "startup.import[ebook_mcp.main]"
+        assert case.measured
+
+        with patch.object(runner, "import_times", return_value={"ebook_mcp.main": 123456}) as mock_times:
+            result = runner.run_case(case, repeat=2)
+        mock_times.assert_called_with("import ebook_mcp.main")
+        assert result["runs"] == 2
+        assert result["median_ms"] == 123.456
+
+        # A slower import than the baseline is a regression like any other case
+        baseline = {"results": {case.name: {"median_ms": 60.0}}}
+        report = runner.compare_results({"results": {case.name: result}}, baseline)
+        assert [entry["case"] for entry in report["regressions"]] == [case.name]
+
+    def test_compare_results(self):
+        """Test regressions, improvements, noise, new errors and missing cases"""
+        def results(**medians):
+            return {"results": {name: ({"error": "boom"} if ms is None else {"median_ms": ms})
+                                for name, ms in medians.items()}}
+
+        baseline = results(slower=10.0, faster=10.0, noise=0.1, broken=5.0, gone=1.0)
+        current = results(slower=20.0, faster=5.0, noise=0.3, broken=None, new=1.0)
+        report = runner.compare_results(current, baseline)
+        assert [entry["case"] for entry in report["regressions"]] == ["slower"]
+        assert report["regressions"][0]["change"] == 1.0
+        assert [entry["case"] for entry in report["improvements"]] == ["faster"]
+        assert [entry["case"] for entry in report["errors"]] == ["broken"]
+        assert report["missing"] == [{"case": "gone"}]
+
+    @patch('ebook_mcp.tools.logger_config.setup_logger')
+    def test_cli_writes_results_and_compares(self, mock_setup_logger, temp_dir, capsys, monkeypatch):
+        """Test the command line: JSON output, and exit status 1 against a faster baseline"""
+        monkeypatch.setenv("EBOOK_MCP_LOG_LEVEL", "WARNING")
+        output = os.path.join(temp_dir, "results.json")
+        assert runner.main(["--corpus", "small", "--repeat", "1", "-k", "get_pdf_toc", "-q", "-o", output]) == 0
+        with open(output, encoding="utf-8") as f:
+            results = json.load(f)
+        assert set(results["results"]) == {"mcp.get_pdf_toc[cjk-report]", "mcp.get_pdf_toc[report]"}
+        assert mock_setup_logger.call_args[0][1] == os.path.join(temp_dir, "ebook_mcp_benchmark.log")
+
+        for result in results["results"].values():
+            result["median_ms"] = 0.001
+        baseline = os.path.join(temp_dir, "baseline.json")
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f)
+        assert runner.main(["--corpus", "small", "--repeat", "1", "-k", "get_pdf_toc", "-q",
+                            "--baseline", baseline, "--min-delta-ms", "0"]) == 1
+        assert "regression" in capsys.readouterr().out
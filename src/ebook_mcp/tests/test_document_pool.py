@@ -0,0 +1,112 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import Mock
+
+from ebook_mcp.tools.document_pool import DocumentPool, file_fingerprint
+
+
+def _write_file(directory, name, content=b"content"):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+class TestDocumentPool:
+    """Test the shared document pool"""
+
+    def test_get_caches_document(self):
+        """Test that a second get is served from the pool"""
+        pool = DocumentPool()
+        loader = Mock(return_value="document")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = _write_file(temp_dir, "book.epub")
+            assert pool.get(path, loader) == "document"
+            assert pool.get(path, loader) == "document"
+        loader.assert_called_once_with(path)
+        stats = pool.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["documents"] == 1
+
+    def test_modified_file_is_reloaded(self):
+        """Test that a change in size or mtime invalidates the pooled document"""
+        pool = DocumentPool()
+        loader = Mock(side_effect=["v1", "v2"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = _write_file(temp_dir, "book.pdf")
+            assert pool.get(path, loader) == "v1"
+            _write_file(temp_dir, "book.pdf", b"modified content")
+            assert pool.get(path, loader) == "v2"
+        assert pool.stats()["invalidations"] == 1
+        assert pool.stats()["documents"] == 1
+
+    def test_eviction_by_count(self):
+        """Test least-recently-used eviction by document count"""
+        pool = DocumentPool(max_documents=2)
+        loader = Mock(side_effect=lambda p: os.path.basename(p))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            a = _write_file(temp_dir, "a.epub")
+            b = _write_file(temp_dir, "b.epub")
+            c = _write_file(temp_dir, "c.epub")
+            pool.get(a, loader)
+            pool.get(b, loader)
+            pool.get(a, loader)  # a becomes most recently used
+            pool.get(c, loader)  # evicts b
+            assert pool.stats()["evictions"] == 1
+            pool.get(a, loader)
+            assert loader.call_count == 3
+            pool.get(b, loader)
+            assert loader.call_count == 4
+
+    def test_eviction_by_bytes(self):
+        """Test eviction when the estimated byte budget is exceeded"""
+        pool = DocumentPool(max_documents=10, max_bytes=15)
+        loader = Mock(return_value="document")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            a = _write_file(temp_dir, "a.pdf", b"0123456789")
+            b = _write_file(temp_dir, "b.pdf", b"0123456789")
+            pool.get(a, loader)
+            pool.get(b, loader)
+        stats = pool.stats()
+        assert stats["documents"] == 1
+        assert stats["bytes"] == 10
+        assert stats["evictions"] == 1
+
+    def test_loader_error_is_not_cached(self):
+        """Test that a failing loader leaves the pool empty"""
+        pool = DocumentPool()
+        loader = Mock(side_effect=Exception("parse error"))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = _write_file(temp_dir, "broken.pdf")
+            with pytest.raises(Exception, match="parse error"):
+                pool.get(path, loader)
+        assert pool.stats()["documents"] == 0
+
+    def test_missing_file(self):
+        """Test that a missing file raises FileNotFoundError"""
+        pool = DocumentPool()
+        with pytest.raises(FileNotFoundError):
+            pool.get("/non/existent/book.epub", Mock())
+
+    def test_lease_and_invalidate(self):
+        """Test leasing a document and explicit invalidation"""
+        pool = DocumentPool()
+        loader = Mock(return_value="document")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = _write_file(temp_dir, "book.pdf")
+            with pool.lease(path, loader) as doc:
+                assert doc == "document"
+            assert pool.invalidate(path) is True
+            assert pool.invalidate(path) is False
+            pool.get(path, loader)
+        assert loader.call_count == 2
+
+    def test_file_fingerprint(self):
+        """Test that the fingerprint uses the resolved path and file size"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = _write_file(temp_dir, "book.epub", b"12345")
+            real_path, mtime_ns, size = file_fingerprint(path)
+            assert real_path == os.path.realpath(path)
+            assert size == 5
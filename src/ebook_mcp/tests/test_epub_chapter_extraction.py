@@ -21,7 +21,9 @@ if DEPENDENCIES_AVAILABLE:
         extract_chapter_html,
         extract_chapter_markdown,
         clean_html,
-        convert_html_to_markdown
+        convert_html_to_markdown,
+        find_chapter_end,
+        slice_chapter
     )
 
 
@@ -367,4 +369,66 @@ class TestExtractChapterHtml:
         assert "Introduction content" not in result
         assert "1.2 Background" not in result
         assert "Background content" not in result
-        assert "Chapter 2 content" not in result 
\ No newline at end of file
+        assert "Chapter 2 content" not in result
+
+
+def _nested_xhtml(depth, paragraphs):
+    """Build a chapter whose content sits inside `depth` nested divs"""
+    body = "".join(f"<p>Paragraph {i} of the nested chapter.</p>" for i in range(paragraphs))
+    nested = "<div>" * depth + body + "</div>" * depth
+    return (
+        "<html><body>"
+        f'<h1 id="ch1">Chapter 1</h1>{nested}'
+        '<h1 id="ch2">Chapter 2</h1><p>Chapter 2 content</p>'
+        "</body></html>"
+    )
+
+
+def _book_for(html_content):
+    mock_book = Mock()
+    mock_chapter1 = Mock()
+    mock_chapter1.title = "Chapter 1"
+    mock_chapter1.href = "chapter1.xhtml#ch1"
+    mock_chapter2 = Mock()
+    mock_chapter2.title = "Chapter 2"
+    mock_chapter2.href = "chapter1.xhtml#ch2"
+    mock_book.toc = [mock_chapter1, mock_chapter2]
+    mock_item = Mock()
+    mock_item.get_content.return_value = html_content.encode('utf-8')
+    mock_book.get_item_with_href.return_value = mock_item
+    return mock_book
+
+
+class TestChapterSlicer:
+    """Regression benchmark for the linear-time chapter slicer"""
+    
+    @pytest.mark.skipif(not DEPENDENCIES_AVAILABLE, reason="Dependencies not available")
+    def test_deeply_nested_output_is_linear(self):
+        """Output must not duplicate nested markup: it stays within the input size"""
+        html_content = _nested_xhtml(depth=200, paragraphs=50)
+        result = extract_chapter_html(_book_for(html_content), "chapter1.xhtml#ch1")
+        
+        assert len(result) <= len(html_content)
+        assert result.count("Paragraph 7 of the nested chapter.") == 1
+        assert "Chapter 2 content" not in result
+    
+    @pytest.mark.skipif(not DEPENDENCIES_AVAILABLE, reason="Dependencies not available")
+    def test_deeply_nested_scaling(self):
+        """Doubling nesting depth must not blow up the output size"""
+        sizes = []
+        for depth in (100, 400):
+            html_content = _nested_xhtml(depth=depth, paragraphs=20)
+            sizes.append(len(extract_chapter_html(_book_for(html_content), "chapter1.xhtml#ch1")))
+        # The nested wrappers are the only difference, so growth is bounded by the added markup
+        assert sizes[1] - sizes[0] <= 300 * len("<div></div>")
+    
+    @pytest.mark.skipif(not DEPENDENCIES_AVAILABLE, reason="Dependencies not available")
+    def test_slice_ends_at_next_toc_anchor(self):
+        """Test that a non-heading TOC anchor ends the chapter"""
+        soup = BeautifulSoup(
+            '<body><p id="a">First</p><div><p>Still first</p><p id="b">Second</p></div></body>',
+            'html.parser'
+        )
+        start = soup.find(id="a")
+        end = find_chapter_end(start, soup.find(id="b"))
+        assert ''.join(str(node) for node in slice_chapter(start, end)) == '<p id="a">First</p><p>Still first</p>'
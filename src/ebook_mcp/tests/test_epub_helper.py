@@ -1,6 +1,8 @@
 import pytest
 import os
 import tempfile
+import time
+import zipfile
 from unittest.mock import Mock, patch, MagicMock
 
 # Mock external dependencies
@@ -29,8 +31,21 @@ from ebook_mcp.tools.epub_helper import (
     extract_chapter_plain_text,
 
     convert_html_to_markdown,
-    clean_html
+    clean_html,
+    clean_tree,
+    get_html_parser,
+    parse_html,
+    LazyEpub,
+    read_opf_metadata,
+    TocIndex,
+    get_toc_index,
+    extract_multiple_chapters,
+    get_multiple_chapters,
+    get_chapter_markdown_page,
+    EpubProcessingError
 )
+from ebook_mcp.tools import epub_helper
+from ebook_mcp.tools.extraction_cache import ExtractionCache
 
 
 class TestEpubHelper:
@@ -278,19 +293,534 @@ class TestEpubHelper:
         assert "# Title" in result
         assert "**bold**" in result
     
-    @patch('ebook_mcp.tools.epub_helper.extract_chapter_html')
-    def test_extract_chapter_plain_text(self, mock_extract_html):
+    @patch('ebook_mcp.tools.epub_helper.extract_chapter_tree')
+    def test_extract_chapter_plain_text(self, mock_extract_tree):
         """Test extract_chapter_plain_text function"""
-        mock_extract_html.return_value = "<h1>Title</h1><p>Content</p>"
+        mock_extract_tree.return_value = BeautifulSoup("<h1>Title</h1><p>Content</p>", 'html.parser')
         
         mock_book = Mock()
         result = extract_chapter_plain_text(mock_book, "chapter1")
         
-        mock_extract_html.assert_called_once_with(mock_book, "chapter1")
+        mock_extract_tree.assert_called_once_with(mock_book, "chapter1")
         # Should return plain text (HTML tags removed)
         assert "<h1>" not in result
         assert "<p>" not in result
         assert "Title" in result
         assert "Content" in result
+
+
+def _link(title, href):
+    link = Mock()
+    link.title = title
+    link.href = href
+    return link
+
+
+class TestTocIndex:
+    """Test the precomputed TOC boundary index"""
+    
+    def _toc(self):
+        return [
+            (_link("Part 1", "part1.xhtml"), [
+                (_link("Chapter 1", "ch1.xhtml"), [
+                    _link("1.1", "ch1.xhtml#s1"),
+                    (_link("1.2", "ch1.xhtml#s2"), [
+                        _link("1.2.1", "ch1.xhtml#s2_1"),
+                    ]),
+                ]),
+                _link("Chapter 2", "ch2.xhtml"),
+            ]),
+            _link("Part 2", "part2.xhtml"),
+        ]
+    
+    def test_arbitrary_depth_levels(self):
+        """Test that nested entries keep their depth beyond two levels"""
+        index = TocIndex(self._toc())
+        assert [(href, level) for _, href, level in index.entries] == [
+            ("part1.xhtml", 1),
+            ("ch1.xhtml", 2),
+            ("ch1.xhtml#s1", 3),
+            ("ch1.xhtml#s2", 3),
+            ("ch1.xhtml#s2_1", 4),
+            ("ch2.xhtml", 2),
+            ("part2.xhtml", 1),
+        ]
+    
+    def test_next_boundary(self):
+        """Test next-boundary pointers at the same or higher level"""
+        index = TocIndex(self._toc())
+        assert index.next_boundary_href(index.find("part1.xhtml")) == "part2.xhtml"
+        assert index.next_boundary_href(index.find("ch1.xhtml")) == "ch2.xhtml"
+        assert index.next_boundary_href(index.find("ch1.xhtml#s1")) == "ch1.xhtml#s2"
+        assert index.next_boundary_href(index.find("ch1.xhtml#s2_1")) == "ch2.xhtml"
+        assert index.next_boundary_href(index.find("part2.xhtml")) is None
+    
+    def test_find_matching_strategies(self):
+        """Test exact, file-level and same-file fallback lookups"""
+        index = TocIndex(self._toc())
+        assert index.find("ch1.xhtml#s2") == 3
+        # Anchor not in the TOC: the entry for its content file
+        assert index.find("ch2.xhtml#unlisted") == 5
+        # Path prefix differs: substring match
+        assert index.find("OEBPS/part2.xhtml") == 6
+        assert index.find("missing.xhtml") is None
+        fallback = TocIndex([_link("1.1", "ch1.xhtml#s1"), _link("1.2", "ch1.xhtml#s2")])
+        assert fallback.find("ch1.xhtml#other") == 0
+        assert fallback.find("ch1.xhtml") == 0
+    
+    def test_index_cached_with_book(self):
+        """Test that the index is built once per book and rebuilt on a new toc"""
+        book = Mock()
+        book.toc = self._toc()
+        index = get_toc_index(book)
+        assert get_toc_index(book) is index
+        book.toc = [_link("Only", "only.xhtml")]
+        assert get_toc_index(book) is not index
+        assert get_toc_index(book).entries == [("Only", "only.xhtml", 1)]
+
+
+def _chapter_xhtml(size_bytes, depth=20):
+    """Build an XHTML chapter of about size_bytes with nested blocks and empty tags"""
+    block = (
+        '<div>' * depth
+        + '<p>Paragraph with <em>emphasis</em> and an empty <span></span> tag.</p>' * 5
+        + '<p> </p><!-- note --><img src="x.png"/>'
+        + '</div>' * depth
+    )
+    return '<html><body>' + block * (size_bytes // len(block) + 1) + '</body></html>'
+
+
+def _time_clean_tree(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    start = time.perf_counter()
+    clean_tree(soup)
+    return time.perf_counter() - start
+
+
+class TestCleanTree:
+    """Tests and scaling benchmark for the single-pass HTML cleaner"""
+    
+    def test_prunes_empty_tags_bottom_up(self):
+        """Test that empty subtrees go while <br> and text-bearing tags stay"""
+        html_content = (
+            '<div><p>Text<br/>more</p><div><span> </span><br/></div>'
+            '<p><!-- c --><img src="a.png"/></p><section><b>kept</b><i></i></section></div>'
+        )
+        assert clean_html(html_content) == '<div><p>Text<br/>more</p><section><b>kept</b></section></div>'
+    
+    def test_blacklisted_text_does_not_count(self):
+        """Test that a tag holding only a script is pruned with it"""
+        assert clean_html('<div><p>a</p><div><script>x()</script></div><nav>menu</nav></div>') == '<div><p>a</p></div>'
+    
+    def test_linear_scaling_on_1mb_chapter(self):
+        """Cleaning a 1 MB chapter costs about 4x a 256 KB one, not 16x"""
+        small = min(_time_clean_tree(_chapter_xhtml(256 * 1024)) for _ in range(2))
+        large = _time_clean_tree(_chapter_xhtml(1024 * 1024))
+        assert large < small * 8
+    
+    def test_deep_nesting_scaling(self):
+        """Nesting depth must not multiply the cost of the cleaner"""
+        def nested(depth):
+            return '<html><body>' + '<div>' * depth + '<p>x</p>' * 50 + '</div>' * depth + '</body></html>'
+        shallow = min(_time_clean_tree(nested(200)) for _ in range(3))
+        deep = min(_time_clean_tree(nested(800)) for _ in range(3))
+        assert deep < shallow * 8
+
+
+class TestHtmlParserBackend:
+    """Tests for the pluggable HTML parser backend"""
     
- 
\ No newline at end of file
+    @pytest.fixture(autouse=True)
+    def reset_parser(self, monkeypatch):
+        monkeypatch.setattr('ebook_mcp.tools.epub_helper._html_parser', None)
+    
+    def test_prefers_lxml_when_available(self, monkeypatch):
+        """Test that lxml is picked by default and the env var overrides it"""
+        pytest.importorskip('lxml')
+        monkeypatch.delenv('EBOOK_MCP_HTML_PARSER', raising=False)
+        assert get_html_parser() == 'lxml'
+        monkeypatch.setattr('ebook_mcp.tools.epub_helper._html_parser', None)
+        monkeypatch.setenv('EBOOK_MCP_HTML_PARSER', 'html.parser')
+        assert get_html_parser() == 'html.parser'
+    
+    def test_unavailable_parser_falls_back(self, monkeypatch):
+        """Test that an unknown parser name falls back to the default order"""
+        monkeypatch.setenv('EBOOK_MCP_HTML_PARSER', 'no-such-parser')
+        assert get_html_parser() in ('lxml', 'html.parser')
+    
+    @pytest.mark.parametrize('parser', ['lxml', 'html.parser'])
+    def test_same_tree_shape_for_all_backends(self, monkeypatch, parser):
+        """Test that fragments stay fragments and XHTML documents parse cleanly"""
+        if parser == 'lxml':
+            pytest.importorskip('lxml')
+        monkeypatch.setenv('EBOOK_MCP_HTML_PARSER', parser)
+        assert str(parse_html('<h1>Title</h1><p>Text</p>')) == '<h1>Title</h1><p>Text</p>'
+        
+        soup = parse_html(
+            '<?xml version="1.0" encoding="utf-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml">'
+            '<body><h1><a id="c1"/>Title</h1><p>a&#160;b</p></body></html>'
+        )
+        assert soup.find(id='c1').parent.name == 'h1'
+        assert soup.find('p').get_text() == 'a\xa0b'
+        assert '?xml' not in str(soup.body)
+
+
+_OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="{version}" unique-identifier="id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:title>Lazy Book</dc:title>
+    <dc:creator>First Author</dc:creator>
+    <dc:creator>Second Author</dc:creator>
+    <dc:identifier id="id">lazy-1</dc:identifier>
+    <dc:language>en</dc:language>
+  </metadata>
+  <manifest>
+    {nav_item}
+    <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>
+    <item id="c1" href="text/ch%201.xhtml" media-type="application/xhtml+xml"/>
+    <item id="c2" href="text/ch2.xhtml" media-type="application/xhtml+xml"/>
+    <item id="img" href="images/big.png" media-type="image/png"/>
+  </manifest>
+  <spine toc="ncx"><itemref idref="c1"/><itemref idref="c2"/></spine>
+</package>"""
+
+_NAV = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops"><body>
+<nav epub:type="toc"><ol>
+  <li><a href="text/ch 1.xhtml">Chapter 1</a><ol><li><a href="text/ch 1.xhtml#s1">Section 1.1</a></li></ol></li>
+  <li><a href="text/ch2.xhtml">Chapter 2</a></li>
+</ol></nav></body></html>"""
+
+_NCX = """<?xml version="1.0" encoding="utf-8"?>
+<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1"><navMap>
+  <navPoint id="p1"><navLabel><text>Chapter 1</text></navLabel><content src="text/ch 1.xhtml"/>
+    <navPoint id="p2"><navLabel><text>Section 1.1</text></navLabel><content src="text/ch 1.xhtml#s1"/></navPoint>
+  </navPoint>
+  <navPoint id="p3"><navLabel><text>Chapter 2</text></navLabel><content src="text/ch2.xhtml"/></navPoint>
+</navMap></ncx>"""
+
+_CHAPTER = """<html xmlns="http://www.w3.org/1999/xhtml"><head><title>{n}</title></head><body>
+<h1>Chapter {n}</h1><p>Chapter {n} text.</p><h2 id="s{n}">Section {n}.1</h2><p>Section {n} text.</p></body></html>"""
+
+
+def _write_epub(path, with_nav=True):
+    """Write a small EPUB with an EPUB 3 nav (and NCX), or an NCX only, under OEBPS/"""
+    nav_item = '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>' if with_nav else ''
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        zf.writestr('META-INF/container.xml', (
+            '<?xml version="1.0"?><container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+            '</rootfiles></container>'
+        ))
+        zf.writestr('OEBPS/content.opf', _OPF.format(version='3.0' if with_nav else '2.0', nav_item=nav_item))
+        if with_nav:
+            zf.writestr('OEBPS/nav.xhtml', _NAV)
+        zf.writestr('OEBPS/toc.ncx', _NCX)
+        zf.writestr('OEBPS/text/ch 1.xhtml', _CHAPTER.format(n=1))
+        zf.writestr('OEBPS/text/ch2.xhtml', _CHAPTER.format(n=2))
+        zf.writestr('OEBPS/images/big.png', os.urandom(1024 * 1024))
+
+
+def _toc_shape(toc):
+    return [
+        (type(entry[0]).__name__, entry[0].title, entry[0].href, _toc_shape(entry[1]))
+        if isinstance(entry, tuple) else (type(entry).__name__, entry.title, entry.href)
+        for entry in toc
+    ]
+
+
+class TestLazyEpub:
+    """Tests for the lazy zip-backed EPUB reader"""
+    
+    @pytest.mark.parametrize('with_nav', [True, False])
+    def test_matches_ebooklib(self, temp_dir, with_nav):
+        """Test that TOC, metadata and chapter extraction match epub.read_epub"""
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path, with_nav)
+        eager = epub.read_epub(path)
+        lazy = LazyEpub(path)
+        
+        assert _toc_shape(lazy.toc) == _toc_shape(eager.toc)
+        assert lazy.metadata == eager.metadata
+        assert lazy.get_metadata('DC', 'creator') == [('First Author', {}), ('Second Author', {})]
+        assert lazy.spine == [('c1', 'yes'), ('c2', 'yes')]
+        for href in flatten_toc(eager):
+            # ebooklib re-renders documents with extra newlines; LazyEpub returns them verbatim
+            assert ''.join(extract_chapter_html(lazy, href).split()) == ''.join(extract_chapter_html(eager, href).split())
+    
+    def test_decompresses_only_requested_items(self, temp_dir):
+        """Test that opening reads only container, OPF and nav, and chapters load on demand"""
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path)
+        read_names = []
+        original_read = zipfile.ZipFile.read
+        
+        def recording_read(zf, name, *args, **kwargs):
+            read_names.append(name)
+            return original_read(zf, name, *args, **kwargs)
+        
+        with patch.object(zipfile.ZipFile, 'read', recording_read):
+            book = LazyEpub(path)
+            assert read_names == ['META-INF/container.xml', 'OEBPS/content.opf', 'OEBPS/nav.xhtml']
+            
+            content = book.get_item_with_href('text/ch2.xhtml').get_content()
+            assert b'Chapter 2 text.' in content
+            assert read_names[-1] == 'OEBPS/text/ch2.xhtml'
+            assert 'OEBPS/images/big.png' not in read_names
+    
+    def test_read_epub_uses_lazy_reader(self, temp_dir):
+        """Test that read_epub opens real archives lazily and get_toc/get_meta work on them"""
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path)
+        
+        assert isinstance(read_epub(path), LazyEpub)
+        assert get_toc(path) == [
+            ('Chapter 1', 'text/ch 1.xhtml'),
+            ('Section 1.1', 'text/ch 1.xhtml#s1'),
+            ('Chapter 2', 'text/ch2.xhtml'),
+        ]
+        assert get_meta(path)['creator'] == ['First Author', 'Second Author']
+    
+    @patch('ebook_mcp.tools.epub_helper.epub.read_epub')
+    def test_falls_back_to_ebooklib(self, mock_read_epub, temp_dir):
+        """Test that an archive LazyEpub cannot read is handed to ebooklib"""
+        path = os.path.join(temp_dir, 'broken.epub')
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('mimetype', 'application/epub+zip')
+        mock_read_epub.return_value = Mock()
+        
+        assert read_epub(path) is mock_read_epub.return_value
+        mock_read_epub.assert_called_once_with(path)
+
+
+_RICH_OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="uid">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="uid">urn:isbn:9780000000001</dc:identifier>
+    <dc:title id="t2">A Subtitle</dc:title>
+    <dc:title id="t1">  Main Title </dc:title>
+    <meta refines="#t1" property="title-type">main</meta>
+    <meta refines="#t2" property="title-type">subtitle</meta>
+    <dc:creator id="c1">Jane Austen</dc:creator>
+    <meta refines="#c1" property="role" scheme="marc:relators">aut</meta>
+    <meta refines="#c1" property="file-as">Austen, Jane</meta>
+    <dc:contributor>Some Editor</dc:contributor>
+    <dc:language>en</dc:language>
+    <dc:subject>Fiction</dc:subject>
+    <dc:subject>Romance</dc:subject>
+    <dc:rights>Public domain</dc:rights>
+    <dc:publisher/>
+    <meta property="dcterms:modified">2024-05-01T10:00:00Z</meta>
+    <meta property="belongs-to-collection" id="s1">Novels</meta>
+    <meta refines="#s1" property="collection-type">series</meta>
+    <meta refines="#s1" property="group-position">3</meta>
+  </metadata>
+  <manifest>
+    <item id="c1-x" href="ch1.xhtml" media-type="application/xhtml+xml"/>
+    <item id="cover-img" href="cover.jpg" media-type="image/jpeg" properties="cover-image"/>
+    <item id="never-parsed" href="ch2.xhtml" media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine><itemref idref="c1-x"/></spine>
+</package>"""
+
+_CALIBRE_OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="uid">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+    <dc:title>Persuasion</dc:title>
+    <dc:creator opf:role="aut" opf:file-as="Austen, Jane">Jane Austen</dc:creator>
+    <meta name="cover" content="cover-id"/>
+    <meta name="calibre:series" content="Austen Novels"/>
+    <meta name="calibre:series_index" content="6.0"/>
+  </metadata>
+  <manifest><item id="cover-id" href="cover.jpg" media-type="image/jpeg"/></manifest>
+</package>"""
+
+
+def _write_opf_epub(path, opf):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        zf.writestr('META-INF/container.xml', (
+            '<?xml version="1.0"?><container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="content.opf" media-type="application/oebps-package+xml"/>'
+            '</rootfiles></container>'
+        ))
+        zf.writestr('content.opf', opf)
+        zf.writestr('ch1.xhtml', _CHAPTER.format(n=1))
+
+
+class TestOpfMetadata:
+    """Tests for the OPF-only metadata reader behind get_meta"""
+    
+    def test_epub3_refinements(self, temp_dir):
+        """Test titles, creator roles, series, cover and modified date from EPUB 3 refinements"""
+        path = os.path.join(temp_dir, 'rich.epub')
+        _write_opf_epub(path, _RICH_OPF)
+        
+        assert read_opf_metadata(path) == {
+            'title': 'Main Title',
+            'subtitle': 'A Subtitle',
+            'identifier': 'urn:isbn:9780000000001',
+            'language': 'en',
+            'rights': 'Public domain',
+            'creator': ['Jane Austen'],
+            'creator_details': [{'name': 'Jane Austen', 'role': 'aut', 'file_as': 'Austen, Jane'}],
+            'contributor': ['Some Editor'],
+            'subject': ['Fiction', 'Romance'],
+            'series': 'Novels',
+            'series_index': 3.0,
+            'cover': 'cover-img',
+            'modified': '2024-05-01T10:00:00Z',
+            'epub_version': '3.0',
+        }
+    
+    def test_epub2_calibre_metadata(self, temp_dir):
+        """Test opf:role/opf:file-as attributes, calibre series and the cover meta"""
+        path = os.path.join(temp_dir, 'calibre.epub')
+        _write_opf_epub(path, _CALIBRE_OPF)
+        
+        meta = read_opf_metadata(path)
+        assert meta['creator_details'] == [{'name': 'Jane Austen', 'role': 'aut', 'file_as': 'Austen, Jane'}]
+        assert (meta['series'], meta['series_index']) == ('Austen Novels', 6.0)
+        assert meta['cover'] == 'cover-id'
+        assert meta['epub_version'] == '2.0'
+    
+    def test_reads_only_container_and_opf(self, temp_dir):
+        """Test that get_meta never opens the book through the full reader"""
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path)
+        read_names = []
+        original_open = zipfile.ZipFile.open
+        
+        def recording_open(archive, name, *args, **kwargs):
+            read_names.append(getattr(name, 'filename', name))
+            return original_open(archive, name, *args, **kwargs)
+        
+        with patch('ebook_mcp.tools.epub_helper.read_epub') as mock_read_epub, \
+                patch.object(zipfile.ZipFile, 'open', recording_open):
+            meta = get_meta(path)
+        mock_read_epub.assert_not_called()
+        assert read_names == ['META-INF/container.xml', 'OEBPS/content.opf']
+        assert meta == {
+            'title': 'Lazy Book',
+            'creator': ['First Author', 'Second Author'],
+            'identifier': 'lazy-1',
+            'language': 'en',
+            'epub_version': '3.0',
+        }
+    
+    def test_stops_parsing_after_the_cover_item(self, temp_dir):
+        """Test that the OPF is streamed: a broken spine after the manifest is never parsed"""
+        path = os.path.join(temp_dir, 'long.epub')
+        spine = '<itemref idref="c1-x"/>' * 20000
+        _write_opf_epub(path, _RICH_OPF.replace('<spine><itemref idref="c1-x"/></spine>',
+                                                f'<spine>{spine}<broken></spine>'))
+        meta = read_opf_metadata(path)
+        assert meta['cover'] == 'cover-img'
+        assert meta['title'] == 'Main Title'
+    
+    @patch('ebook_mcp.tools.epub_helper.epub.read_epub')
+    def test_falls_back_to_full_reader(self, mock_read_epub, temp_dir):
+        """Test that a book without container.xml is read through ebooklib"""
+        path = os.path.join(temp_dir, 'broken.epub')
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('mimetype', 'application/epub+zip')
+        mock_book = Mock()
+        mock_book.get_metadata = lambda namespace, name: [('Fallback', {})] if name == 'title' else []
+        mock_read_epub.return_value = mock_book
+        
+        assert get_meta(path) == {'title': 'Fallback'}
+
+
+class TestMultipleChapters:
+    """Tests for batch chapter extraction"""
+    
+    HREFS = ['text/ch 1.xhtml', 'text/ch 1.xhtml#s1', 'text/ch2.xhtml']
+    
+    @pytest.fixture
+    def epub_path(self, temp_dir):
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path)
+        return path
+    
+    @pytest.mark.parametrize('output,extract', [
+        ('html', extract_chapter_html),
+        ('text', extract_chapter_plain_text),
+        ('markdown', epub_helper.extract_chapter_markdown),
+    ])
+    def test_matches_single_extraction(self, epub_path, output, extract):
+        """Test that a shared parse gives the same chapters as one extraction per chapter"""
+        book = read_epub(epub_path)
+        expected = [(href, extract(book, href)) for href in self.HREFS]
+        assert extract_multiple_chapters(book, self.HREFS, output) == expected
+        assert 'Section 1 text.' in expected[0][1] and 'Section 1 text.' in expected[1][1]
+    
+    def test_parses_each_file_once(self, epub_path):
+        """Test that chapters sharing a content file are sliced from one parse"""
+        book = read_epub(epub_path)
+        with patch('ebook_mcp.tools.epub_helper.parse_html', wraps=parse_html) as mock_parse:
+            extract_multiple_chapters(book, self.HREFS)
+        assert mock_parse.call_count == 2
+    
+    def test_invalid_output(self, epub_path):
+        """Test that an unknown output format is rejected"""
+        with pytest.raises(ValueError):
+            extract_multiple_chapters(read_epub(epub_path), self.HREFS, 'pdf')
+    
+    def test_toc_range(self, epub_path):
+        """Test selecting chapters by an inclusive TOC range"""
+        chapters = get_multiple_chapters(epub_path, start_href='text/ch 1.xhtml#s1', end_href='text/ch2.xhtml')
+        assert [href for href, content in chapters] == self.HREFS[1:]
+        assert 'Chapter 2 text.' in chapters[1][1]
+        
+        with pytest.raises(EpubProcessingError):
+            get_multiple_chapters(epub_path, start_href='text/ch2.xhtml', end_href='text/ch 1.xhtml')
+        with pytest.raises(EpubProcessingError):
+            get_multiple_chapters(epub_path)
+    
+    def test_uses_extraction_cache(self, epub_path, temp_dir, monkeypatch):
+        """Test that cached chapters are not extracted again"""
+        cache = ExtractionCache(os.path.join(temp_dir, 'cache.sqlite3'))
+        monkeypatch.setattr(epub_helper, 'get_extraction_cache', lambda: cache)
+        first = get_multiple_chapters(epub_path, self.HREFS[:2])
+        with patch('ebook_mcp.tools.epub_helper.parse_html', wraps=parse_html) as mock_parse:
+            assert get_multiple_chapters(epub_path, self.HREFS) == first + get_multiple_chapters(epub_path, self.HREFS[2:])
+        # Only the uncached chapter 2 was parsed
+        assert mock_parse.call_count == 1
+
+
+class TestChapterPagination:
+    """Tests for cursor-based chapter markdown pages"""
+    
+    def test_pages_resume_without_extraction(self, temp_dir):
+        """Test that pages reassemble the chapter, which is extracted only once"""
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path)
+        full = epub_helper.get_chapter_markdown(path, 'text/ch 1.xhtml')
+        
+        pages = []
+        cursor = None
+        with patch('ebook_mcp.tools.epub_helper.extract_chapter_tree', wraps=epub_helper.extract_chapter_tree) as mock_extract:
+            while True:
+                page = get_chapter_markdown_page(path, 'text/ch 1.xhtml', cursor, max_chars=20)
+                pages.append(page['content'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+        assert ''.join(pages) == full
+        assert len(pages) > 1
+        assert page['total_chars'] == len(full)
+        assert mock_extract.call_count == 1
+    
+    def test_cursor_invalid_after_change(self, temp_dir):
+        """Test that a cursor is rejected once the book changed on disk"""
+        path = os.path.join(temp_dir, 'book.epub')
+        _write_epub(path)
+        cursor = get_chapter_markdown_page(path, 'text/ch 1.xhtml', max_chars=20)['next_cursor']
+        _write_epub(path, with_nav=False)
+        os.utime(path, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        with pytest.raises(EpubProcessingError, match="changed"):
+            get_chapter_markdown_page(path, 'text/ch 1.xhtml', cursor, max_chars=20)
+        with pytest.raises(EpubProcessingError, match="different document"):
+            get_chapter_markdown_page(path, 'text/ch2.xhtml', cursor, max_chars=20)
+
@@ -0,0 +1,112 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from ebook_mcp.tools import extraction_cache
+from ebook_mcp.tools.extraction_cache import ExtractionCache, cached_extraction, MISS
+
+
+@pytest.fixture
+def cache_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+
+@pytest.fixture
+def book_file(cache_dir):
+    path = os.path.join(cache_dir, "book.epub")
+    with open(path, 'wb') as f:
+        f.write(b"book content")
+    return path
+
+
+class TestExtractionCache:
+    """Test the persistent extraction cache"""
+
+    def test_put_and_get(self, cache_dir, book_file):
+        """Test storing and reading back a value"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+        assert cache.get(book_file, "toc") is MISS
+        cache.put(book_file, "toc", "", [["Chapter 1", "ch1.xhtml"]])
+        assert cache.get(book_file, "toc") == [["Chapter 1", "ch1.xhtml"]]
+        stats = cache.stats()
+        assert stats["entries"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_persists_across_instances(self, cache_dir, book_file):
+        """Test that a second process (instance) sees stored entries"""
+        db_path = os.path.join(cache_dir, "cache.sqlite3")
+        ExtractionCache(db_path).put(book_file, "meta", "", {"title": "Book"})
+        assert ExtractionCache(db_path).get(book_file, "meta") == {"title": "Book"}
+
+    def test_modified_file_invalidates_entries(self, cache_dir, book_file):
+        """Test that changing the book drops its cached entries"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+        cache.put(book_file, "meta", "", {"title": "Old"})
+        with open(book_file, 'wb') as f:
+            f.write(b"a different, longer book content")
+        assert cache.get(book_file, "meta") is MISS
+        assert cache.stats()["entries"] == 0
+
+    def test_extractor_version_invalidates_entries(self, cache_dir, book_file):
+        """Test that a new extractor version ignores old entries"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+        cache.put(book_file, "meta", "", {"title": "Book"})
+        with patch.object(extraction_cache, 'EXTRACTOR_VERSION', 'next'):
+            assert cache.get(book_file, "meta") is MISS
+
+    def test_size_bounded_eviction(self, cache_dir, book_file):
+        """Test that the least recently accessed entries are evicted"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"), max_bytes=2000)
+        for page in range(50):
+            cache.put(book_file, "page", str(page), os.urandom(200).hex())
+        cache.evict()
+        stats = cache.stats()
+        assert stats["bytes"] <= 2000
+        assert stats["entries"] < 50
+        assert cache.get(book_file, "page", "49") is not MISS
+
+    def test_invalidate(self, cache_dir, book_file):
+        """Test explicit invalidation of a file"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+        cache.put(book_file, "toc", "", [])
+        cache.invalidate(book_file)
+        assert cache.get(book_file, "toc") is MISS
+
+    def test_cached_extraction_decorator(self, cache_dir, book_file):
+        """Test that the decorator serves repeated calls from the cache"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+        extract = Mock(return_value=[("Chapter 1", "ch1.xhtml")])
+        extract.__name__ = "extract"
+        decorated = cached_extraction("toc", decode=lambda v: [tuple(e) for e in v])(extract)
+        with patch.object(extraction_cache, 'get_extraction_cache', return_value=cache):
+            assert decorated(book_file) == [("Chapter 1", "ch1.xhtml")]
+            assert decorated(book_file) == [("Chapter 1", "ch1.xhtml")]
+        extract.assert_called_once_with(book_file)
+
+    def test_cached_extraction_missing_file(self, cache_dir):
+        """Test that missing files bypass the cache so the function can raise"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+        extract = Mock(side_effect=FileNotFoundError("missing"))
+        extract.__name__ = "extract"
+        decorated = cached_extraction("toc")(extract)
+        with patch.object(extraction_cache, 'get_extraction_cache', return_value=cache):
+            with pytest.raises(FileNotFoundError):
+                decorated("/non/existent/book.epub")
+
+    def test_file_changed_during_extraction(self, cache_dir, book_file):
+        """Test that a result extracted from the old file is not cached as the new version"""
+        cache = ExtractionCache(os.path.join(cache_dir, "cache.sqlite3"))
+
+        def extract(path):
+            # Rewritten while extraction runs
+            with open(path, 'wb') as f:
+                f.write(b"rewritten book content")
+            return "old content"
+
+        decorated = cached_extraction("chapter")(extract)
+        with patch.object(extraction_cache, 'get_extraction_cache', return_value=cache):
+            assert decorated(book_file) == "old content"
+        assert cache.get(book_file, "chapter", extraction_cache.cache_arg()) is MISS
@@ -0,0 +1,103 @@
+import pytest
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.benchmarks.runner import import_times
+from ebook_mcp.tools.lazy_import import LazyModule, lazy_import
+
+# Third-party packages that only the first EPUB or PDF call may import
+FORMAT_DEPENDENCIES = {"pymupdf", "fitz", "ebooklib", "bs4", "html2text", "lxml"}
+
+
+def _top_level(modules):
+    return {name.partition(".")[0] for name in modules}
+
+
+@pytest.fixture
+def probe_module(tmp_path, monkeypatch):
+    """A module on sys.path that counts how often it is executed"""
+    name = f"lazy_probe_{tmp_path.name}"
+    (tmp_path / f"{name}.py").write_text(
+        "import builtins, time\n"
+        "builtins.lazy_probe_loads = getattr(builtins, 'lazy_probe_loads', 0) + 1\n"
+        "time.sleep(0.05)\n"
+        "def answer():\n"
+        "    return 42\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import builtins
+    monkeypatch.setattr(builtins, "lazy_probe_loads", 0, raising=False)
+    yield name
+    sys.modules.pop(name, None)
+
+
+class TestLazyModule:
+    """Test the deferred module stand-in"""
+
+    def test_loads_on_first_attribute(self, probe_module):
+        """Test that the module is imported by the first attribute access, once"""
+        import builtins
+        module = LazyModule(probe_module)
+        assert builtins.lazy_probe_loads == 0
+        assert module.answer() == 42
+        assert module.answer() == 42
+        assert builtins.lazy_probe_loads == 1
+        assert "answer" in module.__dict__
+
+    def test_concurrent_first_access(self, probe_module):
+        """Test that threads racing on the first access all see the loaded module"""
+        import builtins
+        module = LazyModule(probe_module)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(module.answer())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [42] * 8
+        assert builtins.lazy_probe_loads == 1
+
+    @pytest.mark.parametrize("loaded", [False, True])
+    def test_patch_through_stand_in(self, probe_module, loaded):
+        """Test that mock.patch works on the stand-in before and after it is loaded"""
+        module = LazyModule(probe_module)
+        if loaded:
+            module.answer()
+        with patch.object(module, "answer", return_value=7):
+            assert module.answer() == 7
+        assert module.answer() == 42
+
+    def test_lazy_import(self):
+        """Test missing, already imported and deferred modules"""
+        assert lazy_import("no_such_package_for_ebook_mcp.sub") is None
+        assert lazy_import("os") is os
+        module = LazyModule("json")
+        assert repr(module) == "<lazy module 'json' (not loaded)>"
+        assert module.dumps([1]) == "[1]"
+        assert repr(module) == "<lazy module 'json' (loaded)>"
+
+
+class TestColdStart:
+    """Track what the MCP server imports before its first request"""
+
+    def test_server_import_skips_format_dependencies(self):
+        """Test that importing the server loads neither PyMuPDF nor the EPUB stack"""
+        times = import_times("import ebook_mcp.main")
+        assert "ebook_mcp.main" in times
+        assert not _top_level(times) & FORMAT_DEPENDENCIES
+
+    def test_pdf_call_loads_only_pymupdf(self):
+        """Test that the first PDF call imports PyMuPDF but not the EPUB stack"""
+        times = import_times("from ebook_mcp.tools import pdf_helper; pdf_helper.fitz.open")
+        assert "pymupdf" in _top_level(times)
+        assert not _top_level(times) & {"ebooklib", "bs4", "html2text"}
+
+    def test_epub_call_loads_only_epub_stack(self):
+        """Test that the first EPUB parse imports BeautifulSoup but not PyMuPDF"""
+        times = import_times("from ebook_mcp.tools import epub_helper; epub_helper.parse_html('<p>x</p>')")
+        assert "bs4" in _top_level(times)
+        assert not _top_level(times) & {"pymupdf", "fitz"}
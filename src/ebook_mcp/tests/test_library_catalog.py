@@ -0,0 +1,161 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.library_catalog import LibraryCatalog, read_catalog_fields
+
+
+BOOKS = {
+    "Austen/Emma.epub": {"title": "Emma", "creators": ["Jane Austen"], "language": "en-GB",
+                         "subjects": ["Fiction", "Romance"], "chapters": 55},
+    "Austen/Persuasion.epub": {"title": "Persuasion", "creators": ["Jane Austen"], "language": "en",
+                               "subjects": ["Fiction"], "chapters": 24},
+    "Kleppmann/DDIA.pdf": {"title": "Designing Data-Intensive Applications", "creators": ["Martin Kleppmann"],
+                           "subjects": ["Databases", "Distributed systems"], "pages": 611, "chapters": 12},
+    "Zhang/情绪勒索.epub": {"title": "情緒勒索", "creators": ["周慕姿"], "language": "zh",
+                          "subjects": ["心理學"], "chapters": 8},
+    "broken.pdf": None,
+}
+
+
+def _fake_fields(book_path, book_format):
+    rel_path = os.path.relpath(book_path, _fake_fields.library).replace(os.sep, "/")
+    fields = BOOKS[rel_path]
+    if fields is None:
+        raise ValueError("not a PDF")
+    return dict(fields)
+
+
+@pytest.fixture
+def library(temp_dir):
+    library = os.path.join(temp_dir, "books")
+    for rel_path in BOOKS:
+        path = os.path.join(library, *rel_path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(rel_path)
+    _fake_fields.library = library
+    return library
+
+
+@pytest.fixture
+def catalog(temp_dir):
+    catalog = LibraryCatalog(os.path.join(temp_dir, "catalog.sqlite3"), max_workers=2)
+    yield catalog
+    catalog.shutdown()
+
+
+@patch('ebook_mcp.tools.library_catalog.read_catalog_fields', side_effect=_fake_fields)
+class TestLibraryCatalog:
+    """Test the persistent library catalog"""
+
+    def test_first_query_indexes_library(self, mock_fields, catalog, library):
+        """Test that the first query waits for the books to be indexed"""
+        result = catalog.query(library)
+        assert result["indexing"] == {"pending": 0, "complete": True}
+        assert result["total"] == 5
+        assert [book["title"] for book in result["books"]] == [
+            "broken", "Designing Data-Intensive Applications", "Emma", "Persuasion", "情緒勒索"
+        ]
+        emma = result["books"][2]
+        assert emma["creators"] == ["Jane Austen"]
+        assert emma["format"] == "epub"
+        assert emma["relative_path"] == os.path.join("Austen", "Emma.epub")
+        assert emma["indexed"] is True
+        assert "error" in result["books"][0]
+
+    def test_filters(self, mock_fields, catalog, library):
+        """Test filtering by words, format, language, author and subject"""
+        def titles(**filters):
+            return sorted(book["title"] for book in catalog.query(library, **filters)["books"])
+
+        assert titles(query="jane emma") == ["Emma"]
+        assert titles(query="DATA systems") == ["Designing Data-Intensive Applications"]
+        assert titles(query="勒索") == ["情緒勒索"]
+        assert titles(book_format="pdf") == ["Designing Data-Intensive Applications", "broken"]
+        assert titles(language="en") == ["Emma", "Persuasion"]
+        assert titles(author="austen") == ["Emma", "Persuasion"]
+        assert titles(subject="romance") == ["Emma"]
+        assert titles(query="100%") == []
+
+    def test_sort_and_paging(self, mock_fields, catalog, library):
+        """Test sorting with missing values last and offset paging"""
+        result = catalog.query(library, sort_by="chapters", descending=True, limit=2)
+        assert [book["chapters"] for book in result["books"]] == [55, 24]
+        assert result["next_offset"] == 2
+        rest = catalog.query(library, sort_by="chapters", descending=True, offset=2, limit=10)
+        assert [book["chapters"] for book in rest["books"]] == [12, 8, None]
+        assert rest["next_offset"] is None
+
+    def test_invalid_arguments(self, mock_fields, catalog, library):
+        """Test that unknown sort keys and bad paging are rejected"""
+        with pytest.raises(ValueError, match="sort_by"):
+            catalog.query(library, sort_by="color")
+        with pytest.raises(ValueError):
+            catalog.query(library, limit=0)
+        with pytest.raises(FileNotFoundError):
+            catalog.query(os.path.join(library, "missing"))
+
+    def test_changed_books_reindexed(self, mock_fields, catalog, library):
+        """Test that only new and modified books are indexed again, and removed ones dropped"""
+        catalog.query(library)
+        assert mock_fields.call_count == 5
+        with open(os.path.join(library, "Austen", "Emma.epub"), 'a') as f:
+            f.write(" second edition")
+        os.unlink(os.path.join(library, "broken.pdf"))
+        # Rewriting a book in place does not change its folder: only a forced rescan sees it
+        catalog.update(library, wait=5)
+        assert mock_fields.call_count == 5
+        assert catalog.stats()["books"] == 4
+        result = catalog.query(library, refresh=True)
+        assert result["total"] == 4
+        assert mock_fields.call_count == 6
+        assert mock_fields.call_args.args[0] == os.path.join(library, "Austen", "Emma.epub")
+
+    def test_catalog_persisted(self, mock_fields, catalog, library, temp_dir):
+        """Test that a new catalog on the same database does not index again"""
+        catalog.query(library)
+        reopened = LibraryCatalog(catalog.db_path)
+        result = reopened.query(library)
+        assert result["total"] == 5
+        assert mock_fields.call_count == 5
+        reopened.shutdown()
+
+    def test_unindexed_books_listed(self, mock_fields, catalog, library):
+        """Test that books still being indexed are listed under their file name"""
+        def slow_fields(book_path, book_format):
+            time.sleep(0.2)
+            return _fake_fields(book_path, book_format)
+
+        mock_fields.side_effect = slow_fields
+        result = catalog.query(library, wait=0)
+        assert result["total"] == 5
+        assert result["indexing"]["complete"] is False
+        assert "Emma" in [book["title"] for book in result["books"] if not book["indexed"]]
+
+
+class TestCatalogFields:
+    """Test reading the catalog fields of real books"""
+
+    def test_pdf_fields(self, temp_dir):
+        """Test title, authors, keywords, page and TOC counts of a PDF"""
+        fitz = pytest.importorskip("fitz")
+        path = os.path.join(temp_dir, "doc.pdf")
+        doc = fitz.open()
+        for _ in range(3):
+            doc.new_page()
+        doc.set_metadata({"title": "A Title", "author": "Ann One; Bob Two", "keywords": "logs, storage"})
+        doc.set_toc([[1, "Intro", 1], [1, "Body", 2]])
+        doc.save(path)
+        doc.close()
+
+        fields = read_catalog_fields(path, "pdf")
+        assert fields["title"] == "A Title"
+        assert fields["creators"] == ["Ann One", "Bob Two"]
+        assert fields["subjects"] == ["logs", "storage"]
+        assert fields["pages"] == 3
+        assert fields["chapters"] == 2
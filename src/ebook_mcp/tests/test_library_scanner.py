@@ -0,0 +1,129 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.library_scanner import LibraryScanner, book_format, scan_library
+
+
+def _touch(path, content="book"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def _bump_mtime(path):
+    # Directory mtimes can be coarse; move them explicitly instead of sleeping
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def library(temp_dir):
+    for rel_path in ("top.epub", "notes.txt", "Austen/Emma.EPUB", "Austen/Persuasion.Pdf",
+                     "Tolkien/LOTR/1 Fellowship.epub", "Tolkien/LOTR/cover.jpg", ".hidden/secret.epub"):
+        _touch(os.path.join(temp_dir, *rel_path.split("/")))
+    return temp_dir
+
+
+class TestLibraryScanner:
+    """Test the recursive, incremental library scanner"""
+
+    def test_book_format(self):
+        """Test that suffixes are matched case-insensitively"""
+        assert book_format("a.EPUB") == "epub"
+        assert book_format("a.Pdf") == "pdf"
+        assert book_format("a.txt") is None
+
+    def test_scan_recursive(self, library):
+        """Test that books in nested folders are found with their size, mtime and format"""
+        entries = LibraryScanner(max_workers=4).scan(library)
+        assert [entry["relative_path"] for entry in entries] == [
+            os.path.join("Austen", "Emma.EPUB"),
+            os.path.join("Austen", "Persuasion.Pdf"),
+            os.path.join("Tolkien", "LOTR", "1 Fellowship.epub"),
+            "top.epub",
+        ]
+        emma = entries[0]
+        assert emma["path"] == os.path.join(library, "Austen", "Emma.EPUB")
+        assert emma["format"] == "epub"
+        assert emma["size"] == 4
+        assert emma["mtime"] == pytest.approx(os.stat(emma["path"]).st_mtime)
+        assert entries[1]["format"] == "pdf"
+
+    def test_rescan_lists_only_changed_folders(self, library):
+        """Test that a rescan reuses folders whose mtime did not change"""
+        scanner = LibraryScanner(max_workers=4)
+        scanner.scan(library)
+        assert scanner.stats()["dirs_listed"] == 4
+
+        _touch(os.path.join(library, "Austen", "Sense.epub"))
+        _bump_mtime(os.path.join(library, "Austen"))
+        with patch('ebook_mcp.tools.library_scanner.os.scandir', wraps=os.scandir) as mock_scandir:
+            entries = scanner.scan(library)
+        assert mock_scandir.call_count == 1
+        assert os.path.join("Austen", "Sense.epub") in [entry["relative_path"] for entry in entries]
+        assert scanner.stats()["dirs_reused"] == 3
+
+    def test_removed_folder(self, library):
+        """Test that books of a removed folder disappear from the next scan"""
+        scanner = LibraryScanner()
+        scanner.scan(library)
+        lotr = os.path.join(library, "Tolkien", "LOTR")
+        for name in os.listdir(lotr):
+            os.unlink(os.path.join(lotr, name))
+        os.rmdir(lotr)
+        _bump_mtime(os.path.join(library, "Tolkien"))
+        entries = scanner.scan(library)
+        assert len(entries) == 3
+        assert all(not entry["relative_path"].startswith("Tolkien") for entry in entries)
+
+    def test_force_refreshes_books_changed_in_place(self, library):
+        """Test that a forced scan picks up books rewritten without a folder change"""
+        scanner = LibraryScanner()
+        scanner.scan(library)
+        _touch(os.path.join(library, "top.epub"), "a longer book")
+        assert [e["size"] for e in scanner.scan(library, force=True) if e["relative_path"] == "top.epub"] == [13]
+
+    def test_restat_refreshes_books_changed_in_place(self, library):
+        """Test that restat relists only the folder of a book rewritten in place"""
+        scanner = LibraryScanner()
+        scanner.scan(library)
+        _touch(os.path.join(library, "Austen", "Emma.EPUB"), "a longer book")
+        assert [e["size"] for e in scanner.scan(library) if e["relative_path"] == os.path.join("Austen", "Emma.EPUB")] == [4]
+        listed = scanner.stats()["dirs_listed"]
+        entries = scanner.scan(library, restat=True)
+        assert [e["size"] for e in entries if e["relative_path"] == os.path.join("Austen", "Emma.EPUB")] == [13]
+        assert scanner.stats()["dirs_listed"] == listed + 1
+
+    def test_snapshot_persisted(self, library, tmp_path):
+        """Test that a new scanner resumes from the snapshot saved by a previous one"""
+        snapshot_dir = str(tmp_path)
+        LibraryScanner(snapshot_dir=snapshot_dir).scan(library)
+        assert len(os.listdir(snapshot_dir)) == 1
+
+        scanner = LibraryScanner(snapshot_dir=snapshot_dir)
+        entries = scanner.scan(library)
+        assert len(entries) == 4
+        assert scanner.stats()["dirs_listed"] == 0
+
+    def test_corrupt_snapshot_ignored(self, library, tmp_path):
+        """Test that an unreadable snapshot falls back to a full scan"""
+        snapshot_dir = str(tmp_path)
+        LibraryScanner(snapshot_dir=snapshot_dir).scan(library)
+        snapshot_file = os.path.join(snapshot_dir, os.listdir(snapshot_dir)[0])
+        with open(snapshot_file, 'w') as f:
+            f.write("{not json")
+        assert len(LibraryScanner(snapshot_dir=snapshot_dir).scan(library)) == 4
+
+    def test_missing_folder(self):
+        """Test that scanning a missing folder raises FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            LibraryScanner().scan("/nonexistent/library")
+
+    def test_scan_library_formats(self, library):
+        """Test filtering the process-wide scan by format"""
+        entries = scan_library(library, formats=("pdf",))
+        assert [entry["relative_path"] for entry in entries] == [os.path.join("Austen", "Persuasion.Pdf")]
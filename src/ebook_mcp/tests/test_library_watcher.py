@@ -0,0 +1,150 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.library_scanner import LibraryScanner
+from ebook_mcp.tools.library_watcher import LibraryWatcher, invalidate_book, watch_libraries
+from ebook_mcp.tools.pagination import get_pagination_cache
+
+BACKENDS = ["poll"] + (["inotify"] if sys.platform.startswith("linux") else [])
+
+
+def _write(path, content="book"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _wait_for(watcher, condition, timeout=5.0):
+    # The background thread may pick the change up first; sync() covers the rest
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "watcher did not pick up the change"
+        watcher.sync()
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def library(temp_dir):
+    _write(os.path.join(temp_dir, "Author", "a.epub"))
+    _write(os.path.join(temp_dir, "b.pdf"))
+    return temp_dir
+
+
+@pytest.fixture(params=BACKENDS)
+def watcher(request):
+    watcher = LibraryWatcher(scanner=LibraryScanner(), backend=request.param, debounce=0.0, poll_interval=3600)
+    changes = []
+    watcher.add_listener(lambda path, added, modified, removed: changes.append(
+        (sorted(os.path.basename(p) for p in added),
+         sorted(os.path.basename(p) for p in modified),
+         sorted(os.path.basename(p) for p in removed))))
+    watcher.changes = changes
+    yield watcher
+    watcher.stop()
+
+
+class TestLibraryWatcher:
+    """Test the background library watcher"""
+
+    def test_watch_scans_library(self, watcher, library):
+        """Test that watching a library scans it and starts the background thread"""
+        watcher.watch(library)
+        assert watcher.libraries() == [library]
+        assert watcher.stats()["books"] == 2
+        if watcher.backend == "inotify":
+            assert watcher.stats()["watches"] == 2
+
+    def test_added_book(self, watcher, library):
+        """Test that a book added to a nested folder is reported"""
+        watcher.watch(library)
+        _write(os.path.join(library, "Author", "Series", "c.EPUB"))
+        _bump_mtime(os.path.join(library, "Author"))
+        _wait_for(watcher, lambda: ["c.EPUB"] in [added for added, _, _ in watcher.changes])
+        assert watcher.stats()["books"] == 3
+
+    @patch('ebook_mcp.tools.library_watcher.invalidate_book')
+    def test_modified_and_removed_books_invalidated(self, mock_invalidate, watcher, library):
+        """Test that modified and removed books are dropped from the caches"""
+        watcher.watch(library)
+        _write(os.path.join(library, "b.pdf"), "a longer book")
+        os.unlink(os.path.join(library, "Author", "a.epub"))
+        _bump_mtime(library)
+        _bump_mtime(os.path.join(library, "Author"))
+        _wait_for(watcher, lambda: mock_invalidate.call_count == 2)
+        assert {os.path.basename(call.args[0]) for call in mock_invalidate.call_args_list} == {"a.epub", "b.pdf"}
+        assert [name for _, modified, _ in watcher.changes for name in modified] == ["b.pdf"]
+        assert [name for _, _, removed in watcher.changes for name in removed] == ["a.epub"]
+
+    @patch('ebook_mcp.tools.library_watcher.invalidate_book')
+    def test_poll_catches_book_rewritten_in_place(self, mock_invalidate, library):
+        """Test that polling reports a book rewritten without a change to its folder"""
+        watcher = LibraryWatcher(scanner=LibraryScanner(), backend="poll", debounce=0.0, poll_interval=3600)
+        changes = []
+        watcher.add_listener(lambda path, added, modified, removed: changes.append(modified))
+        try:
+            watcher.watch(library)
+            folder = os.path.join(library, "Author")
+            folder_mtime = os.stat(folder).st_mtime_ns
+            _write(os.path.join(folder, "a.epub"), "a longer book")
+            os.utime(folder, ns=(folder_mtime, folder_mtime))
+            watcher.sync()
+        finally:
+            watcher.stop()
+        assert changes == [[os.path.join(library, "Author", "a.epub")]]
+        assert mock_invalidate.call_args.args[0] == os.path.join(library, "Author", "a.epub")
+        assert watcher.stats()["invalidated"] == 1
+
+    @patch('ebook_mcp.tools.library_watcher.prewarm_book')
+    @patch('ebook_mcp.tools.library_watcher.get_extraction_cache', return_value=Mock())
+    def test_prewarm_new_books(self, mock_cache, mock_prewarm, watcher, library):
+        """Test that new books are pre-extracted in idle time"""
+        watcher.prewarm = True
+        watcher.watch(library)
+        _write(os.path.join(library, "d.epub"))
+        _bump_mtime(library)
+        deadline = time.monotonic() + 5
+        while not mock_prewarm.called:
+            assert time.monotonic() < deadline
+            watcher.sync()
+            time.sleep(0.02)
+        assert mock_prewarm.call_args.args[0] == os.path.join(library, "d.epub")
+        assert watcher.stats()["prewarmed"] == 1
+
+    def test_unwatch(self, watcher, library):
+        """Test that an unwatched library is no longer tracked"""
+        watcher.watch(library)
+        watcher.unwatch(library)
+        assert watcher.libraries() == []
+        assert watcher.stats()["watches"] == 0
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend is rejected"""
+        with pytest.raises(ValueError):
+            LibraryWatcher(backend="fsevents")
+
+    def test_invalidate_book_pagination(self, temp_dir):
+        """Test that invalidating a book drops its paginated chapters only"""
+        book = os.path.join(temp_dir, "a.epub")
+        other = os.path.join(temp_dir, "b.epub")
+        cache = get_pagination_cache()
+        cache.clear()
+        cache.get(f"epub_chapter_markdown:{os.path.realpath(book)}#ch1", "v1", lambda: "text")
+        cache.get(f"epub_chapter_markdown:{os.path.realpath(other)}#ch1", "v1", lambda: "text")
+        invalidate_book(book)
+        assert cache.stats()["entries"] == 1
+        cache.clear()
+
+    def test_watch_libraries_without_paths(self):
+        """Test that nothing is watched when EBOOK_MCP_WATCH_PATHS is empty"""
+        with patch.dict(os.environ, {"EBOOK_MCP_WATCH_PATHS": ""}):
+            assert watch_libraries() is None
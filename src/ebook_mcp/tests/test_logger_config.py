@@ -4,7 +4,10 @@ import os
 import sys
 import tempfile
 import logging
+import threading
+from logging.handlers import QueueHandler
 from unittest.mock import patch, MagicMock
+from ebook_mcp.tools import logger_config
 from ebook_mcp.tools.logger_config import (
     StructuredFormatter, 
     StructuredLogger, 
@@ -113,6 +116,29 @@ class TestStructuredLogger:
         assert hasattr(logger, 'error')
         assert hasattr(logger, 'critical')
 
+    def test_disabled_level_skips_work(self):
+        """Test that a disabled level neither evaluates fields nor reaches the logging module"""
+        logger = StructuredLogger("ebook_mcp.tools.sample")
+        logger._muted = False
+        logger.logger.setLevel(logging.INFO)
+        try:
+            field = MagicMock(return_value=3)
+            with patch.object(logger.logger, 'log') as mock_log:
+                logger.debug("Pages: %d", 3, page_count=field)
+                mock_log.assert_not_called()
+                field.assert_not_called()
+                
+                logger.info("Pages: %d", 3, page_count=field, chapter_count=None)
+                field.assert_called_once_with()
+                assert mock_log.call_args.args == (logging.INFO, "Pages: %d", 3)
+                assert mock_log.call_args.kwargs["extra"] == {"page_count": 3}
+        finally:
+            logger.logger.setLevel(logging.NOTSET)
+    
+    def test_muted_in_tests(self):
+        """Test that structured logging is off under pytest"""
+        assert not StructuredLogger("ebook_mcp.tools.sample").isEnabledFor(logging.CRITICAL)
+
 class TestLogOperationDecorator:
     """Test the log_operation decorator"""
     
@@ -133,7 +159,44 @@ class TestLogOperationDecorator:
         
         with pytest.raises(ValueError, match="Test error"):
             test_function()
+    
+    def test_log_operation_timing(self):
+        """Test that start and completion are logged with the duration when enabled"""
+        with patch('ebook_mcp.tools.logger_config.get_logger') as mock_get_logger:
+            mock_get_logger.return_value.isEnabledFor.return_value = True
+            
+            @log_operation("test_operation")
+            def test_function():
+                return "success"
+            
+            assert test_function() == "success"
+        logger = mock_get_logger.return_value
+        assert [c.args for c in logger.info.call_args_list] == [
+            ("Starting %s", "test_operation"), ("Completed %s successfully", "test_operation")
+        ]
+        assert "duration_ms" in logger.info.call_args.kwargs
+
+@pytest.fixture
+def restore_logging():
+    """Set the logging setup aside for the test, then stop what the test started and put it back"""
+    root_logger = logging.getLogger()
+    handlers = list(root_logger.handlers)
+    level = root_logger.level
+    listener = logger_config._queue_listener
+    log_file_path = logger_config._log_file_path
+    # Detached, so setup_logger in the test cannot stop the previous listener
+    logger_config._queue_listener = None
+    try:
+        yield
+    finally:
+        logger_config._stop_queue_listener()
+        root_logger.handlers[:] = handlers
+        root_logger.setLevel(level)
+        logger_config._queue_listener = listener
+        logger_config._log_file_path = log_file_path
+
 
+@pytest.mark.usefixtures("restore_logging")
 class TestSetupLogger:
     """Test logger setup"""
     
@@ -148,17 +211,35 @@ class TestSetupLogger:
                         setup_logger()
                         mock_makedirs.assert_called_once()
     
-    def test_setup_logger_configures_handlers(self):
+    def test_setup_logger_configures_handlers(self, temp_dir):
         """Test that setup_logger configures handlers correctly"""
         with patch('ebook_mcp.tools.logger_config.logging.getLogger') as mock_get_logger:
             mock_logger = MagicMock()
             mock_get_logger.return_value = mock_logger
             
-            setup_logger()
+            setup_logger("INFO", os.path.join(temp_dir, "server.log"))
             
-            # Verify handlers were added
-            mock_logger.addHandler.assert_called()
-            assert mock_logger.addHandler.call_count == 2  # file and console handlers
+            # One queue handler on the root logger; the listener thread owns file and console handlers
+            mock_logger.addHandler.assert_called_once()
+            assert isinstance(mock_logger.addHandler.call_args.args[0], QueueHandler)
+            handlers = logger_config._queue_listener.handlers
+            assert [type(handler) for handler in handlers] == [logging.FileHandler, logging.StreamHandler]
+    
+    def test_file_writes_leave_calling_thread(self, temp_dir):
+        """Test that records are formatted and written by the listener thread"""
+        log_file = os.path.join(temp_dir, "server.log")
+        setup_logger("DEBUG", log_file)
+        logger = StructuredLogger("ebook_mcp.tools.sample")
+        logger._muted = False
+        with patch.object(StructuredFormatter, 'format', autospec=True,
+                          side_effect=lambda formatter, record: threading.current_thread().name) as mock_format:
+            logger.info("Opened %s", "book.epub", file_path="book.epub")
+            logger_config._stop_queue_listener()
+        assert mock_format.call_count == 1
+        with open(log_file, encoding='utf-8') as f:
+            written_by = f.read().strip()
+        assert written_by and written_by != threading.current_thread().name
+
 
 if __name__ == "__main__":
     # Import sys for exception testing
@@ -1,4 +1,5 @@
 import pytest
+import asyncio
 import os
 import tempfile
 from unittest.mock import Mock, patch, MagicMock
@@ -21,22 +22,31 @@ from ebook_mcp.main import (
     get_all_epub_files,
     get_epub_metadata,
     get_epub_toc,
+    get_epub_chapters_markdown,
+    get_epub_chapter_markdown_page,
     get_all_pdf_files,
+    scan_library,
+    get_library_catalog,
     get_pdf_metadata,
     get_pdf_toc,
     get_pdf_page_text,
     get_pdf_page_markdown,
-    get_pdf_chapter_content
+    get_pdf_pages_text,
+    get_pdf_pages_markdown,
+    get_pdf_chapter_content,
+    get_server_stats,
+    profile_tool_calls
 )
+from ebook_mcp.tools import profiling
 
 
 class TestEpubFunctions:
-    """Test EPUB related functions"""
+    """Test EPUB related functions (tools are coroutines run in the tool executor)"""
     
     def test_get_all_epub_files_empty_directory(self):
         """Test get_all_epub_files with empty directory"""
         with tempfile.TemporaryDirectory() as temp_dir:
-            result = get_all_epub_files(temp_dir)
+            result = asyncio.run(get_all_epub_files(temp_dir))
             assert result == []
     
     def test_get_all_epub_files_with_epub_files(self):
@@ -48,7 +58,7 @@ class TestEpubFunctions:
                 with open(os.path.join(temp_dir, file), 'w') as f:
                     f.write("mock content")
             
-            result = get_all_epub_files(temp_dir)
+            result = asyncio.run(get_all_epub_files(temp_dir))
             assert set(result) == {"book1.epub", "book2.epub"}
     
     @patch('ebook_mcp.main.epub_helper.get_meta')
@@ -61,7 +71,7 @@ class TestEpubFunctions:
         }
         mock_get_meta.return_value = mock_metadata
         
-        result = get_epub_metadata("/path/to/test.epub")
+        result = asyncio.run(get_epub_metadata("/path/to/test.epub"))
         assert result == mock_metadata
         mock_get_meta.assert_called_once_with("/path/to/test.epub")
     
@@ -71,7 +81,7 @@ class TestEpubFunctions:
         mock_get_meta.side_effect = FileNotFoundError("File not found")
         
         with pytest.raises(FileNotFoundError):
-            get_epub_metadata("/path/to/nonexistent.epub")
+            asyncio.run(get_epub_metadata("/path/to/nonexistent.epub"))
     
     @patch('ebook_mcp.main.epub_helper.get_meta')
     def test_get_epub_metadata_parsing_error(self, mock_get_meta):
@@ -79,7 +89,7 @@ class TestEpubFunctions:
         mock_get_meta.side_effect = Exception("Parsing error")
         
         with pytest.raises(Exception):
-            get_epub_metadata("/path/to/corrupted.epub")
+            asyncio.run(get_epub_metadata("/path/to/corrupted.epub"))
     
     @patch('ebook_mcp.main.epub_helper.get_toc')
     def test_get_epub_toc_success(self, mock_get_toc):
@@ -90,7 +100,7 @@ class TestEpubFunctions:
         ]
         mock_get_toc.return_value = mock_toc
         
-        result = get_epub_toc("/path/to/test.epub")
+        result = asyncio.run(get_epub_toc("/path/to/test.epub"))
         assert result == mock_toc
         mock_get_toc.assert_called_once_with("/path/to/test.epub")
     
@@ -100,7 +110,30 @@ class TestEpubFunctions:
         mock_get_toc.side_effect = FileNotFoundError("File not found")
         
         with pytest.raises(FileNotFoundError):
-            get_epub_toc("/path/to/nonexistent.epub")
+            asyncio.run(get_epub_toc("/path/to/nonexistent.epub"))
+    
+    @patch('ebook_mcp.main.epub_helper.get_chapter_markdown_page')
+    def test_get_epub_chapter_markdown_page_success(self, mock_get_page):
+        """Test get_epub_chapter_markdown_page passes the cursor and budgets through"""
+        mock_page = {"content": "# Chapter 1", "offset": 0, "total_chars": 100, "next_cursor": "abc"}
+        mock_get_page.return_value = mock_page
+        
+        result = asyncio.run(get_epub_chapter_markdown_page("/path/to/test.epub", "ch1.xhtml", "xyz", max_tokens=500))
+        assert result == mock_page
+        mock_get_page.assert_called_once_with("/path/to/test.epub", "ch1.xhtml", "xyz", 20000, 500)
+    
+    @patch('ebook_mcp.main.epub_helper.get_multiple_chapters')
+    def test_get_epub_chapters_markdown_success(self, mock_get_chapters):
+        """Test get_epub_chapters_markdown with chapter ids and with a TOC range"""
+        mock_chapters = [("ch1.xhtml", "# Chapter 1"), ("ch1.xhtml#s1", "## Section 1.1")]
+        mock_get_chapters.return_value = mock_chapters
+        
+        result = asyncio.run(get_epub_chapters_markdown("/path/to/test.epub", ["ch1.xhtml", "ch1.xhtml#s1"]))
+        assert result == mock_chapters
+        mock_get_chapters.assert_called_with("/path/to/test.epub", ["ch1.xhtml", "ch1.xhtml#s1"], None, None, 'markdown')
+        
+        asyncio.run(get_epub_chapters_markdown("/path/to/test.epub", start_chapter_id="ch1.xhtml", end_chapter_id="ch2.xhtml"))
+        mock_get_chapters.assert_called_with("/path/to/test.epub", None, "ch1.xhtml", "ch2.xhtml", 'markdown')
 
 
 class TestPdfFunctions:
@@ -109,7 +142,7 @@ class TestPdfFunctions:
     def test_get_all_pdf_files_empty_directory(self):
         """Test get_all_pdf_files with empty directory"""
         with tempfile.TemporaryDirectory() as temp_dir:
-            result = get_all_pdf_files(temp_dir)
+            result = asyncio.run(get_all_pdf_files(temp_dir))
             assert result == []
     
     def test_get_all_pdf_files_with_pdf_files(self):
@@ -121,7 +154,7 @@ class TestPdfFunctions:
                 with open(os.path.join(temp_dir, file), 'w') as f:
                     f.write("mock content")
             
-            result = get_all_pdf_files(temp_dir)
+            result = asyncio.run(get_all_pdf_files(temp_dir))
             assert set(result) == {"document1.pdf", "document2.pdf"}
     
     @patch('ebook_mcp.main.pdf_helper.get_meta')
@@ -134,7 +167,7 @@ class TestPdfFunctions:
         }
         mock_get_meta.return_value = mock_metadata
         
-        result = get_pdf_metadata("/path/to/test.pdf")
+        result = asyncio.run(get_pdf_metadata("/path/to/test.pdf"))
         assert result == mock_metadata
         mock_get_meta.assert_called_once_with("/path/to/test.pdf")
     
@@ -144,7 +177,7 @@ class TestPdfFunctions:
         mock_get_meta.side_effect = FileNotFoundError("File not found")
         
         with pytest.raises(FileNotFoundError):
-            get_pdf_metadata("/path/to/nonexistent.pdf")
+            asyncio.run(get_pdf_metadata("/path/to/nonexistent.pdf"))
     
     @patch('ebook_mcp.main.pdf_helper.get_meta')
     def test_get_pdf_metadata_parsing_error(self, mock_get_meta):
@@ -152,7 +185,7 @@ class TestPdfFunctions:
         mock_get_meta.side_effect = Exception("Parsing error")
         
         with pytest.raises(Exception):
-            get_pdf_metadata("/path/to/corrupted.pdf")
+            asyncio.run(get_pdf_metadata("/path/to/corrupted.pdf"))
     
     @patch('ebook_mcp.main.pdf_helper.get_toc')
     def test_get_pdf_toc_success(self, mock_get_toc):
@@ -163,7 +196,7 @@ class TestPdfFunctions:
         ]
         mock_get_toc.return_value = mock_toc
         
-        result = get_pdf_toc("/path/to/test.pdf")
+        result = asyncio.run(get_pdf_toc("/path/to/test.pdf"))
         assert result == mock_toc
         mock_get_toc.assert_called_once_with("/path/to/test.pdf")
     
@@ -173,14 +206,14 @@ class TestPdfFunctions:
         mock_get_toc.side_effect = FileNotFoundError("File not found")
         
         with pytest.raises(FileNotFoundError):
-            get_pdf_toc("/path/to/nonexistent.pdf")
+            asyncio.run(get_pdf_toc("/path/to/nonexistent.pdf"))
     
     @patch('ebook_mcp.main.pdf_helper.extract_page_text')
     def test_get_pdf_page_text_success(self, mock_extract):
         """Test get_pdf_page_text successful case"""
         mock_extract.return_value = "This is page 1 content."
         
-        result = get_pdf_page_text("/path/to/test.pdf", 1)
+        result = asyncio.run(get_pdf_page_text("/path/to/test.pdf", 1))
         assert result == "This is page 1 content."
         mock_extract.assert_called_once_with("/path/to/test.pdf", 1)
     
@@ -190,14 +223,14 @@ class TestPdfFunctions:
         mock_extract.side_effect = Exception("Extraction error")
         
         with pytest.raises(Exception):
-            get_pdf_page_text("/path/to/test.pdf", 1)
+            asyncio.run(get_pdf_page_text("/path/to/test.pdf", 1))
     
     @patch('ebook_mcp.main.pdf_helper.extract_page_markdown')
     def test_get_pdf_page_markdown_success(self, mock_extract):
         """Test get_pdf_page_markdown successful case"""
         mock_extract.return_value = "# Page 1\n\nThis is page 1 content."
         
-        result = get_pdf_page_markdown("/path/to/test.pdf", 1)
+        result = asyncio.run(get_pdf_page_markdown("/path/to/test.pdf", 1))
         assert result == "# Page 1\n\nThis is page 1 content."
         mock_extract.assert_called_once_with("/path/to/test.pdf", 1)
     
@@ -207,7 +240,34 @@ class TestPdfFunctions:
         mock_extract.side_effect = Exception("Extraction error")
         
         with pytest.raises(Exception):
-            get_pdf_page_markdown("/path/to/test.pdf", 1)
+            asyncio.run(get_pdf_page_markdown("/path/to/test.pdf", 1))
+    
+    @patch('ebook_mcp.main.pdf_helper.extract_page_range')
+    def test_get_pdf_pages_text_success(self, mock_extract):
+        """Test get_pdf_pages_text successful case"""
+        mock_result = {"content": "page 1\npage 2", "pages": [1, 2], "next_page": 3, "total_pages": 9}
+        mock_extract.return_value = mock_result
+        
+        result = asyncio.run(get_pdf_pages_text("/path/to/test.pdf", 1, 9, max_chars=100))
+        assert result == mock_result
+        mock_extract.assert_called_once_with("/path/to/test.pdf", 1, 9, "text", 100)
+    
+    @patch('ebook_mcp.main.pdf_helper.extract_page_range')
+    def test_get_pdf_pages_markdown_success(self, mock_extract):
+        """Test get_pdf_pages_markdown successful case"""
+        mock_extract.return_value = {"content": "## Page 1", "pages": [1], "next_page": None, "total_pages": 1}
+        
+        result = asyncio.run(get_pdf_pages_markdown("/path/to/test.pdf", 1, 1))
+        assert result["content"] == "## Page 1"
+        mock_extract.assert_called_once_with("/path/to/test.pdf", 1, 1, "markdown", 50000)
+    
+    @patch('ebook_mcp.main.pdf_helper.extract_page_range')
+    def test_get_pdf_pages_text_error(self, mock_extract):
+        """Test get_pdf_pages_text with error"""
+        mock_extract.side_effect = Exception("Extraction error")
+        
+        with pytest.raises(Exception):
+            asyncio.run(get_pdf_pages_text("/path/to/test.pdf", 1, 5))
     
     @patch('ebook_mcp.main.pdf_helper.extract_chapter_by_title')
     def test_get_pdf_chapter_content_success(self, mock_get_chapter):
@@ -215,7 +275,7 @@ class TestPdfFunctions:
         mock_content = ("This is chapter content.", [1, 2, 3])
         mock_get_chapter.return_value = mock_content
         
-        result = get_pdf_chapter_content("/path/to/test.pdf", "Chapter 1")
+        result = asyncio.run(get_pdf_chapter_content("/path/to/test.pdf", "Chapter 1"))
         assert result == mock_content
         mock_get_chapter.assert_called_once_with("/path/to/test.pdf", "Chapter 1")
     
@@ -225,7 +285,72 @@ class TestPdfFunctions:
         mock_get_chapter.side_effect = Exception("Chapter extraction error")
         
         with pytest.raises(Exception):
-            get_pdf_chapter_content("/path/to/test.pdf", "Chapter 1")
+            asyncio.run(get_pdf_chapter_content("/path/to/test.pdf", "Chapter 1"))
+
+
+class TestLibraryFunctions:
+    """Test library related functions"""
+
+    def test_scan_library_nested_folders(self):
+        """Test scan_library finds books in subfolders with their details"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.makedirs(os.path.join(temp_dir, "Author"))
+            for rel_path in ("a.epub", os.path.join("Author", "b.PDF"), "c.txt"):
+                with open(os.path.join(temp_dir, rel_path), 'w') as f:
+                    f.write("mock content")
+
+            result = asyncio.run(scan_library(temp_dir))
+            assert [(entry["relative_path"], entry["format"], entry["size"]) for entry in result] == [
+                (os.path.join("Author", "b.PDF"), "pdf", 12),
+                ("a.epub", "epub", 12),
+            ]
+
+    @patch('ebook_mcp.main.library_catalog.get_library_catalog')
+    def test_get_library_catalog(self, mock_get_catalog):
+        """Test get_library_catalog passes filters, sorting and paging to the catalog"""
+        mock_get_catalog.return_value.query.return_value = {"books": [], "total": 0}
+        result = asyncio.run(get_library_catalog("/books", query="logs", format="pdf", sort_by="pages",
+                                                 descending=True, offset=50, limit=10))
+        assert result == {"books": [], "total": 0}
+        mock_get_catalog.return_value.query.assert_called_once_with(
+            "/books", "logs", "pdf", None, None, None, "pages", True, 50, 10, False
+        )
+
+    def test_scan_library_missing_folder(self):
+        """Test scan_library with a missing folder"""
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(scan_library("/path/to/nonexistent"))
+
+
+class TestServerStats:
+    """Test the server statistics tool"""
+
+    def test_get_server_stats(self):
+        """Test that tool calls and component counters are reported"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            asyncio.run(get_all_pdf_files(temp_dir))
+        result = asyncio.run(get_server_stats())
+        assert result["tools"]["get_all_pdf_files"]["calls"] >= 1
+        assert {"p50_ms", "p95_ms", "p99_ms", "bytes_returned"} <= set(result["tools"]["get_all_pdf_files"])
+        assert result["tool_executor"]["tools"]["get_server_stats"]["lane"] == "light"
+        assert "hit_ratio" in result["document_pool"]
+        assert "documents" in result["document_pool"]
+
+
+class TestProfileToolCalls:
+    """Test the tool that turns on profiling"""
+
+    def test_profile_tool_calls(self, temp_dir):
+        """Test that profiling is configured, written to the profile directory and turned off"""
+        profiler = profiling.get_tool_profiler()
+        with patch.object(profiler, "directory", temp_dir):
+            status = asyncio.run(profile_tool_calls(calls=1, tools=["get_all_pdf_files"]))
+            assert status["active"] and status["tools"] == ["get_all_pdf_files"]
+            asyncio.run(get_all_pdf_files(temp_dir))
+            status = asyncio.run(get_server_stats())["profiler"]
+            assert not status["active"]
+            assert os.path.dirname(status["recent"][-1]) == temp_dir
+            assert not asyncio.run(profile_tool_calls(calls=0))["active"]
 
 
 class TestMainModule:
@@ -237,6 +362,59 @@ class TestMainModule:
         assert hasattr(ebook_mcp.main, 'mcp')
         assert hasattr(ebook_mcp.main, 'get_all_epub_files')
         assert hasattr(ebook_mcp.main, 'get_all_pdf_files')
+
+    def test_reimport_has_no_side_effects(self, temp_dir):
+        """Test that re-running main.py the way spawned workers do (as __mp_main__) starts nothing"""
+        import subprocess
+        main_path = os.path.join(os.path.dirname(__file__), '..', 'main.py')
+        code = (
+            "import runpy, sys\n"
+            f"runpy.run_path({main_path!r}, run_name='__mp_main__')\n"
+            "from ebook_mcp.tools import tool_executor\n"
+            "print('mcp.server.fastmcp' in sys.modules, tool_executor._tool_executor is None)\n"
+        )
+        env = dict(os.environ, HOME=temp_dir, PYTHONPATH=os.path.join(os.path.dirname(__file__), '..', '..'))
+        result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.split() == ["False", "True"]
+        assert not os.path.exists(os.path.join(temp_dir, "Library", "Logs", "ebook-mcp"))
+
+    def test_create_server_registers_tools(self):
+        """Test that every tool is registered with the server"""
+        import ebook_mcp.main
+        tools = asyncio.run(ebook_mcp.main.create_server().list_tools())
+        assert {tool.name for tool in tools} == {func.__name__ for func in ebook_mcp.main.server_tools}
+        assert "get_server_stats" in {tool.name for tool in tools}
+
+    @patch('ebook_mcp.tools.progress.MIN_INTERVAL', 0.0)
+    def test_markdown_progress_notifications(self):
+        """Test that a client asking for progress gets notifications while a chapter converts"""
+        import ebook_mcp.main
+        from bs4 import BeautifulSoup
+        from mcp.shared.memory import create_connected_server_and_client_session
+        from ebook_mcp.tools.markdown_stream import iter_markdown
+
+        html = "".join(f"<p>Paragraph {i} of a long chapter.</p>" for i in range(2000))
+
+        def convert(epub_path, chapter_id):
+            return "".join(iter_markdown(BeautifulSoup(html, "html.parser")))
+
+        async def call():
+            updates = []
+
+            async def on_progress(progress, total, message):
+                updates.append(progress)
+
+            async with create_connected_server_and_client_session(ebook_mcp.main.create_server()) as client:
+                result = await client.call_tool("get_epub_chapter_markdown",
+                                                {"epub_path": "/books/a.epub", "chapter_id": "ch1.xhtml"},
+                                                progress_callback=on_progress)
+            return result, updates
+
+        with patch('ebook_mcp.main.epub_helper.get_chapter_markdown', side_effect=convert):
+            result, updates = asyncio.run(call())
+        assert "Paragraph 1999" in result.content[0].text
+        assert updates and updates == sorted(updates)
     
     @pytest.mark.skip(reason="Requires actual MCP server environment")
     def test_cli_entry_function(self):
@@ -318,4 +496,24 @@ class TestDecorators:
             test_epub_function()
         
         with pytest.raises(PdfProcessingError, match="Test PDF error"):
-            test_pdf_function() 
\ No newline at end of file
+            test_pdf_function() 
+    
+    def test_handle_mcp_errors_async(self):
+        """Test that handle_mcp_errors wraps coroutine functions"""
+        from ebook_mcp.main import handle_mcp_errors
+        import inspect
+        
+        @handle_mcp_errors
+        async def test_function():
+            raise FileNotFoundError("Async file not found")
+        
+        assert inspect.iscoroutinefunction(test_function)
+        with pytest.raises(FileNotFoundError, match="Async file not found"):
+            asyncio.run(test_function())
+    
+    def test_tools_are_async(self):
+        """Test that MCP tools are coroutine functions with their original signatures"""
+        import inspect
+        
+        assert inspect.iscoroutinefunction(get_epub_toc)
+        assert list(inspect.signature(get_pdf_page_text).parameters) == ["pdf_path", "page_number"]
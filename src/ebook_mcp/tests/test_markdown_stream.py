@@ -0,0 +1,87 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.epub_helper import convert_html_to_markdown, parse_html
+from ebook_mcp.tools import markdown_stream
+from ebook_mcp.tools.markdown_stream import iter_markdown, iter_markup, new_html2text
+
+
+def _chapter(sections=40):
+    """A chapter exercising the html2text constructs that carry state between paragraphs"""
+    parts = ['<h1 id="top">Chapter &amp; Title</h1>']
+    for i in range(sections):
+        parts.append(
+            f'<h2>Section {i}</h2>'
+            f'<p>Paragraph {i} with <em>emphasis</em>, <strong>bold</strong>, a&nbsp;non-breaking space '
+            f'and a <a href="http://example.com/{i}?a=1&amp;b=2">link</a>. ' + 'Filler text. ' * 20 + '</p>'
+            f'<p><a href="#top"></a>&nbsp;starts with a space, 1. looks like a list &lt;tag&gt;</p>'
+            f'<ul><li>item one</li><li>item <code>two</code></li></ul>'
+            f'<blockquote><p>Quoted {i}</p></blockquote>'
+            f'<pre>code line 1\n  code line 2</pre><hr/>'
+        )
+    return "".join(parts)
+
+
+# Constructs whose html2text output depends on state kept across elements
+_SAMPLES = {
+    "nested_lists": "<ol><li>one<ul><li>a</li><li>b<ol><li>deep</li></ol></li></ul></li><li>two</li></ol>" * 30,
+    "tables": "<table><tr><th>Name</th><th>Value</th></tr><tr><td>a | b</td><td><em>1</em></td></tr></table>"
+              "<p>between</p>" * 30,
+    "images_and_links": '<p><img src="img/a.png" alt="A picture"/> <a href="ch2.xhtml#s1"><img src="b.png"/></a>'
+                        ' <a href="http://example.com/" title="T">titled</a></p>' * 40,
+    "breaks_and_code": "<p>line<br/>next<br/><br/>after</p><pre><code>x = 1\n\n    y = 2</code></pre>"
+                       "<p><code>a*b_c</code> and <del>gone</del>, <sub>2</sub>, <sup>3</sup></p>" * 40,
+    "quotes": "<blockquote><p>outer</p><blockquote><p>inner</p><ul><li>x</li></ul></blockquote></blockquote>" * 30,
+    "entities": "<p>&lt;&gt;&amp;&quot;&#8212;&copy; caf&eacute; 中文 &nbsp;&nbsp; *stars* _under_ #hash</p>" * 40,
+}
+
+
+class TestMarkdownStream:
+    """Test the streaming HTML to markdown conversion"""
+
+    def test_markup_matches_str(self):
+        """Test that piecewise serialization gives the same markup as str()"""
+        tree = parse_html(_chapter(3))
+        assert "".join(iter_markup(tree)) == str(tree)
+
+    @pytest.mark.parametrize("chunk_chars", [1, 100, 4096, 1 << 20])
+    def test_matches_html2text(self, chunk_chars):
+        """Test that the streamed chunks join to exactly html2text's output"""
+        tree = parse_html(_chapter())
+        expected = convert_html_to_markdown(str(tree))
+        assert "".join(iter_markdown(tree, chunk_chars)) == expected
+
+    @pytest.mark.parametrize("sample", sorted(_SAMPLES))
+    def test_matches_html2text_handle(self, sample):
+        """Test the streamed output against html2text's public handle() on each construct"""
+        html = _SAMPLES[sample]
+        expected = new_html2text().handle(str(parse_html(html)))
+        for chunk_chars in (1, 64, 1024):
+            assert "".join(iter_markdown(parse_html(html), chunk_chars)) == expected
+
+    def test_fallback_without_internals(self):
+        """Test that whole-string conversion is used when the library internals are missing"""
+        tree = parse_html(_chapter(3))
+        expected = convert_html_to_markdown(str(tree))
+        with patch.object(markdown_stream, "_streaming", False):
+            assert list(iter_markup(tree)) == [str(tree)]
+            assert list(iter_markdown(tree, chunk_chars=1)) == [expected]
+
+    def test_internals_present(self):
+        """Test that the pinned bs4 and html2text versions provide the internals used for streaming"""
+        with patch.object(markdown_stream, "_streaming", None):
+            assert markdown_stream.streaming_supported()
+
+    def test_yields_before_end(self):
+        """Test that markdown is produced while the chapter is still being converted"""
+        tree = parse_html(_chapter())
+        chunks = iter_markdown(tree, chunk_chars=1024)
+        first = next(chunks)
+        assert first.startswith("# Chapter & Title")
+        rest = list(chunks)
+        assert len(rest) > 10
+        assert len(first) < len(first + "".join(rest)) / 10
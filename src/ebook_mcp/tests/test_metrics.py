@@ -0,0 +1,148 @@
+import pytest
+import asyncio
+import os
+import sys
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.metrics import (LatencyHistogram, MetricsRegistry, result_size, serve_metrics_from_env,
+                                     start_metrics_server)
+from ebook_mcp.tools.tool_executor import ToolExecutor
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry(max_books=3)
+
+
+class TestLatencyHistogram:
+    """Test the fixed-bucket latency histogram"""
+
+    def test_percentiles(self):
+        """Test that percentiles land near the true values and within the observed range"""
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000)
+        assert histogram.count == 100
+        assert histogram.percentile(0.50) == pytest.approx(0.050, rel=0.2)
+        assert histogram.percentile(0.95) == pytest.approx(0.095, rel=0.2)
+        assert histogram.percentile(0.99) <= histogram.max == 0.1
+        assert histogram.cumulative()[-1] == (float("inf"), 100)
+
+    def test_single_and_empty(self):
+        """Test an empty histogram and one with a single slow call"""
+        histogram = LatencyHistogram()
+        assert histogram.percentile(0.5) == 0.0
+        histogram.observe(500.0)
+        assert histogram.percentile(0.5) == 500.0
+        assert histogram.counts[-1] == 1
+
+
+class TestMetricsRegistry:
+    """Test the per-tool and per-book metrics registry"""
+
+    def test_tool_stats(self, registry):
+        """Test calls, errors, percentiles and bytes returned per tool"""
+        for _ in range(9):
+            registry.observe("get_epub_toc", 0.002, result=[("Intro", "ch1.xhtml")])
+        registry.observe("get_epub_toc", 0.2, ok=False, result="ignored")
+        stats = registry.tool_stats()["get_epub_toc"]
+        assert stats["calls"] == 10
+        assert stats["errors"] == 1
+        assert stats["p50_ms"] == pytest.approx(2.0, rel=0.25)
+        assert stats["max_ms"] == 200.0
+        assert stats["bytes_returned"] == 9 * len("Introch1.xhtml")
+
+    def test_slowest_books_bounded(self, registry):
+        """Test that books are ranked by total run time and the oldest dropped"""
+        registry.observe("get_pdf_page_text", 1.0, book="/books/a.pdf")
+        for book in ("/books/b.pdf", "/books/c.pdf", "/books/d.pdf"):
+            registry.observe("get_pdf_page_text", 0.1, book=book)
+        registry.observe("get_pdf_page_text", 0.3, book="/books/c.pdf")
+        books = registry.slowest_books()
+        assert [entry["book"] for entry in books] == ["/books/c.pdf", "/books/b.pdf", "/books/d.pdf"]
+        assert books[0]["calls"] == 2
+        assert books[0]["max_ms"] == 300.0
+
+    def test_sources(self, registry):
+        """Test that sources are read on each snapshot, with hit ratios and errors"""
+        counters = {"documents": 1, "hits": 3, "misses": 1}
+
+        def broken():
+            raise RuntimeError("database is locked")
+
+        registry.add_source("document_pool", lambda: counters)
+        registry.add_source("extraction_cache", lambda: None)
+        registry.add_source("catalog", broken)
+        snapshot = registry.snapshot()
+        assert snapshot["document_pool"] == {"documents": 1, "hits": 3, "misses": 1, "hit_ratio": 0.75}
+        assert "extraction_cache" not in snapshot
+        assert snapshot["catalog"] == {"error": "database is locked"}
+        counters["documents"] = 2
+        assert registry.snapshot()["document_pool"]["documents"] == 2
+
+    def test_result_size(self):
+        """Test the size estimate of strings, containers and scalars"""
+        assert result_size("abc") == 3
+        assert result_size("情绪") == 6
+        assert result_size({"pages": 12, "title": "x"}) == len("pages12titlex")
+        assert result_size(("text", [1, 2])) == 6
+        assert result_size(None) == 0
+
+    def test_executor_records_calls(self, registry):
+        """Test that the tool executor feeds run times and the book argument into the registry"""
+        executor = ToolExecutor(light_workers=1, heavy_workers=1, metrics=registry)
+        executor.configure("get_pdf_page_text", book_arg="pdf_path", book_index=0)
+        try:
+            asyncio.run(executor.run("get_pdf_page_text", lambda pdf_path, page_number: "page", "/b.pdf", 1))
+            asyncio.run(executor.run("get_pdf_page_text", lambda pdf_path, page_number: "page",
+                                     pdf_path="/c.pdf", page_number=1))
+        finally:
+            executor.shutdown()
+        assert registry.tool_stats()["get_pdf_page_text"]["bytes_returned"] == 8
+        assert sorted(entry["book"] for entry in registry.slowest_books()) == ["/b.pdf", "/c.pdf"]
+
+
+class TestPrometheusEndpoint:
+    """Test the Prometheus text format and its HTTP endpoint"""
+
+    def test_render(self, registry):
+        """Test the histogram series and source gauges"""
+        registry.observe('get_"odd"_tool', 0.004)
+        registry.add_source("tool_executor", lambda: {"workers": {"light": 4}, "tools": {"t": {"queued": 2}}})
+        registry.add_source("document_pool", lambda: {"documents": 1, "hits": 1, "misses": 1, "path": "/x"})
+        text = registry.render_prometheus()
+        assert 'ebook_mcp_tool_duration_seconds_bucket{tool="get_\\"odd\\"_tool",le="0.004"} 1' in text
+        assert 'ebook_mcp_tool_duration_seconds_bucket{tool="get_\\"odd\\"_tool",le="0.003"} 0' in text
+        assert 'ebook_mcp_tool_duration_seconds_count{tool="get_\\"odd\\"_tool"} 1' in text
+        assert 'ebook_mcp_tool_executor_workers{name="light"} 4' in text
+        assert 'ebook_mcp_tool_executor_tools_queued{name="t"} 2' in text
+        assert "ebook_mcp_document_pool_hit_ratio 0.5" in text
+        assert "path" not in text
+
+    def test_http_endpoint(self, registry):
+        """Test that /metrics is served on localhost and other paths are not"""
+        registry.observe("get_pdf_toc", 0.01)
+        server = start_metrics_server(0, registry=registry)
+        try:
+            host, port = server.server_address
+            assert host == "127.0.0.1"
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=10) as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert 'tool="get_pdf_toc"' in response.read().decode("utf-8")
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=10)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_serve_from_env(self):
+        """Test that the endpoint is off by default and a bad port does not raise"""
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("EBOOK_MCP_METRICS_PORT", None)
+            assert serve_metrics_from_env() is None
+        with patch.dict(os.environ, {"EBOOK_MCP_METRICS_PORT": "not-a-port"}):
+            assert serve_metrics_from_env() is None
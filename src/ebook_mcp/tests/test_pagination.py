@@ -0,0 +1,170 @@
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.pagination import (
+    PARSED_SOURCE_FACTOR,
+    PagedText,
+    PaginationCache,
+    decode_cursor,
+    encode_cursor,
+    estimate_tokens,
+    get_pagination_cache,
+    paginate
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_pagination_cache():
+    get_pagination_cache().clear()
+    yield
+    get_pagination_cache().clear()
+
+
+def _document(paragraphs=50):
+    return "".join(f"## Heading {i}\n\nParagraph {i} " + "word " * 40 + "\n\n" for i in range(paragraphs))
+
+
+def _read_all(text, **budget):
+    pages = []
+    cursor = None
+    while True:
+        page = paginate("doc", "v1", lambda: text, cursor, **budget)
+        pages.append(page["content"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+class TestPagination:
+    """Test cursor-based pagination of extracted text"""
+
+    def test_pages_reassemble_document(self):
+        """Test that the pages cover the document exactly once, within budget"""
+        text = _document()
+        pages = _read_all(text, max_chars=1000)
+        assert "".join(pages) == text
+        assert len(pages) > 1
+        assert all(len(page) <= 1000 for page in pages)
+
+    def test_pages_end_at_boundaries(self):
+        """Test that pages end after a paragraph and the next starts with a heading or paragraph"""
+        pages = _read_all(_document(), max_chars=1000)
+        assert all(page.endswith("\n\n") for page in pages)
+
+    def test_token_budget(self):
+        """Test that max_tokens bounds the estimated tokens per page"""
+        pages = _read_all(_document(), max_chars=100000, max_tokens=200)
+        assert all(estimate_tokens(page) <= 200 for page in pages)
+
+    def test_oversized_paragraph_is_cut_at_whitespace(self):
+        """Test that a paragraph larger than the budget is split between words"""
+        text = "word " * 1000
+        pages = _read_all(text, max_chars=100)
+        assert "".join(pages) == text
+        assert all(page.endswith(" ") for page in pages)
+
+    def test_estimate_tokens(self):
+        """Test that CJK characters count as one token each"""
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("中文字符") == 4
+
+    def test_document_loaded_once(self):
+        """Test that following pages reuse the cached document"""
+        cache = PaginationCache()
+        loads = []
+        load = lambda: loads.append(1) or _document()
+        cache.get("doc", "v1", load)
+        cache.get("doc", "v1", load)
+        cache.get("doc", "v2", load)
+        assert len(loads) == 2
+        assert cache.stats()["hits"] == 1
+
+    def test_cache_bounded_by_size(self):
+        """Test that least recently used documents are evicted over max_chars"""
+        cache = PaginationCache(max_chars=250)
+        for name in ("a", "b", "c"):
+            cache.get(name, "v1", lambda: "x" * 100)
+        assert cache.stats()["entries"] == 2
+        assert cache.stats()["chars"] == 200
+
+    def test_half_read_document_charged_its_source(self):
+        """Test that a partly produced document counts its parsed source until it completes"""
+        cache = get_pagination_cache()
+        chunks = lambda: iter(["x" * 100 + "\n\n", "y" * 100 + "\n\n"])
+        first = paginate("doc", "v1", chunks, max_chars=102, source_size=lambda: 50)
+        assert first["next_cursor"] is not None
+        assert cache.stats()["incomplete"] == 1
+        assert cache.stats()["chars"] > 50 * PARSED_SOURCE_FACTOR
+
+        # Producing the last page completes the document and releases its source at once
+        paginate("doc", "v1", chunks, first["next_cursor"], max_chars=102, source_size=lambda: 50)
+        assert cache.stats()["incomplete"] == 0
+        assert cache.stats()["chars"] == 204
+
+    def test_half_read_documents_evicted_first(self):
+        """Test that partly produced documents are evicted before complete ones"""
+        cache = PaginationCache(max_chars=1000)
+        cache.get("complete", "v1", lambda: "x" * 100)
+        cache.get("abandoned", "v1", lambda: iter(["y" * 100, "z" * 100]), lambda: 10)
+        cache.get("recent", "v1", lambda: "w" * 100)
+        assert cache.stats()["entries"] == 3
+        # Over budget: the half-read document goes although "complete" is older
+        cache.get("new", "v1", lambda: "v" * 700)
+        assert cache.stats()["entries"] == 3
+        assert cache.stats()["incomplete"] == 0
+        assert cache.stats()["chars"] == 900
+
+    def test_cursor_validation(self):
+        """Test that cursors are tied to their document and its version"""
+        cursor = encode_cursor("doc", "v1", 42)
+        assert decode_cursor(cursor, "doc", "v1") == 42
+        with pytest.raises(ValueError, match="different document"):
+            decode_cursor(cursor, "other", "v1")
+        with pytest.raises(ValueError, match="changed"):
+            decode_cursor(cursor, "doc", "v2")
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor("not a cursor", "doc", "v1")
+
+    def test_paged_text_boundaries(self):
+        """Test that boundaries are found after blank lines and before headings"""
+        paged = PagedText("one\n\ntwo\n# three")
+        assert paged.boundaries == [5, 9, 16]
+
+    def test_streamed_document_pulled_on_demand(self):
+        """Test that a chunked document is only produced as far as the pages need"""
+        text = _document()
+        pulled = []
+
+        def chunks():
+            for i in range(0, len(text), 100):
+                pulled.append(i)
+                yield text[i:i + 100]
+
+        first = paginate("streamed", "v1", chunks, max_chars=500)
+        assert first["total_chars"] is None
+        assert len(pulled) < len(text) // 100 / 2
+
+        pages = [first["content"]]
+        cursor = first["next_cursor"]
+        while cursor is not None:
+            page = paginate("streamed", "v1", chunks, cursor, max_chars=500)
+            pages.append(page["content"])
+            cursor = page["next_cursor"]
+        assert "".join(pages) == text
+        assert page["total_chars"] == len(text)
+        assert all(len(page) <= 500 for page in pages)
+
+    def test_failed_stream_not_cached(self):
+        """Test that a document whose production failed is produced again next time"""
+        def failing():
+            yield "## Heading\n\n" + "word " * 200
+            raise RuntimeError("extraction failed")
+
+        first = paginate("failing", "v1", failing, max_chars=100)
+        with pytest.raises(RuntimeError):
+            paginate("failing", "v1", failing, first["next_cursor"], max_chars=2000)
+        assert get_pagination_cache().stats()["entries"] == 0
+
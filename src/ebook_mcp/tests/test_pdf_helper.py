@@ -1,6 +1,7 @@
 import pytest
 import os
 import tempfile
+import threading
 from unittest.mock import Mock, patch, MagicMock
 
 # Mock external dependencies
@@ -19,7 +20,11 @@ from ebook_mcp.tools.pdf_helper import (
     get_toc,
     extract_page_text,
     extract_page_markdown,
-    extract_chapter_by_title
+    extract_chapter_by_title,
+    extract_page_range,
+    iter_chapter_pages,
+    open_pdf,
+    PdfProcessingError
 )
 
 
@@ -407,3 +412,158 @@ class TestPdfHelper:
             assert pages == [1]
         finally:
             os.unlink(pdf_path)
+    
+    @patch('ebook_mcp.tools.pdf_helper.fitz.open')
+    def test_extract_chapter_by_title_opens_document_once(self, mock_fitz_open):
+        """Test that chapter extraction shares a single document handle"""
+        mock_doc = Mock()
+        mock_doc.get_toc.return_value = [
+            (1, "Chapter 1", 1),
+            (1, "Chapter 2", 5)
+        ]
+        mock_doc.page_count = 8
+        mock_page = Mock()
+        mock_page.get_text.return_value = "page content"
+        mock_doc.__getitem__ = Mock(return_value=mock_page)
+        mock_fitz_open.return_value = mock_doc
+        
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(b"mock pdf content")
+            pdf_path = f.name
+        
+        try:
+            content, pages = extract_chapter_by_title(pdf_path, "Chapter 2")
+            assert pages == [5, 6, 7]
+            assert mock_fitz_open.call_count == 1
+        finally:
+            os.unlink(pdf_path)
+    
+    @patch('ebook_mcp.tools.pdf_helper.fitz.open')
+    def test_iter_chapter_pages_reports_timing(self, mock_fitz_open):
+        """Test that streamed chapter pages carry per-page timing"""
+        mock_doc = Mock()
+        mock_doc.get_toc.return_value = [
+            (1, "Chapter 1", 1),
+            (2, "Section 1.1", 3)
+        ]
+        mock_doc.page_count = 4
+        mock_doc.__getitem__ = Mock(side_effect=lambda i: Mock(get_text=Mock(return_value=f"page {i + 1}")))
+        mock_fitz_open.return_value = mock_doc
+        
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(b"mock pdf content")
+            pdf_path = f.name
+        
+        try:
+            results = list(iter_chapter_pages(pdf_path, "Chapter 1"))
+            assert [(page, text) for page, text, _ in results] == [(1, "page 1"), (2, "page 2")]
+            assert all(duration_ms >= 0 for _, _, duration_ms in results)
+        finally:
+            os.unlink(pdf_path)
+
+    @patch('ebook_mcp.tools.pdf_helper.fitz.open')
+    @patch('ebook_mcp.tools.pdf_helper.CHAPTER_PAGES_PER_LEASE', 2)
+    def test_iter_chapter_pages_streams_between_leases(self, mock_fitz_open):
+        """Test that pages stream batch by batch and the document is free between batches"""
+        mock_doc = Mock()
+        mock_doc.get_toc.return_value = [(1, "Chapter 1", 1), (1, "Chapter 2", 6)]
+        mock_doc.page_count = 7
+        mock_doc.__getitem__ = Mock(side_effect=lambda i: Mock(get_text=Mock(return_value=f"page {i + 1}")))
+        mock_fitz_open.return_value = mock_doc
+
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(b"mock pdf content")
+            pdf_path = f.name
+
+        try:
+            pages = iter_chapter_pages(pdf_path, "Chapter 1")
+            assert next(pages)[0] == 1
+            # Only the first batch was extracted
+            assert mock_doc.__getitem__.call_count == 2
+            leased = threading.Event()
+
+            def lease():
+                with open_pdf(pdf_path):
+                    leased.set()
+
+            thread = threading.Thread(target=lease, daemon=True)
+            thread.start()
+            assert leased.wait(5)
+            assert [page for page, _, _ in pages] == [2, 3, 4, 5]
+            # The pooled handle is reused by every batch
+            assert mock_fitz_open.call_count == 1
+        finally:
+            os.unlink(pdf_path)
+
+
+class TestExtractPageRange:
+    """Test batch page range extraction"""
+
+    @pytest.fixture
+    def pdf_path(self):
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(b"mock pdf content")
+        yield f.name
+        os.unlink(f.name)
+
+    @pytest.fixture
+    def mock_doc(self):
+        mock_doc = Mock()
+        mock_doc.page_count = 5
+        mock_doc.__getitem__ = Mock(side_effect=lambda i: Mock(get_text=Mock(return_value=f"page {i + 1} " * 10)))
+        with patch('ebook_mcp.tools.pdf_helper.fitz.open', return_value=mock_doc) as mock_fitz_open:
+            yield mock_fitz_open
+
+    def test_whole_range_in_one_open(self, mock_doc, pdf_path):
+        """Test that a range within budget comes back from a single document open"""
+        result = extract_page_range(pdf_path, 2, 4)
+        assert result["pages"] == [2, 3, 4]
+        assert result["next_page"] is None
+        assert result["total_pages"] == 5
+        assert "page 2" in result["content"] and "page 4" in result["content"]
+        assert mock_doc.call_count == 1
+
+    def test_budget_returns_continuation(self, mock_doc, pdf_path):
+        """Test that the budget stops at a page boundary and reports where to resume"""
+        result = extract_page_range(pdf_path, 1, 5, max_chars=150)
+        assert result["pages"] == [1, 2]
+        assert result["next_page"] == 3
+
+        result = extract_page_range(pdf_path, result["next_page"], 5, max_chars=150)
+        assert result["pages"] == [3, 4]
+        assert result["next_page"] == 5
+
+    def test_at_least_one_page(self, mock_doc, pdf_path):
+        """Test that a page larger than the budget is still returned"""
+        result = extract_page_range(pdf_path, 1, 5, max_chars=10)
+        assert result["pages"] == [1]
+        assert result["next_page"] == 2
+
+    def test_end_page_clamped(self, mock_doc, pdf_path):
+        """Test that end_page past the last page is clamped to the page count"""
+        assert extract_page_range(pdf_path, 4, 100)["pages"] == [4, 5]
+
+    def test_invalid_range(self, mock_doc, pdf_path):
+        """Test that out-of-range pages and unknown formats are rejected"""
+        with pytest.raises(PdfProcessingError, match="Invalid page range"):
+            extract_page_range(pdf_path, 6, 8)
+        with pytest.raises(PdfProcessingError, match="Invalid page range"):
+            extract_page_range(pdf_path, 3, 2)
+        with pytest.raises(PdfProcessingError, match="Unknown page format"):
+            extract_page_range(pdf_path, 1, 2, fmt="html")
+
+    @patch('ebook_mcp.tools.pdf_helper.fitz.open')
+    def test_markdown_format(self, mock_fitz_open, pdf_path):
+        """Test that the markdown format converts each page"""
+        mock_page = Mock()
+        mock_page.get_text.return_value = {
+            "blocks": [{"lines": [{"spans": [{"text": "Title", "size": 16, "flags": 0}]}]}]
+        }
+        mock_doc = Mock()
+        mock_doc.page_count = 2
+        mock_doc.__getitem__ = Mock(return_value=mock_page)
+        mock_fitz_open.return_value = mock_doc
+
+        result = extract_page_range(pdf_path, 1, 2, fmt="markdown")
+        assert result["pages"] == [1, 2]
+        assert result["content"].count("## Title") == 2
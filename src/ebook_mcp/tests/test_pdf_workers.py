@@ -0,0 +1,92 @@
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+fitz = pytest.importorskip("fitz")
+
+from ebook_mcp.tools import pdf_helper, pdf_workers
+from ebook_mcp.tools.pdf_workers import PdfWorkerPool, get_pdf_worker_pool
+
+
+def _write_pdf(path, pages=6):
+    doc = fitz.open()
+    for n in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Text of page {n}")
+    doc.set_toc([[1, "Intro", 1], [1, "Part A", 2], [1, "Part B", 5]])
+    doc.save(path)
+    doc.close()
+
+
+@pytest.fixture
+def pdf_path(temp_dir):
+    path = os.path.join(temp_dir, "doc.pdf")
+    _write_pdf(path)
+    return path
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A two-worker pool installed as the process-wide PDF worker pool"""
+    pool = PdfWorkerPool(workers=2, max_jobs_per_worker=3)
+    monkeypatch.setattr(pdf_workers, "_pdf_worker_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+class TestPdfWorkers:
+    """Test the PyMuPDF worker process pool"""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Test that PDF work stays in-process unless enabled"""
+        monkeypatch.delenv("EBOOK_MCP_PDF_WORKERS", raising=False)
+        assert get_pdf_worker_pool() is None
+        monkeypatch.setenv("EBOOK_MCP_PDF_WORKERS", "0")
+        assert get_pdf_worker_pool() is None
+
+    def test_path_affinity(self, pool, pdf_path):
+        """Test that a file is always routed to the same worker, shards to the next ones"""
+        index = pool.worker_index(pdf_path)
+        assert pool.worker_index(pdf_path) == index
+        assert pool.worker_index(pdf_path, shard=1) == (index + 1) % 2
+
+    def test_extraction_runs_in_workers(self, pool, pdf_path):
+        """Test that page, range and chapter extraction match in-process results"""
+        assert "Text of page 3" in pdf_helper.extract_page_text(pdf_path, 3)
+        assert "Text of page 3" in pdf_helper.extract_page_markdown(pdf_path, 3)
+        texts = pdf_helper.extract_pages_text(pdf_path, [6, 1, 2])
+        assert [text.strip() for text in texts] == ["Text of page 6", "Text of page 1", "Text of page 2"]
+
+        page_range = pdf_helper.extract_page_range(pdf_path, 2, 6, max_chars=40)
+        assert page_range["pages"] == [2, 3] and page_range["next_page"] == 4
+
+        content, pages = pdf_helper.extract_chapter_by_title(pdf_path, "Part A")
+        assert pages == [2, 3, 4]
+        assert "Text of page 4" in content
+        assert pool.stats()["jobs"] >= 4
+
+        with pytest.raises(pdf_helper.PdfProcessingError):
+            pdf_helper.extract_chapter_by_title(pdf_path, "Missing")
+
+    def test_map_pages_spreads_over_workers(self, pool, pdf_path):
+        """Test that a page range is split over all workers and comes back in order"""
+        texts = pool.map_pages(pdf_helper._pages_text, pdf_path, [1, 2, 3, 4, 5, 6], pages_per_job=2)
+        assert [text.strip() for text in texts] == [f"Text of page {n}" for n in range(1, 7)]
+        assert all(jobs > 0 for jobs in pool.stats()["worker_jobs"])
+
+    def test_workers_recycled_after_max_jobs(self, pool, pdf_path):
+        """Test that a worker is replaced once it has run max_jobs_per_worker jobs"""
+        for page in range(1, 5):
+            assert "Text of page" in pool.run(pdf_path, pdf_helper._page_text, page)
+        stats = pool.stats()
+        assert stats["recycled"] == 1
+        assert max(stats["worker_jobs"]) == 1
+
+    def test_broken_worker_replaced(self, pool, pdf_path):
+        """Test that a worker flagged as crashed is replaced on the next job"""
+        index = pool.worker_index(pdf_path)
+        pool._workers[index].broken = True
+        assert "Text of page 1" in pool.run(pdf_path, pdf_helper._page_text, 1)
+        assert pool.stats()["crashed"] == 1
@@ -0,0 +1,144 @@
+import pytest
+import asyncio
+import json
+import os
+import pstats
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools import profiling
+from ebook_mcp.tools.metrics import MetricsRegistry
+from ebook_mcp.tools.profiling import ToolProfiler, get_tool_profiler
+from ebook_mcp.tools.tool_executor import ToolExecutor
+
+
+def slow_tool(pdf_path, seconds=0.0):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return "done"
+
+
+@pytest.fixture
+def profiler(temp_dir):
+    return ToolProfiler(directory=os.path.join(temp_dir, "profiles"))
+
+
+@pytest.fixture
+def executor(profiler):
+    executor = ToolExecutor(light_workers=1, heavy_workers=1, metrics=MetricsRegistry(), profiler=profiler)
+    executor.configure("get_pdf_page_text", book_arg="pdf_path", book_index=0)
+    yield executor
+    executor.shutdown()
+
+
+def call(executor, book="/books/My Book.pdf", seconds=0.0, tool="get_pdf_page_text"):
+    return asyncio.run(executor.run(tool, slow_tool, book, seconds))
+
+
+class TestToolProfiler:
+    """Test selecting, profiling and writing tool calls"""
+
+    def test_inactive_by_default(self, profiler, executor):
+        """Test that nothing is profiled until configured"""
+        call(executor)
+        assert profiler.status()["written"] == 0
+        assert not os.path.exists(profiler.directory)
+
+    def test_next_calls_pstats(self, profiler, executor):
+        """Test that the next N calls are written as .pstats files with a summary"""
+        status = profiler.configure(calls=2, format="pstats")
+        assert status["active"] and status["remaining"] == 2
+        for _ in range(3):
+            call(executor, seconds=0.01)
+        status = profiler.status()
+        assert status["written"] == 2
+        assert not status["active"]
+        path = status["recent"][0]
+        assert path.endswith(".pstats")
+        assert "get_pdf_page_text_My_Book_" in os.path.basename(path)
+        pstats.Stats(path)
+        with open(path[:-len(".pstats")] + ".json", encoding="utf-8") as f:
+            summary = json.load(f)
+        assert summary["tool"] == "get_pdf_page_text"
+        assert summary["book"] == "/books/My Book.pdf"
+        assert summary["ok"] is True
+        assert summary["duration_ms"] >= 10
+        assert any("slow_tool" in row["function"] for row in summary["hotspots"])
+
+    def test_slow_threshold(self, profiler, executor):
+        """Test that only calls slower than slow_ms are kept and counted"""
+        profiler.configure(calls=1, slow_ms=30)
+        call(executor)
+        assert profiler.status()["discarded"] == 1
+        assert profiler.status()["active"]
+        call(executor, seconds=0.05)
+        status = profiler.status()
+        assert status["written"] == 1
+        assert not status["active"]
+
+    def test_tool_filter(self, profiler, executor):
+        """Test that only the selected tools are profiled"""
+        profiler.configure(calls=1, tools=["get_epub_metadata"])
+        call(executor)
+        assert profiler.status()["written"] == 0
+        call(executor, tool="get_epub_metadata")
+        assert profiler.status()["written"] == 1
+
+    def test_speedscope(self, profiler, executor):
+        """Test that sampled profiles are valid speedscope files"""
+        profiler.configure(calls=1, format="speedscope")
+        with patch.object(profiling, "PYINSTRUMENT_AVAILABLE", False):
+            call(executor, seconds=0.05)
+        path = profiler.status()["recent"][0]
+        assert path.endswith(".speedscope.json")
+        with open(path, encoding="utf-8") as f:
+            document = json.load(f)
+        profile = document["profiles"][0]
+        assert profile["type"] == "sampled"
+        assert profile["samples"] and len(profile["samples"]) == len(profile["weights"])
+        names = {frame["name"] for frame in document["shared"]["frames"]}
+        assert "slow_tool" in names
+
+    def test_default_format(self, profiler):
+        """Test that the per-thread sampler is the default where cProfile is interpreter-wide"""
+        expected = "speedscope" if sys.version_info >= (3, 12) else "pstats"
+        assert profiler.configure(calls=1)["format"] == expected
+
+    def test_one_cprofile_session_at_a_time(self, profiler):
+        """Test that a second concurrent cProfile call is skipped without using up a slot"""
+        profiler.configure(calls=2, format="pstats")
+        first = profiler.start("get_pdf_page_text", "/a.pdf")
+        assert first is not None
+        assert profiler.start("get_pdf_page_text", "/b.pdf") is None
+        assert profiler.status()["remaining"] == 1
+        profiler.finish(first, 0.001)
+        second = profiler.start("get_pdf_page_text", "/b.pdf")
+        assert second is not None
+        profiler.finish(second, 0.001)
+        assert profiler.status()["written"] == 2
+
+    def test_invalid_arguments(self, profiler):
+        """Test that out-of-range settings are rejected"""
+        with pytest.raises(ValueError):
+            profiler.configure(calls=1, format="flamegraph")
+        with pytest.raises(ValueError):
+            profiler.configure(calls=-1)
+        assert not profiler.configure(calls=0)["active"]
+
+    def test_configured_from_env(self, temp_dir, monkeypatch):
+        """Test that the process-wide profiler reads its settings from the environment"""
+        monkeypatch.setattr(profiling, "_tool_profiler", None)
+        monkeypatch.setenv("EBOOK_MCP_PROFILE_SLOW_MS", "250")
+        monkeypatch.setenv("EBOOK_MCP_PROFILE_TOOLS", "get_pdf_page_text, get_epub_metadata")
+        monkeypatch.setenv("EBOOK_MCP_PROFILE_DIR", temp_dir)
+        status = get_tool_profiler().status()
+        assert status["active"]
+        assert status["remaining"] == 0
+        assert status["slow_ms"] == 250.0
+        assert status["tools"] == ["get_epub_metadata", "get_pdf_page_text"]
+        assert status["directory"] == temp_dir
@@ -0,0 +1,118 @@
+import pytest
+import asyncio
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools import progress
+from ebook_mcp.tools.markdown_stream import iter_markdown
+from ebook_mcp.tools.progress import ProgressReporter, report_progress, reporting
+from ebook_mcp.tools.tool_executor import ToolExecutor
+
+
+class _Session:
+    """Records the progress notifications a ServerSession would send"""
+
+    def __init__(self):
+        self.notifications = []
+
+    async def send_progress_notification(self, progress_token, progress, total=None, message=None,
+                                         related_request_id=None):
+        self.notifications.append((progress_token, progress, message, related_request_id))
+
+
+class _Recorder:
+    def __init__(self):
+        self.amounts = []
+
+    def advance(self, amount, message=None):
+        self.amounts.append(amount)
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(light_workers=1, heavy_workers=1)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+def _convert(chapters):
+    for _ in range(chapters):
+        for _ in range(3):
+            report_progress(100, "Converting to markdown")
+    return "done"
+
+
+class TestProgress:
+    """Test progress notifications from tool threads"""
+
+    def test_no_op_outside_a_request(self, executor):
+        """Test that reporting without a requesting client does nothing"""
+        report_progress(10)
+        assert asyncio.run(executor.run("get_epub_chapter_markdown", _convert, 1)) == "done"
+
+    @patch.object(progress, "MIN_INTERVAL", 0.0)
+    def test_notifications_reach_the_session(self, executor):
+        """Test that progress from the worker thread is sent on the request's session, counting up"""
+        from mcp.server.lowlevel.server import request_ctx
+        from mcp.shared.context import RequestContext
+        from mcp.types import RequestParams
+
+        session = _Session()
+
+        async def call():
+            token = request_ctx.set(RequestContext(request_id=7, meta=RequestParams.Meta(progressToken="tok"),
+                                                   session=session, lifespan_context=None))
+            try:
+                result = await executor.run("get_epub_chapters_markdown", _convert, 2)
+            finally:
+                request_ctx.reset(token)
+            # Let the scheduled notifications run
+            await asyncio.sleep(0.05)
+            return result
+
+        assert asyncio.run(call()) == "done"
+        assert [progress for _, progress, _, _ in session.notifications] == [100, 200, 300, 400, 500, 600]
+        assert {(token, message, request_id) for token, _, message, request_id in session.notifications} == \
+            {("tok", "Converting to markdown", "7")}
+
+    def test_no_token_no_reporter(self):
+        """Test that requests without a progress token get no reporter"""
+        from mcp.server.lowlevel.server import request_ctx
+        from mcp.shared.context import RequestContext
+
+        async def capture():
+            token = request_ctx.set(RequestContext(request_id=1, meta=None, session=_Session(),
+                                                   lifespan_context=None))
+            try:
+                return progress.request_reporter()
+            finally:
+                request_ctx.reset(token)
+
+        assert asyncio.run(capture()) is None
+
+    def test_rate_limited(self):
+        """Test that notifications within MIN_INTERVAL are merged into the next one"""
+        loop = asyncio.new_event_loop()
+        try:
+            reporter = ProgressReporter(context=None, loop=loop)
+            reporter._last = float("inf")
+            reporter.advance(5)
+            reporter.advance(5)
+            assert (reporter.done, reporter.sent) == (10, 0)
+        finally:
+            loop.close()
+
+    def test_iter_markdown_reports_markup(self):
+        """Test that markdown conversion reports the markup it has converted"""
+        from bs4 import BeautifulSoup
+
+        html = "".join(f"<p>Paragraph {i} with some text.</p>" for i in range(200))
+        recorder = _Recorder()
+        with reporting(recorder):
+            markdown = "".join(iter_markdown(BeautifulSoup(html, "html.parser"), chunk_chars=256))
+        assert "Paragraph 199" in markdown
+        assert len(recorder.amounts) > 10
+        assert sum(recorder.amounts) <= len(html)
@@ -0,0 +1,238 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import patch
+
+from ebook_mcp.tools.search_index import (
+    SearchIndex,
+    tokenize,
+    make_snippet,
+    search_library,
+    intersect_postings,
+    iter_book_passages,
+    _PostingList
+)
+
+
+PASSAGES = {
+    "a.epub": [
+        ("ch1.xhtml", "Chapter 1", "Logs are append-only files used for incremental updates."),
+        ("ch2.xhtml", "Chapter 2", "B-trees keep keys sorted for fast lookups."),
+    ],
+    "c.epub": [
+        ("ch1.xhtml", "第一章", "情緒勒索是一種操控的手段，勒索者利用恐懼、義務和罪惡感。"),
+        ("ch2.xhtml", "第二章", "索取與情緒的界線：如何說不。"),
+    ],
+    "b.pdf": [
+        (1, "Page 1", "An introduction to databases and storage engines."),
+        (2, "Page 2", "Write-ahead logs make crash recovery possible. Logs logs logs."),
+    ],
+}
+
+
+def _fake_passages(book_path):
+    return iter(PASSAGES[os.path.basename(book_path)])
+
+
+@pytest.fixture
+def library():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in list(PASSAGES) + ["notes.txt"]:
+            with open(os.path.join(temp_dir, name), 'w') as f:
+                f.write(name)
+        yield temp_dir
+
+
+class TestSearchIndex:
+    """Test the full-text search index"""
+
+    def test_tokenize(self):
+        """Test lowercase word tokenization"""
+        assert tokenize("Append-only LOGS, v2") == ["append", "only", "logs", "v2"]
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_search_ranks_by_bm25(self, mock_passages, library):
+        """Test that the passage with the most matching terms ranks first"""
+        index = SearchIndex()
+        index.index_book(os.path.join(library, "a.epub"))
+        index.index_book(os.path.join(library, "b.pdf"))
+
+        hits = index.search("logs")
+        assert [hit["location"] for hit in hits] == [2, "ch1.xhtml"]
+        assert hits[0]["title"] == "Page 2"
+        assert "logs" in hits[0]["snippet"].lower()
+        assert hits[0]["score"] > hits[1]["score"]
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_incremental_indexing(self, mock_passages, library):
+        """Test that unchanged books are not re-read"""
+        index = SearchIndex()
+        book = os.path.join(library, "a.epub")
+        assert index.index_book(book) is True
+        assert index.index_book(book) is False
+        assert mock_passages.call_count == 1
+
+        with open(book, 'w') as f:
+            f.write("a changed book")
+        assert index.index_book(book) is True
+        stats = index.stats()
+        assert (stats["books"], stats["passages"], stats["indexed"]) == (1, 2, 2)
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_remove_book(self, mock_passages, library):
+        """Test that removed books no longer produce hits"""
+        index = SearchIndex()
+        book = os.path.join(library, "a.epub")
+        index.index_book(book)
+        index.remove_book(book)
+        assert index.search("trees") == []
+        stats = index.stats()
+        assert (stats["books"], stats["passages"], stats["terms"]) == (0, 0, 0)
+        # Gone from the database too, so a restart does not bring it back
+        assert SearchIndex(index.db_path).search("trees") == []
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_search_restricted_to_books(self, mock_passages, library):
+        """Test restricting hits to a subset of books"""
+        index = SearchIndex()
+        index.index_book(os.path.join(library, "a.epub"))
+        index.index_book(os.path.join(library, "b.pdf"))
+        hits = index.search("logs", book_paths=[os.path.join(library, "a.epub")])
+        assert [hit["location"] for hit in hits] == ["ch1.xhtml"]
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_search_library(self, mock_passages, library):
+        """Test searching a whole library folder, indexed in the background"""
+        with patch('ebook_mcp.tools.search_index._search_index', SearchIndex()):
+            result = search_library(library, "sorted keys")
+        hits = result["hits"]
+        assert hits[0]["file_path"] == os.path.realpath(os.path.join(library, "a.epub"))
+        assert hits[0]["location"] == "ch2.xhtml"
+        assert result["indexing"] == {"pending": 0, "indexed": 3, "complete": True}
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_search_library_without_waiting(self, mock_passages, library):
+        """Test that a search only sees indexed books and reports the books still queued"""
+        index = SearchIndex()
+        index.index_book(os.path.join(library, "a.epub"))
+        with patch.object(index, "_queue", return_value=2) as mock_queue:
+            with patch.dict(index._pending, {os.path.realpath(library): {"b.pdf", "c.epub"}}):
+                result = index.search_library(library, "logs", wait=0)
+        queued = sorted(os.path.basename(book) for book in mock_queue.call_args[0][1])
+        assert queued == ["b.pdf", "c.epub"]
+        assert [hit["location"] for hit in result["hits"]] == ["ch1.xhtml"]
+        assert result["indexing"] == {"pending": 2, "indexed": 1, "complete": False}
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_persisted_between_runs(self, mock_passages, library):
+        """Test that a new index over the same database searches without extracting again"""
+        with tempfile.TemporaryDirectory() as db_dir:
+            db_path = os.path.join(db_dir, "search_index.sqlite3")
+            index = SearchIndex(db_path)
+            index.index_book(os.path.join(library, "a.epub"))
+            index.index_book(os.path.join(library, "b.pdf"))
+            index.shutdown()
+
+            restarted = SearchIndex(db_path)
+            assert restarted.update(library, wait=5) == 1
+            hits = restarted.search("logs")
+            restarted.shutdown()
+        assert [hit["location"] for hit in hits] == [2, "ch1.xhtml"]
+        assert "logs" in hits[0]["snippet"].lower()
+        # Only c.epub, never indexed before, was extracted by the second index
+        assert mock_passages.call_count == 3
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_library_change(self, mock_passages, library):
+        """Test that watcher changes are indexed once the library is known"""
+        index = SearchIndex()
+        book = os.path.join(library, "a.epub")
+        index.on_library_change(library, [book], [], [])
+        assert index.stats()["pending"] == 0
+        index.update(library, wait=5)
+        with open(book, 'w') as f:
+            f.write("a changed book")
+        index.remove_book(book)
+        index.on_library_change(library, [], [book], [])
+        index.shutdown()
+        assert index.search("trees")[0]["file_path"] == os.path.realpath(book)
+        assert mock_passages.call_count == 4
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=ValueError("broken zip"))
+    def test_failed_book_not_retried(self, mock_passages, library):
+        """Test that a book that fails to parse is skipped until it changes"""
+        index = SearchIndex()
+        book = os.path.join(library, "a.epub")
+        with pytest.raises(ValueError, match="broken zip"):
+            index.index_book(book)
+        with pytest.raises(ValueError, match="could not be indexed"):
+            index.index_book(book)
+        assert mock_passages.call_count == 1
+        assert index.stats()["failed"] == 1
+
+    @patch('ebook_mcp.tools.search_index.iter_book_passages', side_effect=_fake_passages)
+    def test_cjk_search(self, mock_passages, library):
+        """Test that CJK queries match n-gram sequences, not scattered characters"""
+        index = SearchIndex()
+        index.index_book(os.path.join(library, "c.epub"))
+
+        hits = index.search("情緒勒索")
+        assert [hit["location"] for hit in hits] == ["ch1.xhtml"]
+        assert "情緒勒索" in hits[0]["snippet"]
+        # Single characters still match through unigrams
+        assert len(index.search("索")) == 2
+        assert index.search("勒索者操控") == []
+
+    @patch('ebook_mcp.tools.search_index.epub_helper')
+    def test_nested_chapter_titles(self, mock_epub_helper):
+        """Test that chapters nested at any depth keep their own TOC titles"""
+        mock_epub_helper.flatten_toc_entries.return_value = [
+            ("Part I", "part1.xhtml"), ("Chapter 1", "ch1.xhtml"), ("Section 1.1", "ch1.xhtml#s1"),
+            ("Section 1.1.1", "ch1.xhtml#s1-1"), ("", "ch2.xhtml"),
+        ]
+        mock_epub_helper.extract_multiple_chapters.side_effect = \
+            lambda book, hrefs, output: [(href, f"text of {href}") for href in hrefs]
+        passages = list(iter_book_passages("/books/book.epub"))
+        assert [(location, title) for location, title, _ in passages] == [
+            ("part1.xhtml", "Part I"), ("ch1.xhtml", "Chapter 1"), ("ch1.xhtml#s1", "Section 1.1"),
+            ("ch1.xhtml#s1-1", "Section 1.1.1"), ("ch2.xhtml", "ch2.xhtml"),
+        ]
+        # One batch over the loaded book, sharing parses, and nothing written to the extraction cache
+        book = mock_epub_helper.read_epub.return_value
+        mock_epub_helper.extract_multiple_chapters.assert_called_once_with(
+            book, ["part1.xhtml", "ch1.xhtml", "ch1.xhtml#s1", "ch1.xhtml#s1-1", "ch2.xhtml"], 'text')
+        mock_epub_helper.get_chapter_text.assert_not_called()
+
+    @patch('ebook_mcp.tools.search_index.epub_helper')
+    def test_broken_chapter_skipped(self, mock_epub_helper):
+        """Test that a chapter that cannot be extracted does not drop the rest of the book"""
+        mock_epub_helper.flatten_toc_entries.return_value = [("One", "ch1.xhtml"), ("Two", "missing.xhtml")]
+        mock_epub_helper.extract_multiple_chapters.side_effect = KeyError("missing.xhtml")
+
+        def extract(book, href):
+            if href == "missing.xhtml":
+                raise KeyError(href)
+            return f"text of {href}"
+
+        mock_epub_helper.extract_chapter_plain_text.side_effect = extract
+        passages = list(iter_book_passages("/books/book.epub"))
+        assert passages == [("ch1.xhtml", "One", "text of ch1.xhtml")]
+
+    def test_intersect_postings(self):
+        """Test intersection of sorted posting lists"""
+        lists = []
+        for ids in ([1, 3, 5, 7, 9, 11], [3, 4, 5, 11], [0, 3, 11, 12]):
+            posting = _PostingList()
+            for passage_id in ids:
+                posting.append(passage_id, 1)
+            lists.append(posting)
+        assert intersect_postings(lists) == [3, 11]
+        assert lists[0].freq(5) == 1
+        assert lists[0].freq(6) == 0
+
+    def test_make_snippet(self):
+        """Test snippet windows around the first match"""
+        text = "x" * 200 + " needle " + "y" * 200
+        snippet = make_snippet(text, ["needle"], radius=20)
+        assert "needle" in snippet
+        assert snippet.startswith("...") and snippet.endswith("...")
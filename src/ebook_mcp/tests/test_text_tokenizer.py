@@ -0,0 +1,44 @@
+import pytest
+
+from ebook_mcp.tools.text_tokenizer import tokenize, tokenize_query, cjk_ngrams, is_cjk_token
+
+
+class TestTextTokenizer:
+    """Test the CJK-aware search tokenizer"""
+
+    def test_latin_words(self):
+        """Test that non-CJK text is split into lowercase words"""
+        assert tokenize("Append-only Logs") == ["append", "only", "logs"]
+
+    def test_cjk_ngrams(self):
+        """Test overlapping n-grams for CJK runs"""
+        assert cjk_ngrams("情緒勒索") == ["情緒", "緒勒", "勒索"]
+        assert cjk_ngrams("情緒勒索", 3) == ["情緒勒", "緒勒索"]
+        assert cjk_ngrams("情") == ["情"]
+
+    def test_mixed_text(self):
+        """Test text mixing CJK runs, words and digits"""
+        tokens = tokenize("第2版 Python入門")
+        assert "python" in tokens
+        assert "2" in tokens
+        assert "入門" in tokens
+        assert "第" in tokens
+
+    def test_japanese_and_korean(self):
+        """Test kana and Hangul runs"""
+        assert "カタ" in tokenize("カタカナ")
+        assert "한국" in tokenize("한국어")
+
+    def test_query_groups(self):
+        """Test that queries keep each CJK run as one group of n-grams"""
+        assert tokenize_query("情緒勒索 Blackmail") == [["情緒", "緒勒", "勒索"], ["blackmail"]]
+
+    def test_is_cjk_token(self):
+        """Test CJK token detection"""
+        assert is_cjk_token("情緒")
+        assert not is_cjk_token("logs")
+
+    def test_is_cjk_token_non_tokens(self):
+        """Test that punctuation, spaces and mixed strings are not CJK tokens"""
+        for value in ("", "!", " 情緒", "情緒!", "情緒logs"):
+            assert not is_cjk_token(value)
@@ -0,0 +1,110 @@
+import pytest
+import asyncio
+import threading
+import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ebook_mcp.tools.tool_executor import ToolExecutor, LIGHT, HEAVY
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(light_workers=2, heavy_workers=1)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+class TestToolExecutor:
+    """Test the bounded tool executor"""
+
+    def test_run_returns_result_and_counts(self, executor):
+        """Test results, exceptions and completion counters"""
+        def fail():
+            raise ValueError("boom")
+
+        assert asyncio.run(executor.run("add", lambda a, b: a + b, 1, b=2)) == 3
+        with pytest.raises(ValueError, match="boom"):
+            asyncio.run(executor.run("add", fail))
+
+        stats = executor.stats()["tools"]["add"]
+        assert stats["completed"] == 1
+        assert stats["failed"] == 1
+        assert stats["queued"] == 0
+        assert stats["running"] == 0
+
+    def test_light_calls_not_blocked_by_heavy_work(self, executor):
+        """Test that a saturated heavy lane does not delay light tools"""
+        executor.configure("extract", HEAVY)
+        executor.configure("toc", LIGHT)
+        release = threading.Event()
+
+        async def scenario():
+            heavy = [asyncio.ensure_future(executor.run("extract", release.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            result = await executor.run("toc", lambda: "toc")
+            elapsed = time.perf_counter() - start
+            stats = executor.stats()["tools"]["extract"]
+            release.set()
+            await asyncio.gather(*heavy)
+            return result, elapsed, stats
+
+        result, elapsed, stats = asyncio.run(scenario())
+        assert result == "toc"
+        assert elapsed < 1
+        assert stats["running"] == 1
+        assert stats["queued"] == 2
+        assert stats["max_queued"] >= 2
+
+    def test_max_concurrency(self):
+        """Test that a per-tool limit caps calls in flight"""
+        executor = ToolExecutor(light_workers=4, heavy_workers=4)
+        executor.configure("chapter", HEAVY, max_concurrency=2)
+        lock = threading.Lock()
+        active = [0, 0]  # current, peak
+
+        def work():
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        async def scenario():
+            await asyncio.gather(*(executor.run("chapter", work) for _ in range(6)))
+
+        asyncio.run(scenario())
+        executor.shutdown()
+        assert active[1] == 2
+        assert executor.stats()["tools"]["chapter"]["completed"] == 6
+
+    def test_cancelled_call_leaves_queue(self, executor):
+        """Test that a call cancelled before reaching a worker is withdrawn"""
+        executor.configure("extract", HEAVY)
+        release = threading.Event()
+        ran = []
+
+        async def scenario():
+            blocker = asyncio.ensure_future(executor.run("extract", release.wait, 5))
+            queued = asyncio.ensure_future(executor.run("extract", ran.append, 1))
+            await asyncio.sleep(0.05)
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            release.set()
+            await blocker
+
+        asyncio.run(scenario())
+        executor.shutdown()
+        assert ran == []
+        assert executor.stats()["tools"]["extract"]["queued"] == 0
+
+    def test_configure_validates(self, executor):
+        """Test that unknown lanes and invalid limits are rejected"""
+        with pytest.raises(ValueError):
+            executor.configure("tool", "gpu")
+        with pytest.raises(ValueError):
+            executor.configure("tool", LIGHT, max_concurrency=0)
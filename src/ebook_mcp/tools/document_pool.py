@@ -0,0 +1,182 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Default pool limits, overridable through the environment
+DEFAULT_MAX_DOCUMENTS = int(os.environ.get("EBOOK_MCP_POOL_MAX_DOCUMENTS", "16"))
+DEFAULT_MAX_BYTES = int(os.environ.get("EBOOK_MCP_POOL_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def file_fingerprint(path: str) -> Tuple[str, int, int]:
+    """
+    Get the (realpath, mtime_ns, size) fingerprint identifying one version of a file
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    real_path = os.path.realpath(path)
+    st = os.stat(real_path)
+    return (real_path, st.st_mtime_ns, st.st_size)
+
+
+class _PoolEntry:
+    """A pooled document together with its fingerprint and access lock"""
+    __slots__ = ("fingerprint", "document", "size", "lock")
+
+    def __init__(self, fingerprint: Tuple[str, int, int], document: Any, size: int):
+        self.fingerprint = fingerprint
+        self.document = document
+        self.size = size
+        self.lock = threading.RLock()
+
+
+class DocumentPool:
+    """
+    Process-wide LRU pool of open EPUB/PDF documents.
+
+    Documents are keyed by (realpath, mtime, size), so a modified file is
+    reloaded transparently. Entries are evicted in least-recently-used order
+    when either the document count or the estimated byte size (the on-disk
+    file size) exceeds its limit. Evicted documents are simply dropped and
+    released by garbage collection once no caller holds them anymore.
+    """
+
+    def __init__(self, max_documents: int = DEFAULT_MAX_DOCUMENTS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, fingerprint: Tuple[str, int, int]) -> Optional[_PoolEntry]:
+        real_path = fingerprint[0]
+        with self._lock:
+            entry = self._entries.get(real_path)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(real_path)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                # The file changed on disk since it was pooled
+                self._remove(real_path)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def _insert(self, entry: _PoolEntry) -> _PoolEntry:
+        real_path = entry.fingerprint[0]
+        with self._lock:
+            existing = self._entries.get(real_path)
+            if existing is not None and existing.fingerprint == entry.fingerprint:
+                # Another thread loaded the same version concurrently
+                return existing
+            if existing is not None:
+                self._remove(real_path)
+            self._entries[real_path] = entry
+            self._bytes += entry.size
+            self._evict()
+            return entry
+
+    def _remove(self, real_path: str) -> None:
+        entry = self._entries.pop(real_path)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        # Always keep the most recently inserted entry, even if it alone exceeds the byte budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_documents or self._bytes > self.max_bytes
+        ):
+            real_path, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+            logger.debug(
+                "Evicted document from pool",
+                file_path=real_path,
+                operation="document_pool_eviction"
+            )
+
+    def _get_entry(self, path: str, loader: Callable[[str], Any]) -> _PoolEntry:
+        fingerprint = file_fingerprint(path)
+        entry = self._lookup(fingerprint)
+        if entry is not None:
+            return entry
+        # Load outside the pool lock so that slow parses do not block other books
+        document = loader(path)
+        return self._insert(_PoolEntry(fingerprint, document, fingerprint[2]))
+
+    def get(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        Get the pooled document for path, loading it with loader(path) on a miss
+
+        Args:
+            path: Path to the book file
+            loader: Callable that opens and parses the file
+
+        Returns:
+            Any: The document returned by loader
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        return self._get_entry(path, loader).document
+
+    @contextmanager
+    def lease(self, path: str, loader: Callable[[str], Any]) -> Iterator[Any]:
+        """
+        Context manager yielding the pooled document with exclusive access.
+
+        Use this for document types that are not safe to share between
+        threads, such as PyMuPDF documents.
+        """
+        entry = self._get_entry(path, loader)
+        with entry.lock:
+            yield entry.document
+
+    def invalidate(self, path: str) -> bool:
+        """Drop the pooled document for path, returning whether one was pooled"""
+        real_path = os.path.realpath(path)
+        with self._lock:
+            if real_path not in self._entries:
+                return False
+            self._remove(real_path)
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        """Drop all pooled documents and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get pool size and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "bytes": self._bytes,
+                "max_documents": self.max_documents,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_document_pool = DocumentPool()
+
+
+def get_document_pool() -> DocumentPool:
+    """Get the process-wide document pool shared by epub_helper and pdf_helper"""
+    return _document_pool
@@ -1,6 +1,23 @@
-from typing import List, Tuple, Dict, Union, Any, Optional
+from typing import Callable, List, Tuple, Dict, Union, Any, Optional, Iterator
+from collections import Counter
+import copy
+import logging
 import os
+import posixpath
+import re
+import threading
+import weakref
+import zipfile
+from urllib.parse import unquote
+from xml.etree import ElementTree
 from .logger_config import get_logger, log_operation
+from .document_pool import get_document_pool
+from .extraction_cache import (MISS, cache_arg, cached_extraction, file_version_key, get_extraction_cache,
+                               version_key_or_none)
+from .lazy_import import lazy_import
+from .library_scanner import scan_library
+from .markdown_stream import iter_markdown, new_html2text
+from .pagination import DEFAULT_PAGE_CHARS, paginate
 
 # Custom exception classes for better error handling
 class EpubProcessingError(Exception):
@@ -21,40 +38,120 @@ class PdfProcessingError(Exception):
         self.original_error = original_error
         super().__init__(f"{message} (file: {file_path}, operation: {operation})")
 
-# Try to import optional dependencies
-try:
-    from ebooklib import epub
-    EBOOKLIB_AVAILABLE = True
-except ImportError:
-    epub = None
-    EBOOKLIB_AVAILABLE = False
-
-try:
-    from bs4 import BeautifulSoup, Comment
-    BEAUTIFULSOUP_AVAILABLE = True
-except ImportError:
-    BeautifulSoup = None
-    Comment = None
-    BEAUTIFULSOUP_AVAILABLE = False
-
-try:
-    import html2text
-    HTML2TEXT_AVAILABLE = True
-except ImportError:
-    html2text = None
-    HTML2TEXT_AVAILABLE = False
+# Optional dependencies, imported on first use to keep server start-up fast
+epub = lazy_import('ebooklib.epub')
+ebooklib_utils = lazy_import('ebooklib.utils')
+EBOOKLIB_AVAILABLE = epub is not None
+
+bs4 = lazy_import('bs4')
+BEAUTIFULSOUP_AVAILABLE = bs4 is not None
+
+html2text = lazy_import('html2text')
+HTML2TEXT_AVAILABLE = html2text is not None
 
 # Initialize structured logger
 logger = get_logger(__name__)
 
+# BeautifulSoup tree builders in order of preference: lxml's C parser, then the pure-Python one
+_HTML_PARSERS = ('lxml', 'html.parser')
+
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+_DOCUMENT_TAG = re.compile(r'<(?:html|body)[\s/>]', re.IGNORECASE)
+
+_html_parser: Optional[str] = None
+
+_CONTAINER_NS = '{urn:oasis:names:tc:opendocument:xmlns:container}'
+_OPF_NS = '{http://www.idpf.org/2007/opf}'
+_DC_NS = '{http://purl.org/dc/elements/1.1/}'
+
+# Values of get_meta: strings, lists of names, series_index and *_details
+EpubMetadata = Dict[str, Union[str, float, List[str], List[Dict[str, str]]]]
+
+
+def get_html_parser() -> str:
+    """
+    Get the BeautifulSoup tree builder used for all EPUB HTML parsing
+
+    The fastest available builder is picked on first use; set
+    EBOOK_MCP_HTML_PARSER (e.g. 'lxml', 'html.parser', 'html5lib') to
+    force one. An unavailable builder falls back to the default order.
+    """
+    global _html_parser
+    if _html_parser is None:
+        requested = os.environ.get("EBOOK_MCP_HTML_PARSER")
+        candidates = ((requested,) if requested else ()) + _HTML_PARSERS
+        for name in candidates:
+            try:
+                bs4.BeautifulSoup('', name)
+            except bs4.FeatureNotFound:
+                if name == requested:
+                    logger.warning(
+                        "HTML parser not available, falling back",
+                        operation="html_parser_selection",
+                        parser=name
+                    )
+                continue
+            _html_parser = name
+            break
+    return _html_parser
+
+
+def parse_html(markup: str) -> Any:
+    """
+    Parse an (X)HTML document or fragment with the selected parser backend
+
+    Fragments come back as fragments: lxml's <html><body> wrapper is removed
+    so every backend yields the same tree shape as html.parser.
+
+    Args:
+        markup: HTML or XHTML text
+
+    Returns:
+        BeautifulSoup document
+    """
+    parser = get_html_parser()
+    if parser == 'html.parser':
+        return bs4.BeautifulSoup(markup, parser)
+    # lxml would keep the declaration as a bogus comment and warn about XML
+    markup = _XML_DECLARATION.sub('', markup, count=1)
+    soup = bs4.BeautifulSoup(markup, parser)
+    if soup.body is not None and not _DOCUMENT_TAG.search(markup):
+        return make_fragment(list(soup.body.children))
+    return soup
+
+
+def make_fragment(nodes: List[Any], copy_nodes: bool = False) -> Any:
+    """
+    Move nodes out of their document into a new, empty one
+
+    Used to hand a chapter slice to the next pipeline stage as a tree
+    instead of serializing and re-parsing it. With copy_nodes the nodes are
+    copied instead, leaving their document intact for further slicing.
+    """
+    fragment = bs4.BeautifulSoup('', get_html_parser())
+    for node in nodes:
+        fragment.append(copy.copy(node) if copy_nodes else node.extract())
+    return fragment
+
 
 def get_all_epub_files(path: str) -> List[str]:
     """
-    Get all EPUB files in the specified path
+    Get all EPUB files below the specified path, including subfolders
+
+    Suffixes are matched case-insensitively. Folders are scanned by the
+    incremental library scanner, so repeated calls only list changed folders.
+
+    Returns:
+        List[str]: Paths relative to path, sorted
     """
-    return [f for f in os.listdir(path) if f.endswith('.epub')]
+    return [entry["relative_path"] for entry in scan_library(path, formats=("epub",))]
+
+def _toc_from_cache(value: List[List[str]]) -> List[Tuple[str, str]]:
+    return [tuple(entry) for entry in value]
 
 @log_operation("epub_toc_extraction")
+@cached_extraction("epub_toc", decode=_toc_from_cache)
 def get_toc(epub_path: str) -> List[Tuple[str, str]]:
     """
     Get the Table of Contents (TOC) from an EPUB file
@@ -84,7 +181,7 @@ def get_toc(epub_path: str) -> List[Tuple[str, str]]:
             file_path=epub_path,
             operation="toc_extraction"
         )
-        book = epub.read_epub(epub_path)
+        book = read_epub(epub_path)
         toc = []
         
         # Iterate through TOC items
@@ -124,15 +221,24 @@ def get_toc(epub_path: str) -> List[Tuple[str, str]]:
         raise EpubProcessingError("Failed to parse EPUB file", epub_path, "toc_extraction", e)
 
 @log_operation("epub_metadata_extraction")
-def get_meta(epub_path: str) -> Dict[str, Union[str, List[str]]]:
+@cached_extraction("epub_metadata")
+def get_meta(epub_path: str) -> EpubMetadata:
     """
     Get metadata from an EPUB file
-    
+
+    Only META-INF/container.xml and the metadata of the OPF package document
+    are read (see read_opf_metadata); books that cannot be read that way go
+    through the full reader and get the Dublin Core fields only.
+
     Args:
         epub_path (str): Absolute path to the EPUB file
         
     Returns:
-        Dict[str, Union[str, List[str]]]: Dictionary containing metadata
+        EpubMetadata: title, language, identifier, date, publisher,
+            description and rights; creator, contributor and subject lists;
+            and when the book declares them subtitle, series, series_index,
+            cover (manifest id of the cover image), modified, epub_version and
+            creator_details/contributor_details (name, role, file_as)
             
     Raises:
         FileNotFoundError: If the file does not exist
@@ -153,33 +259,18 @@ def get_meta(epub_path: str) -> Dict[str, Union[str, List[str]]]:
             file_path=epub_path,
             operation="metadata_extraction"
         )
-        book = epub.read_epub(epub_path)
-        meta = {}
-
-        # Standard metadata fields
-        standard_fields = {
-            'title': 'title',
-            'language': 'language',
-            'identifier': 'identifier',
-            'date': 'date',
-            'publisher': 'publisher',
-            'description': 'description'
-        }
-
-        # Fields that may have multiple values
-        multi_fields = ['creator', 'contributor', 'subject']
-
-        # Extract standard fields
-        for field, dc_field in standard_fields.items():
-            items = book.get_metadata('DC', dc_field)
-            if items and len(items) > 0 and len(items[0]) > 0:
-                meta[field] = items[0][0]
-
-        # Handle multi-value fields
-        for field in multi_fields:
-            items = book.get_metadata('DC', field)
-            if items:
-                meta[field] = [item[0] for item in items]
+        try:
+            meta = read_opf_metadata(epub_path)
+        except Exception as e:
+            logger.warning(
+                "OPF metadata reader failed, falling back to the full reader",
+                file_path=epub_path,
+                operation="metadata_extraction",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            book = read_epub(epub_path)
+            meta = _collect_metadata(lambda name: book.get_metadata('DC', name), [])
 
         logger.info(
             "EPUB metadata extraction completed",
@@ -200,7 +291,147 @@ def get_meta(epub_path: str) -> Dict[str, Union[str, List[str]]]:
             error_details=str(e)
         )
         raise EpubProcessingError("Failed to parse EPUB file", epub_path, "metadata_extraction", e)
-    
+
+
+def read_opf_metadata(epub_path: str) -> EpubMetadata:
+    """
+    Read the metadata of an EPUB from its OPF package document only
+
+    Only META-INF/container.xml and the OPF are decompressed, and the OPF is
+    streamed through an incremental parser up to the end of <metadata>, or
+    for EPUB 3 up to the manifest's cover-image item. Chapters, images and
+    the navigation document are never touched.
+
+    Args:
+        epub_path (str): Absolute path to the EPUB file
+
+    Returns:
+        EpubMetadata: Same fields as get_meta
+
+    Raises:
+        KeyError: If the archive has no container.xml or OPF document
+        ValueError: If container.xml names no OPF package document
+        zipfile.BadZipFile, ElementTree.ParseError: If the file is not a valid EPUB
+    """
+    version = None
+    dc: Dict[str, List[Tuple[Optional[str], Dict[str, str]]]] = {}
+    metas: List[Tuple[Optional[str], Dict[str, str]]] = []
+    cover_id = None
+    with zipfile.ZipFile(epub_path) as archive:
+        container = ElementTree.fromstring(archive.read('META-INF/container.xml'))
+        opf_file = None
+        for root_file in container.iter(_CONTAINER_NS + 'rootfile'):
+            if root_file.get('media-type') == 'application/oebps-package+xml':
+                opf_file = root_file.get('full-path')
+                break
+        if not opf_file:
+            raise ValueError("No OPF package document in META-INF/container.xml")
+        with archive.open(posixpath.normpath(opf_file)) as opf:
+            # iterparse decompresses and parses the OPF in chunks, so the rest
+            # of the package document is never read once we stop
+            for event, elem in ElementTree.iterparse(opf, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == _OPF_NS + 'package':
+                        version = elem.get('version')
+                elif elem.tag == _OPF_NS + 'metadata':
+                    for child in elem:
+                        if child.tag.startswith(_DC_NS):
+                            dc.setdefault(child.tag[len(_DC_NS):], []).append((child.text, dict(child.items())))
+                        elif child.tag == _OPF_NS + 'meta':
+                            metas.append((child.text, dict(child.items())))
+                    if not (version or '').startswith('3'):
+                        # Only EPUB 3 marks the cover in the manifest
+                        break
+                elif elem.tag == _OPF_NS + 'item':
+                    if 'cover-image' in (elem.get('properties') or '').split():
+                        cover_id = elem.get('id')
+                        break
+                    elem.clear()
+                elif elem.tag == _OPF_NS + 'manifest':
+                    break
+
+    return _collect_metadata(lambda name: dc.get(name, []), metas, version, cover_id)
+
+
+def _collect_metadata(dc: Callable[[str], List[Tuple[Any, Dict[str, str]]]],
+                      metas: List[Tuple[Any, Dict[str, str]]],
+                      version: Optional[str] = None, cover_id: Optional[str] = None) -> EpubMetadata:
+    # dc(name) gives the (text, attributes) pairs of a dc:* element; metas are the OPF <meta> elements
+    refinements: Dict[str, Dict[str, str]] = {}
+    named: Dict[str, str] = {}
+    properties: Dict[str, Tuple[str, Dict[str, str]]] = {}
+    for text, attrs in metas:
+        if attrs.get('name'):
+            # EPUB 2 / calibre: <meta name="calibre:series" content="..."/>
+            named.setdefault(attrs['name'], (attrs.get('content') or '').strip())
+            continue
+        value = (text or '').strip()
+        prop = attrs.get('property')
+        if not prop or not value:
+            continue
+        if attrs.get('refines'):
+            # EPUB 3: <meta refines="#creator01" property="role">aut</meta>
+            refinements.setdefault(attrs['refines'].lstrip('#'), {}).setdefault(prop, value)
+        else:
+            properties.setdefault(prop, (value, attrs))
+
+    def values(name: str) -> List[Tuple[str, Dict[str, str]]]:
+        return [(text.strip(), attrs) for text, attrs in dc(name) if text and text.strip()]
+
+    meta: Dict[str, Any] = {}
+    titles = values('title')
+    if titles:
+        title_types = [refinements.get(attrs.get('id'), {}).get('title-type') for _, attrs in titles]
+        meta['title'] = titles[title_types.index('main')][0] if 'main' in title_types else titles[0][0]
+        if 'subtitle' in title_types:
+            meta['subtitle'] = titles[title_types.index('subtitle')][0]
+    for field in ('language', 'identifier', 'date', 'publisher', 'description', 'rights'):
+        items = values(field)
+        if items:
+            meta[field] = items[0][0]
+
+    for field in ('creator', 'contributor'):
+        items = values(field)
+        if not items:
+            continue
+        meta[field] = [text for text, _ in items]
+        details = []
+        for text, attrs in items:
+            refined = refinements.get(attrs.get('id'), {})
+            detail = {'name': text}
+            role = refined.get('role') or attrs.get(_OPF_NS + 'role')
+            file_as = refined.get('file-as') or attrs.get(_OPF_NS + 'file-as')
+            if role:
+                detail['role'] = role
+            if file_as:
+                detail['file_as'] = file_as
+            details.append(detail)
+        if any(len(detail) > 1 for detail in details):
+            meta[field + '_details'] = details
+    subjects = values('subject')
+    if subjects:
+        meta['subject'] = [text for text, _ in subjects]
+
+    series, series_index = named.get('calibre:series'), named.get('calibre:series_index')
+    if not series and 'belongs-to-collection' in properties:
+        series, attrs = properties['belongs-to-collection']
+        series_index = refinements.get(attrs.get('id'), {}).get('group-position')
+    if series:
+        meta['series'] = series
+        try:
+            meta['series_index'] = float(series_index)
+        except (TypeError, ValueError):
+            pass
+
+    cover_id = cover_id or named.get('cover')
+    if cover_id:
+        meta['cover'] = cover_id
+    if 'dcterms:modified' in properties:
+        meta['modified'] = properties['dcterms:modified'][0]
+    if version:
+        meta['epub_version'] = version
+    return meta
+
 
 
 @log_operation("epub_chapter_extraction")
@@ -222,7 +453,7 @@ def extract_chapter_from_epub(epub_path: str, anchor_href: str) -> str:
         operation="chapter_extraction"
     )
     # Read EPUB file
-    book = epub.read_epub(epub_path)
+    book = read_epub(epub_path)
     # Parse input href and anchor id
     if '#' in anchor_href:
         href, anchor_id = anchor_href.split('#')
@@ -241,7 +472,7 @@ def extract_chapter_from_epub(epub_path: str, anchor_href: str) -> str:
     if item is None:
         raise EpubProcessingError(f"Chapter file not found: {href}", epub_path, "chapter_extraction")
     
-    soup = BeautifulSoup(item.get_content().decode('utf-8'), 'html.parser')
+    soup = parse_html(item.get_content().decode('utf-8'))
 
     # If no anchor, return entire page
     if not anchor_id:
@@ -253,43 +484,323 @@ def extract_chapter_from_epub(epub_path: str, anchor_href: str) -> str:
         raise EpubProcessingError(f"Anchor #{anchor_id} not found in file {href}", epub_path, "anchor_extraction")
 
     # Extract all content after this anchor (including itself)
-    extracted = [str(anchor_elem)]
-    for elem in anchor_elem.find_all_next():
-        extracted.append(str(elem))
+    return ''.join(str(node) for node in slice_chapter(anchor_elem))
 
-    return '\n'.join(extracted)
 
+class LazyEpubItem:
+    """Manifest item of a LazyEpub; its content is decompressed on each request"""
 
-def read_epub(epub_path: str) -> Any:
+    def __init__(self, book: "LazyEpub", uid: str, file_name: str, media_type: str, properties: List[str]):
+        self._book = book
+        self.id = uid
+        self.file_name = file_name
+        self.media_type = media_type
+        self.properties = properties
+
+    def get_id(self) -> str:
+        return self.id
+
+    def get_name(self) -> str:
+        return self.file_name
+
+    def get_content(self, default: Optional[bytes] = None) -> bytes:
+        try:
+            return self._book.read_file(posixpath.join(self._book.opf_dir, self.file_name))
+        except KeyError:
+            return default if default is not None else b''
+
+    def get_size(self) -> int:
+        """Get the uncompressed size of the content in bytes, without decompressing it"""
+        try:
+            return self._book.file_size(posixpath.join(self._book.opf_dir, self.file_name))
+        except KeyError:
+            return 0
+
+
+class LazyEpub:
+    """
+    Read-only EPUB reader that decompresses content documents on demand.
+
+    Opening a book reads only META-INF/container.xml, the OPF package
+    document and the navigation document (the EPUB 3 nav, or the NCX when
+    there is none). Images, fonts, audio and chapters stay compressed in the
+    archive until an item's get_content() is called, so memory and latency
+    follow the chapter being read rather than the size of the book.
+
+    It implements the subset of ebooklib's EpubBook used by this package
+    (toc, spine, get_metadata, get_item_with_href, get_item_with_id,
+    get_items) with the same TOC semantics as epub.read_epub.
+    """
+
+    def __init__(self, epub_path: str):
+        self.file_name = epub_path
+        self.opf_dir = ''
+        self.version = None
+        self.title = ''
+        self.metadata: Dict[str, Dict[str, List[Tuple[Any, Dict[str, str]]]]] = {}
+        self.spine: List[Tuple[str, str]] = []
+        self.toc: List[Any] = []
+        self._items: List[LazyEpubItem] = []
+        self._by_href: Dict[str, LazyEpubItem] = {}
+        self._by_id: Dict[str, LazyEpubItem] = {}
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(epub_path)
+        try:
+            self._load()
+        except Exception:
+            self._zip.close()
+            raise
+
+    def read_file(self, name: str) -> bytes:
+        """
+        Decompress one archive member
+
+        Raises:
+            KeyError: If the archive has no such member
+        """
+        with self._lock:
+            return self._zip.read(posixpath.normpath(name))
+
+    def file_size(self, name: str) -> int:
+        """
+        Get the uncompressed size of one archive member
+
+        Raises:
+            KeyError: If the archive has no such member
+        """
+        with self._lock:
+            return self._zip.getinfo(posixpath.normpath(name)).file_size
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def get_metadata(self, namespace: str, name: str) -> List[Tuple[Any, Dict[str, str]]]:
+        """Get (value, attributes) pairs of a metadata field, e.g. get_metadata('DC', 'title')"""
+        namespace = epub.NAMESPACES.get(namespace, namespace)
+        return self.metadata.get(namespace, {}).get(name, [])
+
+    def get_item_with_href(self, href: str) -> Optional[LazyEpubItem]:
+        return self._by_href.get(href)
+
+    def get_item_with_id(self, uid: str) -> Optional[LazyEpubItem]:
+        return self._by_id.get(uid)
+
+    def get_items(self) -> List[LazyEpubItem]:
+        return list(self._items)
+
+    def _load(self) -> None:
+        container = ebooklib_utils.parse_string(self.read_file('META-INF/container.xml'))
+        opf_file = None
+        for root_file in container.iter('{%s}rootfile' % epub.NAMESPACES['CONTAINERNS']):
+            if root_file.get('media-type') == 'application/oebps-package+xml':
+                opf_file = root_file.get('full-path')
+                break
+        if not opf_file:
+            raise ValueError("No OPF package document in META-INF/container.xml")
+        self.opf_dir = posixpath.dirname(opf_file)
+
+        package = ebooklib_utils.parse_string(self.read_file(opf_file)).getroot()
+        self.version = package.get('version')
+        opf_ns = '{%s}' % epub.NAMESPACES['OPF']
+
+        metadata = package.find(opf_ns + 'metadata')
+        if metadata is not None:
+            self._load_metadata(metadata)
+
+        nav_item = None
+        manifest = package.find(opf_ns + 'manifest')
+        for elem in (manifest if manifest is not None else []):
+            if elem.tag != opf_ns + 'item' or not elem.get('href'):
+                continue
+            properties = elem.get('properties', '').split()
+            item = LazyEpubItem(self, elem.get('id'), unquote(elem.get('href')), elem.get('media-type'), properties)
+            self._items.append(item)
+            self._by_href.setdefault(item.file_name, item)
+            self._by_id.setdefault(item.id, item)
+            if 'nav' in properties and item.media_type == 'application/xhtml+xml':
+                nav_item = item
+
+        spine = package.find(opf_ns + 'spine')
+        if spine is not None:
+            self.spine = [(elem.get('idref'), elem.get('linear', 'yes')) for elem in spine if elem.get('idref')]
+
+        # Like epub.read_epub: the EPUB 3 nav wins, the NCX is the fallback
+        if nav_item is not None:
+            self.toc = self._parse_nav(nav_item.get_content(), posixpath.dirname(nav_item.file_name))
+        elif spine is not None and spine.get('toc'):
+            ncx_item = self.get_item_with_id(spine.get('toc'))
+            if ncx_item is not None:
+                self.toc = self._parse_ncx(ncx_item.get_content())
+
+    def _load_metadata(self, metadata: Any) -> None:
+        # Keyed like ebooklib: element namespace, then local name (OPF <meta> included)
+        self.metadata = {namespace: {} for namespace in metadata.nsmap.values()}
+        for elem in metadata:
+            if not isinstance(elem.tag, str):
+                continue  # comments and processing instructions
+            namespace, _, name = elem.tag[1:].partition('}')
+            self.metadata.setdefault(namespace, {}).setdefault(name, []).append((elem.text, dict(elem.items())))
+
+        titles = self.get_metadata('DC', 'title')
+        if titles:
+            self.title = titles[0][0]
+
+    def _parse_nav(self, data: bytes, base_path: str) -> List[Any]:
+        nav_nodes = ebooklib_utils.parse_html_string(data).xpath("//nav[@*='toc']")
+        if not nav_nodes or nav_nodes[0].find('ol') is None:
+            return []
+
+        def parse_list(list_node):
+            items = []
+            for item_node in list_node.findall('li'):
+                sublist_node = item_node.find('ol')
+                link_node = item_node.find('a')
+                if sublist_node is not None:
+                    title = item_node[0].text_content()
+                    children = parse_list(sublist_node)
+                    if link_node is not None and link_node.get('href'):
+                        href = posixpath.normpath(posixpath.join(base_path, link_node.get('href')))
+                        items.append((epub.Section(title, href=href), children))
+                    else:
+                        items.append((epub.Section(title), children))
+                elif link_node is not None and link_node.get('href'):
+                    href = posixpath.normpath(posixpath.join(base_path, link_node.get('href')))
+                    items.append(epub.Link(href, link_node.text_content()))
+            return items
+
+        return parse_list(nav_nodes[0].find('ol'))
+
+    def _parse_ncx(self, data: bytes) -> List[Any]:
+        daisy_ns = '{%s}' % epub.NAMESPACES['DAISY']
+        nav_map = ebooklib_utils.parse_string(data).getroot().find(daisy_ns + 'navMap')
+        if nav_map is None:
+            return []
+
+        def parse_point(point):
+            label, content, children = '', '', []
+            for elem in point:
+                if elem.tag == daisy_ns + 'navLabel' and len(elem):
+                    label = elem[0].text
+                elif elem.tag == daisy_ns + 'content':
+                    content = elem.get('src', '')
+                elif elem.tag == daisy_ns + 'navPoint':
+                    children.append(parse_point(elem))
+            if children:
+                return (epub.Section(label, href=content), children)
+            return epub.Link(content, label, point.get('id', ''))
+
+        return [parse_point(point) for point in nav_map.findall(daisy_ns + 'navPoint')]
+
+
+def _load_epub(epub_path: str) -> Any:
+    """Open an EPUB with LazyEpub, falling back to ebooklib for anything it cannot read"""
+    if os.path.isfile(epub_path) and zipfile.is_zipfile(epub_path):
+        try:
+            return LazyEpub(epub_path)
+        except Exception as e:
+            logger.warning(
+                "Lazy EPUB reader failed, falling back to ebooklib",
+                file_path=epub_path,
+                operation="epub_open",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
     return epub.read_epub(epub_path)
 
-def flatten_toc(book: Any) -> List[str]:
-    toc_list = []
+
+def read_epub(epub_path: str) -> Any:
+    """
+    Read an EPUB file through the shared document pool
+
+    Books are opened with the lazy LazyEpub reader, which only decompresses
+    the items that are actually requested; ebooklib's full reader is the
+    fallback. The book is reused by later calls until the file changes on
+    disk or is evicted from the pool.
+    """
+    return get_document_pool().get(epub_path, _load_epub)
+
+def flatten_toc_entries(book: Any) -> List[Tuple[str, str]]:
+    """Get every TOC entry of a book, at any depth, as (title, href) in reading order"""
+    entries = []
     def _flatten(toc: Any) -> None:
         for item in toc:
             if isinstance(item, tuple):
                 link, children = item
-                toc_list.append(link.href)
+                entries.append((link.title, link.href))
                 if children:
                     _flatten(children)
             else:
                 # Handle single Link object
-                toc_list.append(item.href)
+                entries.append((item.title, item.href))
     _flatten(book.toc)
-    return toc_list
+    return entries
+
+def flatten_toc(book: Any) -> List[str]:
+    return [href for _, href in flatten_toc_entries(book)]
 
 def extract_chapter_plain_text(book: Any, anchor_href: str) -> str:
-    html = extract_chapter_html(book, anchor_href)
-    soup = BeautifulSoup(html, 'html.parser')
-    return soup.get_text()
+    return extract_chapter_tree(book, anchor_href).get_text()
 
 
 
 def convert_html_to_markdown(html_str: str) -> str:
-    h = html2text.HTML2Text()
-    h.ignore_links = False
-    h.ignore_images = False
-    return h.handle(html_str)
+    return new_html2text().handle(html_str)
+
+# Tags dropped together with their content by clean_html
+REMOVED_TAGS = frozenset(['script', 'style', 'img', 'svg', 'iframe', 'video', 'nav'])
+
+
+def _is_text(node: Any) -> bool:
+    # Only plain strings and CDATA count as text, like Tag.get_text()
+    return type(node) is bs4.NavigableString or isinstance(node, bs4.CData)
+
+
+def clean_tree(root: Any) -> None:
+    """
+    Clean a parsed HTML tree in place in a single bottom-up traversal
+
+    Blacklisted tags and comments are removed, and every tag whose subtree
+    has no text left is pruned (except <br>). Whether a subtree has text is
+    computed once per tag from its children, so the cost is linear in the
+    size of the document whatever its nesting depth.
+
+    Args:
+        root: BeautifulSoup document or tag to clean
+    """
+    has_text = {}
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            stack.extend(
+                (child, False) for child in node.contents
+                if isinstance(child, bs4.Tag) and child.name not in REMOVED_TAGS
+            )
+            continue
+
+        text = False
+        empty_children = []
+        for child in list(node.contents):
+            if isinstance(child, bs4.Tag):
+                if child.name in REMOVED_TAGS:
+                    child.decompose()
+                elif has_text.pop(id(child)):
+                    text = True
+                elif child.name != 'br':
+                    empty_children.append(child)
+            elif isinstance(child, bs4.Comment):
+                child.extract()
+            elif not text and _is_text(child) and child.strip():
+                text = True
+
+        # An empty tag is dropped by the nearest ancestor that has text, so
+        # each removed subtree is decomposed exactly once
+        if text or node is root:
+            for child in empty_children:
+                child.decompose()
+        has_text[id(node)] = text
+
 
 def clean_html(html_str: str) -> str:
     """
@@ -301,227 +812,540 @@ def clean_html(html_str: str) -> str:
     Returns:
     - Cleaned HTML string
     """
-    soup = BeautifulSoup(html_str, 'html.parser')
+    soup = parse_html(html_str)
+    clean_tree(soup)
+    return str(soup)
 
-    # Remove unnecessary tags
-    for tag in soup(['script', 'style', 'img', 'svg', 'iframe', 'video', 'nav']):
-        tag.decompose()
 
-    # Remove HTML comments
-    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-        comment.extract()
 
-    # Remove empty tags (no text and no useful attributes)
-    for tag in soup.find_all():
-        if not tag.get_text(strip=True) and not tag.find('img') and not tag.name == 'br':
-            tag.decompose()
+def heading_level(tag_name: Optional[str]) -> int:
+    """Get the level of an h1-h6 tag name, or 7 for anything that is not a heading"""
+    if tag_name and tag_name.startswith('h') and tag_name[1:].isdigit():
+        return int(tag_name[1:])
+    return 7  # treat as lowest priority
 
-    return str(soup)
 
+def find_anchor(soup: Any, anchor: str) -> Any:
+    """Find an anchor element by id, then by name, then as an in-page link target"""
+    elem = soup.find(id=anchor)
+    if not elem:
+        elem = soup.find(attrs={"name": anchor})
+    if not elem:
+        elem = soup.find('a', href=f"#{anchor}")
+    return elem
 
 
-def extract_chapter_html(book: Any, anchor_href: str) -> str:
+def _following_nodes(node: Any) -> Any:
+    """Iterate over the nodes after node's subtree, in document order"""
+    while node is not None and node.next_sibling is None:
+        node = node.parent
+    if node is None:
+        return
+    node = node.next_sibling
+    yield node
+    yield from node.next_elements
+
+
+def _contains(ancestor: Any, node: Any) -> bool:
+    return any(parent is ancestor for parent in node.parents)
+
+
+def find_chapter_end(start_elem: Any, boundary_elem: Any = None) -> Any:
     """
-    Extract chapter HTML content with improved logic to handle subchapters correctly.
-    This function fixes the issue where subchapters in the TOC cause premature truncation
-    of chapter content by properly understanding the chapter hierarchy.
+    Find the node where a chapter starting at start_elem ends
+
+    The chapter ends at the first heading of the same or a higher level than
+    start_elem (any heading if start_elem is not a heading), or at
+    boundary_elem (the next TOC entry's anchor), whichever comes first after
+    start_elem. A boundary inside start_elem itself also ends the chapter.
+
+    Returns:
+        The first node not belonging to the chapter, or None if the chapter
+        runs to the end of the document
+    """
+    if boundary_elem is not None and _contains(start_elem, boundary_elem):
+        return boundary_elem
+    start_level = heading_level(start_elem.name)
+    for elem in _following_nodes(start_elem):
+        if elem is boundary_elem:
+            return elem
+        level = heading_level(elem.name)
+        if level < 7 and level <= start_level:
+            return elem
+    return None
+
+
+def slice_chapter(start_elem: Any, end_elem: Any = None) -> List[Any]:
+    """
+    Get the nodes covering the document range [start_elem, end_elem)
+
+    Each node in the range is returned exactly once, as the largest subtree
+    lying entirely inside the range: whole siblings are taken as they are,
+    and only ancestors of end_elem are descended into. Serializing the
+    result therefore costs time and space linear in the chapter size,
+    independent of nesting depth.
+
+    Args:
+        start_elem: First node of the range
+        end_elem: First node after the range, or None for the end of the document
+
+    Returns:
+        List of nodes (tags and strings) in document order
+    """
+    end_ancestors = set(id(parent) for parent in end_elem.parents) if end_elem is not None else set()
+    nodes = []
+    node = start_elem
+    while node is not None and node is not end_elem:
+        if id(node) in end_ancestors:
+            # The range ends inside this node: continue with its children
+            node = node.contents[0]
+            continue
+        nodes.append(node)
+        while node is not None and node.next_sibling is None:
+            node = node.parent
+        node = node.next_sibling if node is not None else None
+    return nodes
+
+
+class TocIndex:
+    """
+    Flattened, indexed view of a book's TOC, built once per book.
+
+    Entries are (title, href, level) tuples in reading order, with levels
+    starting at 1 for top-level entries and nesting to arbitrary depth.
+    The index provides hash lookups by exact href and by content file, and
+    for every entry a precomputed pointer to the next entry at the same or
+    a higher level, which is where that chapter ends.
+    """
+
+    def __init__(self, toc: Any):
+        self.entries: List[Tuple[str, str, int]] = []
+        self._flatten(toc, 1)
+        self.by_href: Dict[str, int] = {}
+        self.last_by_href: Dict[str, int] = {}
+        self.by_file: Dict[str, List[int]] = {}
+        for i, (title, href, level) in enumerate(self.entries):
+            self.by_href.setdefault(href, i)
+            self.last_by_href[href] = i
+            self.by_file.setdefault(href.split('#')[0], []).append(i)
+        self.next_boundary: List[Optional[int]] = [None] * len(self.entries)
+        pending: List[int] = []
+        for i, (title, href, level) in enumerate(self.entries):
+            while pending and self.entries[pending[-1]][2] >= level:
+                self.next_boundary[pending.pop()] = i
+            pending.append(i)
+
+    def _flatten(self, toc: Any, level: int) -> None:
+        for item in toc:
+            if isinstance(item, tuple):
+                # item format: (chapter element, list of subchapters)
+                link, children = item[0], item[1]
+                self.entries.append((link.title, link.href, level))
+                if children:
+                    self._flatten(children, level + 1)
+            else:
+                self.entries.append((item.title, item.href, level))
+
+    def find(self, anchor_href: str) -> Optional[int]:
+        """
+        Find the TOC entry for a chapter href
+
+        Matching prefers, in order: an exact href match; an entry for the
+        whole content file of an anchored href; an entry whose href is
+        contained in anchor_href (the last one wins); and finally the first
+        entry pointing into the same content file.
+
+        Returns:
+            Optional[int]: Index into entries, or None if nothing matches
+        """
+        idx = self.by_href.get(anchor_href)
+        if idx is not None:
+            return idx
+        anchor_file = anchor_href.split('#')[0]
+        if anchor_file != anchor_href:
+            idx = self.last_by_href.get(anchor_file)
+            if idx is not None:
+                return idx
+        # Rare case (e.g. differing path prefixes): fall back to a substring scan
+        for i in range(len(self.entries) - 1, -1, -1):
+            if self.entries[i][1] in anchor_href:
+                return i
+        same_file = self.by_file.get(anchor_file)
+        return same_file[0] if same_file else None
+
+    def next_boundary_href(self, idx: int) -> Optional[str]:
+        """Get the href where the chapter at idx ends, or None for the last chapter"""
+        next_idx = self.next_boundary[idx]
+        return self.entries[next_idx][1] if next_idx is not None else None
+
+
+_toc_indexes: "weakref.WeakKeyDictionary[Any, Tuple[Any, TocIndex]]" = weakref.WeakKeyDictionary()
+_toc_indexes_lock = threading.Lock()
+
+
+def get_toc_index(book: Any) -> TocIndex:
+    """
+    Get the TocIndex of a book, building it on first use
+
+    The index lives as long as the book object (e.g. while it stays in the
+    document pool) and is rebuilt if the book's toc is replaced.
+    """
+    try:
+        with _toc_indexes_lock:
+            cached = _toc_indexes.get(book)
+        if cached is not None and cached[0] is book.toc:
+            return cached[1]
+    except TypeError:
+        # Book objects that cannot be weakly referenced are indexed per call
+        return TocIndex(book.toc)
+    index = TocIndex(book.toc)
+    with _toc_indexes_lock:
+        _toc_indexes[book] = (book.toc, index)
+    return index
+
+
+def _parse_item(item: Any, href: str, parsed: Optional[Dict[str, Any]]) -> Any:
+    if parsed is None:
+        return parse_html(item.get_content().decode('utf-8'))
+    soup = parsed.get(href)
+    if soup is None:
+        soup = parsed[href] = parse_html(item.get_content().decode('utf-8'))
+    return soup
+
+
+def extract_chapter_tree(book: Any, anchor_href: str, parsed: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Extract a chapter as a parsed tree, for the HTML, text and markdown stages.
+
+    The content file is parsed once; the chapter nodes are moved into a new
+    document and cleaned in place, so later stages never re-parse it.
     Args:
         book: EPUB book object
         anchor_href: Chapter location information like 'chapter1.xhtml#section1_3'
+        parsed: Parsed content files by href, shared between calls. Files are
+            taken from and added to it, and the shared trees are left intact:
+            chapter nodes are copied out of them instead of moved.
     Returns:
-        HTML string (complete chapter content with proper boundaries)
+        BeautifulSoup document holding the chapter content
     """
-    logger.debug(f"Extracting chapter with improved logic: {anchor_href}")
+    logger.debug("Extracting chapter with improved logic: %s", anchor_href)
     href, anchor = anchor_href.split('#') if '#' in anchor_href else (anchor_href, None)
-    toc_entries = []
-    for item in book.toc:
-        if isinstance(item, tuple):
-            chapter = item[0]
-            toc_entries.append((chapter.title, chapter.href, 1))
-            for sub_item in item[1]:
-                if isinstance(sub_item, tuple):
-                    toc_entries.append((sub_item[0].title, sub_item[0].href, 2))
-                else:
-                    toc_entries.append((sub_item.title, sub_item.href, 2))
-        else:
-            toc_entries.append((item.title, item.href, 1))
-    current_idx = None
-    current_level = None
-    fallback_idx = None
-    fallback_level = None
-    
-    # Try multiple matching strategies with preference for more specific matches
-    for i, (title, toc_href, level) in enumerate(toc_entries):
-        # Strategy 1: Exact match (highest priority)
-        if toc_href == anchor_href:
-            current_idx = i
-            current_level = level
-            break
-        
-        # Strategy 2: TOC href is contained in the requested anchor_href (high priority)
-        if toc_href in anchor_href:
-            current_idx = i
-            current_level = level
-            # Don't break here - continue looking for exact matches
-        
-        # Strategy 3: File part matches (lower priority - use as fallback)
-        if current_idx is None:  # Only consider if no better match found
-            if '#' in anchor_href and '#' in toc_href:
-                anchor_file = anchor_href.split('#')[0]
-                toc_file = toc_href.split('#')[0]
-                if anchor_file == toc_file and fallback_idx is None:
-                    fallback_idx = i
-                    fallback_level = level
-            elif '#' in anchor_href:
-                anchor_file = anchor_href.split('#')[0]
-                if anchor_file == toc_href and fallback_idx is None:
-                    fallback_idx = i
-                    fallback_level = level
-            elif '#' in toc_href:
-                toc_file = toc_href.split('#')[0]
-                if toc_file == anchor_href and fallback_idx is None:
-                    fallback_idx = i
-                    fallback_level = level
-    
-    # Use fallback if no better match was found
-    if current_idx is None and fallback_idx is not None:
-        current_idx = fallback_idx
-        current_level = fallback_level
+    shared = parsed is not None
+    toc_index = get_toc_index(book)
+    current_idx = toc_index.find(anchor_href)
     
     if current_idx is None:
         # Chapter not found in TOC, but it might exist in the EPUB file
         # Try to find the file directly in the EPUB
-        logger.debug(f"Chapter {anchor_href} not found in TOC, checking if file exists in EPUB")
+        logger.debug("Chapter %s not found in TOC, checking if file exists in EPUB", anchor_href)
         
         # Check if the file exists in the EPUB
         item = book.get_item_with_href(href)
         if item is not None:
-            logger.info(f"Chapter file {href} found in EPUB but not in TOC, processing as standalone chapter")
+            logger.info("Chapter file %s found in EPUB but not in TOC, processing as standalone chapter", href)
             # Process as a standalone chapter without TOC-based boundaries
-            soup = BeautifulSoup(item.get_content().decode('utf-8'), 'html.parser')
+            soup = _parse_item(item, href, parsed)
             
             # If there's an anchor, try to find it and extract from that point
             if anchor:
                 # Try multiple anchor finding strategies
-                anchor_elem = soup.find(id=anchor)
-                if not anchor_elem:
-                    anchor_elem = soup.find(attrs={'name': anchor})
-                if not anchor_elem:
-                    anchor_elem = soup.find('a', href=f'#{anchor}')
+                anchor_elem = find_anchor(soup, anchor)
                 
                 if anchor_elem:
-                    logger.debug(f"Found anchor {anchor} in standalone chapter")
+                    logger.debug("Found anchor %s in standalone chapter", anchor)
                     # Extract content from anchor point to end of file
-                    elems = []
-                    current = anchor_elem
-                    while current:
-                        if hasattr(current, 'name') and current.name:
-                            elems.append(current)
-                        current = current.next_sibling
-                    
-                    # Also include all following elements
-                    for elem in anchor_elem.find_all_next():
-                        if elem not in elems:
-                            elems.append(elem)
-                    
-                    if elems:
-                        return ''.join(str(elem) for elem in elems)
-                    else:
-                        logger.warning(f"Anchor {anchor} found but no content extracted, returning full chapter")
-                        return str(soup)
+                    return make_fragment(slice_chapter(anchor_elem), copy_nodes=shared)
                 else:
-                    logger.warning(f"Anchor {anchor} not found in standalone chapter, returning full chapter")
-                    return str(soup)
+                    logger.warning("Anchor %s not found in standalone chapter, returning full chapter", anchor)
+                    return copy.copy(soup) if shared else soup
             else:
                 # No anchor, return entire chapter
-                return str(soup)
+                return copy.copy(soup) if shared else soup
         
         # File doesn't exist at all
-        logger.debug(f"Available TOC entries:")
-        for i, (title, toc_href, level) in enumerate(toc_entries):
-            logger.debug(f"  [{i}] '{title}' -> '{toc_href}' (level {level})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Available TOC entries:")
+            for i, (title, toc_href, level) in enumerate(toc_index.entries):
+                logger.debug("  [%d] '%s' -> '%s' (level %s)", i, title, toc_href, level)
         raise EpubProcessingError(f"Chapter {anchor_href} not found in TOC or EPUB file", "unknown", "toc_lookup")
-    next_chapter_href = None
-    for i in range(current_idx + 1, len(toc_entries)):
-        title, toc_href, level = toc_entries[i]
-        if level <= current_level:
-            next_chapter_href = toc_href
-            break
+    next_chapter_href = toc_index.next_boundary_href(current_idx)
     item = book.get_item_with_href(href)
     if item is None:
         raise EpubProcessingError(f"Chapter file not found: {href}", "unknown", "chapter_file_lookup")
-    soup = BeautifulSoup(item.get_content().decode('utf-8'), 'html.parser')
-    elems = []
-    def heading_level(tag_name):
-        if tag_name and tag_name.startswith('h') and tag_name[1:].isdigit():
-            return int(tag_name[1:])
-        return 7  # treat as lowest priority
+    soup = _parse_item(item, href, parsed)
     if anchor:
-        start_elem = soup.find(id=anchor)
+        start_elem = find_anchor(soup, anchor)
         if not start_elem:
-            # Try alternative anchor lookup methods
-            start_elem = soup.find(attrs={"name": anchor})
-            if not start_elem:
-                # Try to find anchor in href attributes
-                start_elem = soup.find('a', href=f"#{anchor}")
-                if not start_elem:
-                    # Log the issue and fall back to returning the entire chapter
-                    logger.warning(f"Anchor '{anchor}' not found in {href}, returning entire chapter content")
-                    # Fall back to returning entire chapter content
-                    elems = [str(elem) for elem in soup.body.children if hasattr(elem, 'name')] if soup.body else [str(soup)]
-                    return ''.join(elems)
-        
-        if start_elem:
-            start_level = heading_level(start_elem.name) if start_elem.name else 7
-            for elem in start_elem.next_elements:
-                if elem is start_elem:
-                    elems.append(str(elem))
-                    continue
-                if hasattr(elem, 'name') and elem.name and elem.name.startswith('h') and elem.name[1:].isdigit():
-                    if heading_level(elem.name) <= start_level:
-                        break
-                elems.append(str(elem))
+            # Log the issue and fall back to returning the entire chapter
+            logger.warning("Anchor '%s' not found in %s, returning entire chapter content", anchor, href)
+            if soup.body:
+                return make_fragment(list(soup.body.children), copy_nodes=shared)
+            return copy.copy(soup) if shared else soup
     else:
-        chapter_elem = soup.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-        if chapter_elem:
-            start_level = heading_level(chapter_elem.name)
-            for elem in chapter_elem.next_elements:
-                if elem is chapter_elem:
-                    elems.append(str(elem))
-                    continue
-                if hasattr(elem, 'name') and elem.name and elem.name.startswith('h') and elem.name[1:].isdigit():
-                    if heading_level(elem.name) <= start_level:
-                        break
-                elems.append(str(elem))
-        else:
+        start_elem = soup.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+        if not start_elem:
             body_elem = soup.find('body')
-            elems = [str(body_elem)] if body_elem else [str(soup)]
-    html = '\n'.join(elems)
-    return clean_html(html)
+            if body_elem:
+                fragment = make_fragment([body_elem], copy_nodes=shared)
+            else:
+                fragment = copy.copy(soup) if shared else soup
+            clean_tree(fragment)
+            return fragment
+
+    # The next TOC entry ends this chapter if it points into the same file
+    boundary_elem = None
+    if next_chapter_href and '#' in next_chapter_href:
+        next_href, next_anchor = next_chapter_href.split('#', 1)
+        if next_href == href:
+            boundary_elem = find_anchor(soup, next_anchor)
+    end_elem = find_chapter_end(start_elem, boundary_elem)
+    fragment = make_fragment(slice_chapter(start_elem, end_elem), copy_nodes=shared)
+    clean_tree(fragment)
+    return fragment
+
+
+def extract_chapter_html(book: Any, anchor_href: str) -> str:
+    """
+    Extract chapter HTML content with improved logic to handle subchapters correctly.
+    This function fixes the issue where subchapters in the TOC cause premature truncation
+    of chapter content by properly understanding the chapter hierarchy.
+    Args:
+        book: EPUB book object
+        anchor_href: Chapter location information like 'chapter1.xhtml#section1_3'
+    Returns:
+        HTML string (complete chapter content with proper boundaries)
+    """
+    return str(extract_chapter_tree(book, anchor_href))
 
 
 def extract_chapter_markdown(book: Any, anchor_href: str) -> str:
     """Fixed version of extract_chapter_markdown using extract_chapter_html"""
-    html = extract_chapter_html(book, anchor_href)
-    return convert_html_to_markdown(html)
+    return "".join(iter_markdown(extract_chapter_tree(book, anchor_href)))
+
+
+@cached_extraction("epub_chapter_html")
+def get_chapter_html(epub_path: str, anchor_href: str) -> str:
+    """Extract chapter HTML from an EPUB file, using the persistent extraction cache"""
+    return extract_chapter_html(read_epub(epub_path), anchor_href)
+
+
+@cached_extraction("epub_chapter_markdown")
+def get_chapter_markdown(epub_path: str, anchor_href: str) -> str:
+    """Extract chapter markdown from an EPUB file, using the persistent extraction cache"""
+    return extract_chapter_markdown(read_epub(epub_path), anchor_href)
+
+
+@cached_extraction("epub_chapter_text")
+def get_chapter_text(epub_path: str, anchor_href: str) -> str:
+    """Extract chapter plain text from an EPUB file, using the persistent extraction cache"""
+    return extract_chapter_plain_text(read_epub(epub_path), anchor_href)
+
+
+def iter_chapter_markdown(epub_path: str, anchor_href: str) -> Iterator[str]:
+    """
+    Stream a chapter's markdown in pieces as it is converted
+
+    A chapter in the persistent extraction cache is yielded whole; otherwise
+    it is converted incrementally and stored in the cache once complete.
+    """
+    cache = get_extraction_cache()
+    arg = cache_arg(anchor_href)
+    fingerprint = None
+    if cache is not None:
+        value = cache.get(epub_path, 'epub_chapter_markdown', arg)
+        if value is not MISS:
+            yield value
+            return
+        fingerprint = version_key_or_none(epub_path)
+    pieces = []
+    for piece in iter_markdown(extract_chapter_tree(read_epub(epub_path), anchor_href)):
+        pieces.append(piece)
+        yield piece
+    if fingerprint is not None:
+        cache.put(epub_path, 'epub_chapter_markdown', arg, "".join(pieces), fingerprint)
+
+
+def _chapter_source_size(book: Any, anchor_href: str) -> int:
+    """Get the uncompressed size in bytes of the content file holding a chapter, or 0 if unknown"""
+    item = book.get_item_with_href(anchor_href.split('#')[0])
+    if item is None:
+        return 0
+    if isinstance(item, LazyEpubItem):
+        return item.get_size()
+    return len(item.get_content())
+
+
+def get_chapter_markdown_page(epub_path: str, anchor_href: str, cursor: Optional[str] = None,
+                              max_chars: int = DEFAULT_PAGE_CHARS,
+                              max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get one page of a chapter's markdown, for chapters too large for one response
+
+    The chapter is converted once and kept server-side; pages end at
+    paragraph or heading boundaries, and the returned cursor resumes
+    without extracting the chapter again. Conversion is streamed, so the
+    first page is returned before the rest of the chapter is converted.
+
+    Args:
+        epub_path: Path to the EPUB file
+        anchor_href: Chapter location like 'chapter1.xhtml#section1_3'
+        cursor: next_cursor of the previous page, or None for the first page
+        max_chars: Maximum characters per page
+        max_tokens: Maximum estimated tokens per page, if any
+
+    Returns:
+        Dict[str, Any]: content, offset, total_chars (None until the whole chapter
+        is converted) and next_cursor (None on the last page)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        EpubProcessingError: If the cursor is invalid, or the book changed since it was issued
+    """
+    if not os.path.exists(epub_path):
+        raise FileNotFoundError(f"EPUB file not found: {epub_path}")
+    scope = f"epub_chapter_markdown:{os.path.realpath(epub_path)}#{anchor_href}"
+    try:
+        return paginate(
+            scope,
+            file_version_key(epub_path),
+            lambda: iter_chapter_markdown(epub_path, anchor_href),
+            cursor,
+            max_chars,
+            max_tokens,
+            lambda: _chapter_source_size(read_epub(epub_path), anchor_href)
+        )
+    except ValueError as e:
+        raise EpubProcessingError(str(e), epub_path, "chapter_pagination", e)
+
+
+# Output formats of extract_multiple_chapters and their extraction cache kinds
+CHAPTER_OUTPUTS = {
+    'html': 'epub_chapter_html',
+    'text': 'epub_chapter_text',
+    'markdown': 'epub_chapter_markdown',
+}
+
+
+def render_chapter(tree: Any, output: str) -> str:
+    """Render an extracted chapter tree as html, text or markdown"""
+    if output == 'html':
+        return str(tree)
+    if output == 'text':
+        return tree.get_text()
+    if output == 'markdown':
+        return "".join(iter_markdown(tree))
+    raise ValueError("Invalid output format.")
 
 
 def extract_multiple_chapters(book: Any, anchor_list: List[str], output: str = 'html') -> List[Tuple[str, str]]:
-    """Extract multiple chapters using improved extract_chapter_html logic"""
+    """
+    Extract multiple chapters, parsing each content file only once
+
+    Chapters pointing into the same content file are sliced from one shared
+    parse of that file, which is dropped after its last chapter.
+    Args:
+        book: EPUB book object
+        anchor_list: Chapter hrefs like 'chapter1.xhtml#section1_3', in the order to return them
+        output: 'html', 'text' or 'markdown'
+    Returns:
+        List of (href, content) tuples in the order of anchor_list
+    """
+    if output not in CHAPTER_OUTPUTS:
+        raise ValueError("Invalid output format.")
+    files = [href.split('#')[0] for href in anchor_list]
+    last_use = {file: i for i, file in enumerate(files)}
+    shared_files = set(file for file, count in Counter(files).items() if count > 1)
+    parsed: Dict[str, Any] = {}
     results = []
-    for href in anchor_list:
-        if output == 'html':
-            content = extract_chapter_html(book, href)
-        elif output == 'text':
-            content = extract_chapter_plain_text(book, href)
-        elif output == 'markdown':
-            content = extract_chapter_markdown(book, href)
-        else:
-            raise ValueError("Invalid output format.")
-        results.append((href, content))
+    for i, href in enumerate(anchor_list):
+        file = files[i]
+        tree = extract_chapter_tree(book, href, parsed if file in shared_files else None)
+        results.append((href, render_chapter(tree, output)))
+        if last_use[file] == i:
+            parsed.pop(file, None)
     return results
 
 
+def get_toc_range(book: Any, start_href: str, end_href: str) -> List[str]:
+    """
+    Get the hrefs of the TOC entries from start_href to end_href, inclusive
+
+    Raises:
+        EpubProcessingError: If either entry is not in the TOC or end_href comes before start_href
+    """
+    toc_index = get_toc_index(book)
+    start = toc_index.find(start_href)
+    end = toc_index.find(end_href)
+    if start is None or end is None:
+        missing = start_href if start is None else end_href
+        raise EpubProcessingError(f"Chapter {missing} not found in TOC", "unknown", "toc_lookup")
+    if end < start:
+        raise EpubProcessingError(f"Chapter {end_href} comes before {start_href} in TOC", "unknown", "toc_lookup")
+    return [href for title, href, level in toc_index.entries[start:end + 1]]
+
+
+@log_operation("epub_multiple_chapters_extraction")
+def get_multiple_chapters(epub_path: str, anchor_list: Optional[List[str]] = None,
+                          start_href: Optional[str] = None, end_href: Optional[str] = None,
+                          output: str = 'markdown') -> List[Tuple[str, str]]:
+    """
+    Extract several chapters of an EPUB file in one call
+
+    Chapters are given either as a list of hrefs or as a TOC range. Chapters
+    already in the persistent extraction cache are served from it; the rest
+    are extracted with extract_multiple_chapters and then cached.
+
+    Args:
+        epub_path: Path to the EPUB file
+        anchor_list: Chapter hrefs to extract
+        start_href: First chapter of a TOC range, used when anchor_list is not given
+        end_href: Last chapter of a TOC range (inclusive)
+        output: 'html', 'text' or 'markdown'
+
+    Returns:
+        List[Tuple[str, str]]: (href, content) tuples in the requested order
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        EpubProcessingError: If a chapter is not found or the arguments are invalid
+    """
+    if output not in CHAPTER_OUTPUTS:
+        raise EpubProcessingError(f"Invalid output format: {output}", epub_path, "multiple_chapters_extraction")
+    if not os.path.exists(epub_path):
+        raise FileNotFoundError(f"EPUB file not found: {epub_path}")
+    cache = get_extraction_cache()
+    # Taken before reading, so chapters of a book rewritten meanwhile are not cached as the new version
+    fingerprint = version_key_or_none(epub_path) if cache is not None else None
+    book = read_epub(epub_path)
+    if anchor_list is None:
+        if start_href is None or end_href is None:
+            raise EpubProcessingError("Either chapter hrefs or a TOC range is required",
+                                      epub_path, "multiple_chapters_extraction")
+        anchor_list = get_toc_range(book, start_href, end_href)
+
+    kind = CHAPTER_OUTPUTS[output]
+    contents: Dict[str, str] = {}
+    if cache is not None:
+        for href in anchor_list:
+            value = cache.get(epub_path, kind, cache_arg(href))
+            if value is not MISS:
+                contents[href] = value
+    missing = list(dict.fromkeys(href for href in anchor_list if href not in contents))
+    for href, content in extract_multiple_chapters(book, missing, output):
+        contents[href] = content
+        if fingerprint is not None:
+            cache.put(epub_path, kind, cache_arg(href), content, fingerprint)
+
+    logger.info(
+        "EPUB chapters extraction completed",
+        file_path=epub_path,
+        operation="multiple_chapters_extraction",
+        chapter_count=len(anchor_list),
+        cached_count=len(anchor_list) - len(missing)
+    )
+    return [(href, contents[href]) for href in anchor_list]
+
+
 
 
 
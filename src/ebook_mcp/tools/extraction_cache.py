@@ -0,0 +1,321 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = "5"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Number of writes between two checks of the total cache size
+_EVICTION_CHECK_INTERVAL = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    arg TEXT NOT NULL,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (path, kind, arg)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+class _Miss:
+    """Sentinel type for cache misses, since None is a valid cached value"""
+    def __repr__(self) -> str:
+        return "MISS"
+
+
+MISS = _Miss()
+
+
+def default_cache_dir() -> str:
+    """Get the per-user cache directory, overridable with EBOOK_MCP_CACHE_DIR"""
+    if os.environ.get("EBOOK_MCP_CACHE_DIR"):
+        return os.path.expanduser(os.environ["EBOOK_MCP_CACHE_DIR"])
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/ebook-mcp")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ebook-mcp")
+
+
+def file_version_key(path: str) -> str:
+    """
+    Get the key identifying one version of a file: inode, mtime and size
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    st = os.stat(path)
+    return f"{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def version_key_or_none(path: str) -> Optional[str]:
+    """Get file_version_key(path), or None if the file cannot be read"""
+    try:
+        return file_version_key(path)
+    except OSError:
+        return None
+
+
+class ExtractionCache:
+    """
+    Persistent SQLite cache for extraction results (TOC, metadata, chapters, pages).
+
+    Entries are keyed by (realpath, kind, arguments) and validated against
+    the file's (inode, mtime, size) and EXTRACTOR_VERSION, so a changed book
+    or a new extractor release invalidates them automatically. The database
+    runs in WAL mode so several server processes can share it; the total
+    size is bounded by evicting least-recently-accessed entries. Cache errors
+    are logged and treated as misses, never surfaced to the caller.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, file_path: str, kind: str, arg: str = "") -> Any:
+        """
+        Look up a cached extraction result
+
+        Returns:
+            Any: The cached value, or MISS
+        """
+        try:
+            real_path = os.path.realpath(file_path)
+            fingerprint = file_version_key(real_path)
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT fingerprint, version, value FROM entries WHERE path = ? AND kind = ? AND arg = ?",
+                (real_path, kind, arg)
+            ).fetchone()
+            if row is None:
+                self._count(hit=False)
+                return MISS
+            if row[0] != fingerprint or row[1] != EXTRACTOR_VERSION:
+                # The book changed on disk (or the extractor did): drop all its stale entries
+                conn.execute(
+                    "DELETE FROM entries WHERE path = ? AND (fingerprint != ? OR version != ?)",
+                    (real_path, fingerprint, EXTRACTOR_VERSION)
+                )
+                self._count(hit=False)
+                return MISS
+            conn.execute(
+                "UPDATE entries SET accessed = ? WHERE path = ? AND kind = ? AND arg = ?",
+                (time.time(), real_path, kind, arg)
+            )
+            self._count(hit=True)
+            return json.loads(zlib.decompress(row[2]))
+        except (OSError, sqlite3.Error, ValueError, zlib.error) as e:
+            logger.warning(
+                "Extraction cache lookup failed",
+                file_path=file_path,
+                operation="extraction_cache_get",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            self._count(hit=False)
+            return MISS
+
+    def put(self, file_path: str, kind: str, arg: str, value: Any, fingerprint: Optional[str] = None) -> None:
+        """
+        Store an extraction result; values must be JSON-serializable
+
+        Args:
+            fingerprint: file_version_key() of the file taken before the value was
+                extracted, so a file rewritten during extraction is not cached under
+                its new version; by default the file's current version
+        """
+        try:
+            real_path = os.path.realpath(file_path)
+            if fingerprint is None:
+                fingerprint = file_version_key(real_path)
+            blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (path, fingerprint, kind, arg, version, value, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (real_path, fingerprint, kind, arg, EXTRACTOR_VERSION, blob, len(blob), time.time())
+            )
+            with self._lock:
+                self._writes += 1
+                check = self._writes % _EVICTION_CHECK_INTERVAL == 1
+            if check:
+                self.evict()
+        except (OSError, sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(
+                "Extraction cache store failed",
+                file_path=file_path,
+                operation="extraction_cache_put",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+
+    def evict(self) -> int:
+        """Evict least-recently-accessed entries until under 90% of max_bytes"""
+        conn = self._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while total > target:
+            rows = conn.execute("SELECT rowid, size FROM entries ORDER BY accessed LIMIT 256").fetchall()
+            if not rows:
+                break
+            doomed = []
+            for rowid, size in rows:
+                if total <= target:
+                    break
+                doomed.append((rowid,))
+                total -= size
+            conn.executemany("DELETE FROM entries WHERE rowid = ?", doomed)
+            evicted += len(doomed)
+        logger.debug(
+            "Evicted extraction cache entries",
+            operation="extraction_cache_eviction",
+            evicted=evicted
+        )
+        return evicted
+
+    def invalidate(self, file_path: str) -> None:
+        """Drop all cached results for a file"""
+        try:
+            self._connection().execute("DELETE FROM entries WHERE path = ?", (os.path.realpath(file_path),))
+        except sqlite3.Error as e:
+            logger.warning(
+                "Extraction cache invalidation failed",
+                file_path=file_path,
+                operation="extraction_cache_invalidate",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+
+    def clear(self) -> None:
+        """Drop all cached results"""
+        self._connection().execute("DELETE FROM entries")
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get entry count, stored bytes and hit/miss counters"""
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {
+            "path": self.db_path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def cache_enabled() -> bool:
+    """Check whether persistent caching is enabled (disable with EBOOK_MCP_CACHE=0)"""
+    return os.environ.get("EBOOK_MCP_CACHE", "1").lower() not in ("0", "false", "off", "no")
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_initialized = False
+_init_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Get the process-wide extraction cache, or None when caching is disabled
+
+    The cache is created on first use. Set EBOOK_MCP_CACHE=0 to disable it,
+    EBOOK_MCP_CACHE_DIR to move it and EBOOK_MCP_CACHE_MAX_BYTES to bound it.
+    """
+    global _extraction_cache, _extraction_cache_initialized
+    if _extraction_cache_initialized:
+        return _extraction_cache
+    with _init_lock:
+        if not _extraction_cache_initialized:
+            if cache_enabled():
+                db_path = os.path.join(default_cache_dir(), "extraction_cache.sqlite3")
+                max_bytes = int(os.environ.get("EBOOK_MCP_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+                try:
+                    _extraction_cache = ExtractionCache(db_path, max_bytes)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(
+                        "Extraction cache unavailable, continuing without it",
+                        file_path=db_path,
+                        operation="extraction_cache_init",
+                        error_type=type(e).__name__,
+                        error_details=str(e)
+                    )
+            _extraction_cache_initialized = True
+    return _extraction_cache
+
+
+def cache_arg(*args, **kwargs) -> str:
+    """Encode the non-path arguments of an extraction call as a cache key"""
+    return json.dumps([args, sorted(kwargs.items())], ensure_ascii=False, default=str)
+
+
+def cached_extraction(kind: str, decode: Optional[Callable[[Any], Any]] = None):
+    """
+    Decorator caching a path-based extraction function in the extraction cache.
+
+    The decorated function must take the book path as its first argument;
+    the remaining arguments become part of the cache key. decode converts
+    the JSON-decoded value back to the function's return type (e.g. lists
+    back to tuples).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(file_path: str, *args, **kwargs):
+            cache = get_extraction_cache()
+            if cache is None or not os.path.isfile(file_path):
+                return func(file_path, *args, **kwargs)
+            arg = cache_arg(*args, **kwargs)
+            value = cache.get(file_path, kind, arg)
+            if value is not MISS:
+                return decode(value) if decode else value
+            fingerprint = version_key_or_none(file_path)
+            result = func(file_path, *args, **kwargs)
+            if fingerprint is not None:
+                cache.put(file_path, kind, arg, result, fingerprint)
+            return result
+        return wrapper
+    return decorator
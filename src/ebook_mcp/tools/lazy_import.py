@@ -0,0 +1,71 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from typing import Any, Optional
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access
+
+    The format dependencies (PyMuPDF, ebooklib, BeautifulSoup, html2text)
+    take most of the server's import time, and a session may never open a
+    book of that format. Helpers bind these stand-ins instead, so each
+    dependency is imported by the first call that needs it.
+
+    Unlike importlib.util.LazyLoader it can be touched from several threads
+    at once, and it is not put in sys.modules, so a plain import elsewhere
+    still gets the real module. Once loaded, the module's attributes are
+    copied onto the stand-in, making later lookups as cheap as on the
+    module itself; unittest.mock.patch works through it before and after.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for attributes the stand-in does not have (yet)
+        if attr.startswith('__') and attr.endswith('__'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__.update(module.__dict__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+
+def lazy_import(name: str) -> Optional[types.ModuleType]:
+    """
+    Get a module that is imported on first use
+
+    Args:
+        name: Dotted module name, e.g. "ebooklib.epub"
+
+    Returns:
+        The module itself when it is already imported, a LazyModule when it
+        is installed, or None when its top-level package is not installed
+        (checked without importing it)
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        if importlib.util.find_spec(name.partition('.')[0]) is None:
+            return None
+    except (ImportError, ValueError):
+        return None
+    return LazyModule(name)
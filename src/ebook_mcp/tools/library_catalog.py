@@ -0,0 +1,456 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from . import epub_helper, pdf_helper
+from .extraction_cache import cache_enabled, default_cache_dir
+from .library_scanner import scan_library
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Bump whenever the catalog fields change so stale rows are indexed again
+CATALOG_VERSION = "1"
+
+# Books whose metadata is extracted concurrently
+DEFAULT_INDEX_WORKERS = int(os.environ.get("EBOOK_MCP_CATALOG_WORKERS", str(max(2, os.cpu_count() or 1))))
+
+# Seconds a catalog query reuses the last scan of an unwatched library
+DEFAULT_RESCAN_INTERVAL = float(os.environ.get("EBOOK_MCP_CATALOG_RESCAN_INTERVAL", "60"))
+
+# Seconds a query that found new books waits for them to be indexed
+DEFAULT_WAIT = 20.0
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Sort keys accepted by query(), and the columns they order by
+SORT_COLUMNS = {
+    "title": "sort_title",
+    "author": "sort_creator",
+    "path": "relative_path",
+    "size": "size",
+    "mtime": "mtime",
+    "pages": "pages",
+    "chapters": "chapters",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    library TEXT NOT NULL,
+    relative_path TEXT NOT NULL,
+    path TEXT NOT NULL,
+    format TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    title TEXT,
+    creators TEXT NOT NULL DEFAULT '[]',
+    language TEXT,
+    subjects TEXT NOT NULL DEFAULT '[]',
+    publisher TEXT,
+    date TEXT,
+    pages INTEGER,
+    chapters INTEGER,
+    search_text TEXT NOT NULL DEFAULT '',
+    sort_title TEXT,
+    sort_creator TEXT,
+    error TEXT,
+    version TEXT,
+    indexed_at REAL,
+    PRIMARY KEY (library, relative_path)
+);
+CREATE INDEX IF NOT EXISTS books_title ON books (library, sort_title);
+"""
+
+_COLUMNS = ("path", "relative_path", "format", "size", "mtime", "title", "creators", "language", "subjects",
+            "publisher", "date", "pages", "chapters", "error", "indexed_at")
+
+_SPLIT_KEYWORDS = re.compile(r'\s*[;,]\s*')
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    values = value if isinstance(value, list) else [value]
+    return [str(item).strip() for item in values if str(item).strip()]
+
+
+def read_catalog_fields(book_path: str, book_format: str) -> Dict[str, Any]:
+    """
+    Extract the catalog fields of one book
+
+    Both formats go through the persistent extraction cache, so indexing a
+    book that was already opened by a tool is cheap.
+
+    Returns:
+        Dict[str, Any]: title, creators, language, subjects, publisher, date,
+        pages (PDF) and chapters (number of TOC entries)
+    """
+    if book_format == "epub":
+        meta = epub_helper.get_meta(book_path)
+        return {
+            "title": _text(meta.get("title")),
+            "creators": _list(meta.get("creator")),
+            "language": _text(meta.get("language")),
+            "subjects": _list(meta.get("subject")),
+            "publisher": _text(meta.get("publisher")),
+            "date": _text(meta.get("date")),
+            "pages": None,
+            "chapters": len(epub_helper.get_toc(book_path)),
+        }
+    fields = pdf_helper.get_catalog_fields(book_path)
+    return {
+        "title": _text(fields.get("title")),
+        "creators": _SPLIT_KEYWORDS.split(fields["author"].strip()) if fields.get("author") else [],
+        "language": None,
+        "subjects": _list(fields.get("subject")) + [keyword for keyword in
+                                                    _SPLIT_KEYWORDS.split(fields.get("keywords") or "") if keyword],
+        "publisher": None,
+        "date": None,
+        "pages": fields.get("pages"),
+        "chapters": fields.get("chapters"),
+    }
+
+
+def _file_title(rel_path: str) -> str:
+    # Title of books without one, or not indexed yet
+    return os.path.splitext(os.path.basename(rel_path))[0]
+
+
+def _like(value: str) -> str:
+    # Substring pattern matching value literally
+    return "%" + value.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class LibraryCatalog:
+    """
+    Persistent catalog of the books in library folders, for fast filtering.
+
+    One SQLite row per book holds its title, creators, language, subjects,
+    page and chapter counts, size and format. A query rescans the library
+    incrementally (at most every rescan_interval seconds, or never when a
+    watcher reports changes), queues new and changed books, and answers
+    from the table; a thread pool extracts the queued books' metadata in
+    the background. Books not indexed yet are listed with their file name
+    as title until their row is filled. Rows are keyed by the library's
+    realpath and the book's relative path, and re-indexed when the file's
+    size or mtime, or CATALOG_VERSION, changes.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_workers: int = DEFAULT_INDEX_WORKERS,
+                 rescan_interval: float = DEFAULT_RESCAN_INTERVAL):
+        self.rescan_interval = rescan_interval
+        self.max_workers = max(1, max_workers)
+        self._temp_dir = None
+        if db_path is None:
+            # Private to this instance, deleted with it
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="ebook-mcp-catalog-")
+            db_path = os.path.join(self._temp_dir.name, "library_catalog.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Set[str]] = {}
+        self._idle: Dict[str, threading.Event] = {}
+        self._scanned_at: Dict[str, float] = {}
+        self._connection().executescript(_SCHEMA)
+        self.indexed = 0
+        self.failed = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="ebook-mcp-catalog")
+            return self._executor
+
+    def update(self, path: str, wait: float = 0.0, force: bool = False) -> int:
+        """
+        Rescan a library folder and queue its new and changed books for indexing
+
+        Args:
+            path: Library folder
+            wait: Seconds to wait for the queued books to be indexed
+            force: Relist every subfolder, catching books rewritten in place
+
+        Returns:
+            int: Number of books queued by this call
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+        """
+        library = os.path.realpath(path)
+        entries = scan_library(path, force=force)
+        conn = self._connection()
+        known = {
+            row[0]: row[1:]
+            for row in conn.execute("SELECT relative_path, size, mtime, version FROM books WHERE library = ?",
+                                    (library,))
+        }
+        current = {entry["relative_path"] for entry in entries}
+        gone = [(library, rel_path) for rel_path in known if rel_path not in current]
+        stale = [entry for entry in entries
+                 if known.get(entry["relative_path"]) != (entry["size"], entry["mtime"], CATALOG_VERSION)]
+        with self._lock:
+            self._scanned_at[library] = time.monotonic()
+
+        conn.execute("BEGIN")
+        try:
+            conn.executemany("DELETE FROM books WHERE library = ? AND relative_path = ?", gone)
+            # Placeholders keep new books listed, under their file name, until indexed
+            conn.executemany(
+                "INSERT INTO books (library, relative_path, path, format, size, mtime, title, sort_title) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (library, relative_path) DO NOTHING",
+                [(library, entry["relative_path"], entry["path"], entry["format"], entry["size"], entry["mtime"],
+                  _file_title(entry["relative_path"]), _file_title(entry["relative_path"]).lower())
+                 for entry in stale]
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        queued = self._queue(library, stale)
+        if queued and wait > 0:
+            self._idle[library].wait(wait)
+        return queued
+
+    def _queue(self, library: str, entries: List[Dict[str, Any]]) -> int:
+        with self._lock:
+            pending = self._pending.setdefault(library, set())
+            idle = self._idle.setdefault(library, threading.Event())
+            new = [entry for entry in entries if entry["relative_path"] not in pending]
+            pending.update(entry["relative_path"] for entry in new)
+            if pending:
+                idle.clear()
+            else:
+                idle.set()
+        executor = self._get_executor()
+        for entry in new:
+            executor.submit(self._index_book, library, entry)
+        return len(new)
+
+    def _index_book(self, library: str, entry: Dict[str, Any]) -> None:
+        rel_path = entry["relative_path"]
+        try:
+            try:
+                fields = read_catalog_fields(entry["path"], entry["format"])
+                error = None
+            except FileNotFoundError:
+                # Removed since the scan; the next scan drops its row
+                return
+            except Exception as e:
+                fields = {}
+                error = str(e)
+                logger.warning(
+                    "Failed to index book metadata",
+                    file_path=entry["path"],
+                    operation="library_catalog_index",
+                    error_type=type(e).__name__,
+                    error_details=str(e)
+                )
+            title = fields.get("title") or _file_title(rel_path)
+            creators = fields.get("creators") or []
+            subjects = fields.get("subjects") or []
+            search_text = "\n".join([title] + creators + subjects).lower()
+            self._connection().execute(
+                "INSERT OR REPLACE INTO books (library, relative_path, path, format, size, mtime, title, creators, "
+                "language, subjects, publisher, date, pages, chapters, search_text, sort_title, sort_creator, "
+                "error, version, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (library, rel_path, entry["path"], entry["format"], entry["size"], entry["mtime"], title,
+                 json.dumps(creators, ensure_ascii=False), fields.get("language"),
+                 json.dumps(subjects, ensure_ascii=False), fields.get("publisher"), fields.get("date"),
+                 fields.get("pages"), fields.get("chapters"), search_text, title.lower(),
+                 creators[0].lower() if creators else None, error, CATALOG_VERSION, time.time())
+            )
+            with self._lock:
+                if error is None:
+                    self.indexed += 1
+                else:
+                    self.failed += 1
+        except sqlite3.Error as e:
+            logger.warning(
+                "Failed to store book metadata",
+                file_path=entry["path"],
+                operation="library_catalog_index",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+        finally:
+            with self._lock:
+                pending = self._pending[library]
+                pending.discard(rel_path)
+                if not pending:
+                    self._idle[library].set()
+
+    def on_library_change(self, path: str, added: List[str], modified: List[str], removed: List[str]) -> None:
+        """Watcher listener: apply a library's changes without waiting for the next rescan"""
+        library = os.path.realpath(path)
+        with self._lock:
+            # Catalogs of libraries never queried are built on their first query
+            if library not in self._scanned_at:
+                return
+        self.update(path)
+
+    def query(self, path: str, query: Optional[str] = None, book_format: Optional[str] = None,
+              language: Optional[str] = None, author: Optional[str] = None, subject: Optional[str] = None,
+              sort_by: str = "title", descending: bool = False, offset: int = 0, limit: int = DEFAULT_LIMIT,
+              refresh: bool = False, wait: float = DEFAULT_WAIT) -> Dict[str, Any]:
+        """
+        Filter, sort and page the books of a library folder
+
+        Args:
+            path: Library folder
+            query: Words that must all appear in the title, creators or subjects
+            book_format: "epub" or "pdf"
+            language: Language code prefix, e.g. "en" also matches "en-US"
+            author: Substring of a creator's name
+            subject: Substring of a subject
+            sort_by: One of SORT_COLUMNS
+            descending: Reverse the sort order
+            offset: Number of matching books to skip
+            limit: Maximum books to return (at most MAX_LIMIT)
+            refresh: Rescan every subfolder now, even if the folder was scanned recently
+            wait: Seconds to wait for newly found books to be indexed
+
+        Returns:
+            Dict[str, Any]: books, total (matching books), offset, next_offset (None
+            on the last page) and indexing (pending books, complete flag)
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+            ValueError: If sort_by, offset or limit is invalid
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort_by: {sort_by}, expected one of {', '.join(SORT_COLUMNS)}")
+        if offset < 0 or limit < 1:
+            raise ValueError("offset must be >= 0 and limit >= 1")
+        limit = min(limit, MAX_LIMIT)
+        library = os.path.realpath(path)
+        with self._lock:
+            scanned_at = self._scanned_at.get(library)
+        if refresh or scanned_at is None or time.monotonic() - scanned_at >= self.rescan_interval:
+            self.update(path, wait, force=refresh)
+        elif not os.path.isdir(library):
+            raise FileNotFoundError(f"Library folder not found: {path}")
+
+        where = ["library = ?"]
+        params: List[Any] = [library]
+        for word in (query or "").lower().split():
+            where.append("search_text LIKE ? ESCAPE '\\'")
+            params.append(_like(word))
+        if book_format:
+            where.append("format = ?")
+            params.append(book_format.lower())
+        if language:
+            where.append("lower(language) LIKE ? ESCAPE '\\'")
+            params.append(_like(language)[1:])
+        if author:
+            where.append("lower(creators) LIKE ? ESCAPE '\\'")
+            params.append(_like(author))
+        if subject:
+            where.append("lower(subjects) LIKE ? ESCAPE '\\'")
+            params.append(_like(subject))
+        condition = " AND ".join(where)
+        column = SORT_COLUMNS[sort_by]
+        direction = "DESC" if descending else "ASC"
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM books WHERE {condition}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM books WHERE {condition} "
+            f"ORDER BY {column} IS NULL, {column} {direction}, relative_path LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        books = []
+        for row in rows:
+            book = dict(zip(_COLUMNS, row))
+            book["creators"] = json.loads(book["creators"])
+            book["subjects"] = json.loads(book["subjects"])
+            book["indexed"] = book.pop("indexed_at") is not None
+            if book["error"] is None:
+                del book["error"]
+            books.append(book)
+        with self._lock:
+            pending = len(self._pending.get(library, ()))
+        return {
+            "books": books,
+            "total": total,
+            "offset": offset,
+            "next_offset": offset + len(books) if offset + len(books) < total else None,
+            "indexing": {"pending": pending, "complete": pending == 0},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of catalogued books and indexing counters"""
+        count = self._connection().execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        with self._lock:
+            return {
+                "libraries": len(self._scanned_at),
+                "books": count,
+                "pending": sum(len(pending) for pending in self._pending.values()),
+                "indexed": self.indexed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_library_catalog: Optional[LibraryCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_library_catalog() -> LibraryCatalog:
+    """
+    Get the process-wide library catalog
+
+    The catalog is stored next to the extraction cache, or in a temporary
+    database when caching is disabled with EBOOK_MCP_CACHE=0.
+    """
+    global _library_catalog
+    if _library_catalog is None:
+        with _catalog_lock:
+            if _library_catalog is None:
+                db_path = None
+                if cache_enabled():
+                    db_path = os.path.join(default_cache_dir(), "library_catalog.sqlite3")
+                try:
+                    _library_catalog = LibraryCatalog(db_path)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(
+                        "Library catalog database unavailable, using a temporary one",
+                        file_path=db_path,
+                        operation="library_catalog_init",
+                        error_type=type(e).__name__,
+                        error_details=str(e)
+                    )
+                    _library_catalog = LibraryCatalog()
+    return _library_catalog
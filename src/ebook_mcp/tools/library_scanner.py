@@ -0,0 +1,319 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .extraction_cache import cache_enabled, default_cache_dir
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Book formats found by the scanner, by lowercase file suffix
+BOOK_FORMATS = {".epub": "epub", ".pdf": "pdf"}
+
+# Directories listed concurrently during a scan
+DEFAULT_SCAN_WORKERS = int(os.environ.get("EBOOK_MCP_SCAN_WORKERS", "8"))
+
+# Bump whenever the snapshot layout changes so old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+# A directory record: (mtime_ns, {file name: (size, mtime_ns)}, [subdirectory names])
+_DirRecord = Tuple[int, Dict[str, Tuple[int, int]], List[str]]
+
+
+def book_format(name: str) -> Optional[str]:
+    """Get the book format of a file name ("epub" or "pdf"), case-insensitively, or None"""
+    # Same result as os.path.splitext, which is too slow for every file of a large library
+    dot = name.rfind(".")
+    return BOOK_FORMATS.get(name[dot:].lower()) if dot > 0 else None
+
+
+def _files_changed(directory: str, files: Dict[str, Tuple[int, int]]) -> bool:
+    # Rewriting a file in place changes its size or mtime, not its folder's mtime
+    for name, (size, mtime_ns) in files.items():
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError:
+            return True
+        if st.st_size != size or st.st_mtime_ns != mtime_ns:
+            return True
+    return False
+
+
+class LibraryScanner:
+    """
+    Recursive, incremental scanner for folders of EPUB and PDF books.
+
+    Each directory is listed with os.scandir on a thread pool, so nested
+    author/series folders are walked concurrently. The scanner keeps a
+    snapshot of every directory's mtime, book files (size, mtime) and
+    subdirectories; a rescan stats each known directory and only lists the
+    ones whose mtime changed. Books rewritten in place do not change their
+    directory's mtime, so their size and mtime are refreshed by a forced
+    scan. Snapshots are persisted per library folder when a snapshot
+    directory is given, so a restarted server rescans incrementally too.
+    Hidden directories and symlinked directories are not followed.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_SCAN_WORKERS, snapshot_dir: Optional[str] = None):
+        self.max_workers = max(1, max_workers)
+        self.snapshot_dir = snapshot_dir
+        self._snapshots: Dict[str, Dict[str, _DirRecord]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.scans = 0
+        self.dirs_listed = 0
+        self.dirs_reused = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="ebook-mcp-scan")
+            return self._executor
+
+    def scan(self, path: str, force: bool = False, dirty: Optional[Iterable[str]] = None,
+             restat: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find all books below a library folder
+
+        Args:
+            path: Library folder
+            force: List every directory again instead of reusing unchanged ones
+            dirty: Directories (relative to path, "" for the folder itself) to list
+                again even if their mtime did not change, e.g. reported by a watcher
+            restat: Stat the known books of unchanged directories and list a
+                directory again if one of them changed, catching books rewritten
+                in place without a full listing
+
+        Returns:
+            List[Dict[str, Any]]: One entry per book, sorted by relative path, with path,
+            relative_path, format, size (bytes) and mtime (seconds since the epoch)
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+            NotADirectoryError: If the path is not a folder
+        """
+        root = os.path.realpath(path)
+        if not os.path.exists(root):
+            raise FileNotFoundError(f"Library folder not found: {path}")
+        if not os.path.isdir(root):
+            raise NotADirectoryError(f"Not a folder: {path}")
+
+        previous = {} if force else self._load_snapshot(root)
+        snapshot, listed = self._walk(root, previous, set(dirty or ()), restat)
+        with self._lock:
+            self._snapshots[root] = snapshot
+            self.scans += 1
+            self.dirs_listed += listed
+            self.dirs_reused += len(snapshot) - listed
+        if listed or len(snapshot) != len(previous):
+            self._save_snapshot(root, snapshot)
+        logger.debug(
+            "Scanned library",
+            file_path=root,
+            operation="library_scan",
+            dirs=len(snapshot),
+            dirs_listed=listed
+        )
+
+        entries = []
+        prefix = os.path.join(path, "")
+        for rel_dir, (_, files, _) in snapshot.items():
+            dir_prefix = rel_dir + os.sep if rel_dir else ""
+            for name, (size, mtime_ns) in files.items():
+                rel_path = dir_prefix + name
+                entries.append({
+                    "path": prefix + rel_path,
+                    "relative_path": rel_path,
+                    "format": book_format(name),
+                    "size": size,
+                    "mtime": mtime_ns / 1e9,
+                })
+        entries.sort(key=lambda entry: entry["relative_path"])
+        return entries
+
+    def _walk(self, root: str, previous: Dict[str, _DirRecord],
+              dirty: Set[str], restat: bool = False) -> Tuple[Dict[str, _DirRecord], int]:
+        # Directories are scanned as soon as their parent's record is known
+        executor = self._get_executor()
+        snapshot: Dict[str, _DirRecord] = {}
+        listed = 0
+        pending = {executor.submit(self._scan_dir, root, "", None if "" in dirty else previous.get(""), restat)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir, record, was_listed = future.result()
+                if record is None:
+                    continue
+                snapshot[rel_dir] = record
+                listed += was_listed
+                for name in record[2]:
+                    child = os.path.join(rel_dir, name) if rel_dir else name
+                    record = None if child in dirty else previous.get(child)
+                    pending.add(executor.submit(self._scan_dir, root, child, record, restat))
+        return snapshot, listed
+
+    @staticmethod
+    def _scan_dir(root: str, rel_dir: str, previous: Optional[_DirRecord],
+                  restat: bool = False) -> Tuple[str, Optional[_DirRecord], bool]:
+        directory = os.path.join(root, rel_dir) if rel_dir else root
+        try:
+            # Stat before listing, so a change made during the listing is seen next time
+            mtime_ns = os.stat(directory).st_mtime_ns
+            if previous is not None and previous[0] == mtime_ns:
+                if not restat or not _files_changed(directory, previous[1]):
+                    return rel_dir, previous, False
+            files: Dict[str, Tuple[int, int]] = {}
+            subdirs: List[str] = []
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            subdirs.append(entry.name)
+                    elif book_format(entry.name) and entry.is_file():
+                        st = entry.stat()
+                        files[entry.name] = (st.st_size, st.st_mtime_ns)
+            return rel_dir, (mtime_ns, files, subdirs), True
+        except OSError as e:
+            if not rel_dir:
+                raise
+            # A subfolder removed or unreadable mid-scan is skipped, not fatal
+            logger.warning(
+                "Skipping unreadable library folder",
+                file_path=directory,
+                operation="library_scan",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            return rel_dir, None, False
+
+    def _snapshot_file(self, root: str) -> str:
+        name = hashlib.sha1(root.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.snapshot_dir, f"{name}.json")
+
+    def _load_snapshot(self, root: str) -> Dict[str, _DirRecord]:
+        with self._lock:
+            snapshot = self._snapshots.get(root)
+        if snapshot is not None or not self.snapshot_dir:
+            return snapshot or {}
+        try:
+            with open(self._snapshot_file(root), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION or data.get("root") != root:
+                return {}
+            return {
+                rel_dir: (mtime_ns, {name: tuple(stat) for name, stat in files.items()}, subdirs)
+                for rel_dir, (mtime_ns, files, subdirs) in data["dirs"].items()
+            }
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                "Ignoring unreadable library snapshot",
+                file_path=root,
+                operation="library_snapshot_load",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            return {}
+
+    def _save_snapshot(self, root: str, snapshot: Dict[str, _DirRecord]) -> None:
+        if not self.snapshot_dir:
+            return
+        target = self._snapshot_file(root)
+        temp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump({"version": SNAPSHOT_VERSION, "root": root, "dirs": snapshot}, f,
+                          ensure_ascii=False, separators=(",", ":"))
+            # Atomic, so concurrent servers never read a half-written snapshot
+            os.replace(temp, target)
+        except (OSError, ValueError) as e:
+            logger.warning(
+                "Failed to save library snapshot",
+                file_path=root,
+                operation="library_snapshot_save",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            try:
+                os.unlink(temp)
+            except OSError:
+                pass
+
+    def directories(self, path: str) -> List[str]:
+        """Get the directories (relative to path) found by the last scan of a library folder"""
+        with self._lock:
+            return list(self._snapshots.get(os.path.realpath(path), ()))
+
+    def forget(self, path: str) -> None:
+        """Drop the in-memory snapshot of a library folder, e.g. after it changed"""
+        with self._lock:
+            self._snapshots.pop(os.path.realpath(path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of scans and of directories listed or reused from snapshots"""
+        with self._lock:
+            return {
+                "libraries": len(self._snapshots),
+                "scans": self.scans,
+                "dirs_listed": self.dirs_listed,
+                "dirs_reused": self.dirs_reused,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_library_scanner: Optional[LibraryScanner] = None
+_scanner_lock = threading.Lock()
+
+
+def get_library_scanner() -> LibraryScanner:
+    """
+    Get the process-wide library scanner
+
+    Snapshots are persisted next to the extraction cache unless caching is
+    disabled with EBOOK_MCP_CACHE=0; EBOOK_MCP_SCAN_WORKERS sets the number
+    of directories listed concurrently.
+    """
+    global _library_scanner
+    if _library_scanner is None:
+        with _scanner_lock:
+            if _library_scanner is None:
+                snapshot_dir = os.path.join(default_cache_dir(), "library_snapshots") if cache_enabled() else None
+                _library_scanner = LibraryScanner(snapshot_dir=snapshot_dir)
+    return _library_scanner
+
+
+def scan_library(path: str, formats: Optional[Iterable[str]] = None, force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Find all books below a library folder with the process-wide scanner
+
+    Args:
+        path: Library folder
+        formats: Book formats to keep ("epub", "pdf"), or None for all
+        force: List every directory again instead of reusing unchanged ones
+
+    Returns:
+        List[Dict[str, Any]]: Book entries with path, relative_path, format, size and mtime
+
+    Raises:
+        FileNotFoundError: If the folder does not exist
+    """
+    entries = get_library_scanner().scan(path, force)
+    if formats is None:
+        return entries
+    wanted = set(formats)
+    return [entry for entry in entries if entry["format"] in wanted]
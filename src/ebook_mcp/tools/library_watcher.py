@@ -0,0 +1,568 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from . import epub_helper
+from .document_pool import get_document_pool
+from .extraction_cache import get_extraction_cache
+from .library_scanner import LibraryScanner, book_format, get_library_scanner
+from .logger_config import get_logger
+from .pagination import get_pagination_cache
+from .search_index import get_search_index
+from .tool_executor import get_tool_executor
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Seconds without new events before a changed library is rescanned
+DEFAULT_DEBOUNCE = 1.0
+
+# Seconds between two rescans of a polled library
+DEFAULT_POLL_INTERVAL = 30.0
+
+# inotify event flags, from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+# Everything that changes a directory listing or a file's size and mtime
+_WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event without its variable-length name
+_EVENT_HEADER = struct.Struct("iIII")
+
+# A listener receives (library path, added, modified, removed) book paths
+Listener = Callable[[str, List[str], List[str], List[str]], None]
+
+
+class Inotify:
+    """
+    Minimal ctypes binding to Linux inotify, watching directories
+
+    Raises:
+        OSError: If inotify is unavailable (not Linux, or no free instance)
+    """
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._rm_watch.restype = ctypes.c_int
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+        # Written to by interrupt() to end a read_events() wait early
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+
+    def add_watch(self, path: str) -> int:
+        """Watch a directory, returning its watch descriptor"""
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        # Fails harmlessly when the kernel already dropped the watch
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """Wait up to timeout seconds for events, returning (wd, mask, name) tuples"""
+        ready, _, _ = select.select([self.fd, self._wakeup_r], [], [], timeout)
+        if self._wakeup_r in ready:
+            try:
+                os.read(self._wakeup_r, 4096)
+            except BlockingIOError:
+                pass
+        if self.fd not in ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            events.append((wd, mask, os.fsdecode(data[offset:offset + length].rstrip(b"\0"))))
+            offset += length
+        return events
+
+    def interrupt(self) -> None:
+        """Make a concurrent read_events() return immediately"""
+        os.write(self._wakeup_w, b"\0")
+
+    def close(self) -> None:
+        os.close(self.fd)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+
+
+def invalidate_book(book_path: str) -> None:
+    """Drop everything cached or pooled for a book that changed or disappeared"""
+    get_document_pool().invalidate(book_path)
+    cache = get_extraction_cache()
+    if cache is not None:
+        cache.invalidate(book_path)
+    get_search_index().remove_book(book_path)
+    get_pagination_cache().invalidate(book_path)
+
+
+def prewarm_book(book_path: str) -> None:
+    """
+    Pre-extract a book into the persistent extraction cache
+
+    EPUB books get their TOC, metadata and the markdown of every chapter
+    cached, so the first tool call on them is a cache hit. PDF pages are
+    extracted on demand only, as caching every page of a large scan would
+    cost more than it saves.
+    """
+    if book_format(book_path) != "epub":
+        return
+    toc = epub_helper.get_toc(book_path)
+    epub_helper.get_meta(book_path)
+    anchors = list(dict.fromkeys(href for _, href in toc))
+    if anchors:
+        epub_helper.get_multiple_chapters(book_path, anchors, output='markdown')
+
+
+class _Library:
+    """A watched library folder: its books and its inotify watches"""
+    __slots__ = ("path", "books", "watches", "dirty", "force", "changed_at", "polled_at", "polling")
+
+    def __init__(self, path: str, polling: bool):
+        self.path = path
+        self.books: Dict[str, Tuple[int, float]] = {}
+        self.watches: Dict[str, int] = {}
+        self.dirty: Set[str] = set()
+        self.force = False
+        self.changed_at: Optional[float] = None
+        self.polled_at = time.monotonic()
+        self.polling = polling
+
+
+class LibraryWatcher:
+    """
+    Background watcher keeping library folders, caches and indexes current.
+
+    On Linux every folder of a watched library gets an inotify watch; other
+    platforms, or libraries exceeding the inotify watch limit, are polled.
+    Changes are debounced, then the library is rescanned incrementally,
+    listing only the folders that had events (when polling: whose mtime
+    changed, or holding a book whose size or mtime changed). Books that were modified or removed are dropped from the
+    document pool, extraction cache, search index and pagination cache;
+    listeners are told about every change. With prewarm on, new and
+    modified books are pre-extracted while no tool call is in flight.
+    """
+
+    def __init__(self, scanner: Optional[LibraryScanner] = None, backend: str = "auto",
+                 debounce: float = DEFAULT_DEBOUNCE, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 prewarm: bool = False):
+        if backend not in ("auto", "inotify", "poll"):
+            raise ValueError(f"Unknown watcher backend: {backend}")
+        self.scanner = scanner or get_library_scanner()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.prewarm = prewarm
+        self._inotify: Optional[Inotify] = None
+        if backend != "poll":
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                if backend == "inotify":
+                    raise
+                logger.info(
+                    "inotify unavailable, polling library folders",
+                    operation="library_watch",
+                    error_type=type(e).__name__,
+                    error_details=str(e)
+                )
+        self._libraries: Dict[str, _Library] = {}
+        self._wds: Dict[int, Tuple[_Library, str]] = {}
+        self._listeners: List[Listener] = []
+        self._prewarm_queue: Deque[str] = deque()
+        self._lock = threading.RLock()
+        # Serializes rescans, so each change is reported exactly once
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        # Ends the poll wait early; the inotify backend is interrupted instead
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.events = 0
+        self.refreshes = 0
+        self.invalidated = 0
+        self.prewarmed = 0
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "poll"
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener(library, added, modified, removed) after every change to a watched library"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def watch(self, path: str) -> None:
+        """
+        Start watching a library folder and its subfolders
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+        """
+        root = os.path.realpath(path)
+        with self._lock:
+            if root in self._libraries:
+                return
+        library = _Library(path, polling=self._inotify is None)
+        library.books = {entry["path"]: (entry["size"], entry["mtime"]) for entry in self.scanner.scan(path)}
+        with self._lock:
+            if root in self._libraries:
+                return
+            self._libraries[root] = library
+            self._sync_watches(library)
+        logger.info(
+            "Watching library",
+            file_path=path,
+            operation="library_watch",
+            backend="poll" if library.polling else "inotify",
+            books=len(library.books)
+        )
+        self.start()
+
+    def unwatch(self, path: str) -> None:
+        """Stop watching a library folder"""
+        with self._lock:
+            library = self._libraries.pop(os.path.realpath(path), None)
+            if library is not None:
+                self._drop_watches(library)
+
+    def libraries(self) -> List[str]:
+        """Get the watched library folders"""
+        with self._lock:
+            return [library.path for library in self._libraries.values()]
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="ebook-mcp-watcher", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watcher thread and release all watches"""
+        self._stop.set()
+        self._wake()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._lock:
+            for library in self._libraries.values():
+                self._drop_watches(library)
+            self._libraries.clear()
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+    def _wake(self) -> None:
+        # Caller may hold the lock
+        if self._inotify is not None:
+            self._inotify.interrupt()
+        else:
+            self._wakeup.set()
+
+    def _sync_watches(self, library: _Library) -> None:
+        # Caller holds the lock. Watch the folders of the last scan and no others.
+        if library.polling:
+            return
+        directories = set(self.scanner.directories(library.path))
+        for rel_dir in list(library.watches):
+            if rel_dir not in directories:
+                self._inotify.rm_watch(library.watches[rel_dir])
+                self._wds.pop(library.watches.pop(rel_dir), None)
+        added = []
+        for rel_dir in directories - set(library.watches):
+            try:
+                wd = self._inotify.add_watch(os.path.join(library.path, rel_dir))
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    # Out of inotify watches (fs.inotify.max_user_watches)
+                    logger.warning(
+                        "inotify watch limit reached, polling library instead",
+                        file_path=library.path,
+                        operation="library_watch",
+                        error_details=str(e)
+                    )
+                    self._drop_watches(library)
+                    library.polling = True
+                    return
+                # Folder removed since the scan: the next event on its parent rescans it
+                continue
+            library.watches[rel_dir] = wd
+            self._wds[wd] = (library, rel_dir)
+            added.append(rel_dir)
+        if added:
+            # Files created between listing a folder and watching it had no event
+            library.dirty.update(added)
+            library.changed_at = time.monotonic()
+
+    def _drop_watches(self, library: _Library) -> None:
+        # Caller holds the lock
+        for wd in library.watches.values():
+            if self._inotify is not None:
+                self._inotify.rm_watch(wd)
+            self._wds.pop(wd, None)
+        library.watches.clear()
+
+    def _handle_events(self, events: List[Tuple[int, int, str]]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.events += len(events)
+            for wd, mask, _ in events:
+                if mask & IN_Q_OVERFLOW:
+                    # Events were lost: relist every folder of every library
+                    for library in self._libraries.values():
+                        library.force = True
+                        library.changed_at = now
+                    continue
+                target = self._wds.get(wd)
+                if target is None:
+                    continue
+                library, rel_dir = target
+                if mask & IN_IGNORED:
+                    # The folder is gone; its parent's event triggers the rescan
+                    del self._wds[wd]
+                    if library.watches.get(rel_dir) == wd:
+                        del library.watches[rel_dir]
+                    continue
+                library.dirty.add(rel_dir)
+                library.changed_at = now
+
+    def _due(self) -> List[_Library]:
+        now = time.monotonic()
+        with self._lock:
+            due = []
+            for library in self._libraries.values():
+                if library.changed_at is not None and now - library.changed_at >= self.debounce:
+                    due.append(library)
+                elif library.polling and now - library.polled_at >= self.poll_interval:
+                    due.append(library)
+            return due
+
+    def sync(self) -> None:
+        """Process pending events and rescan every changed or polled library now, without debouncing"""
+        if self._inotify is not None:
+            self._handle_events(self._inotify.read_events(0))
+        with self._lock:
+            libraries = [library for library in self._libraries.values()
+                         if library.polling or library.changed_at is not None or library.force]
+        for library in libraries:
+            self._refresh(library)
+
+    def _refresh(self, library: _Library) -> None:
+        with self._refresh_lock:
+            self._refresh_locked(library)
+
+    def _refresh_locked(self, library: _Library) -> None:
+        # Rescan a library and apply its changes to the caches and listeners
+        with self._lock:
+            dirty, library.dirty = library.dirty, set()
+            force, library.force = library.force, False
+            library.changed_at = None
+            library.polled_at = time.monotonic()
+        try:
+            # Polling sees no file events, so it restats the books of unchanged folders
+            entries = self.scanner.scan(library.path, force=force, dirty=dirty, restat=library.polling)
+        except OSError as e:
+            logger.warning(
+                "Failed to rescan watched library",
+                file_path=library.path,
+                operation="library_watch",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            return
+        books = {entry["path"]: (entry["size"], entry["mtime"]) for entry in entries}
+        old = library.books
+        added = [book for book in books if book not in old]
+        modified = [book for book, stat in books.items() if book in old and old[book] != stat]
+        removed = [book for book in old if book not in books]
+        with self._lock:
+            library.books = books
+            self.refreshes += 1
+            if self._libraries.get(os.path.realpath(library.path)) is library:
+                self._sync_watches(library)
+            listeners = list(self._listeners)
+        if not (added or modified or removed):
+            return
+
+        for book in modified + removed:
+            invalidate_book(book)
+        with self._lock:
+            self.invalidated += len(modified) + len(removed)
+            if self.prewarm and get_extraction_cache() is not None:
+                self._prewarm_queue.extend(added + modified)
+                self._wake()
+        logger.info(
+            "Library changed",
+            file_path=library.path,
+            operation="library_watch",
+            added=len(added),
+            modified=len(modified),
+            removed=len(removed)
+        )
+        for listener in listeners:
+            try:
+                listener(library.path, added, modified, removed)
+            except Exception as e:
+                logger.warning(
+                    "Library change listener failed",
+                    file_path=library.path,
+                    operation="library_watch",
+                    error_type=type(e).__name__,
+                    error_details=str(e)
+                )
+
+    def _prewarm_next(self) -> bool:
+        # Pre-extract one queued book if no tool call is waiting for the CPU
+        with self._lock:
+            if not self._prewarm_queue or not get_tool_executor().is_idle():
+                return False
+            book_path = self._prewarm_queue.popleft()
+        if not os.path.exists(book_path):
+            return True
+        try:
+            prewarm_book(book_path)
+            with self._lock:
+                self.prewarmed += 1
+        except Exception as e:
+            logger.warning(
+                "Failed to pre-extract book",
+                file_path=book_path,
+                operation="library_prewarm",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+        return True
+
+    def _timeout(self) -> float:
+        # Sleep until the next debounce deadline or poll, at most one second
+        with self._lock:
+            if self._prewarm_queue:
+                return 0.1
+            timeout = 1.0
+            now = time.monotonic()
+            for library in self._libraries.values():
+                if library.changed_at is not None:
+                    timeout = min(timeout, library.changed_at + self.debounce - now)
+                elif library.polling:
+                    timeout = min(timeout, library.polled_at + self.poll_interval - now)
+            return max(0.0, timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            timeout = self._timeout()
+            inotify = self._inotify
+            if inotify is not None:
+                try:
+                    self._handle_events(inotify.read_events(timeout))
+                except (OSError, ValueError):
+                    # Closed by stop()
+                    break
+            else:
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+            for library in self._due():
+                self._refresh(library)
+            if not self._due():
+                self._prewarm_next()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the backend, watched libraries and books, and event/refresh/prewarm counters"""
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "libraries": len(self._libraries),
+                "books": sum(len(library.books) for library in self._libraries.values()),
+                "watches": len(self._wds),
+                "events": self.events,
+                "refreshes": self.refreshes,
+                "invalidated": self.invalidated,
+                "prewarmed": self.prewarmed,
+                "prewarm_pending": len(self._prewarm_queue),
+            }
+
+
+_library_watcher: Optional[LibraryWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_library_watcher() -> LibraryWatcher:
+    """
+    Get the process-wide library watcher
+
+    EBOOK_MCP_WATCH_BACKEND selects "inotify", "poll" or "auto" (default),
+    EBOOK_MCP_WATCH_POLL_INTERVAL the polling period in seconds, and
+    EBOOK_MCP_WATCH_PREWARM=1 turns on pre-extraction of new books.
+    """
+    global _library_watcher
+    if _library_watcher is None:
+        with _watcher_lock:
+            if _library_watcher is None:
+                _library_watcher = LibraryWatcher(
+                    backend=os.environ.get("EBOOK_MCP_WATCH_BACKEND", "auto"),
+                    poll_interval=float(os.environ.get("EBOOK_MCP_WATCH_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)),
+                    prewarm=os.environ.get("EBOOK_MCP_WATCH_PREWARM", "0").lower() in ("1", "true", "on", "yes"),
+                )
+    return _library_watcher
+
+
+def watch_libraries(paths: Optional[List[str]] = None) -> Optional[LibraryWatcher]:
+    """
+    Start watching library folders in the background
+
+    Called by the server entry point. Folders default to the
+    EBOOK_MCP_WATCH_PATHS environment variable (separated by os.pathsep);
+    nothing is watched when it is empty. Missing folders are logged and
+    skipped.
+
+    Returns:
+        Optional[LibraryWatcher]: The process-wide watcher, or None if nothing is watched
+    """
+    if paths is None:
+        paths = [path for path in os.environ.get("EBOOK_MCP_WATCH_PATHS", "").split(os.pathsep) if path]
+    if not paths:
+        return None
+    watcher = get_library_watcher()
+    for path in paths:
+        try:
+            watcher.watch(os.path.expanduser(path))
+        except OSError as e:
+            logger.warning(
+                "Cannot watch library",
+                file_path=path,
+                operation="library_watch",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+    return watcher
@@ -1,12 +1,33 @@
+import atexit
 import logging
 import json
 import os
+import queue
+import sys
 import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, Optional
 from functools import wraps
 import traceback
 
+# Background thread writing the records queued by setup_logger's handler
+_queue_listener: Optional[QueueListener] = None
+
+# File the structured log is written to, set by setup_logger
+_log_file_path: Optional[str] = None
+
+_test_environment: Optional[bool] = None
+
+
+def in_test_environment() -> bool:
+    """Whether we run under pytest, which silences structured logging; checked once"""
+    global _test_environment
+    if _test_environment is None:
+        _test_environment = 'pytest' in sys.modules
+    return _test_environment
+
+
 class StructuredFormatter(logging.Formatter):
     """Custom formatter for structured JSON logging"""
     
@@ -51,61 +72,104 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False, default=str)
 
 class StructuredLogger:
-    """Enhanced logger with structured logging capabilities"""
+    """
+    Enhanced logger with structured logging capabilities
+
+    Calls below the logger's level return before doing any work. The message
+    may use %-style placeholders with positional args, formatted only when
+    the record is written, and context values may be zero-argument callables,
+    called only when the record is emitted.
+    """
     
     def __init__(self, name: str):
         self.logger = logging.getLogger(name)
         self.name = name
+        # Logging is skipped in the test environment
+        self._muted = in_test_environment() or 'test' in name
     
-    def _log_with_context(self, level: int, message: str, **context):
-        """Log with additional context fields"""
-        # Check if we're in a test environment
-        import sys
-        if 'pytest' in sys.modules or 'test' in self.name:
-            # Skip logging in test environment
-            return
-            
+    def isEnabledFor(self, level: int) -> bool:
+        """Whether a message of this level would be emitted"""
+        return not self._muted and self.logger.isEnabledFor(level)
+    
+    def _log_with_context(self, level: int, message: str, *args, **context):
+        """Log with additional context fields; callers have checked that the level is enabled"""
         extra = {}
         for key, value in context.items():
+            if callable(value):
+                value = value()
             if value is not None:
                 extra[key] = value
-        
-        self.logger.log(level, message, extra=extra)
+        # stacklevel: report the caller of info()/debug()/..., not this module
+        self.logger.log(level, message, *args, extra=extra, stacklevel=3)
     
-    def info(self, message: str, **context):
+    def info(self, message: str, *args, **context):
         """Log info message with context"""
-        self._log_with_context(logging.INFO, message, **context)
+        if not self._muted and self.logger.isEnabledFor(logging.INFO):
+            self._log_with_context(logging.INFO, message, *args, **context)
     
-    def debug(self, message: str, **context):
+    def debug(self, message: str, *args, **context):
         """Log debug message with context"""
-        self._log_with_context(logging.DEBUG, message, **context)
+        if not self._muted and self.logger.isEnabledFor(logging.DEBUG):
+            self._log_with_context(logging.DEBUG, message, *args, **context)
     
-    def warning(self, message: str, **context):
+    def warning(self, message: str, *args, **context):
         """Log warning message with context"""
-        self._log_with_context(logging.WARNING, message, **context)
+        if not self._muted and self.logger.isEnabledFor(logging.WARNING):
+            self._log_with_context(logging.WARNING, message, *args, **context)
     
-    def error(self, message: str, **context):
+    def error(self, message: str, *args, **context):
         """Log error message with context"""
-        self._log_with_context(logging.ERROR, message, **context)
+        if not self._muted and self.logger.isEnabledFor(logging.ERROR):
+            self._log_with_context(logging.ERROR, message, *args, **context)
     
-    def critical(self, message: str, **context):
+    def critical(self, message: str, *args, **context):
         """Log critical message with context"""
-        self._log_with_context(logging.CRITICAL, message, **context)
+        if not self._muted and self.logger.isEnabledFor(logging.CRITICAL):
+            self._log_with_context(logging.CRITICAL, message, *args, **context)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves all formatting to the listener thread
+
+    QueueHandler.prepare() merges the message arguments and renders the
+    traceback in the logging thread so records can be pickled; the queue here
+    never leaves the process, so the record is queued as it is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _stop_queue_listener() -> None:
+    """Write out the queued records and stop the listener thread"""
+    global _queue_listener
+    if _queue_listener is not None:
+        listener, _queue_listener = _queue_listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(_stop_queue_listener)
 
 def setup_logger(level: str = "INFO", log_file: str = "ebook_mcp.log"):
     """Configure structured logging system"""
+    global _queue_listener, _log_file_path
     
     # Create logs directory if it doesn't exist
     log_dir = os.path.join(os.path.dirname(__file__), "..", "logs")
     os.makedirs(log_dir, exist_ok=True)
     
     log_file_path = os.path.join(log_dir, log_file)
+    _log_file_path = os.path.abspath(log_file_path)
     
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, level.upper()))
     
-    # Clear existing handlers
+    # Clear existing handlers, flushing what a previous setup still has queued
+    _stop_queue_listener()
     root_logger.handlers.clear()
     
     # Create formatters
@@ -124,12 +188,21 @@ def setup_logger(level: str = "INFO", log_file: str = "ebook_mcp.log"):
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(getattr(logging, level.upper()))
     
-    # Add handlers
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    # Callers only enqueue records; a background thread formats and writes
+    # them, so file and console I/O stay off the request threads
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(_DeferredQueueHandler(log_queue))
+    _queue_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _queue_listener.start()
     
     return root_logger
 
+def get_log_directory() -> str:
+    """Get the directory of the current log file"""
+    if _log_file_path is None:
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "logs"))
+    return os.path.dirname(_log_file_path)
+
 def get_logger(name: str) -> StructuredLogger:
     """Get a structured logger instance"""
     return StructuredLogger(name)
@@ -137,44 +210,31 @@ def get_logger(name: str) -> StructuredLogger:
 def log_operation(operation_name: str):
     """Decorator to log operation start/end with timing"""
     def decorator(func):
+        logger = get_logger(func.__module__)
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Check if we're in a test environment by looking for pytest
-            import sys
-            if 'pytest' in sys.modules or 'test' in func.__module__:
-                # Skip logging in test environment
+            if not logger.isEnabledFor(logging.ERROR):
                 return func(*args, **kwargs)
-            
-            logger = get_logger(func.__module__)
-            start_time = time.time()
+            log_info = logger.isEnabledFor(logging.INFO)
+            start_time = time.perf_counter()
             
             # Log operation start
-            logger.info(
-                f"Starting {operation_name}",
-                operation=operation_name,
-                function=func.__name__
-            )
-            
-            try:
-                result = func(*args, **kwargs)
-                duration_ms = (time.time() - start_time) * 1000
-                
-                # Log operation success
+            if log_info:
                 logger.info(
-                    f"Completed {operation_name} successfully",
+                    "Starting %s", operation_name,
                     operation=operation_name,
-                    function=func.__name__,
-                    duration_ms=round(duration_ms, 2)
+                    function=func.__name__
                 )
-                
-                return result
-                
+            
+            try:
+                result = func(*args, **kwargs)
             except Exception as e:
-                duration_ms = (time.time() - start_time) * 1000
+                duration_ms = (time.perf_counter() - start_time) * 1000
                 
                 # Log operation failure
                 logger.error(
-                    f"Failed to complete {operation_name}",
+                    "Failed to complete %s", operation_name,
                     operation=operation_name,
                     function=func.__name__,
                     duration_ms=round(duration_ms, 2),
@@ -182,6 +242,17 @@ def log_operation(operation_name: str):
                     error_details=str(e)
                 )
                 raise
+            
+            # Log operation success
+            if log_info:
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                logger.info(
+                    "Completed %s successfully", operation_name,
+                    operation=operation_name,
+                    function=func.__name__,
+                    duration_ms=round(duration_ms, 2)
+                )
+            return result
                 
         return wrapper
     return decorator
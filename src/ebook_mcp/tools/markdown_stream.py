@@ -0,0 +1,160 @@
+import html.entities
+from typing import Any, Iterator, List, Optional
+from .lazy_import import lazy_import
+from .logger_config import get_logger
+from .progress import report_progress
+
+# Imported on first use to keep server start-up fast
+bs4 = lazy_import('bs4')
+html2text = lazy_import('html2text')
+html2text_utils = lazy_import('html2text.utils')
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Characters of markup fed to html2text between two output drains
+DEFAULT_CHUNK_CHARS = 16384
+
+# html2text's stand-in for &nbsp;, replaced by a space in its final pass
+_NBSP_PLACEHOLDER = "&nbsp_place_holder;"
+
+
+_streaming: Optional[bool] = None
+
+
+def streaming_supported() -> bool:
+    """
+    Check that the library internals used for streaming are available
+
+    Streaming relies on bs4's tag event stream (4.13+) and on html2text's
+    output list, neither of which is public API; pyproject pins both
+    libraries to the versions tested. Without them, iter_markup and
+    iter_markdown fall back to whole-string conversion with the same output.
+    """
+    global _streaming
+    if _streaming is None:
+        Tag = bs4.Tag
+        h = new_html2text()
+        _streaming = (
+            all(hasattr(Tag, name) for name in ("_event_stream", "_format_tag", "START_ELEMENT_EVENT",
+                                                "EMPTY_ELEMENT_EVENT", "END_ELEMENT_EVENT"))
+            and isinstance(getattr(h, "outtextlist", None), list)
+            and all(callable(getattr(h, name, None)) for name in ("optwrap", "finish"))
+        )
+        if not _streaming:
+            logger.warning(
+                "Installed bs4/html2text lack the internals used for streaming markdown, converting whole chapters",
+                operation="markdown_stream"
+            )
+    return _streaming
+
+
+def new_html2text() -> Any:
+    """Create an html2text converter with the options used for chapter markdown"""
+    h = html2text.HTML2Text()
+    h.ignore_links = False
+    h.ignore_images = False
+    return h
+
+
+def iter_markup(tree: Any) -> Iterator[str]:
+    """
+    Serialize a parsed tree piece by piece, without building the whole string
+
+    Yields the same markup as str(tree) with the minimal formatter: one
+    piece per start tag, end tag and string (or str(tree) whole when
+    streaming is not supported).
+    """
+    if not streaming_supported():
+        yield str(tree)
+        return
+    formatter = tree.formatter_for_name("minimal")
+    Tag = bs4.Tag
+    for event, element in tree._event_stream():
+        if event is Tag.START_ELEMENT_EVENT or event is Tag.EMPTY_ELEMENT_EVENT:
+            yield element._format_tag("utf-8", formatter, opening=True)
+        elif event is Tag.END_ELEMENT_EVENT:
+            yield element._format_tag("utf-8", formatter, opening=False)
+        else:
+            yield element.output_ready(formatter)
+
+
+def _safe_split(items: List[str]) -> int:
+    """
+    Find the last output item at which the markdown can be cut
+
+    html2text wraps its whole output in a final pass that carries state from
+    line to line. That state is reset after a blank line, so the output can
+    be wrapped in separate pieces at any item that starts a non-blank line
+    right after a blank line, and that html2text will not take back.
+
+    Returns:
+        int: Index of the first item to keep buffered, or 0 if none is safe
+    """
+    for i in range(len(items) - 1, 0, -1):
+        item = items[i]
+        if not item or item[0].isspace() or item.startswith(_NBSP_PLACEHOLDER):
+            continue
+        if item == "[":
+            # Dropped again by html2text if the link turns out to be empty
+            continue
+        previous = items[i - 1]
+        if previous.endswith("\n\n") or (previous == "\n" and i > 1 and items[i - 2].endswith("\n")):
+            return i
+    return 0
+
+
+def _postprocess(h: Any, text: str) -> str:
+    # Same as html2text's own finish() and handle() post-processing
+    nbsp = html.entities.html5["nbsp;"] if h.unicode_snob else " "
+    return h.optwrap(text.replace(_NBSP_PLACEHOLDER, nbsp))
+
+
+def iter_markdown(tree: Any, chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[str]:
+    """
+    Convert a parsed chapter tree to markdown incrementally
+
+    The tree is serialized piece by piece into html2text's parser, and
+    finished markdown is yielded at paragraph boundaries as soon as it is
+    produced. Neither the chapter's HTML string nor its full markdown is
+    ever held at once; joining the chunks gives exactly what html2text
+    returns for str(tree).
+
+    Args:
+        tree: BeautifulSoup document or fragment
+        chunk_chars: Characters of markup to feed between two yields
+
+    Yields:
+        str: Consecutive pieces of the markdown
+    """
+    if not streaming_supported():
+        yield new_html2text().handle(str(tree))
+        return
+    h = new_html2text()
+    # Stateful wrapping options that span paragraphs cannot be streamed
+    streaming = not h.backquote_code_style and not h.pad_tables
+    h.start = True
+    pending: List[str] = []
+    size = 0
+    for piece in iter_markup(tree):
+        pending.append(piece)
+        size += len(piece)
+        if size < chunk_chars:
+            continue
+        h.feed("".join(pending))
+        # Markup characters converted, sent to MCP clients that asked for progress
+        report_progress(size, "Converting to markdown")
+        pending = []
+        size = 0
+        if streaming:
+            split = _safe_split(h.outtextlist)
+            if split:
+                ready = "".join(h.outtextlist[:split])
+                del h.outtextlist[:split]
+                yield _postprocess(h, ready)
+    h.feed("".join(pending))
+    h.feed("")
+    markdown = h.optwrap(h.finish())
+    if h.pad_tables:
+        markdown = html2text_utils.pad_tables_in_text(markdown)
+    yield markdown
@@ -0,0 +1,421 @@
+import bisect
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Upper bounds of the latency buckets in seconds, at most 1.5x apart between
+# 1 ms and 30 s, so percentiles interpolated inside a bucket stay close
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0015, 0.002, 0.003, 0.004, 0.005, 0.0075,
+    0.01, 0.015, 0.02, 0.03, 0.04, 0.05, 0.075,
+    0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 4.0, 5.0, 7.5,
+    10.0, 15.0, 20.0, 30.0, 60.0, 120.0,
+)
+
+# Books tracked for the slowest-books report, least recently used dropped first
+DEFAULT_MAX_BOOKS = 256
+SLOWEST_BOOKS = 10
+
+METRICS_PATH = "/metrics"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram
+
+    Observations are counted in LATENCY_BUCKETS plus an overflow bucket, so
+    memory stays constant however many calls are made. Percentiles are
+    interpolated linearly inside the bucket they fall in, like Prometheus'
+    histogram_quantile, and clamped to the smallest and largest observation.
+    Not thread-safe; MetricsRegistry serializes access.
+    """
+    __slots__ = ("counts", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if self.count == 0 or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate the q-th quantile (0 < q <= 1) in seconds, 0.0 when empty
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index > 0 else 0.0
+                upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(estimate, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Get (upper bound, calls at or below it) pairs, ending with +Inf"""
+        pairs = []
+        total = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            total += bucket_count
+            pairs.append((bound, total))
+        return pairs
+
+
+class _ToolMetrics:
+    __slots__ = ("latency", "errors", "bytes_returned")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.bytes_returned = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        latency = self.latency
+        return {
+            "calls": latency.count,
+            "errors": self.errors,
+            "avg_ms": round(latency.sum / latency.count * 1000, 2) if latency.count else 0.0,
+            "p50_ms": round(latency.percentile(0.50) * 1000, 2),
+            "p95_ms": round(latency.percentile(0.95) * 1000, 2),
+            "p99_ms": round(latency.percentile(0.99) * 1000, 2),
+            "max_ms": round(latency.max * 1000, 2),
+            "bytes_returned": self.bytes_returned,
+        }
+
+
+def result_size(result: Any) -> int:
+    """
+    Estimate the size of a tool result in bytes
+
+    Strings count their UTF-8 length, bytes their length, containers the
+    sum of their items (and keys); other values the length of their str().
+    """
+    if isinstance(result, str):
+        return len(result) if result.isascii() else len(result.encode("utf-8", "surrogatepass"))
+    if isinstance(result, (bytes, bytearray)):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(result_size(key) + result_size(value) for key, value in result.items())
+    if isinstance(result, (list, tuple, set, frozenset)):
+        return sum(result_size(item) for item in result)
+    if result is None:
+        return 0
+    return len(str(result))
+
+
+def hit_ratio(stats: Dict[str, Any]) -> Optional[float]:
+    """Get hits / (hits + misses) of a cache's stats, or None without lookups"""
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    return round(stats.get("hits", 0) / lookups, 4) if lookups else None
+
+
+class MetricsRegistry:
+    """
+    In-process registry of tool latencies and component statistics.
+
+    The tool executor records the run time, outcome and result size of
+    every tool call, per tool and per book. Components such as the document
+    pool and the caches are not copied in: they are registered as sources,
+    callables returning their current stats(), and read on each snapshot.
+    Caches that report hits and misses get a hit_ratio added.
+    """
+
+    def __init__(self, max_books: int = DEFAULT_MAX_BOOKS):
+        self.max_books = max_books
+        self.started = time.time()
+        self._tools: Dict[str, _ToolMetrics] = {}
+        # book path -> [calls, total seconds, max seconds]
+        self._books: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._sources: "OrderedDict[str, Callable[[], Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, tool: str, seconds: float, ok: bool = True, result: Any = None,
+                book: Optional[str] = None) -> None:
+        """
+        Record one tool call
+
+        Args:
+            tool: Tool name
+            seconds: Run time of the call
+            ok: Whether the call returned rather than raised
+            result: Its return value, measured with result_size()
+            book: Path of the book the call worked on, if any
+        """
+        size = result_size(result) if ok else 0
+        with self._lock:
+            metrics = self._tools.get(tool)
+            if metrics is None:
+                metrics = self._tools[tool] = _ToolMetrics()
+            metrics.latency.observe(seconds)
+            metrics.bytes_returned += size
+            if not ok:
+                metrics.errors += 1
+            if book:
+                entry = self._books.get(book)
+                if entry is None:
+                    entry = self._books[book] = [0, 0.0, 0.0]
+                    if len(self._books) > self.max_books:
+                        self._books.popitem(last=False)
+                else:
+                    self._books.move_to_end(book)
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def add_source(self, name: str, stats: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """
+        Register a component whose stats() belong in the snapshot
+
+        Args:
+            name: Key of the component in the snapshot, e.g. "document_pool"
+            stats: Callable returning a dict of the component's counters, or
+                None when the component is disabled
+        """
+        with self._lock:
+            self._sources[name] = stats
+
+    def tool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get calls, errors, latency percentiles and bytes returned per tool"""
+        with self._lock:
+            return {tool: metrics.as_dict() for tool, metrics in sorted(self._tools.items())}
+
+    def slowest_books(self, limit: int = SLOWEST_BOOKS) -> List[Dict[str, Any]]:
+        """Get the books with the most total tool run time"""
+        with self._lock:
+            books = sorted(self._books.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {
+                "book": book,
+                "calls": int(calls),
+                "total_ms": round(total * 1000, 2),
+                "avg_ms": round(total / calls * 1000, 2),
+                "max_ms": round(longest * 1000, 2),
+            }
+            for book, (calls, total, longest) in books
+        ]
+
+    def source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Read every registered source; a failing source reports its error"""
+        with self._lock:
+            sources = list(self._sources.items())
+        result = {}
+        for name, stats in sources:
+            try:
+                values = stats()
+            except Exception as e:
+                logger.warning(
+                    "Metrics source failed",
+                    operation="metrics_source",
+                    source=name,
+                    error_type=type(e).__name__,
+                    error_details=str(e)
+                )
+                result[name] = {"error": str(e)}
+                continue
+            if values is None:
+                continue
+            values = dict(values)
+            if "hits" in values and "misses" in values:
+                values["hit_ratio"] = hit_ratio(values)
+            result[name] = values
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get everything the registry knows
+
+        Returns:
+            Dict[str, Any]: uptime_s, tools (per-tool stats), slowest_books and
+            one entry per registered source
+        """
+        snapshot = {
+            "uptime_s": round(time.time() - self.started, 1),
+            "tools": self.tool_stats(),
+            "slowest_books": self.slowest_books(),
+        }
+        snapshot.update(self.source_stats())
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """
+        Render the registry in the Prometheus text exposition format
+
+        Tool latencies become the ebook_mcp_tool_duration_seconds histogram;
+        numeric source stats become gauges named ebook_mcp_<source>_<key>,
+        with nested per-name dicts (e.g. per-tool executor queues) as a
+        name label. Books are left out to keep label cardinality bounded.
+        """
+        lines = [
+            "# HELP ebook_mcp_tool_duration_seconds Run time of tool calls",
+            "# TYPE ebook_mcp_tool_duration_seconds histogram",
+        ]
+        with self._lock:
+            tools = [(tool, metrics.latency.cumulative(), metrics.latency.sum, metrics.errors,
+                      metrics.bytes_returned) for tool, metrics in sorted(self._tools.items())]
+        for tool, buckets, total, _, _ in tools:
+            label = _label_value(tool)
+            for bound, count in buckets:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'ebook_mcp_tool_duration_seconds_bucket{{tool="{label}",le="{le}"}} {count}')
+            lines.append(f'ebook_mcp_tool_duration_seconds_sum{{tool="{label}"}} {total!r}')
+            lines.append(f'ebook_mcp_tool_duration_seconds_count{{tool="{label}"}} {buckets[-1][1]}')
+        lines += [
+            "# HELP ebook_mcp_tool_errors_total Tool calls that raised",
+            "# TYPE ebook_mcp_tool_errors_total counter",
+        ]
+        lines += [f'ebook_mcp_tool_errors_total{{tool="{_label_value(tool)}"}} {errors}'
+                  for tool, _, _, errors, _ in tools]
+        lines += [
+            "# HELP ebook_mcp_tool_response_bytes_total Approximate size of tool results",
+            "# TYPE ebook_mcp_tool_response_bytes_total counter",
+        ]
+        lines += [f'ebook_mcp_tool_response_bytes_total{{tool="{_label_value(tool)}"}} {size}'
+                  for tool, _, _, _, size in tools]
+
+        gauges: "OrderedDict[str, List[str]]" = OrderedDict()
+        for source, values in self.source_stats().items():
+            for key, value in values.items():
+                metric = _metric_name(f"ebook_mcp_{source}_{key}")
+                if isinstance(value, dict):
+                    for name, nested in value.items():
+                        if isinstance(nested, dict):
+                            for field, number in nested.items():
+                                if _is_number(number):
+                                    gauges.setdefault(_metric_name(f"{metric}_{field}"), []).append(
+                                        f'{{name="{_label_value(name)}"}} {_number(number)}')
+                        elif _is_number(nested):
+                            gauges.setdefault(metric, []).append(f'{{name="{_label_value(name)}"}} {_number(nested)}')
+                elif _is_number(value):
+                    gauges.setdefault(metric, []).append(f" {_number(value)}")
+        for metric, samples in gauges.items():
+            lines.append(f"# TYPE {metric} gauge")
+            lines += [metric + sample for sample in samples]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Forget all recorded tool calls; sources stay registered"""
+        with self._lock:
+            self._tools.clear()
+            self._books.clear()
+            self.started = time.time()
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _number(value: Any) -> str:
+    return str(int(value)) if isinstance(value, bool) else repr(value)
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry fed by the tool executor"""
+    return _metrics_registry
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1", registry: Optional[MetricsRegistry] = None) -> Any:
+    """
+    Serve the registry at http://host:port/metrics from a daemon thread
+
+    Args:
+        port: TCP port, 0 for any free port (see server.server_address)
+        host: Interface to bind, localhost by default
+        registry: Registry to serve, by default the process-wide one
+
+    Returns:
+        http.server.ThreadingHTTPServer: The running server; call shutdown() to stop it
+
+    Raises:
+        OSError: If the port cannot be bound
+    """
+    # Imported here: most sessions never enable the endpoint
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry or _metrics_registry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != METRICS_PATH:
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # The default writes every request to stderr
+            logger.debug("Metrics request: " + format, *args, operation="metrics_http")
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="ebook-mcp-metrics", daemon=True).start()
+    logger.info(
+        "Serving metrics",
+        operation="metrics_http_start",
+        url=f"http://{server.server_address[0]}:{server.server_address[1]}{METRICS_PATH}"
+    )
+    return server
+
+
+def serve_metrics_from_env() -> Any:
+    """
+    Start the metrics endpoint if EBOOK_MCP_METRICS_PORT is set
+
+    Called by the server entry point. EBOOK_MCP_METRICS_HOST overrides the
+    interface (127.0.0.1). A port that cannot be bound is logged, not raised,
+    so metrics never keep the server from starting.
+
+    Returns:
+        The running server, or None when the endpoint is off or failed to start
+    """
+    port = os.environ.get("EBOOK_MCP_METRICS_PORT")
+    if not port:
+        return None
+    host = os.environ.get("EBOOK_MCP_METRICS_HOST", "127.0.0.1")
+    try:
+        return start_metrics_server(int(port), host)
+    except (OSError, ValueError) as e:
+        logger.error(
+            "Could not start metrics endpoint",
+            operation="metrics_http_start",
+            port=port,
+            error_type=type(e).__name__,
+            error_details=str(e)
+        )
+        return None
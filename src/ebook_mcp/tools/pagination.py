@@ -0,0 +1,364 @@
+import base64
+import bisect
+import json
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+DEFAULT_PAGE_CHARS = 20000
+
+# Total characters of paginated documents kept in memory
+DEFAULT_MAX_CHARS = int(os.environ.get("EBOOK_MCP_PAGINATION_MAX_CHARS", str(64 * 1024 * 1024)))
+
+# Pages end after a blank line or right before a markdown heading
+_PARAGRAPH_END = re.compile(r'\n[ \t]*\n')
+_HEADING_START = re.compile(r'\n(?=#{1,6} )')
+_WHITESPACE = re.compile(r'\s')
+
+# Characters rescanned for boundaries spanning two chunks of streamed text
+_BOUNDARY_OVERLAP = 64
+
+# Characters a document still being produced is accounted per byte of its source:
+# its producer keeps the parsed source alive, and a BeautifulSoup tree takes about
+# 40 bytes per byte of HTML, against about one per character of cached text
+PARSED_SOURCE_FACTOR = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the LLM token count of a text
+
+    About four characters per token for ASCII text, and one token per
+    character for everything else (CJK text in particular).
+    """
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+class PagedText:
+    """
+    A document split into pages on demand, indexed by character offset.
+
+    The offsets of all paragraph and heading boundaries are computed as the
+    text arrives, so each page is found with a binary search and costs time
+    proportional to its own size. The text may be given whole or as an
+    iterator of chunks (e.g. a streaming conversion); chunks are then only
+    pulled until the requested page is complete, so the first pages are
+    served before the rest of the document has been produced. source_size
+    is the size of what the iterator holds on to until it is exhausted,
+    e.g. the HTML behind a parsed chapter.
+    """
+    __slots__ = ("text", "boundaries", "complete", "source_size", "_chunks", "_lock")
+
+    def __init__(self, source: Union[str, Iterable[str]], source_size: int = 0):
+        self.text = ""
+        self.boundaries: List[int] = []
+        self.complete = False
+        self.source_size = source_size
+        self._chunks: Optional[Iterator[str]] = None
+        self._lock = threading.Lock()
+        if isinstance(source, str):
+            self._append(source)
+            self._finish()
+        else:
+            self._chunks = iter(source)
+
+    def _append(self, chunk: str) -> None:
+        # Rescan a little of the old text for boundaries spanning the join
+        scan_from = max(0, len(self.text) - _BOUNDARY_OVERLAP)
+        self.text += chunk
+        last = self.boundaries[-1] if self.boundaries else 0
+        found = set(m.end() for m in _PARAGRAPH_END.finditer(self.text, scan_from))
+        found.update(m.end() for m in _HEADING_START.finditer(self.text, scan_from))
+        self.boundaries.extend(sorted(offset for offset in found if offset > last))
+
+    def _finish(self) -> None:
+        if not self.boundaries or self.boundaries[-1] != len(self.text):
+            self.boundaries.append(len(self.text))
+        self.complete = True
+        self._chunks = None
+
+    @property
+    def cost(self) -> int:
+        """Characters accounted for this document: its text, plus its parsed source until complete"""
+        if self.complete:
+            return len(self.text)
+        return len(self.text) + self.source_size * PARSED_SOURCE_FACTOR
+
+    def ensure(self, length: int) -> None:
+        """Pull chunks until the text is longer than length or complete"""
+        with self._lock:
+            while not self.complete and len(self.text) <= length:
+                # Grow at least geometrically so appending stays linear overall
+                target = max(length + 1, 2 * len(self.text))
+                pending = []
+                size = len(self.text)
+                for chunk in self._chunks:
+                    pending.append(chunk)
+                    size += len(chunk)
+                    if size >= target:
+                        break
+                else:
+                    self._append("".join(pending))
+                    self._finish()
+                    break
+                self._append("".join(pending))
+
+    def page_end(self, offset: int, max_chars: int, max_tokens: Optional[int] = None) -> int:
+        """
+        Get the end of the page starting at offset
+
+        The page ends at the last boundary that keeps it within max_chars and
+        max_tokens. If even the first boundary is too far, the page is cut at
+        the last whitespace within budget, or hard at the budget.
+        """
+        # An ASCII token is at most four characters, any other at least one
+        window = max_chars if max_tokens is None else min(max_chars, 4 * max_tokens + 4)
+        self.ensure(offset + window)
+        text = self.text
+        boundaries = self.boundaries
+        end = offset
+        tokens = 0
+        for i in range(bisect.bisect_right(boundaries, offset), len(boundaries)):
+            boundary = boundaries[i]
+            if boundary - offset > max_chars:
+                break
+            if max_tokens is not None:
+                tokens += estimate_tokens(text[end:boundary])
+                if tokens > max_tokens:
+                    break
+            end = boundary
+        if end > offset:
+            return end
+
+        limit = min(offset + max_chars, len(text))
+        if max_tokens is not None:
+            # Shrink the cut proportionally until its estimate fits the token budget
+            while limit > offset + 1 and estimate_tokens(text[offset:limit]) > max_tokens:
+                limit = offset + max(1, (limit - offset) * max_tokens // estimate_tokens(text[offset:limit]))
+        if limit < len(text):
+            space = max((m.start() for m in _WHITESPACE.finditer(text, offset + (limit - offset) // 2, limit)),
+                        default=None)
+            if space is not None:
+                return space + 1
+        return limit
+
+
+class PaginationCache:
+    """
+    LRU cache of paginated documents, bounded by their total size.
+
+    Entries are keyed by (scope, version), where scope names the document
+    as "<kind>:<realpath of the book>#<part>" and version the file it came
+    from, so a changed book never serves stale pages. Documents still being
+    produced also count the source their producer keeps alive (see
+    PagedText.cost), and are evicted before complete ones: a half-read
+    chapter pins its whole parsed tree, a complete one only its text.
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[Tuple[str, str], PagedText]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope: str, version: str, load: Callable[[], Union[str, Iterable[str]]],
+            source_size: Optional[Callable[[], int]] = None) -> PagedText:
+        """
+        Get a paginated document, calling load() to produce its text on a miss
+
+        load() returns the whole text, or an iterator of chunks that is
+        consumed page by page. Documents still being produced are accounted
+        at the size they have reached plus their source, updated on every
+        access; source_size() gives the source size in bytes on a miss.
+        """
+        key = (scope, version)
+        with self._lock:
+            paged = self._entries.get(key)
+            if paged is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._resize(key, paged)
+                return paged
+            self.misses += 1
+        paged = PagedText(load(), source_size() if source_size is not None else 0)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = paged
+                self._sizes[key] = 0
+            self._resize(key, paged)
+        return paged
+
+    def _resize(self, key: Tuple[str, str], paged: PagedText) -> None:
+        # Caller holds the lock
+        cost = paged.cost
+        self._chars += cost - self._sizes[key]
+        self._sizes[key] = cost
+        while self._chars > self.max_chars:
+            # Least recently used first, documents still being produced before complete ones
+            others = [other for other in self._entries if other != key]
+            if not others:
+                break
+            evicted_key = next((other for other in others if not self._entries[other].complete), others[0])
+            del self._entries[evicted_key]
+            self._chars -= self._sizes.pop(evicted_key)
+
+    def refresh(self, scope: str, version: str) -> None:
+        """Account a document at its current size, e.g. after producing a page of it"""
+        key = (scope, version)
+        with self._lock:
+            paged = self._entries.get(key)
+            if paged is not None:
+                self._resize(key, paged)
+
+    def discard(self, scope: str, version: str) -> None:
+        """Drop a document, e.g. after producing its text failed"""
+        with self._lock:
+            if self._entries.pop((scope, version), None) is not None:
+                self._chars -= self._sizes.pop((scope, version))
+
+    def invalidate(self, file_path: str) -> int:
+        """Drop all documents extracted from a file, returning how many were dropped"""
+        marker = f":{os.path.realpath(file_path)}#"
+        with self._lock:
+            keys = [key for key in self._entries if marker in key[0]]
+            for key in keys:
+                del self._entries[key]
+                self._chars -= self._sizes.pop(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get entry count, cached characters and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "incomplete": sum(1 for paged in self._entries.values() if not paged.complete),
+                "chars": self._chars,
+                "max_chars": self.max_chars,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_pagination_cache: Optional[PaginationCache] = None
+_pagination_cache_lock = threading.Lock()
+
+
+def get_pagination_cache() -> PaginationCache:
+    """Get the process-wide pagination cache, bounded by EBOOK_MCP_PAGINATION_MAX_CHARS"""
+    global _pagination_cache
+    if _pagination_cache is None:
+        with _pagination_cache_lock:
+            if _pagination_cache is None:
+                _pagination_cache = PaginationCache()
+    return _pagination_cache
+
+
+def _scope_hash(scope: str) -> int:
+    return zlib.crc32(scope.encode('utf-8'))
+
+
+def encode_cursor(scope: str, version: str, offset: int) -> str:
+    """Encode an opaque cursor resuming a document at offset"""
+    payload = json.dumps({"s": _scope_hash(scope), "v": version, "o": offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, scope: str, version: str) -> int:
+    """
+    Decode a cursor issued by encode_cursor for the same document
+
+    Returns:
+        int: The offset to resume at
+
+    Raises:
+        ValueError: If the cursor is malformed, belongs to another document,
+            or the document changed since it was issued
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        scope_hash, cursor_version, offset = payload["s"], payload["v"], int(payload["o"])
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if scope_hash != _scope_hash(scope):
+        raise ValueError("Cursor belongs to a different document")
+    if cursor_version != version:
+        raise ValueError("The book changed since the cursor was issued, start again without a cursor")
+    return offset
+
+
+def paginate(scope: str, version: str, load: Callable[[], Union[str, Iterable[str]]], cursor: Optional[str] = None,
+             max_chars: int = DEFAULT_PAGE_CHARS, max_tokens: Optional[int] = None,
+             source_size: Optional[Callable[[], int]] = None) -> Dict[str, Any]:
+    """
+    Get one page of a document, split at paragraph or heading boundaries
+
+    The document text is produced by load() on first use and kept in the
+    pagination cache, so following pages never redo the extraction. If
+    load() returns an iterator of chunks, only as much of the document as
+    the page needs is produced.
+
+    Args:
+        scope: Name of the document, e.g. book path and chapter
+        version: Version of the source file, invalidating cursors when it changes
+        load: Produces the document text, whole or as an iterator of chunks
+        cursor: Cursor returned with the previous page, or None for the first page
+        max_chars: Maximum characters per page
+        max_tokens: Maximum estimated tokens per page, if any
+        source_size: Gives the size in bytes of the source load()'s iterator keeps alive
+
+    Returns:
+        Dict[str, Any]: content, offset (of the page in the document), total_chars
+        (None while the document is still being produced), and next_cursor
+        (None on the last page)
+
+    Raises:
+        ValueError: If the cursor is invalid or a budget is not positive
+    """
+    if max_chars < 1 or (max_tokens is not None and max_tokens < 1):
+        raise ValueError("Page budgets must be positive")
+    offset = decode_cursor(cursor, scope, version) if cursor else 0
+    cache = get_pagination_cache()
+    paged = cache.get(scope, version, load, source_size)
+    try:
+        paged.ensure(offset)
+        if offset < 0 or offset > len(paged.text):
+            raise ValueError(f"Cursor offset {offset} is past the end of the document")
+        end = paged.page_end(offset, max_chars, max_tokens)
+    except Exception:
+        if not paged.complete:
+            # Producing the text failed part way: never serve it truncated
+            cache.discard(scope, version)
+        raise
+    cache.refresh(scope, version)
+    total_chars = len(paged.text) if paged.complete else None
+    logger.debug(
+        "Served document page",
+        operation="pagination",
+        offset=offset,
+        end=end,
+        total_chars=total_chars
+    )
+    return {
+        "content": paged.text[offset:end],
+        "offset": offset,
+        "total_chars": total_chars,
+        "next_cursor": encode_cursor(scope, version, end) if end < len(paged.text) or not paged.complete else None,
+    }
@@ -1,9 +1,15 @@
-from typing import List, Tuple, Dict, Union
+from typing import List, Tuple, Dict, Union, Any, Iterator
 import os
+from contextlib import contextmanager
 from io import StringIO
-import fitz  # PyMuPDF
 import re
+import time
 from .logger_config import get_logger, log_operation
+from .document_pool import get_document_pool
+from .library_scanner import scan_library
+from .extraction_cache import cached_extraction
+from .lazy_import import LazyModule
+from .pdf_workers import get_pdf_worker_pool, map_pdf_pages, run_pdf_job
 
 # Custom exception class for PDF processing errors
 class PdfProcessingError(Exception):
@@ -18,11 +24,33 @@ class PdfProcessingError(Exception):
 # Initialize structured logger
 logger = get_logger(__name__)
 
+# PyMuPDF, imported by the first PDF call to keep server start-up fast. Its
+# legacy "fitz" alias prints a deprecation warning to stdout, which is the
+# MCP stdio transport once the server is running.
+fitz = LazyModule('pymupdf')
+
+@contextmanager
+def open_pdf(pdf_path: str) -> Iterator[Any]:
+    """
+    Open a PDF file through the shared document pool
+
+    PyMuPDF documents are not thread-safe, so the pooled document is leased
+    exclusively for the duration of the with-block. Callers must not close it.
+    """
+    with get_document_pool().lease(pdf_path, fitz.open) as doc:
+        yield doc
+
 def get_all_pdf_files(path: str) -> List[str]:
     """
-    Get all PDF files in the specified path
+    Get all PDF files below the specified path, including subfolders
+
+    Suffixes are matched case-insensitively. Folders are scanned by the
+    incremental library scanner, so repeated calls only list changed folders.
+
+    Returns:
+        List[str]: Paths relative to path, sorted
     """
-    return [f for f in os.listdir(path) if f.endswith('.pdf')]
+    return [entry["relative_path"] for entry in scan_library(path, formats=("pdf",))]
 
 @log_operation("pdf_metadata_extraction")
 def get_meta(pdf_path: str) -> Dict[str, Union[str, List[str], int, float, bool]]:
@@ -54,60 +82,58 @@ def get_meta(pdf_path: str) -> Dict[str, Union[str, List[str], int, float, bool]
             file_path=pdf_path,
             operation="metadata_extraction"
         )
-        doc = fitz.open(pdf_path)
-        meta = {}
+        with open_pdf(pdf_path) as doc:
+            meta = {}
 
-        # Extract metadata from PDF using PyMuPDF
-        metadata = doc.metadata
-        
-        # Standard metadata fields mapping
-        standard_fields = {
-            'title': 'title',
-            'author': 'author', 
-            'subject': 'subject',
-            'creator': 'creator',
-            'producer': 'producer',
-            'creation_date': 'creationDate',
-            'modification_date': 'modDate',
-            'keywords': 'keywords',
-            'format': 'format'
-        }
-
-        # Extract standard metadata fields
-        for field, pdf_field in standard_fields.items():
-            if pdf_field in metadata and metadata[pdf_field]:
-                meta[field] = metadata[pdf_field]
-
-        # Add additional information
-        meta['pages'] = doc.page_count
-        meta['file_size'] = os.path.getsize(pdf_path)
+            # Extract metadata from PDF using PyMuPDF
+            metadata = doc.metadata
         
-        # Get PDF version and encryption info
-        try:
-            # Try to get version info - different PyMuPDF versions have different APIs
-            if hasattr(doc, 'version_major') and hasattr(doc, 'version_minor'):
-                meta['pdf_version'] = f"{doc.version_major}.{doc.version_minor}"
-            elif hasattr(doc, 'version'):
-                meta['pdf_version'] = str(doc.version)
-            else:
-                meta['pdf_version'] = "Unknown"
-        except:
-            meta['pdf_version'] = "Unknown"
-        
-        meta['is_encrypted'] = doc.is_encrypted
+            # Standard metadata fields mapping
+            standard_fields = {
+                'title': 'title',
+                'author': 'author', 
+                'subject': 'subject',
+                'creator': 'creator',
+                'producer': 'producer',
+                'creation_date': 'creationDate',
+                'modification_date': 'modDate',
+                'keywords': 'keywords',
+                'format': 'format'
+            }
+
+            # Extract standard metadata fields
+            for field, pdf_field in standard_fields.items():
+                if pdf_field in metadata and metadata[pdf_field]:
+                    meta[field] = metadata[pdf_field]
+
+            # Add additional information
+            meta['pages'] = doc.page_count
+            meta['file_size'] = os.path.getsize(pdf_path)
         
-        # Get page dimensions (first page)
-        if doc.page_count > 0:
+            # Get PDF version and encryption info
             try:
-                first_page = doc[0]
-                rect = first_page.rect
-                meta['page_width'] = rect.width
-                meta['page_height'] = rect.height
+                # Try to get version info - different PyMuPDF versions have different APIs
+                if hasattr(doc, 'version_major') and hasattr(doc, 'version_minor'):
+                    meta['pdf_version'] = f"{doc.version_major}.{doc.version_minor}"
+                elif hasattr(doc, 'version'):
+                    meta['pdf_version'] = str(doc.version)
+                else:
+                    meta['pdf_version'] = "Unknown"
             except:
-                # If we can't get page dimensions, skip it
-                pass
+                meta['pdf_version'] = "Unknown"
+        
+            meta['is_encrypted'] = doc.is_encrypted
         
-        doc.close()
+            # Get page dimensions (first page)
+            if doc.page_count > 0:
+                try:
+                    first_page = doc[0]
+                    rect = first_page.rect
+                    meta['page_width'] = rect.width
+                    meta['page_height'] = rect.height
+                except:
+                    # If we can't get page dimensions, skip it
+                    pass
         
         logger.info(
             "PDF metadata extraction completed",
@@ -161,16 +187,15 @@ def get_toc(pdf_path: str) -> List[Tuple[str, int]]:
             file_path=pdf_path,
             operation="toc_extraction"
         )
-        doc = fitz.open(pdf_path)
-        toc = []
-        
-        # Get TOC from document
-        outline = doc.get_toc()
-        for item in outline:
-            level, title, page = item
-            toc.append((title, page))
-        
-        doc.close()
+        with open_pdf(pdf_path) as doc:
+            toc = []
+
+            # Get TOC from document
+            outline = doc.get_toc()
+            for item in outline:
+                level, title, page = item
+                toc.append((title, page))
+
         logger.info(
             "PDF TOC extraction completed",
             file_path=pdf_path,
@@ -191,6 +216,55 @@ def get_toc(pdf_path: str) -> List[Tuple[str, int]]:
         )
         raise PdfProcessingError("Failed to parse PDF file", pdf_path, "toc_extraction", e)
 
+def _catalog_fields(pdf_path: str) -> Dict[str, Any]:
+    with open_pdf(pdf_path) as doc:
+        metadata = doc.metadata or {}
+        fields = {key: metadata[key] for key in ("title", "author", "subject", "keywords") if metadata.get(key)}
+        fields["pages"] = doc.page_count
+        fields["chapters"] = len(doc.get_toc())
+        return fields
+
+@cached_extraction("pdf_catalog_fields")
+def get_catalog_fields(pdf_path: str) -> Dict[str, Any]:
+    """
+    Get the fields of a PDF file needed by the library catalog
+
+    Runs in a PDF worker process when they are enabled, opening the
+    document once for its metadata, page count and TOC.
+
+    Returns:
+        Dict[str, Any]: title, author, subject and keywords when set, pages and
+        chapters (number of TOC entries)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        PdfProcessingError: If the file is not a valid PDF
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    try:
+        return run_pdf_job(_catalog_fields, pdf_path)
+    except Exception as e:
+        logger.error(
+            "Failed to read PDF catalog fields",
+            file_path=pdf_path,
+            operation="catalog_fields",
+            error_type=type(e).__name__,
+            error_details=str(e)
+        )
+        raise PdfProcessingError("Failed to read PDF catalog fields", pdf_path, "catalog_fields", e)
+
+def _page_text(pdf_path: str, page_number: int) -> str:
+    with open_pdf(pdf_path) as doc:
+        # Convert to 0-based index
+        page = doc[page_number - 1]
+        return page.get_text()
+
+def _pages_text(pdf_path: str, page_numbers: List[int]) -> List[str]:
+    with open_pdf(pdf_path) as doc:
+        return [doc[page_number - 1].get_text() for page_number in page_numbers]
+
+@cached_extraction("pdf_page_text")
 def extract_page_text(pdf_path: str, page_number: int) -> str:
     """
     Extract text content from a specific page in the PDF
@@ -203,12 +277,7 @@ def extract_page_text(pdf_path: str, page_number: int) -> str:
         str: Extracted text content
     """
     try:
-        doc = fitz.open(pdf_path)
-        # Convert to 0-based index
-        page = doc[page_number - 1]
-        text = page.get_text()
-        doc.close()
-        return text
+        return run_pdf_job(_page_text, pdf_path, page_number)
     except Exception as e:
         logger.error(
             "Failed to extract page text",
@@ -220,6 +289,66 @@ def extract_page_text(pdf_path: str, page_number: int) -> str:
         )
         raise PdfProcessingError("Failed to extract page text", pdf_path, "page_text_extraction", e)
 
+def extract_pages_text(pdf_path: str, page_numbers: List[int]) -> List[str]:
+    """
+    Extract the text of several pages
+
+    With PDF worker processes enabled the pages are split into chunks
+    extracted in parallel; otherwise they share one document handle.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_numbers: Page numbers to extract (1-based index)
+        
+    Returns:
+        List[str]: Text of each page, in the order of page_numbers
+    """
+    try:
+        return map_pdf_pages(_pages_text, pdf_path, page_numbers)
+    except Exception as e:
+        logger.error(
+            "Failed to extract pages text",
+            file_path=pdf_path,
+            page_count=len(page_numbers),
+            operation="pages_text_extraction",
+            error_type=type(e).__name__,
+            error_details=str(e)
+        )
+        raise PdfProcessingError("Failed to extract pages text", pdf_path, "pages_text_extraction", e)
+
+def page_to_markdown(page: Any) -> str:
+    """Convert a PyMuPDF page to markdown, using font size and flags for headers and emphasis"""
+    # Extract text with formatting information
+    blocks = page.get_text("dict")["blocks"]
+    markdown_text = StringIO()
+
+    for block in blocks:
+        if "lines" in block:
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    text = span["text"]
+                    size = span["size"]
+                    flags = span["flags"]
+
+                    # Convert formatting to markdown
+                    if size > 14:  # Assuming larger text is a header
+                        text = f"## {text}"
+                    if flags & 2**3:  # Bold text
+                        text = f"**{text}**"
+                    if flags & 2**1:  # Italic text
+                        text = f"*{text}*"
+
+                    markdown_text.write(text + " ")
+                markdown_text.write("\n")
+            markdown_text.write("\n")
+
+    return markdown_text.getvalue()
+
+def _page_markdown(pdf_path: str, page_number: int) -> str:
+    with open_pdf(pdf_path) as doc:
+        return page_to_markdown(doc[page_number - 1])
+
+@cached_extraction("pdf_page_markdown")
 def extract_page_markdown(pdf_path: str, page_number: int) -> str:
     """
     Extract text content from a specific page and convert to markdown format
@@ -232,35 +361,7 @@ def extract_page_markdown(pdf_path: str, page_number: int) -> str:
         str: Markdown formatted text
     """
     try:
-        doc = fitz.open(pdf_path)
-        page = doc[page_number - 1]
-        
-        # Extract text with formatting information
-        blocks = page.get_text("dict")["blocks"]
-        markdown_text = StringIO()
-        
-        for block in blocks:
-            if "lines" in block:
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        text = span["text"]
-                        size = span["size"]
-                        flags = span["flags"]
-                        
-                        # Convert formatting to markdown
-                        if size > 14:  # Assuming larger text is a header
-                            text = f"## {text}"
-                        if flags & 2**3:  # Bold text
-                            text = f"**{text}**"
-                        if flags & 2**1:  # Italic text
-                            text = f"*{text}*"
-                            
-                        markdown_text.write(text + " ")
-                    markdown_text.write("\n")
-                markdown_text.write("\n")
-        
-        doc.close()
-        return markdown_text.getvalue()
+        return run_pdf_job(_page_markdown, pdf_path, page_number)
     except Exception as e:
         logger.error(
             "Failed to extract page markdown",
@@ -272,6 +373,167 @@ def extract_page_markdown(pdf_path: str, page_number: int) -> str:
         )
         raise PdfProcessingError("Failed to extract page markdown", pdf_path, "page_markdown_extraction", e)
 
+# Page extraction formats of extract_page_range
+PAGE_FORMATS = ("text", "markdown")
+
+# Default output budget of one extract_page_range call, in characters
+DEFAULT_MAX_CHARS = 50000
+
+# Chapter pages extracted per lease of the pooled document by iter_chapter_pages
+CHAPTER_PAGES_PER_LEASE = 8
+
+def _page_range(pdf_path: str, start_page: int, end_page: int, fmt: str, max_chars: int) -> Dict[str, Any]:
+    with open_pdf(pdf_path) as doc:
+        total_pages = doc.page_count
+        if start_page < 1 or start_page > total_pages:
+            raise ValueError(f"start page {start_page} out of range 1-{total_pages}")
+        if end_page < start_page:
+            raise ValueError(f"end page {end_page} before start page {start_page}")
+        end_page = min(end_page, total_pages)
+
+        content = []
+        pages = []
+        size = 0
+        next_page = None
+        for page_num in range(start_page, end_page + 1):
+            page = doc[page_num - 1]
+            text = page_to_markdown(page) if fmt == "markdown" else page.get_text()
+            # Always return at least one page, even if it alone exceeds the budget
+            if pages and size + len(text) > max_chars:
+                next_page = page_num
+                break
+            content.append(text)
+            pages.append(page_num)
+            size += len(text)
+
+    return {
+        "content": "\n".join(content),
+        "pages": pages,
+        "next_page": next_page,
+        "total_pages": total_pages,
+    }
+
+def extract_page_range(pdf_path: str, start_page: int, end_page: int, fmt: str = "text",
+                       max_chars: int = DEFAULT_MAX_CHARS) -> Dict[str, Any]:
+    """
+    Extract the text or markdown of a page range within an output budget
+
+    The document is opened once and pages are extracted one at a time until
+    the next page would exceed max_chars. The remaining pages are left for a
+    follow-up call starting at next_page.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start_page: First page to extract (1-based index)
+        end_page: Last page to extract (inclusive, clamped to the page count)
+        fmt: "text" or "markdown"
+        max_chars: Maximum characters of content to return; at least one page is always returned
+
+    Returns:
+        Dict[str, Any]: content (pages joined by newlines), pages (page numbers included),
+        next_page (first page not returned, or None when the range is complete) and total_pages
+
+    Raises:
+        PdfProcessingError: If the range or format is invalid or extraction fails
+    """
+    if fmt not in PAGE_FORMATS:
+        raise PdfProcessingError(f"Unknown page format '{fmt}'", pdf_path, "page_range_extraction")
+    try:
+        start_time = time.perf_counter()
+        result = run_pdf_job(_page_range, pdf_path, start_page, end_page, fmt, max_chars)
+        logger.info(
+            "PDF page range extraction completed",
+            file_path=pdf_path,
+            operation="page_range_extraction",
+            page_count=len(result["pages"]),
+            next_page=result["next_page"],
+            duration_ms=round((time.perf_counter() - start_time) * 1000, 2)
+        )
+        return result
+    except ValueError as e:
+        raise PdfProcessingError(f"Invalid page range: {e}", pdf_path, "page_range_extraction", e)
+    except Exception as e:
+        logger.error(
+            "Failed to extract page range",
+            file_path=pdf_path,
+            start_page=start_page,
+            end_page=end_page,
+            operation="page_range_extraction",
+            error_type=type(e).__name__,
+            error_details=str(e)
+        )
+        raise PdfProcessingError("Failed to extract page range", pdf_path, "page_range_extraction", e)
+
+def find_chapter_page_range(doc: Any, chapter_title: str) -> Tuple[int, int]:
+    """
+    Find the page range of a chapter in an open PDF document
+
+    Args:
+        doc: Open PyMuPDF document
+        chapter_title: Title of the chapter as listed in the TOC
+
+    Returns:
+        Tuple[int, int]: (start_page, end_page), 1-based with end_page exclusive.
+        The chapter ends where the next TOC entry starts, or at the last page.
+
+    Raises:
+        KeyError: If the chapter is not in the TOC
+    """
+    toc = doc.get_toc()
+    for i, (level, title, page) in enumerate(toc):
+        if title == chapter_title:
+            if i < len(toc) - 1:
+                return page, toc[i + 1][2]
+            return page, doc.page_count
+    raise KeyError(chapter_title)
+
+def _chapter_page_range(pdf_path: str, chapter_title: str) -> Tuple[int, int]:
+    with open_pdf(pdf_path) as doc:
+        return find_chapter_page_range(doc, chapter_title)
+
+def iter_chapter_pages(pdf_path: str, chapter_title: str) -> Iterator[Tuple[int, str, float]]:
+    """
+    Stream the pages of a chapter using the pooled document handle
+
+    The document is opened (or taken from the pool) once; the TOC lookup and
+    all page extractions share that handle. It is leased for one batch of
+    CHAPTER_PAGES_PER_LEASE pages at a time and released before the batch is
+    yielded, so pages stream as they are extracted and a caller holding the
+    generator never blocks other tools on the same PDF.
+
+    Args:
+        pdf_path: Path to the PDF file
+        chapter_title: Title of the chapter to extract
+
+    Yields:
+        Tuple[int, str, float]: (page_number, page_text, duration_ms) for each page
+
+    Raises:
+        PdfProcessingError: If the chapter is not in the TOC
+    """
+    with open_pdf(pdf_path) as doc:
+        try:
+            start_page, end_page = find_chapter_page_range(doc, chapter_title)
+        except KeyError:
+            raise PdfProcessingError(f"Chapter '{chapter_title}' not found in TOC", pdf_path, "chapter_lookup")
+
+    for first in range(start_page, end_page, CHAPTER_PAGES_PER_LEASE):
+        batch = []
+        with open_pdf(pdf_path) as doc:
+            for page_num in range(first, min(first + CHAPTER_PAGES_PER_LEASE, end_page)):
+                start_time = time.perf_counter()
+                text = doc[page_num - 1].get_text()
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                logger.debug(
+                    "Extracted chapter page",
+                    file_path=pdf_path,
+                    page_number=page_num,
+                    operation="chapter_page_extraction",
+                    duration_ms=round(duration_ms, 2)
+                )
+                batch.append((page_num, text, duration_ms))
+        yield from batch
+
 def extract_chapter_by_title(pdf_path: str, chapter_title: str) -> Tuple[str, List[int]]:
     """
     Extract a chapter's content by its title from the TOC
@@ -284,34 +546,30 @@ def extract_chapter_by_title(pdf_path: str, chapter_title: str) -> Tuple[str, Li
         Tuple[str, List[int]]: Tuple containing (chapter_content, page_numbers)
     """
     try:
-        # Get TOC to find chapter location
-        toc = get_toc(pdf_path)
-        chapter_start_page = None
-        chapter_end_page = None
-        
-        # Find the chapter in TOC
-        for i, (title, page) in enumerate(toc):
-            if title == chapter_title:
-                chapter_start_page = page
-                if i < len(toc) - 1:
-                    chapter_end_page = toc[i + 1][1]
-                break
-        
-        if chapter_start_page is None:
-            raise PdfProcessingError(f"Chapter '{chapter_title}' not found in TOC", pdf_path, "chapter_lookup")
-            
-        # If it's the last chapter, read until the end of the document
-        if chapter_end_page is None:
-            doc = fitz.open(pdf_path)
-            chapter_end_page = doc.page_count
-            doc.close()
-            
-        # Extract content from all pages in the chapter
+        start_time = time.perf_counter()
         content = []
-        for page_num in range(chapter_start_page, chapter_end_page):
-            content.append(extract_page_text(pdf_path, page_num))
-            
-        return ("\n".join(content), list(range(chapter_start_page, chapter_end_page)))
+        pages = []
+        if get_pdf_worker_pool() is not None:
+            # Spread the chapter's pages over the worker processes
+            try:
+                start_page, end_page = run_pdf_job(_chapter_page_range, pdf_path, chapter_title)
+            except KeyError:
+                raise PdfProcessingError(f"Chapter '{chapter_title}' not found in TOC", pdf_path, "chapter_lookup")
+            pages = list(range(start_page, end_page))
+            content = extract_pages_text(pdf_path, pages)
+        else:
+            for page_num, text, _ in iter_chapter_pages(pdf_path, chapter_title):
+                content.append(text)
+                pages.append(page_num)
+
+        logger.info(
+            "PDF chapter extraction completed",
+            file_path=pdf_path,
+            operation="chapter_extraction",
+            page_count=len(pages),
+            duration_ms=round((time.perf_counter() - start_time) * 1000, 2)
+        )
+        return ("\n".join(content), pages)
         
     except Exception as e:
         logger.error(
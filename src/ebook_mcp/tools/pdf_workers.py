@@ -0,0 +1,200 @@
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+DEFAULT_MAX_JOBS_PER_WORKER = 500
+
+# Pages per job when a page range is spread over the workers
+DEFAULT_PAGES_PER_JOB = 16
+
+# Set in worker processes, which always run PDF jobs in-process
+_in_worker = False
+
+
+def _init_worker() -> None:
+    global _in_worker
+    _in_worker = True
+
+
+class _Worker:
+    __slots__ = ("executor", "jobs", "broken")
+
+    def __init__(self, executor: ProcessPoolExecutor):
+        self.executor = executor
+        self.jobs = 0
+        self.broken = False
+
+
+class PdfWorkerPool:
+    """
+    Pool of single-process workers for CPU-heavy PyMuPDF work.
+
+    PyMuPDF holds the GIL while extracting text and its documents must not
+    be shared between threads, so heavy page extraction runs in worker
+    processes. Each worker has its own document pool, and jobs are routed
+    by a hash of the file path so the same book keeps hitting the same
+    worker and its already-open document. A worker is replaced after
+    max_jobs_per_worker jobs: it finishes the jobs it already has and then
+    exits, which caps memory growth from PyMuPDF caches.
+    """
+
+    def __init__(self, workers: int, max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.max_jobs_per_worker = max_jobs_per_worker
+        # spawn: forking a threaded server process that holds open PyMuPDF documents is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._workers = [self._new_worker() for _ in range(workers)]
+        self.jobs = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    def _new_worker(self) -> _Worker:
+        return _Worker(ProcessPoolExecutor(max_workers=1, mp_context=self._context, initializer=_init_worker))
+
+    def _replace(self, index: int, crashed: bool = False) -> None:
+        # Caller holds the lock
+        old = self._workers[index]
+        self._workers[index] = self._new_worker()
+        old.executor.shutdown(wait=False)
+        if crashed:
+            self.crashed += 1
+        else:
+            self.recycled += 1
+        logger.debug(
+            "Replaced PDF worker",
+            operation="pdf_worker_recycle",
+            worker=index,
+            jobs=old.jobs,
+            crashed=crashed
+        )
+
+    def worker_index(self, pdf_path: str, shard: int = 0) -> int:
+        """Get the worker a file (or one shard of it) is routed to"""
+        base = zlib.crc32(os.path.realpath(pdf_path).encode("utf-8"))
+        return (base + shard) % len(self._workers)
+
+    def submit(self, pdf_path: str, func: Callable[..., Any], *args, shard: int = 0) -> Future:
+        """
+        Submit func(pdf_path, *args) to the worker owning pdf_path
+
+        func must be a picklable module-level function.
+        """
+        index = self.worker_index(pdf_path, shard)
+        with self._lock:
+            worker = self._workers[index]
+            if worker.broken:
+                self._replace(index, crashed=True)
+                worker = self._workers[index]
+            elif worker.jobs >= self.max_jobs_per_worker:
+                self._replace(index)
+                worker = self._workers[index]
+            worker.jobs += 1
+            self.jobs += 1
+            try:
+                future = worker.executor.submit(func, pdf_path, *args)
+            except BrokenProcessPool:
+                self._replace(index, crashed=True)
+                raise
+
+        def on_done(done: Future) -> None:
+            # Runs on the executor's management thread: only flag the worker,
+            # it is replaced by the next submit
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                worker.broken = True
+
+        future.add_done_callback(on_done)
+        return future
+
+    def run(self, pdf_path: str, func: Callable[..., Any], *args) -> Any:
+        """Run func(pdf_path, *args) in the worker owning pdf_path and wait for the result"""
+        return self.submit(pdf_path, func, *args).result()
+
+    def map_pages(self, func: Callable[..., List[Any]], pdf_path: str, page_numbers: Sequence[int],
+                  pages_per_job: int = DEFAULT_PAGES_PER_JOB) -> List[Any]:
+        """
+        Run func(pdf_path, chunk) over page_numbers split into chunks, using all workers
+
+        Consecutive chunks go to consecutive workers starting at the file's
+        own worker, and results are concatenated in page order.
+        """
+        chunks = [page_numbers[i:i + pages_per_job] for i in range(0, len(page_numbers), pages_per_job)]
+        futures = [self.submit(pdf_path, func, list(chunk), shard=i) for i, chunk in enumerate(chunks)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Get worker count, per-worker job counts and recycling counters"""
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "max_jobs_per_worker": self.max_jobs_per_worker,
+                "worker_jobs": [worker.jobs for worker in self._workers],
+                "jobs": self.jobs,
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.executor.shutdown(wait=wait)
+
+
+_pdf_worker_pool: Optional[PdfWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_worker_pool() -> Optional[PdfWorkerPool]:
+    """
+    Get the process-wide PDF worker pool, or None when PDF work runs in-process
+
+    The pool is off unless EBOOK_MCP_PDF_WORKERS is set to a positive
+    number. Worker processes themselves never get a pool.
+    """
+    global _pdf_worker_pool
+    if _in_worker:
+        return None
+    if _pdf_worker_pool is not None:
+        return _pdf_worker_pool
+    workers = int(os.environ.get("EBOOK_MCP_PDF_WORKERS") or 0)
+    if workers < 1:
+        return None
+    with _pool_lock:
+        if _pdf_worker_pool is None:
+            max_jobs = int(os.environ.get("EBOOK_MCP_PDF_WORKER_MAX_JOBS", DEFAULT_MAX_JOBS_PER_WORKER))
+            _pdf_worker_pool = PdfWorkerPool(workers, max_jobs)
+            logger.info(
+                "Started PDF worker processes",
+                operation="pdf_worker_pool_start",
+                workers=workers,
+                max_jobs_per_worker=max_jobs
+            )
+    return _pdf_worker_pool
+
+
+def run_pdf_job(func: Callable[..., Any], pdf_path: str, *args) -> Any:
+    """Run func(pdf_path, *args) in the PDF worker pool when enabled, in-process otherwise"""
+    pool = get_pdf_worker_pool()
+    if pool is None:
+        return func(pdf_path, *args)
+    return pool.run(pdf_path, func, *args)
+
+
+def map_pdf_pages(func: Callable[..., List[Any]], pdf_path: str, page_numbers: Sequence[int]) -> List[Any]:
+    """Run func(pdf_path, pages) over a page range, split across the PDF workers when enabled"""
+    pool = get_pdf_worker_pool()
+    if pool is None:
+        return func(pdf_path, list(page_numbers))
+    return pool.map_pages(func, pdf_path, page_numbers)
@@ -0,0 +1,437 @@
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .lazy_import import lazy_import
+from .logger_config import get_log_directory, get_logger
+
+# Optional sampling profiler, used for speedscope output when installed
+pyinstrument = lazy_import('pyinstrument')
+PYINSTRUMENT_AVAILABLE = pyinstrument is not None
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+FORMATS = ("pstats", "speedscope")
+# From Python 3.12 cProfile is built on sys.monitoring, which is not
+# per-thread: the sampler is the default there
+DEFAULT_FORMAT = "speedscope" if sys.version_info >= (3, 12) else "pstats"
+DEFAULT_SAMPLE_INTERVAL = 0.001
+# Functions of this package listed in each profile's summary
+HOTSPOTS = 15
+RECENT_PROFILES = 20
+
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _own_code(filename: str) -> bool:
+    return filename.startswith(_PACKAGE_DIR)
+
+
+def _function_name(filename: str, line: int, name: str) -> str:
+    module = os.path.splitext(os.path.relpath(filename, _PACKAGE_DIR))[0].replace(os.sep, ".")
+    return f"{module}.{name}:{line}"
+
+
+class _CProfileCollector:
+    """
+    Deterministic cProfile profile, saved as .pstats
+
+    Before Python 3.12 cProfile only sees the thread that enabled it. From
+    3.12 it uses sys.monitoring, which is interpreter-wide, so functions run
+    by other threads during the call (other tool calls, the library
+    watcher) may be included. One cProfile session runs at a time; other
+    selected calls are not profiled meanwhile.
+    """
+    extension = ".pstats"
+    _active = threading.Lock()
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        if not self._active.acquire(blocking=False):
+            raise ValueError("cProfile is already profiling another call")
+        try:
+            self.profile.enable()
+        except ValueError:
+            self._active.release()
+            raise
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self._active.release()
+
+    def save(self, path: str, title: str) -> None:
+        self.profile.dump_stats(path)
+
+    def hotspots(self) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(self.profile).stats
+        rows = [
+            {
+                "function": _function_name(filename, line, name),
+                "calls": calls,
+                "cumulative_ms": round(cumulative * 1000, 3),
+                "own_ms": round(own * 1000, 3),
+            }
+            for (filename, line, name), (_, calls, own, cumulative, _) in stats.items()
+            if _own_code(filename)
+        ]
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        return rows[:HOTSPOTS]
+
+
+class _StackSampler:
+    """
+    Wall-clock stack sampler of one thread, saved in the speedscope format
+
+    A daemon thread reads the profiled thread's stack every interval; each
+    sample is weighted by the time since the previous one. Overhead is far
+    below cProfile's, at the price of missing very short calls.
+    """
+    extension = ".speedscope.json"
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[Tuple[str, str, int]] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ebook-mcp-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                index = self._frame_index.get(key)
+                if index is None:
+                    index = self._frame_index[key] = len(self.frames)
+                    self.frames.append(key)
+                stack.append(index)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.samples.append(stack)
+                self.weights.append((now - self._last) * 1000)
+            self._last = now
+
+    def save(self, path: str, title: str) -> None:
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": title,
+            "exporter": "ebook-mcp",
+            "shared": {"frames": [{"name": name, "file": filename, "line": line}
+                                  for name, filename, line in self.frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": title,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(self.weights), 3),
+                "samples": self.samples,
+                "weights": [round(weight, 3) for weight in self.weights],
+            }],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f)
+
+    def hotspots(self) -> List[Dict[str, Any]]:
+        cumulative: Dict[int, float] = {}
+        own: Dict[int, float] = {}
+        samples: Dict[int, int] = {}
+        for stack, weight in zip(self.samples, self.weights):
+            for index in set(stack):
+                cumulative[index] = cumulative.get(index, 0.0) + weight
+                samples[index] = samples.get(index, 0) + 1
+            own[stack[-1]] = own.get(stack[-1], 0.0) + weight
+        rows = [
+            {
+                "function": _function_name(filename, line, name),
+                "samples": samples[index],
+                "cumulative_ms": round(cumulative[index], 3),
+                "own_ms": round(own.get(index, 0.0), 3),
+            }
+            for index, (name, filename, line) in enumerate(self.frames)
+            if index in cumulative and _own_code(filename)
+        ]
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        return rows[:HOTSPOTS]
+
+
+class _PyinstrumentCollector:
+    """pyinstrument session of the calling thread, saved in the speedscope format"""
+    extension = ".speedscope.json"
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.profiler = pyinstrument.Profiler(interval=interval, async_mode="disabled")
+
+    def start(self) -> None:
+        self.profiler.start()
+
+    def stop(self) -> None:
+        self.profiler.stop()
+
+    def save(self, path: str, title: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.profiler.output(renderer=pyinstrument.renderers.SpeedscopeRenderer()))
+
+    def hotspots(self) -> List[Dict[str, Any]]:
+        # The speedscope file has the full breakdown
+        return []
+
+
+class _Session:
+    """One profiled tool call"""
+    __slots__ = ("tool", "book", "started", "collector")
+
+    def __init__(self, tool: str, book: Optional[str], collector: Any):
+        self.tool = tool
+        self.book = book
+        self.started = datetime.now()
+        self.collector = collector
+
+
+class ToolProfiler:
+    """
+    Profiles selected tool calls on request, to see where a slow call's time goes.
+
+    Off by default; the tool executor then only checks the active flag.
+    configure(calls=N) profiles the next N calls. With slow_ms, calls are
+    profiled and only kept when they take at least slow_ms; calls=N then
+    stops after N such calls, calls=0 keeps going. Profiles are speedscope
+    files from a stack sampler of the tool's thread (pyinstrument when
+    installed) or cProfile .pstats files, the default before Python 3.12,
+    written to the profile directory together with a
+    .json summary naming the tool and book and listing this package's
+    functions by cumulative time (parsing, slicing, cleaning, markdown).
+
+    Work done outside the interpreter is not seen: PDF work done in the
+    PDF worker processes shows up as waiting (leave EBOOK_MCP_PDF_WORKERS unset).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.active = False
+        self.remaining = 0
+        self.slow_ms: Optional[float] = None
+        self.tools: Optional[frozenset] = None
+        self.format = DEFAULT_FORMAT
+        self.written = 0
+        self.discarded = 0
+        self._sequence = 0
+        self._recent: "deque[str]" = deque(maxlen=RECENT_PROFILES)
+        self._lock = threading.Lock()
+
+    def configure(self, calls: int = 0, slow_ms: Optional[float] = None, tools: Optional[Iterable[str]] = None,
+                  format: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Choose which calls to profile; calls=0 without slow_ms turns profiling off
+
+        Args:
+            calls: Number of calls to profile (to keep, with slow_ms); 0 for no limit with slow_ms
+            slow_ms: Only keep profiles of calls taking at least this many milliseconds
+            tools: Only profile these tools, all tools if None
+            format: "speedscope" (sampling, per thread) or "pstats" (cProfile);
+                DEFAULT_FORMAT if None
+
+        Returns:
+            Dict[str, Any]: The new status()
+
+        Raises:
+            ValueError: If an argument is out of range
+        """
+        format = format or DEFAULT_FORMAT
+        if format not in FORMATS:
+            raise ValueError(f"Unknown profile format: {format} (expected one of {', '.join(FORMATS)})")
+        if calls < 0:
+            raise ValueError("calls must not be negative")
+        if slow_ms is not None and slow_ms < 0:
+            raise ValueError("slow_ms must not be negative")
+        with self._lock:
+            self.remaining = calls
+            self.slow_ms = slow_ms
+            self.tools = frozenset(tools) if tools else None
+            self.format = format
+            self.active = calls > 0 or slow_ms is not None
+        logger.info(
+            "Tool profiling configured",
+            operation="profiler_configure",
+            calls=calls,
+            slow_ms=slow_ms,
+            tools=sorted(self.tools) if self.tools else None,
+            profile_format=format
+        )
+        return self.status()
+
+    def start(self, tool: str, book: Optional[str] = None) -> Optional[_Session]:
+        """
+        Start profiling a call on the current thread if it is selected
+
+        Returns:
+            A session to pass to finish(), or None if the call is not profiled
+        """
+        if not self.active:
+            return None
+        with self._lock:
+            if not self.active or (self.tools is not None and tool not in self.tools):
+                return None
+            profile_format = self.format
+        if profile_format == "pstats":
+            collector = _CProfileCollector()
+        elif PYINSTRUMENT_AVAILABLE:
+            collector = _PyinstrumentCollector()
+        else:
+            collector = _StackSampler(threading.get_ident())
+        try:
+            collector.start()
+        except ValueError as e:
+            # cProfile is busy with another call, or another profiler is active
+            logger.debug("Cannot profile tool call", operation="profiler_start", tool=tool, error_details=str(e))
+            return None
+        with self._lock:
+            # Without a threshold every profiled call is kept: count it now
+            selected = self.active and (self.slow_ms is not None or self.remaining > 0)
+            if selected and self.slow_ms is None:
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    self.active = False
+        if not selected:
+            # Profiling was turned off, or the last slot taken, meanwhile
+            collector.stop()
+            return None
+        return _Session(tool, book, collector)
+
+    def finish(self, session: _Session, seconds: float, ok: bool = True) -> Optional[str]:
+        """
+        Stop profiling a call and write its profile if it is kept
+
+        Returns:
+            Optional[str]: Path of the profile, or None if it was discarded
+        """
+        session.collector.stop()
+        duration_ms = seconds * 1000
+        with self._lock:
+            if self.slow_ms is not None:
+                if duration_ms < self.slow_ms or (self.remaining == 0 and not self.active):
+                    self.discarded += 1
+                    return None
+                if self.remaining > 0:
+                    self.remaining -= 1
+                    if self.remaining == 0:
+                        self.active = False
+            self._sequence += 1
+            sequence = self._sequence
+        try:
+            path = self._write(session, duration_ms, ok, sequence)
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(
+                "Failed to write tool profile",
+                operation="profiler_write",
+                tool=session.tool,
+                file_path=session.book,
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+            return None
+        with self._lock:
+            self.written += 1
+            self._recent.append(path)
+        logger.info(
+            "Wrote tool profile",
+            operation="profiler_write",
+            tool=session.tool,
+            file_path=session.book,
+            duration_ms=round(duration_ms, 2),
+            profile=path
+        )
+        return path
+
+    def _write(self, session: _Session, duration_ms: float, ok: bool, sequence: int) -> str:
+        directory = self.directory or os.path.join(get_log_directory(), "profiles")
+        os.makedirs(directory, exist_ok=True)
+        book = re.sub(r"[^\w.-]+", "_", os.path.splitext(os.path.basename(session.book or ""))[0])[:60]
+        base = os.path.join(directory, "_".join(part for part in (
+            session.started.strftime("%Y%m%d-%H%M%S"), f"{sequence:04d}", session.tool, book,
+            f"{int(duration_ms)}ms") if part))
+        title = f"{session.tool} {session.book or ''} ({duration_ms:.1f} ms)".replace("  ", " ")
+        path = base + session.collector.extension
+        session.collector.save(path, title)
+        summary = {
+            "tool": session.tool,
+            "book": session.book,
+            "started": session.started.isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration_ms, 3),
+            "ok": ok,
+            "profile": os.path.basename(path),
+            "hotspots": session.collector.hotspots(),
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return path
+
+    def status(self) -> Dict[str, Any]:
+        """Get the profiling settings, counters and the most recent profile files"""
+        with self._lock:
+            return {
+                "active": self.active,
+                "remaining": self.remaining,
+                "slow_ms": self.slow_ms,
+                "tools": sorted(self.tools) if self.tools else None,
+                "format": self.format,
+                "sampler": "pyinstrument" if PYINSTRUMENT_AVAILABLE else "builtin",
+                "directory": self.directory or os.path.join(get_log_directory(), "profiles"),
+                "written": self.written,
+                "discarded": self.discarded,
+                "recent": list(self._recent),
+            }
+
+
+_tool_profiler: Optional[ToolProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_tool_profiler() -> ToolProfiler:
+    """
+    Get the process-wide tool profiler
+
+    It starts as configured by EBOOK_MCP_PROFILE_CALLS (profile the next N
+    calls), EBOOK_MCP_PROFILE_SLOW_MS (keep calls slower than this),
+    EBOOK_MCP_PROFILE_TOOLS (comma-separated tool names),
+    EBOOK_MCP_PROFILE_FORMAT ("speedscope" or "pstats") and
+    EBOOK_MCP_PROFILE_DIR (default: "profiles" in the log directory).
+    """
+    global _tool_profiler
+    if _tool_profiler is None:
+        with _profiler_lock:
+            if _tool_profiler is None:
+                profiler = ToolProfiler(os.environ.get("EBOOK_MCP_PROFILE_DIR") or None)
+                calls = int(os.environ.get("EBOOK_MCP_PROFILE_CALLS", "0"))
+                slow_ms = os.environ.get("EBOOK_MCP_PROFILE_SLOW_MS")
+                if calls or slow_ms:
+                    tools = [tool.strip() for tool in os.environ.get("EBOOK_MCP_PROFILE_TOOLS", "").split(",")
+                             if tool.strip()]
+                    profiler.configure(calls, float(slow_ms) if slow_ms else None, tools or None,
+                                       os.environ.get("EBOOK_MCP_PROFILE_FORMAT"))
+                _tool_profiler = profiler
+    return _tool_profiler
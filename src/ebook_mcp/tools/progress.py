@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from .logger_config import get_logger
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Seconds between two progress notifications of one tool call
+MIN_INTERVAL = 0.1
+
+_local = threading.local()
+
+
+class ProgressReporter:
+    """
+    Sends MCP progress notifications for one tool call from its worker thread.
+
+    Tool bodies run in the tool executor's threads, away from the event loop
+    that owns the client session, so each notification is scheduled on that
+    loop with asyncio.run_coroutine_threadsafe and sent through FastMCP's
+    Context.report_progress. Progress only grows: advance() adds to a running
+    total, so a tool converting several chapters keeps counting up.
+    Notifications are rate-limited to one per MIN_INTERVAL seconds.
+    """
+    __slots__ = ("_context", "_loop", "_last", "done", "sent")
+
+    def __init__(self, context: Any, loop: asyncio.AbstractEventLoop):
+        self._context = context
+        self._loop = loop
+        self._last = 0.0
+        self.done = 0.0
+        self.sent = 0
+
+    def advance(self, amount: float, message: Optional[str] = None) -> None:
+        """Add amount to the progress and notify the client, unless it was notified just now"""
+        self.done += amount
+        now = time.monotonic()
+        if now - self._last < MIN_INTERVAL or self._loop.is_closed():
+            return
+        self._last = now
+        future = asyncio.run_coroutine_threadsafe(
+            self._context.report_progress(self.done, None, message), self._loop
+        )
+        future.add_done_callback(_log_failure)
+        self.sent += 1
+
+
+def _log_failure(future: Future) -> None:
+    # Progress is best effort: a closed session must not fail the tool call
+    if future.cancelled() or future.exception() is None:
+        return
+    error = future.exception()
+    logger.debug(
+        "Failed to send progress notification",
+        operation="progress_notification",
+        error_type=type(error).__name__,
+        error_details=str(error)
+    )
+
+
+def request_reporter() -> Optional[ProgressReporter]:
+    """
+    Get a reporter for the MCP request being handled on the running event loop
+
+    Returns:
+        Optional[ProgressReporter]: None outside an MCP request, or when the
+        client sent no progress token
+    """
+    # Only an imported MCP server can be handling a request; never import it here
+    server_module = sys.modules.get("mcp.server.lowlevel.server")
+    if server_module is None:
+        return None
+    try:
+        request_context = server_module.request_ctx.get()
+    except LookupError:
+        return None
+    meta = request_context.meta
+    if meta is None or meta.progressToken is None:
+        return None
+    from mcp.server.fastmcp import Context
+    return ProgressReporter(Context(request_context=request_context), asyncio.get_running_loop())
+
+
+@contextmanager
+def reporting(reporter: Optional[ProgressReporter]) -> Iterator[None]:
+    """Make reporter receive the report_progress() calls of this thread for the with-block"""
+    previous = getattr(_local, "reporter", None)
+    _local.reporter = reporter
+    try:
+        yield
+    finally:
+        _local.reporter = previous
+
+
+def report_progress(amount: float, message: Optional[str] = None) -> None:
+    """
+    Report that the current tool call made amount more progress
+
+    A no-op outside a tool call, or when the client did not ask for progress.
+    """
+    reporter = getattr(_local, "reporter", None)
+    if reporter is not None:
+        reporter.advance(amount, message)
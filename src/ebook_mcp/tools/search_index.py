@@ -0,0 +1,780 @@
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from . import epub_helper, pdf_helper
+from .extraction_cache import cache_enabled, default_cache_dir, file_version_key, version_key_or_none
+from .library_scanner import scan_library
+from .logger_config import get_logger
+from .text_tokenizer import tokenize, tokenize_query
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Bump whenever tokenization or passage splitting changes so stored books are indexed again
+SEARCH_INDEX_VERSION = "1"
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_RADIUS = 80
+
+BOOK_EXTENSIONS = ('.epub', '.pdf')
+
+# PDF pages extracted per request while indexing
+PDF_PAGES_PER_BATCH = 128
+
+# Seconds a library search reuses the last scan of an unwatched library
+DEFAULT_RESCAN_INTERVAL = float(os.environ.get("EBOOK_MCP_SEARCH_RESCAN_INTERVAL", "60"))
+
+# Seconds a library search that found new books waits for them to be indexed
+DEFAULT_WAIT = 20.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    path TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    index_version TEXT NOT NULL,
+    error TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    location TEXT NOT NULL,
+    title TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    terms BLOB NOT NULL,
+    text BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_path ON passages (path);
+"""
+
+
+class _Passage:
+    """One indexed unit: an EPUB chapter or a PDF page (its text stays in the database)"""
+    __slots__ = ("book_path", "location", "title", "length")
+
+    def __init__(self, book_path: str, location: Union[str, int], title: str, length: int):
+        self.book_path = book_path
+        self.location = location
+        self.title = title
+        self.length = length
+
+
+class _IndexedBook:
+    """The version of a book that was indexed, its passage ids and distinct terms"""
+    __slots__ = ("version", "error", "ids", "terms")
+
+    def __init__(self, version: str, error: Optional[str] = None):
+        self.version = version
+        self.error = error
+        self.ids: List[int] = []
+        self.terms: Set[str] = set()
+
+
+# A passage as added to the posting lists: (id, location, title, length, term frequencies)
+_PassageRow = Tuple[int, Union[str, int], str, int, Dict[str, int]]
+
+
+def _pack_terms(term_freqs: Dict[str, int]) -> bytes:
+    return zlib.compress(json.dumps(term_freqs, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack_terms(data: bytes) -> Dict[str, int]:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _library_prefix(library: str) -> str:
+    # Book paths below a library folder start with this
+    return library.rstrip(os.sep) + os.sep
+
+
+class _PostingList:
+    """
+    Compact posting list: passage ids and term frequencies in parallel
+    unsigned-int arrays (4 bytes each), kept sorted by passage id.
+    """
+    __slots__ = ("ids", "freqs")
+
+    def __init__(self):
+        self.ids = array("I")
+        self.freqs = array("I")
+
+    def append(self, passage_id: int, freq: int) -> None:
+        # Passage ids are allocated in increasing order, so appending keeps the list sorted
+        self.ids.append(passage_id)
+        self.freqs.append(freq)
+
+    def freq(self, passage_id: int) -> int:
+        i = bisect_left(self.ids, passage_id)
+        if i < len(self.ids) and self.ids[i] == passage_id:
+            return self.freqs[i]
+        return 0
+
+    def remove(self, passage_ids: Set[int]) -> None:
+        keep = [i for i, passage_id in enumerate(self.ids) if passage_id not in passage_ids]
+        self.ids = array("I", (self.ids[i] for i in keep))
+        self.freqs = array("I", (self.freqs[i] for i in keep))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def intersect_postings(postings: List[_PostingList]) -> List[int]:
+    """
+    Intersect sorted posting lists, smallest first
+
+    Each candidate from the shortest list is located in the longer lists by
+    binary search from the previous position, so the cost is bounded by the
+    shortest list rather than the total posting volume.
+    """
+    if not postings:
+        return []
+    postings = sorted(postings, key=len)
+    result = list(postings[0].ids)
+    for posting in postings[1:]:
+        ids = posting.ids
+        matched = []
+        lo = 0
+        for passage_id in result:
+            lo = bisect_left(ids, passage_id, lo)
+            if lo == len(ids):
+                break
+            if ids[lo] == passage_id:
+                matched.append(passage_id)
+        result = matched
+        if not result:
+            break
+    return result
+
+
+def _iter_epub_passages(epub_path: str) -> Iterator[Tuple[str, str, str]]:
+    # Chapters are extracted from the loaded book, not through the extraction cache:
+    # their text is stored in the search index, and caching it too would evict what tools use
+    book = epub_helper.read_epub(epub_path)
+    titles: Dict[str, str] = {}
+    # Titles and hrefs come from the same walk, so nested entries keep their own titles
+    for title, href in epub_helper.flatten_toc_entries(book):
+        titles.setdefault(href, title or href)
+    hrefs = list(titles)
+    try:
+        # One parse per content file, shared by the chapters it holds
+        chapters = epub_helper.extract_multiple_chapters(book, hrefs, 'text')
+    except Exception as e:
+        logger.warning(
+            "Extracting chapters one by one after a batch extraction failed",
+            file_path=epub_path,
+            operation="search_indexing",
+            error_type=type(e).__name__,
+            error_details=str(e)
+        )
+        chapters = _extract_chapters_one_by_one(epub_path, book, hrefs)
+    for href, text in chapters:
+        yield href, titles[href], text
+
+
+def _extract_chapters_one_by_one(epub_path: str, book: Any, hrefs: List[str]) -> Iterator[Tuple[str, str]]:
+    for href in hrefs:
+        try:
+            yield href, epub_helper.extract_chapter_plain_text(book, href)
+        except Exception as e:
+            logger.warning(
+                "Skipping chapter that could not be extracted",
+                file_path=epub_path,
+                operation="search_indexing",
+                chapter_id=href,
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+
+
+def _iter_pdf_passages(pdf_path: str) -> Iterator[Tuple[int, str, str]]:
+    with pdf_helper.open_pdf(pdf_path) as doc:
+        page_count = doc.page_count
+    # Batches keep memory bounded while letting the PDF workers extract in parallel
+    for first in range(1, page_count + 1, PDF_PAGES_PER_BATCH):
+        batch = list(range(first, min(first + PDF_PAGES_PER_BATCH, page_count + 1)))
+        for page_number, text in zip(batch, pdf_helper.extract_pages_text(pdf_path, batch)):
+            yield page_number, f"Page {page_number}", text
+
+
+def iter_book_passages(book_path: str) -> Iterator[Tuple[Union[str, int], str, str]]:
+    """
+    Yield the searchable units of a book as (location, title, text)
+
+    EPUB books yield one unit per TOC entry (location is the chapter href),
+    PDF files one unit per page (location is the 1-based page number).
+
+    Raises:
+        ValueError: If the file is neither an EPUB nor a PDF
+    """
+    extension = os.path.splitext(book_path)[1].lower()
+    if extension == '.epub':
+        return _iter_epub_passages(book_path)
+    if extension == '.pdf':
+        return _iter_pdf_passages(book_path)
+    raise ValueError(f"Unsupported book format: {book_path}")
+
+
+class SearchIndex:
+    """
+    Persistent inverted index over EPUB chapters and PDF pages with BM25 ranking.
+
+    Text is tokenized into words and, for Chinese, Japanese and Korean runs,
+    character n-grams (see text_tokenizer); a CJK query run only matches
+    passages containing all of its n-grams, found by intersecting the
+    compact posting lists. Every passage is stored in SQLite with its term
+    frequencies and compressed text; the posting lists live in memory and
+    are rebuilt from the database in the background on first use, so a
+    restart never re-extracts a book. A single background thread loads the
+    database and then indexes the books queued by library rescans or the
+    watcher, so passage ids, and with them the posting lists, stay in
+    increasing order. A book is indexed again when its (inode, mtime, size)
+    or SEARCH_INDEX_VERSION changes; books that fail to parse are recorded
+    and skipped until they change. Searches only see what is loaded.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, rescan_interval: float = DEFAULT_RESCAN_INTERVAL):
+        self.rescan_interval = rescan_interval
+        self._temp_dir = None
+        if db_path is None:
+            # Private to this instance, deleted with it
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="ebook-mcp-search-")
+            db_path = os.path.join(self._temp_dir.name, "search_index.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        # Held while the database and posting lists change together
+        self._write_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._loading = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._postings: Dict[str, _PostingList] = {}
+        self._passages: Dict[int, _Passage] = {}
+        self._books: Dict[str, _IndexedBook] = {}
+        self._total_length = 0
+        self._pending: Dict[str, Set[str]] = {}
+        self._idle: Dict[str, threading.Event] = {}
+        self._scanned_at: Dict[str, float] = {}
+        self._connection().executescript(_SCHEMA)
+        self.indexed = 0
+        self.failed = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # One thread, so books are appended to the posting lists in id order
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ebook-mcp-search")
+            return self._executor
+
+    def _start_loading(self) -> None:
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        self._get_executor().submit(self._load)
+
+    def _load(self) -> None:
+        # Rebuild the posting lists from the database, book by book in id order
+        with self._write_lock:
+            if self._loaded.is_set():
+                return
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN")
+                try:
+                    conn.execute("DELETE FROM passages WHERE path IN "
+                                 "(SELECT path FROM books WHERE index_version != ?)", (SEARCH_INDEX_VERSION,))
+                    conn.execute("DELETE FROM books WHERE index_version != ?", (SEARCH_INDEX_VERSION,))
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+                books = {
+                    path: _IndexedBook(version, error)
+                    for path, version, error in conn.execute("SELECT path, version, error FROM books")
+                }
+                current = None
+                rows: List[_PassageRow] = []
+                cursor = conn.execute("SELECT id, path, location, title, length, terms FROM passages ORDER BY id")
+                for passage_id, path, location, title, length, terms in cursor:
+                    if path != current:
+                        if rows:
+                            self._add_loaded(current, books[current], rows)
+                        current, rows = path, []
+                    if path in books:
+                        rows.append((passage_id, json.loads(location), title, length, _unpack_terms(terms)))
+                if rows:
+                    self._add_loaded(current, books[current], rows)
+                with self._lock:
+                    for path, book in books.items():
+                        self._books.setdefault(path, book)
+                logger.info(
+                    "Loaded search index",
+                    file_path=self.db_path,
+                    operation="search_index_load",
+                    book_count=len(books)
+                )
+            except (sqlite3.Error, ValueError, zlib.error) as e:
+                logger.warning(
+                    "Failed to load search index, searching the books indexed from now on",
+                    file_path=self.db_path,
+                    operation="search_index_load",
+                    error_type=type(e).__name__,
+                    error_details=str(e)
+                )
+            finally:
+                with self._lock:
+                    self._loading = True
+                self._loaded.set()
+
+    def _add_loaded(self, path: str, book: _IndexedBook, rows: List[_PassageRow]) -> None:
+        with self._lock:
+            self._books[path] = book
+            self._add_passages(path, book, rows)
+
+    def _add_passages(self, path: str, book: _IndexedBook, rows: List[_PassageRow]) -> None:
+        for passage_id, location, title, length, term_freqs in rows:
+            self._passages[passage_id] = _Passage(path, location, title, length)
+            self._total_length += length
+            for term, freq in term_freqs.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = _PostingList()
+                posting.append(passage_id, freq)
+            book.terms.update(term_freqs)
+            book.ids.append(passage_id)
+
+    def index_book(self, book_path: str) -> bool:
+        """
+        Index a book now, or re-index it if it changed since it was last indexed
+
+        Returns:
+            bool: True if the book was (re)indexed, False if it was up to date
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the book failed to parse when this version was indexed
+        """
+        real_path = os.path.realpath(book_path)
+        version = file_version_key(real_path)
+        self._load()
+        with self._lock:
+            indexed = self._books.get(real_path)
+        if indexed is not None and indexed.version == version:
+            if indexed.error is not None:
+                raise ValueError(f"Book could not be indexed: {indexed.error}")
+            return False
+
+        rows = []
+        failure = None
+        try:
+            for location, title, text in iter_book_passages(book_path):
+                term_freqs = Counter(tokenize(text))
+                rows.append((location, title, text, dict(term_freqs), sum(term_freqs.values())))
+        except OSError:
+            # Missing or unreadable files are retried on the next scan
+            raise
+        except Exception as e:
+            failure = e
+        self._store(real_path, version, rows if failure is None else [], None if failure is None else str(failure))
+        with self._lock:
+            if failure is None:
+                self.indexed += 1
+            else:
+                self.failed += 1
+        if failure is not None:
+            raise failure
+        logger.info(
+            "Indexed book for search",
+            file_path=book_path,
+            operation="search_indexing",
+            chapter_count=len(rows)
+        )
+        return True
+
+    def _store(self, real_path: str, version: str,
+               rows: List[Tuple[Union[str, int], str, str, Dict[str, int], int]], error: Optional[str]) -> None:
+        with self._write_lock:
+            conn = self._connection()
+            ids = []
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM passages WHERE path = ?", (real_path,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO books (path, version, index_version, error, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (real_path, version, SEARCH_INDEX_VERSION, error, time.time())
+                )
+                for location, title, text, term_freqs, length in rows:
+                    cursor = conn.execute(
+                        "INSERT INTO passages (path, location, title, length, terms, text) VALUES (?, ?, ?, ?, ?, ?)",
+                        (real_path, json.dumps(location), title, length, _pack_terms(term_freqs),
+                         zlib.compress(text.encode("utf-8")))
+                    )
+                    # AUTOINCREMENT never reuses ids, so new passages sort after every loaded one
+                    ids.append(cursor.lastrowid)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            with self._lock:
+                self._remove_book(real_path)
+                book = self._books[real_path] = _IndexedBook(version, error)
+                self._add_passages(real_path, book, [
+                    (passage_id, location, title, length, term_freqs)
+                    for passage_id, (location, title, _, term_freqs, length) in zip(ids, rows)
+                ])
+
+    def _remove_book(self, real_path: str) -> None:
+        indexed = self._books.pop(real_path, None)
+        if indexed is None:
+            return
+        for passage_id in indexed.ids:
+            self._total_length -= self._passages.pop(passage_id).length
+        removed = set(indexed.ids)
+        for term in indexed.terms:
+            posting = self._postings[term]
+            posting.remove(removed)
+            if not posting:
+                del self._postings[term]
+
+    def remove_book(self, book_path: str) -> None:
+        """Remove a book from the index and its database"""
+        real_path = os.path.realpath(book_path)
+        with self._write_lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM passages WHERE path = ?", (real_path,))
+                conn.execute("DELETE FROM books WHERE path = ?", (real_path,))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            with self._lock:
+                self._remove_book(real_path)
+
+    def update(self, path: str, wait: float = 0.0, force: bool = False) -> int:
+        """
+        Rescan a library folder and queue its new and changed books for indexing
+
+        Args:
+            path: Library folder
+            wait: Seconds to wait for the queued books to be indexed
+            force: Relist every subfolder, catching books rewritten in place
+
+        Returns:
+            int: Number of books queued by this call
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+        """
+        library = os.path.realpath(path)
+        entries = scan_library(path, force=force)
+        prefix = _library_prefix(library)
+        # The database, not the posting lists, says what is indexed, so this works while they load
+        known = dict(self._connection().execute(
+            "SELECT path, version FROM books WHERE path >= ? AND path < ? AND index_version = ?",
+            (prefix, prefix[:-1] + chr(ord(os.sep) + 1), SEARCH_INDEX_VERSION)
+        ))
+        current = {}
+        for entry in entries:
+            version = version_key_or_none(entry["path"])
+            if version is not None:
+                current[entry["path"]] = version
+        with self._lock:
+            self._scanned_at[library] = time.monotonic()
+        for book_path in known:
+            if book_path not in current:
+                self.remove_book(book_path)
+        self._start_loading()
+        queued = self._queue(library, [book_path for book_path, version in current.items()
+                                       if known.get(book_path) != version])
+        if queued and wait > 0:
+            self._idle[library].wait(wait)
+        return queued
+
+    def _queue(self, library: str, book_paths: List[str]) -> int:
+        with self._lock:
+            pending = self._pending.setdefault(library, set())
+            idle = self._idle.setdefault(library, threading.Event())
+            new = [book_path for book_path in book_paths if book_path not in pending]
+            pending.update(new)
+            if pending:
+                idle.clear()
+            else:
+                idle.set()
+        executor = self._get_executor()
+        for book_path in new:
+            executor.submit(self._index_queued, library, book_path)
+        return len(new)
+
+    def _index_queued(self, library: str, book_path: str) -> None:
+        try:
+            self.index_book(book_path)
+        except FileNotFoundError:
+            # Removed since the scan; the next scan drops it
+            pass
+        except Exception as e:
+            logger.warning(
+                "Skipping book that could not be indexed",
+                file_path=book_path,
+                operation="search_indexing",
+                error_type=type(e).__name__,
+                error_details=str(e)
+            )
+        finally:
+            with self._lock:
+                pending = self._pending[library]
+                pending.discard(book_path)
+                if not pending:
+                    self._idle[library].set()
+
+    def on_library_change(self, path: str, added: List[str], modified: List[str], removed: List[str]) -> None:
+        """Watcher listener: index a library's new and changed books without waiting for a rescan"""
+        library = os.path.realpath(path)
+        with self._lock:
+            # Libraries never searched or watched at startup are indexed on their first search
+            if library not in self._scanned_at:
+                return
+        # The watcher already removed the changed and deleted books
+        self._queue(library, added + modified)
+
+    def progress(self, path: str) -> Dict[str, Any]:
+        """
+        Get the indexing progress of a library folder
+
+        Returns:
+            Dict[str, Any]: pending (books queued), indexed (books searchable) and complete flag
+        """
+        library = os.path.realpath(path)
+        prefix = _library_prefix(library)
+        with self._lock:
+            pending = len(self._pending.get(library, ()))
+            indexed = sum(1 for book_path in self._books if book_path.startswith(prefix))
+        loaded = self._loaded.is_set()
+        return {"pending": pending, "indexed": indexed, "complete": pending == 0 and loaded}
+
+    def search_library(self, path: str, query: str, limit: int = 10, wait: float = DEFAULT_WAIT) -> Dict[str, Any]:
+        """
+        Search the books of a library folder that are already indexed
+
+        The folder is rescanned at most every rescan_interval seconds (a
+        watcher queues changes as they happen); new and changed books are
+        indexed in the background, waiting at most wait seconds for them.
+
+        Returns:
+            Dict[str, Any]: hits (see search) and indexing progress (see progress)
+
+        Raises:
+            FileNotFoundError: If the folder does not exist
+        """
+        library = os.path.realpath(path)
+        deadline = time.monotonic() + wait
+        with self._lock:
+            scanned_at = self._scanned_at.get(library)
+        if scanned_at is None or time.monotonic() - scanned_at >= self.rescan_interval:
+            self.update(path, wait)
+        elif not os.path.isdir(library):
+            raise FileNotFoundError(f"Library folder not found: {path}")
+        self._start_loading()
+        self._loaded.wait(max(0.0, deadline - time.monotonic()))
+        return {
+            "hits": self.search(query, limit, library=library),
+            "indexing": self.progress(library),
+        }
+
+    def search(self, query: str, limit: int = 10, book_paths: Optional[Iterable[str]] = None,
+               library: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rank indexed chapters/pages against a query with BM25
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of hits to return
+            book_paths: Restrict the search to these books (all books if None)
+            library: Restrict the search to the books below this folder
+
+        Returns:
+            List[Dict[str, Any]]: Hits with file_path, location, title, score and snippet
+        """
+        self._start_loading()
+        groups = tokenize_query(query)
+        terms = list(dict.fromkeys(term for group in groups for term in group))
+        if not terms:
+            return []
+        allowed = None
+        if book_paths is not None:
+            allowed = set(os.path.realpath(p) for p in book_paths)
+        prefix = _library_prefix(os.path.realpath(library)) if library is not None else None
+        with self._lock:
+            passage_count = len(self._passages)
+            if passage_count == 0:
+                return []
+            avg_length = self._total_length / passage_count
+            postings = dict((term, self._postings.get(term)) for term in terms)
+
+            # Every n-gram of a CJK run must occur; plain words are optional (OR semantics)
+            required = [term for group in groups if len(group) > 1 for term in group]
+            if any(postings[term] is None for term in required):
+                return []
+            candidates = None
+            if required:
+                candidates = intersect_postings([postings[term] for term in set(required)])
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                posting = postings[term]
+                if posting is None:
+                    continue
+                idf = math.log(1 + (passage_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                if candidates is None:
+                    matches = zip(posting.ids, posting.freqs)
+                else:
+                    matches = ((passage_id, posting.freq(passage_id)) for passage_id in candidates)
+                for passage_id, freq in matches:
+                    if not freq:
+                        continue
+                    passage = self._passages[passage_id]
+                    if allowed is not None and passage.book_path not in allowed:
+                        continue
+                    if prefix is not None and not passage.book_path.startswith(prefix):
+                        continue
+                    norm = freq + BM25_K1 * (1 - BM25_B + BM25_B * passage.length / avg_length)
+                    scores[passage_id] = scores.get(passage_id, 0.0) + idf * freq * (BM25_K1 + 1) / norm
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            hits = [(passage_id, self._passages[passage_id], score) for passage_id, score in ranked]
+        texts = self._passage_texts([passage_id for passage_id, _, _ in hits])
+        return [
+            {
+                "file_path": passage.book_path,
+                "location": passage.location,
+                "title": passage.title,
+                "score": round(score, 4),
+                "snippet": make_snippet(texts.get(passage_id, ""), terms),
+            }
+            for passage_id, passage, score in hits
+        ]
+
+    def _passage_texts(self, passage_ids: List[int]) -> Dict[int, str]:
+        # Only the hits' text is read back; a passage removed meanwhile gets an empty snippet
+        if not passage_ids:
+            return {}
+        rows = self._connection().execute(
+            f"SELECT id, text FROM passages WHERE id IN ({', '.join('?' * len(passage_ids))})", passage_ids
+        )
+        return {passage_id: zlib.decompress(text).decode("utf-8") for passage_id, text in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of indexed books, passages and distinct terms, and indexing counters"""
+        with self._lock:
+            return {
+                "books": len(self._books),
+                "passages": len(self._passages),
+                "terms": len(self._postings),
+                "loaded": self._loaded.is_set(),
+                "pending": sum(len(pending) for pending in self._pending.values()),
+                "indexed": self.indexed,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def make_snippet(text: str, terms: List[str], radius: int = SNIPPET_RADIUS) -> str:
+    """Cut a snippet around the first occurrence of any query term"""
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    center = min(positions) if positions else 0
+    start = max(0, center - radius)
+    end = min(len(text), center + radius)
+    snippet = " ".join(text[start:end].split())
+    if start > 0:
+        snippet = "..." + snippet
+    if end < len(text):
+        snippet = snippet + "..."
+    return snippet
+
+
+_search_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """
+    Get the process-wide search index
+
+    The index is stored next to the extraction cache, or in a temporary
+    database when caching is disabled with EBOOK_MCP_CACHE=0.
+    """
+    global _search_index
+    if _search_index is None:
+        with _index_lock:
+            if _search_index is None:
+                db_path = None
+                if cache_enabled():
+                    db_path = os.path.join(default_cache_dir(), "search_index.sqlite3")
+                try:
+                    _search_index = SearchIndex(db_path)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(
+                        "Search index database unavailable, using a temporary one",
+                        file_path=db_path,
+                        operation="search_index_init",
+                        error_type=type(e).__name__,
+                        error_details=str(e)
+                    )
+                    _search_index = SearchIndex()
+    return _search_index
+
+
+def search_book(book_path: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Search inside one EPUB or PDF book, indexing it first if needed
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If the book could not be parsed
+    """
+    if not os.path.exists(book_path):
+        raise FileNotFoundError(f"Book file not found: {book_path}")
+    index = get_search_index()
+    index.index_book(book_path)
+    return index.search(query, limit, [book_path])
+
+
+def search_library(path: str, query: str, limit: int = 10, wait: float = DEFAULT_WAIT) -> Dict[str, Any]:
+    """
+    Search the already indexed EPUB and PDF books of a library folder
+
+    New and changed books are indexed in the background; books that fail
+    to parse are skipped. See SearchIndex.search_library.
+    """
+    return get_search_index().search_library(path, query, limit, wait)
@@ -0,0 +1,75 @@
+import re
+from typing import Iterator, List
+
+# Scripts written without spaces between words: CJK ideographs, kana and Hangul
+_CJK_CHARS = (
+    "\u1100-\u11ff"          # Hangul Jamo
+    "\u2e80-\u2fdf"          # CJK radicals
+    "\u3040-\u309f"          # Hiragana
+    "\u30a0-\u30ff"          # Katakana
+    "\u3100-\u312f"          # Bopomofo
+    "\u3130-\u318f"          # Hangul compatibility Jamo
+    "\u3400-\u4dbf"          # CJK extension A
+    "\u4e00-\u9fff"          # CJK unified ideographs
+    "\uac00-\ud7af"          # Hangul syllables
+    "\uf900-\ufaff"          # CJK compatibility ideographs
+    "\uff66-\uff9f"          # Half-width katakana
+    "\U00020000-\U0002ffff"  # CJK extensions B-F
+)
+
+_TOKEN_RE = re.compile(f"(?P<cjk>[{_CJK_CHARS}]+)|(?P<word>[^\\W{_CJK_CHARS}]+)", re.UNICODE)
+
+# Length of the character n-grams emitted for CJK runs
+DEFAULT_NGRAM_SIZE = 2
+
+
+def is_cjk_token(token: str) -> bool:
+    """Check whether a token is a CJK n-gram rather than a word; other strings are neither"""
+    match = _TOKEN_RE.fullmatch(token)
+    return match is not None and match.lastgroup == "cjk"
+
+
+def cjk_ngrams(run: str, size: int = DEFAULT_NGRAM_SIZE) -> List[str]:
+    """Split a CJK run into overlapping character n-grams; short runs are kept whole"""
+    if len(run) <= size:
+        return [run]
+    return [run[i:i + size] for i in range(len(run) - size + 1)]
+
+
+def iter_runs(text: str) -> Iterator[re.Match]:
+    """Iterate over the CJK runs and words of a text"""
+    return _TOKEN_RE.finditer(text.lower())
+
+
+def tokenize(text: str, ngram_size: int = DEFAULT_NGRAM_SIZE) -> List[str]:
+    """
+    Tokenize text for indexing
+
+    Words are lowercased; CJK runs become overlapping character n-grams
+    plus their single characters, so one-character queries still match.
+    """
+    tokens = []
+    for match in iter_runs(text):
+        run = match.group()
+        if match.lastgroup == "cjk":
+            if len(run) > 1:
+                tokens.extend(run)
+            tokens.extend(cjk_ngrams(run, ngram_size))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def tokenize_query(text: str, ngram_size: int = DEFAULT_NGRAM_SIZE) -> List[List[str]]:
+    """
+    Tokenize a search query
+
+    Returns:
+        List[List[str]]: One group per word or CJK run. A word yields a
+        one-token group; a CJK run yields the n-grams that must all occur
+        in a matching passage.
+    """
+    return [
+        cjk_ngrams(match.group(), ngram_size) if match.lastgroup == "cjk" else [match.group()]
+        for match in iter_runs(text)
+    ]
@@ -0,0 +1,293 @@
+import asyncio
+import inspect
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from .logger_config import get_logger
+from .metrics import MetricsRegistry, get_metrics_registry
+from .profiling import ToolProfiler, get_tool_profiler
+from .progress import reporting, request_reporter
+
+# Initialize structured logger
+logger = get_logger(__name__)
+
+# Lanes: cheap metadata/TOC/listing calls never wait behind heavy extraction
+LIGHT = "light"
+HEAVY = "heavy"
+
+DEFAULT_LIGHT_WORKERS = 4
+DEFAULT_HEAVY_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class _ToolStats:
+    __slots__ = ("lane", "max_concurrency", "book_arg", "book_index", "queued", "running", "max_queued",
+                 "completed", "failed", "wait_ms", "run_ms")
+
+    def __init__(self, lane: str, max_concurrency: Optional[int], book_arg: Optional[str] = None,
+                 book_index: Optional[int] = None):
+        self.lane = lane
+        self.max_concurrency = max_concurrency
+        self.book_arg = book_arg
+        self.book_index = book_index
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_ms = 0.0
+        self.run_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "lane": self.lane,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.wait_ms / finished, 2) if finished else 0.0,
+            "avg_run_ms": round(self.run_ms / finished, 2) if finished else 0.0,
+        }
+
+    def book(self, args: tuple, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Get the book path argument of a call, if the tool has one"""
+        if self.book_index is not None and self.book_index < len(args):
+            return args[self.book_index]
+        return kwargs.get(self.book_arg) if self.book_arg else None
+
+
+class _Call:
+    """Bookkeeping for one call, shared between the event loop and the worker thread"""
+    __slots__ = ("enqueued", "started", "abandoned")
+
+    def __init__(self):
+        self.enqueued = time.perf_counter()
+        self.started = False
+        self.abandoned = False
+
+
+class ToolExecutor:
+    """
+    Runs synchronous tool bodies off the event loop in bounded thread pools.
+
+    Each tool belongs to a lane (LIGHT or HEAVY) with its own thread pool,
+    so slow chapter extraction cannot occupy the workers that serve cheap
+    metadata and TOC calls. A tool may additionally be capped at
+    max_concurrency calls in flight; further calls wait on the event loop
+    without holding a worker. Per-tool queue depth, in-flight count and
+    wait/run times are available from stats(); the run time, outcome and
+    result size of every call, with the book it worked on, are recorded in
+    a MetricsRegistry for latency percentiles. Calls selected by the
+    ToolProfiler are profiled on their worker thread.
+    """
+
+    def __init__(self, light_workers: int = DEFAULT_LIGHT_WORKERS, heavy_workers: int = DEFAULT_HEAVY_WORKERS,
+                 metrics: Optional[MetricsRegistry] = None, profiler: Optional[ToolProfiler] = None):
+        self._lanes = {
+            LIGHT: ThreadPoolExecutor(max_workers=light_workers, thread_name_prefix="ebook-mcp-light"),
+            HEAVY: ThreadPoolExecutor(max_workers=heavy_workers, thread_name_prefix="ebook-mcp-heavy"),
+        }
+        self._workers = {LIGHT: light_workers, HEAVY: heavy_workers}
+        self._tools: Dict[str, _ToolStats] = {}
+        self.metrics = metrics or get_metrics_registry()
+        self.profiler = profiler or get_tool_profiler()
+        self._lock = threading.Lock()
+        # asyncio.Semaphore binds to the loop it is first used on
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def configure(self, tool: str, lane: str = LIGHT, max_concurrency: Optional[int] = None,
+                  book_arg: Optional[str] = None, book_index: Optional[int] = None) -> None:
+        """
+        Set the lane and concurrency limit of a tool
+
+        Args:
+            tool: Tool name
+            lane: LIGHT or HEAVY
+            max_concurrency: Maximum calls in flight, or None for the lane size
+            book_arg: Name of the argument holding the book path, for per-book metrics
+            book_index: Position of that argument when passed positionally
+
+        Raises:
+            ValueError: If the lane is unknown or max_concurrency is not positive
+        """
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown executor lane: {lane}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        with self._lock:
+            self._tools[tool] = _ToolStats(lane, max_concurrency, book_arg, book_index)
+
+    def _stats_for(self, tool: str) -> _ToolStats:
+        with self._lock:
+            stats = self._tools.get(tool)
+            if stats is None:
+                stats = self._tools[tool] = _ToolStats(LIGHT, None)
+            return stats
+
+    def _semaphore(self, tool: str, limit: int) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            if tool not in semaphores:
+                semaphores[tool] = asyncio.Semaphore(limit)
+            return semaphores[tool]
+
+    async def run(self, tool: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in the tool's lane and await its result
+
+        Progress that func reports with progress.report_progress() is sent
+        to the MCP client when the calling request carries a progress token.
+
+        Args:
+            tool: Tool name, used for the lane, the limit and the metrics
+            func: Synchronous callable to run in a worker thread
+
+        Returns:
+            Any: The return value of func; its exceptions propagate unchanged
+        """
+        stats = self._stats_for(tool)
+        call = _Call()
+        with self._lock:
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+            queued = stats.queued
+        if queued > 1:
+            logger.debug(
+                "Tool call queued",
+                operation="tool_executor_queue",
+                tool=tool,
+                queued=queued,
+                running=stats.running
+            )
+
+        # The request's progress token is only visible here, on the event loop
+        reporter = request_reporter()
+
+        def invoke() -> Any:
+            with self._lock:
+                if call.abandoned:
+                    return None
+                call.started = True
+                stats.queued -= 1
+                stats.running += 1
+                stats.wait_ms += (time.perf_counter() - call.enqueued) * 1000
+            book = stats.book(args, kwargs)
+            session = self.profiler.start(tool, book) if self.profiler.active else None
+            start = time.perf_counter()
+            ok = False
+            result = None
+            try:
+                with reporting(reporter):
+                    result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    stats.running -= 1
+                    stats.run_ms += elapsed * 1000
+                    if ok:
+                        stats.completed += 1
+                    else:
+                        stats.failed += 1
+                if session is not None:
+                    self.profiler.finish(session, elapsed, ok)
+                self.metrics.observe(tool, elapsed, ok, result, book)
+
+        lane = self._lanes[stats.lane]
+        loop = asyncio.get_running_loop()
+        try:
+            if stats.max_concurrency is None:
+                return await loop.run_in_executor(lane, invoke)
+            async with self._semaphore(tool, stats.max_concurrency):
+                return await loop.run_in_executor(lane, invoke)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not call.started:
+                    # Never reached a worker: withdraw it from the queue
+                    call.abandoned = True
+                    stats.queued -= 1
+            raise
+
+    def is_idle(self) -> bool:
+        """Check whether no tool call is queued or running"""
+        with self._lock:
+            return all(stats.queued == 0 and stats.running == 0 for stats in self._tools.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the lane sizes and the per-tool queue and timing metrics"""
+        with self._lock:
+            return {
+                "workers": dict(self._workers),
+                "tools": {name: stats.as_dict() for name, stats in self._tools.items()},
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        for lane in self._lanes.values():
+            lane.shutdown(wait=wait)
+
+
+_tool_executor: Optional[ToolExecutor] = None
+_executor_lock = threading.Lock()
+# configure() arguments of every @offload tool, applied when the executor is created
+_tool_configs: Dict[str, tuple] = {}
+
+
+def get_tool_executor() -> ToolExecutor:
+    """
+    Get the process-wide tool executor
+
+    Lane sizes come from EBOOK_MCP_LIGHT_WORKERS and EBOOK_MCP_HEAVY_WORKERS.
+    """
+    global _tool_executor
+    if _tool_executor is None:
+        with _executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ToolExecutor(
+                    light_workers=int(os.environ.get("EBOOK_MCP_LIGHT_WORKERS", DEFAULT_LIGHT_WORKERS)),
+                    heavy_workers=int(os.environ.get("EBOOK_MCP_HEAVY_WORKERS", DEFAULT_HEAVY_WORKERS)),
+                )
+                for tool, config in _tool_configs.items():
+                    _tool_executor.configure(tool, *config)
+    return _tool_executor
+
+
+def offload(lane: str = LIGHT, max_concurrency: Optional[int] = None):
+    """
+    Decorator turning a synchronous tool into a coroutine run in the tool executor.
+
+    The wrapped function keeps its name and signature, so it can be
+    registered with @mcp.tool() like any async tool. Its first argument
+    named *_path is taken as the book for per-book metrics.
+
+    Args:
+        lane: LIGHT for cheap calls, HEAVY for parsing and extraction
+        max_concurrency: Maximum calls of this tool in flight, or None for the lane size
+    """
+    def decorator(func):
+        tool = func.__name__
+        params = list(inspect.signature(func).parameters)
+        book_index = next((i for i, name in enumerate(params) if name.endswith("_path")), None)
+        book_arg = params[book_index] if book_index is not None else None
+        config = (lane, max_concurrency, book_arg, book_index)
+        # Decorating does not create the executor
+        with _executor_lock:
+            _tool_configs[tool] = config
+            executor = _tool_executor
+        if executor is not None:
+            executor.configure(tool, *config)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await get_tool_executor().run(tool, func, *args, **kwargs)
+        return wrapper
+    return decorator